@@ -0,0 +1,133 @@
+"""
+并行压缩：不同线程数下zip、tar.gz和tar.bz2的耗时、吞吐量和压缩率。
+
+在临时目录生成大小混合的文件（大量几KB的小文件、几百KB的中等文件和几十MB的大文件，
+大部分是可压缩的文本，少量是随机数据），对每种格式分别用--workers中的线程数压缩，
+workers=1为改动前的串行实现。--verify时解压并核对每个条目。
+
+用法::
+
+    python benchmarks/bench_compress.py --workers 1 2 4 8 --scale 1
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+# 将common目录添加到路径中，以便我们可以导入compress
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compress import compress_path_advanced
+
+# 压缩格式
+FORMATS = ('zip', 'tar.gz', 'tar.bz2')
+
+# 生成文本内容用的单词
+WORDS = [b'error', b'warning', b'request', b'response', b'user', b'timeout', b'id',
+         b'2024-01-01T00:00:00', b'GET', b'POST', b'/api/v1/items', b'200', b'503']
+
+
+def _text(size: int, rng: random.Random) -> bytes:
+    """生成约size字节、类似日志的可压缩文本"""
+    lines = []
+    total = 0
+    while total < size:
+        line = b' '.join(rng.choice(WORDS) for _ in range(12)) + b'\n'
+        lines.append(line)
+        total += len(line)
+    return b''.join(lines)[:size]
+
+
+def make_tree(root: Path, scale: float) -> int:
+    """
+    生成大小混合的目录
+
+    Args:
+        root: 目录
+        scale: 文件数量和大小的倍数
+
+    Returns:
+        int: 文件总字节数
+    """
+    rng = random.Random(0)
+    # (文件数, 最小字节数, 最大字节数, 是否随机数据)
+    groups = [(int(2000 * scale), 1024, 16 * 1024, False),
+              (int(100 * scale), 100 * 1024, 1024 * 1024, False),
+              (max(1, int(4 * scale)), 16 * 1024 * 1024, 48 * 1024 * 1024, False),
+              (max(1, int(2 * scale)), 4 * 1024 * 1024, 8 * 1024 * 1024, True)]
+    sample = _text(4 * 1024 * 1024, rng)
+    total = 0
+    for index, (count, low, high, incompressible) in enumerate(groups):
+        directory = root / f'group{index}'
+        directory.mkdir(parents=True)
+        for i in range(count):
+            size = rng.randint(low, high)
+            if incompressible:
+                data = os.urandom(size)
+            else:
+                # 从样本中随机截取并重复，避免生成大量文本的耗时
+                start = rng.randrange(len(sample) // 2)
+                data = (sample[start:] * (size // (len(sample) - start) + 1))[:size]
+            (directory / f'{i}.dat').write_bytes(data)
+            total += size
+    return total
+
+
+def verify(path: str, format_type: str, source: Path):
+    """解压压缩包并核对每个文件"""
+    if format_type == 'zip':
+        with zipfile.ZipFile(path) as zipf:
+            for info in zipf.infolist():
+                assert zipf.read(info) == (source.parent / info.filename).read_bytes(), info
+    else:
+        with tarfile.open(path) as tar:
+            for member in tar:
+                if member.isfile():
+                    assert (tar.extractfile(member).read()
+                            == (source.parent / member.name).read_bytes()), member.name
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--verify', action='store_true')
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix='bench-compress-'))
+    try:
+        source = directory / 'src'
+        total = make_tree(source, args.scale)
+        output = directory / 'out'
+        output.mkdir()
+        print(f"源目录: {total / 1024 / 1024:.0f}MB，CPU核数: {os.cpu_count()}")
+        for format_type in args.formats:
+            for workers in args.workers:
+                start = time.perf_counter()
+                cpu_start = time.process_time()
+                path = compress_path_advanced(source, output, f'w{workers}', format_type,
+                                              workers=workers)
+                elapsed = time.perf_counter() - start
+                cpu = time.process_time() - cpu_start
+                if args.verify:
+                    verify(path, format_type, source)
+                size = os.path.getsize(path)
+                print(f"  {format_type:8s}workers={workers:<3d}{elapsed:7.2f}s  "
+                      f"{total / 1024 / 1024 / elapsed:7.1f}MB/s  cpu {cpu:6.2f}s  "
+                      f"ratio {size / total:.3f}")
+                os.remove(path)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+流式压缩：先压缩到磁盘再读回上传 vs iter_archive直接产生数据块的峰值内存、耗时和临时文件大小。
+
+在临时目录生成entries个小文件（分布在多级子目录中）和一个large_mb大小的可压缩大文件，
+每种方式在独立的子进程中运行，统计子进程的峰值常驻内存。数据块被丢弃，相当于上传速度无限快。
+
+- file: compress_path_advanced写到磁盘，再按块读回（改动前上传备份的做法）
+- stream: iter_archive按块产生压缩包，不写磁盘
+
+用法::
+
+    python benchmarks/bench_stream_archive.py --entries 200000 --large-mb 256
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 将common目录添加到路径中，以便我们可以导入compress
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from compress import BLOCK_SIZE, compress_path_advanced, iter_archive
+
+# 压缩方式
+MODES = ('file', 'stream')
+
+# 压缩格式
+FORMATS = ('zip', 'tar.gz')
+
+# 每个子目录中的文件数
+FILES_PER_DIR = 1000
+
+
+def make_tree(root: Path, entries: int, large_mb: int):
+    """
+    生成包含大量小文件和一个大文件的目录
+
+    Args:
+        root: 目录
+        entries: 小文件数
+        large_mb: 大文件大小（MB）
+    """
+    for i in range(entries):
+        directory = root / f'd{i // FILES_PER_DIR // 100}' / f'd{i // FILES_PER_DIR}'
+        if i % FILES_PER_DIR == 0:
+            directory.mkdir(parents=True)
+        (directory / f'{i}.json').write_bytes(b'{"id": %d, "ok": true}\n' % i)
+    line = b'2024-01-01T00:00:00 INFO request handled in 12ms path=/api/v1/items\n'
+    with open(root / 'large.log', 'wb') as f:
+        block = line * (BLOCK_SIZE // len(line))
+        for _ in range(large_mb * 1024 * 1024 // len(block)):
+            f.write(block)
+
+
+def run(mode: str, format_type: str, source: str, scratch: str) -> dict:
+    """
+    在当前进程中按指定方式生成压缩包并丢弃数据
+
+    Args:
+        mode: 压缩方式
+        format_type: 压缩格式
+        source: 源目录
+        scratch: file方式写压缩包的目录
+
+    Returns:
+        统计结果
+    """
+    start = time.perf_counter()
+    total = 0
+    temp_bytes = 0
+    if mode == 'file':
+        path = compress_path_advanced(source, scratch, 'backup', format_type)
+        temp_bytes = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(BLOCK_SIZE), b''):
+                total += len(chunk)
+        os.remove(path)
+    else:
+        for chunk in iter_archive(source, format_type):
+            total += len(chunk)
+    return {
+        'seconds': round(time.perf_counter() - start, 2),
+        'archive_mb': round(total / 1024 / 1024, 1),
+        'temp_file_mb': round(temp_bytes / 1024 / 1024, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--large-mb', type=int, default=256)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    # 以下参数由父进程传给子进程
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run(**json.loads(args.child))))
+        return
+
+    directory = Path(tempfile.mkdtemp(prefix='bench-stream-'))
+    try:
+        source = directory / 'src'
+        make_tree(source, args.entries, args.large_mb)
+        print(f"{args.entries}个小文件，一个{args.large_mb}MB的大文件")
+        for format_type in args.formats:
+            for mode in MODES:
+                spec = {'mode': mode, 'format_type': format_type, 'source': str(source),
+                        'scratch': str(directory)}
+                result = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', json.dumps(spec)],
+                    capture_output=True, text=True)
+                if result.returncode != 0:
+                    print(f"  {format_type:7s}{mode:7s}失败: "
+                          f"{result.stderr.strip().splitlines()[-1]}")
+                    continue
+                print(f"  {format_type:7s}{mode:7s}{json.loads(result.stdout)}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
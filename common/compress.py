@@ -1,22 +1,59 @@
+import bz2
 import os
+import queue
+import struct
+import threading
+import time
 import zipfile
 import tarfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union, Literal
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Tuple, Union, Literal
+
+# 并行压缩时每个任务压缩的数据块大小（字节）
+BLOCK_SIZE = 1024 * 1024
+
+# deflate的窗口大小：并行压缩时用前一块末尾的这么多字节作为预设字典，与串行压缩的压缩率相近（与pigz相同）
+DICT_SIZE = 32 * 1024
+
+# 每个工作线程最多排队的数据块数，限制并行压缩时的内存占用
+PENDING_PER_WORKER = 4
+
+# 与tarfile.open('w:gz')/('w:bz2')的默认值相同的压缩级别
+TAR_COMPRESS_LEVEL = 9
+
+# iter_archive()的队列中最多缓存的块数，内存占用约为(QUEUE_CHUNKS + 2) * chunk_size
+QUEUE_CHUNKS = 4
+
+# zip条目使用数据描述符的标志位和描述符签名
+_ZIP_DATA_DESCRIPTOR_FLAG = 0x08
+_ZIP_DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+
+# zip文件名使用UTF-8编码的标志位
+_ZIP_UTF8_FLAG = 0x800
 
 
 def compress_path_advanced(source_path: Union[str, Path],
                            output_dir: Union[str, Path],
                            archive_name: str = None,
-                           format_type: Literal['zip', 'tar', 'tar.gz', 'tar.bz2'] = 'zip') -> str:
+                           format_type: Literal['zip', 'tar', 'tar.gz', 'tar.bz2'] = 'zip',
+                           workers: Optional[int] = 1) -> str:
     """
     压缩文件或目录为指定格式
 
+    workers大于1时多个线程并行压缩（zlib和bz2压缩时释放GIL），生成的仍是标准格式的压缩包：
+    zip的每个条目按块deflate（以前一块末尾32KB为字典）后依次写入；tar.gz按块deflate（以前一块末尾32KB为字典）后拼接成
+    一个gzip流；tar.bz2按块压缩成多个bzip2流后拼接（与pbzip2相同，bunzip2和Python都能解压）。
+    不压缩的tar不需要并行。
+
     Args:
         source_path: 要压缩的文件或目录路径
         output_dir: 压缩包保存目录
         archive_name: 压缩包名称（可选）
         format_type: 压缩格式 ('zip', 'tar', 'tar.gz', 'tar.bz2')
+        workers: 压缩线程数，None表示CPU核数（默认1，串行压缩）
 
     Returns:
         str: 压缩包的完整路径
@@ -36,12 +73,17 @@ def compress_path_advanced(source_path: Union[str, Path],
     else:
         base_name = archive_name
 
+    workers = workers or os.cpu_count() or 1
     if format_type == 'zip':
         archive_path = output_dir / f"{base_name}.zip"
+        if workers > 1:
+            return _compress_parallel(source_path, archive_path, format_type, workers)
         return _compress_zip(source_path, archive_path)
     elif format_type in ['tar', 'tar.gz', 'tar.bz2']:
         ext = '.tar' if format_type == 'tar' else f'.{format_type}'
         archive_path = output_dir / f"{base_name}{ext}"
+        if workers > 1 and format_type != 'tar':
+            return _compress_parallel(source_path, archive_path, format_type, workers)
         return _compress_tar(source_path, archive_path, format_type)
     else:
         raise ValueError(f"不支持的压缩格式: {format_type}")
@@ -75,6 +117,478 @@ def _compress_tar(source_path: Path, archive_path: Path, format_type: str) -> st
     return str(archive_path)
 
 
+def _compress_parallel(source_path: Path, archive_path: Path, format_type: str,
+                       workers: int) -> str:
+    """多线程压缩到文件"""
+    with open(archive_path, 'wb') as f:
+        write_archive(source_path, f, format_type, workers)
+    return str(archive_path)
+
+
+def write_archive(source_path: Union[str, Path], fileobj: Any,
+                  format_type: Literal['zip', 'tar', 'tar.gz', 'tar.bz2'] = 'zip',
+                  workers: Optional[int] = 1) -> int:
+    """
+    把文件或目录压缩后流式写入任意可写对象，不使用临时文件
+
+    输出对象只需要write()方法（或者是有sendall()的套接字），不需要tell()和seek()，例如
+    打开的文件、socket.makefile('wb')、sys.stdout.buffer或管道。内存占用与文件大小无关：
+    tar逐个写入条目，不保存条目列表，条目数量再多内存也不增长；zip需要在末尾写出中央目录，
+    每个条目保存一条编码好的记录（约80字节），不保留ZipInfo对象。
+
+    zip的条目内容与compress_path_advanced相同（只包含文件），每个条目的CRC和大小写在数据之后的
+    数据描述符中；tar包含目录、符号链接和硬链接。目录按os.scandir的顺序逐项读取，不排序。
+
+    Args:
+        source_path: 要压缩的文件或目录路径
+        fileobj: 输出对象
+        format_type: 压缩格式 ('zip', 'tar', 'tar.gz', 'tar.bz2')
+        workers: 压缩线程数，None表示CPU核数（默认1，在调用者线程中压缩）
+
+    Returns:
+        int: 写入的字节数
+
+    Raises:
+        FileNotFoundError: 源路径不存在
+        ValueError: 不支持的压缩格式
+    """
+    source_path = Path(source_path)
+    if not source_path.exists():
+        raise FileNotFoundError(f"源路径不存在: {source_path}")
+    if format_type not in ('zip', 'tar', 'tar.gz', 'tar.bz2'):
+        raise ValueError(f"不支持的压缩格式: {format_type}")
+    workers = workers or os.cpu_count() or 1
+    sink = _Sink(fileobj)
+
+    if format_type == 'zip':
+        writer = _ZipStreamWriter(sink, workers)
+        try:
+            for path, arcname, is_dir in _walk(source_path):
+                # 与os.walk相同，指向目录的符号链接不进入也不写入
+                if not is_dir:
+                    writer.add_file(path, arcname)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        return sink.offset
+
+    compression = format_type.partition('.')[2]
+    stream = _ParallelCompressedWriter(sink, compression, workers) if compression else sink
+    try:
+        with tarfile.open(fileobj=stream, mode='w|') as tar:
+            for path, arcname, _ in _walk(source_path):
+                inodes = len(tar.inodes)
+                tar.add(path, arcname, recursive=False)
+                # 只写入时不需要成员列表，清空它让内存不随条目数增长；tarfile为识别硬链接记录了
+                # 每个普通文件的inode，只保留链接数大于1的
+                tar.members.clear()
+                if len(tar.inodes) > inodes and os.lstat(path).st_nlink == 1:
+                    tar.inodes.popitem()
+    except BaseException:
+        if stream is not sink:
+            stream.abort()
+        raise
+    if stream is not sink:
+        stream.close()
+    return sink.offset
+
+
+def iter_archive(source_path: Union[str, Path],
+                 format_type: Literal['zip', 'tar', 'tar.gz', 'tar.bz2'] = 'zip',
+                 workers: Optional[int] = 1, chunk_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """
+    以生成器的形式流式产生压缩包，每块chunk_size字节（最后一块可能更小）
+
+    后台线程执行write_archive()，产生的块放在有界队列中，消费者处理得慢时压缩线程等待，
+    内存占用约为(QUEUE_CHUNKS + 2) * chunk_size。可以直接作为HTTP客户端分块上传的请求体，
+    或者按分片大小传给对象存储的分片上传::
+
+        client.post(url, data=iter_archive('/data/logs', 'tar.gz'))
+
+        for number, part in enumerate(iter_archive(src, 'zip', chunk_size=8 * 1024 * 1024), 1):
+            bucket.upload_part(key, upload_id, number, part)
+
+    提前关闭生成器（或不再迭代）时后台线程停止压缩；压缩过程中的异常在迭代时重新抛出。
+
+    Args:
+        source_path: 要压缩的文件或目录路径
+        format_type: 压缩格式 ('zip', 'tar', 'tar.gz', 'tar.bz2')
+        workers: 压缩线程数，None表示CPU核数（默认1）
+        chunk_size: 每块的字节数
+
+    Yields:
+        bytes: 压缩包的数据块
+    """
+    chunks = queue.Queue(maxsize=QUEUE_CHUNKS)
+    writer = _QueueWriter(chunks, chunk_size)
+    end = object()
+
+    def produce():
+        try:
+            write_archive(source_path, writer, format_type, workers)
+            writer.flush()
+            chunks.put(end)
+        except BaseException as e:
+            chunks.put(e)
+
+    thread = threading.Thread(target=produce, name='iter-archive', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = chunks.get()
+            if item is end:
+                return
+            if isinstance(item, BaseException):
+                if isinstance(item, _ArchiveCancelled):
+                    return
+                raise item
+            yield item
+    finally:
+        writer.cancelled = True
+        # 取走剩余的块，让阻塞在队列上的后台线程结束
+        while thread.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        thread.join()
+
+
+def _walk(source_path: Path) -> Iterator[Tuple[str, str, bool]]:
+    """
+    逐个产生源路径本身和其下的条目：(路径, 压缩包内名称, 是否目录)
+
+    用os.scandir逐项读取目录，只在栈中保存待读取的子目录，条目再多内存也不增长。
+    与os.walk相同，指向目录的符号链接是目录但不进入。
+    """
+    root = str(source_path)
+    is_dir = source_path.is_dir()
+    yield root, source_path.name, is_dir
+    if not is_dir or source_path.is_symlink():
+        return
+    stack = [(root, source_path.name)]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                arcname = f"{prefix}/{entry.name}"
+                is_dir = entry.is_dir()
+                if is_dir and not entry.is_symlink():
+                    stack.append((entry.path, arcname))
+                yield entry.path, arcname, is_dir
+
+
+class _Sink:
+    """包装输出对象，只使用write()（或套接字的sendall()），记录已写入的字节数"""
+
+    def __init__(self, fileobj: Any):
+        write = getattr(fileobj, 'write', None)
+        self._write = write if write is not None else fileobj.sendall
+        self.offset = 0
+
+    def write(self, data: bytes) -> int:
+        written = self._write(data)
+        # 原始IO对象可能只写入一部分；sendall和大多数write返回None或全部长度
+        if written is not None and written < len(data):
+            view = memoryview(data)[written:]
+            while view:
+                view = view[self._write(view):]
+        self.offset += len(data)
+        return len(data)
+
+
+class _ArchiveCancelled(Exception):
+    """iter_archive()的消费者停止迭代，后台线程停止压缩"""
+
+
+class _QueueWriter:
+    """把写入的数据切成固定大小的块放入队列"""
+
+    def __init__(self, chunks: queue.Queue, chunk_size: int):
+        self.chunks = chunks
+        self.chunk_size = chunk_size
+        self.cancelled = False
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        if self.cancelled:
+            raise _ArchiveCancelled()
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self.chunks.put(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+        return len(data)
+
+    def flush(self):
+        """放入剩余的数据"""
+        if self._buffer:
+            self.chunks.put(bytes(self._buffer))
+            self._buffer.clear()
+
+
+class _OrderedPool:
+    """
+    按提交顺序处理结果的线程池
+
+    submit()提交的任务在线程池中执行，结果按提交顺序交给各自的处理函数（在调用submit()的线程中）；
+    排队的任务超过上限时submit()先处理最早的结果，内存占用与数据总量无关。
+    只有一个工作线程时任务直接在调用者线程中执行。
+    """
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._pending = deque()
+        self._limit = workers * PENDING_PER_WORKER
+
+    def submit(self, handler: Callable, fn: Optional[Callable] = None, *args):
+        """
+        提交任务
+
+        Args:
+            handler: 按顺序处理结果的函数
+            fn: 在线程池中执行的函数，为None时直接把args[0]交给handler
+            *args: fn的参数
+        """
+        if self._executor is None:
+            handler(fn(*args) if fn is not None else args[0])
+            return
+        result = self._executor.submit(fn, *args) if fn is not None else args[0]
+        self._pending.append((handler, fn is not None, result))
+        while len(self._pending) > self._limit:
+            self._handle_next()
+
+    def _handle_next(self):
+        """处理最早提交的结果"""
+        handler, is_future, result = self._pending.popleft()
+        handler(result.result() if is_future else result)
+
+    def drain(self):
+        """处理所有结果"""
+        while self._pending:
+            self._handle_next()
+
+    def shutdown(self):
+        """丢弃未处理的任务并停止线程"""
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _deflate_block(data: bytes, zdict: bytes, level: int, last: bool) -> bytes:
+    """
+    把一块数据压缩成raw deflate片段，各片段按顺序拼接后是一个完整的deflate流
+
+    非最后一块以Z_SYNC_FLUSH结束（字节对齐、不设置结束标志），最后一块以Z_FINISH结束。
+
+    Args:
+        data: 数据块
+        zdict: 前一块末尾的数据，作为预设字典
+        level: 压缩级别
+        last: 是否是最后一块
+
+    Returns:
+        bytes: 压缩后的片段
+    """
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _ZipMember:
+    """正在写入的zip条目，结果按顺序写出时更新"""
+
+    def __init__(self, writer: '_ZipStreamWriter', zinfo: zipfile.ZipInfo):
+        self.writer = writer
+        self.zinfo = zinfo
+        # 与ZipFile.open(..., 'w')相同：压缩后可能变大，留出余量
+        self.zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        self.crc = 0
+        self.file_size = 0
+        self.compress_size = 0
+
+    def start(self, _=None):
+        """写入本地文件头，CRC和大小写在数据描述符中"""
+        zinfo = self.zinfo
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.flag_bits = _ZIP_DATA_DESCRIPTOR_FLAG
+        zinfo.header_offset = self.writer.sink.offset
+        self.writer.sink.write(zinfo.FileHeader(self.zip64))
+
+    def write(self, data: bytes):
+        """写入压缩后的片段"""
+        self.compress_size += len(data)
+        self.writer.sink.write(data)
+
+    def finish(self, _=None):
+        """写入数据描述符，把条目编码成中央目录记录"""
+        zinfo = self.zinfo
+        zinfo.CRC, zinfo.file_size, zinfo.compress_size = (self.crc, self.file_size,
+                                                           self.compress_size)
+        if not self.zip64 and max(self.file_size, self.compress_size) > zipfile.ZIP64_LIMIT:
+            raise RuntimeError(f"文件在压缩过程中变大，超出了zip的大小限制: {zinfo.filename}")
+        fmt = '<LLQQ' if self.zip64 else '<LLLL'
+        self.writer.sink.write(struct.pack(fmt, _ZIP_DATA_DESCRIPTOR_SIGNATURE, zinfo.CRC,
+                                           zinfo.compress_size, zinfo.file_size))
+        self.writer.add_central_record(zinfo)
+
+
+class _ZipStreamWriter:
+    """
+    向只支持write()的输出流式写入zip
+
+    条目的CRC和大小写在数据描述符中，不需要回写文件头；中央目录在条目写完时编码成字节保存，
+    每个条目只占几十字节。编码方式与ZipFile.close()相同。
+    """
+
+    def __init__(self, sink: _Sink, workers: int, level: int = zlib.Z_DEFAULT_COMPRESSION):
+        self.sink = sink
+        self.level = level
+        self._pool = _OrderedPool(workers)
+        self._central_directory = bytearray()
+        self._count = 0
+
+    def add_file(self, file_path: str, arcname: str):
+        """按块读取文件并压缩（提交到线程池），结果按顺序写成一个条目"""
+        member = _ZipMember(self, zipfile.ZipInfo.from_file(file_path, arcname))
+        pool = self._pool
+        pool.submit(member.start, None, None)
+        with open(file_path, 'rb') as f:
+            zdict = b''
+            data = f.read(BLOCK_SIZE)
+            while True:
+                following = f.read(BLOCK_SIZE)
+                member.crc = zlib.crc32(data, member.crc)
+                member.file_size += len(data)
+                pool.submit(member.write, _deflate_block, data, zdict, self.level, not following)
+                if not following:
+                    break
+                zdict = data[-DICT_SIZE:]
+                data = following
+        pool.submit(member.finish, None, None)
+
+    def add_central_record(self, zinfo: zipfile.ZipInfo):
+        """编码条目的中央目录记录"""
+        dt = zinfo.date_time
+        dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+        dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+        extra = []
+        file_size, compress_size, header_offset = (zinfo.file_size, zinfo.compress_size,
+                                                   zinfo.header_offset)
+        if file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT:
+            extra += [file_size, compress_size]
+            file_size = compress_size = 0xffffffff
+        if header_offset > zipfile.ZIP64_LIMIT:
+            extra.append(header_offset)
+            header_offset = 0xffffffff
+        extra_data = zinfo.extra
+        min_version = 0
+        if extra:
+            extra_data = struct.pack('<HH' + 'Q' * len(extra), 1, 8 * len(extra), *extra)
+            min_version = zipfile.ZIP64_VERSION
+        try:
+            filename = zinfo.filename.encode('ascii')
+            flag_bits = zinfo.flag_bits
+        except UnicodeEncodeError:
+            filename = zinfo.filename.encode('utf-8')
+            flag_bits = zinfo.flag_bits | _ZIP_UTF8_FLAG
+        self._central_directory += struct.pack(
+            zipfile.structCentralDir, zipfile.stringCentralDir,
+            max(min_version, zinfo.create_version), zinfo.create_system,
+            max(min_version, zinfo.extract_version), zinfo.reserved, flag_bits,
+            zinfo.compress_type, dostime, dosdate, zinfo.CRC, compress_size, file_size,
+            len(filename), len(extra_data), 0, 0, zinfo.internal_attr, zinfo.external_attr,
+            header_offset)
+        self._central_directory += filename + extra_data
+        self._count += 1
+
+    def close(self):
+        """写出剩余的条目、中央目录和目录结束记录"""
+        try:
+            self._pool.drain()
+        finally:
+            self._pool.shutdown()
+        sink = self.sink
+        start = sink.offset
+        sink.write(self._central_directory)
+        size = len(self._central_directory)
+        count = self._count
+        if (count > zipfile.ZIP_FILECOUNT_LIMIT or start > zipfile.ZIP64_LIMIT
+                or size > zipfile.ZIP64_LIMIT):
+            end = sink.offset
+            sink.write(struct.pack(zipfile.structEndArchive64, zipfile.stringEndArchive64,
+                                   44, 45, 45, 0, 0, count, count, size, start))
+            sink.write(struct.pack(zipfile.structEndArchive64Locator,
+                                   zipfile.stringEndArchive64Locator, 0, end, 1))
+            count = min(count, 0xffff)
+            size = min(size, 0xffffffff)
+            start = min(start, 0xffffffff)
+        sink.write(struct.pack(zipfile.structEndArchive, zipfile.stringEndArchive,
+                               0, 0, count, count, size, start, 0))
+        self._central_directory = bytearray()
+
+    def abort(self):
+        """出错时停止线程池"""
+        self._pool.shutdown()
+
+
+class _ParallelCompressedWriter:
+    """
+    按块并行压缩写入的数据，输出一个gzip流或多个拼接的bzip2流
+
+    只实现write()和close()，供tarfile以流模式（'w|'）写入。
+    """
+
+    def __init__(self, fileobj: BinaryIO, compression: str, workers: int,
+                 level: int = TAR_COMPRESS_LEVEL):
+        self.fileobj = fileobj
+        self.compression = compression
+        self.level = level
+        self._pool = _OrderedPool(workers)
+        self._buffer = bytearray()
+        self._zdict = b''
+        self._crc = 0
+        self._size = 0
+        if compression == 'gz':
+            # gzip头部：deflate、无可选字段、修改时间、未知操作系统
+            fileobj.write(struct.pack('<BBBBLBB', 0x1f, 0x8b, 8, 0, int(time.time()), 0, 255))
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        while len(self._buffer) >= BLOCK_SIZE:
+            self._submit(bytes(self._buffer[:BLOCK_SIZE]), last=False)
+            del self._buffer[:BLOCK_SIZE]
+        return len(data)
+
+    def _submit(self, block: bytes, last: bool):
+        """提交一块数据"""
+        if self.compression == 'gz':
+            self._pool.submit(self.fileobj.write, _deflate_block, block, self._zdict, self.level,
+                              last)
+            self._zdict = block[-DICT_SIZE:]
+        elif block:
+            self._pool.submit(self.fileobj.write, bz2.compress, block, self.level)
+
+    def close(self):
+        """压缩剩余数据，写出gzip尾部（CRC32和长度）"""
+        try:
+            self._submit(bytes(self._buffer), last=True)
+            self._buffer.clear()
+            self._pool.drain()
+            if self.compression == 'gz':
+                self.fileobj.write(struct.pack('<LL', self._crc, self._size & 0xffffffff))
+        finally:
+            self._pool.shutdown()
+
+    def abort(self):
+        """出错时停止线程池"""
+        self._pool.shutdown()
+
+
 if __name__ == '__main__':
     source_path = 'D:/opt/inference-server'
     output_dir = 'D:/opt'
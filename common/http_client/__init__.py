@@ -5,140 +5,100 @@ HTTP客户端模块。
 身份验证、自定义头部等功能。
 """
 
+import atexit
+import contextlib
+import contextvars
+import functools
 import json
+import os
+import ssl
 import time
 import threading
-import urllib.parse
-from typing import Dict, Any, Optional, Union
-from urllib.request import Request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Union
 from urllib.error import URLError, HTTPError
-from urllib.parse import urlencode, urlparse
-from http.client import HTTPConnection, HTTPSConnection
+from urllib.parse import urlparse
+from http.client import HTTPConnection, RemoteDisconnected
 
+from .async_client import AsyncHTTPClient
+from .base import IDEMPOTENT_METHODS, BaseClient, RequestBody
+from .batch import BatchItem, BatchRequest, BatchResult, BatchScheduler
+from .cache import DiskStorage, HTTPCache, MemoryStorage
+from .compression import ACCEPT_ENCODING, decode_body, get_decoder
+from .cookie_store import CookieStore, SQLiteCookieStore
+from .cookies import CookieJar
+from .dns import DNSCache, StaticResolver, default_dns_cache
+from .exceptions import CircuitOpenError, HTTPException, RateLimitExceeded
+from .http2 import ALPN_PROTOCOLS, HTTP2Transport, HTTP2Unavailable
+from .instrumentation import (ConnectionEvent, Histogram, Hooks, MetricsCollector,
+                              RequestEvent, RetryEvent, host_label)
+from .multipart import MultipartEncoder
+from .overload import AIMDLimiter, CircuitBreaker, is_failure_status
+from .pool import ConnectionPool, PooledConnection
+from .ratelimit import MemoryBackend, RateLimit, RateLimiter, SharedFileBackend
+from .response import Response, header_value
+from .retry import RetryBudget, RetryPolicy
+from .scheduler import MaintenanceScheduler, ScheduledTask, default_scheduler
+from .singleflight import SingleFlight
+from .streaming import StreamingBody
+from .tls import ResumableHTTPSConnection, TLSSessionCache, create_ssl_context
 
-class HTTPException(Exception):
-    """HTTP客户端错误的自定义异常。"""
-    pass
 
+# 复用的连接已被服务器关闭时可能出现的异常
+_STALE_CONNECTION_ERRORS = (RemoteDisconnected, ConnectionResetError,
+                            ConnectionAbortedError, BrokenPipeError)
 
-class CookieJar:
+# 清理过期连接和Cookie的间隔（秒）
+CLEANUP_INTERVAL = 30
+
+
+def _body_length(body) -> Optional[int]:
+    """已编码请求体的字节数，文件类对象或迭代器时为None。"""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    if isinstance(body, MultipartEncoder):
+        return len(body)
+    return None
+
+
+def _request_event(method: str, url: str, key, attempt: int, start: float, trace: dict,
+                   response: Optional[Response], error: Optional[BaseException]) -> RequestEvent:
     """
-    简单的Cookie管理器。
+    根据请求过程中记录的trace构造request事件。
+
+    Args:
+        method: HTTP方法。
+        url: 完整URL。
+        key: 主机键(scheme, host, port)。
+        attempt: 第几次尝试，从0开始。
+        start: 尝试开始的时间（time.perf_counter()）。
+        trace: _make_request记录的协议、连接复用、耗时和字节数。
+        response: 响应对象，请求失败时为None。
+        error: 请求抛出的异常，成功时为None。
+
+    Returns:
+        request事件。
     """
-    
-    def __init__(self):
-        """初始化Cookie管理器。"""
-        self._cookies = {}
-    
-    def set_cookie(self, domain: str, path: str, name: str, value: str, 
-                   expires: Optional[float] = None):
-        """
-        设置Cookie。
-        
-        Args:
-            domain: Cookie的域名。
-            path: Cookie的路径。
-            name: Cookie名称。
-            value: Cookie值。
-            expires: 过期时间（时间戳）。
-        """
-        key = (domain, path, name)
-        self._cookies[key] = {
-            'value': value,
-            'expires': expires
-        }
-    
-    def get_cookies(self, domain: str, path: str) -> Dict[str, str]:
-        """
-        获取适用于指定域名和路径的Cookie。
-        
-        Args:
-            domain: 域名。
-            path: 路径。
-            
-        Returns:
-            Cookie字典。
-        """
-        cookies = {}
-        current_time = time.time()
-        
-        for (cookie_domain, cookie_path, name), cookie_data in self._cookies.items():
-            # 检查域名匹配
-            if not self._domain_match(domain, cookie_domain):
-                continue
-                
-            # 检查路径匹配
-            if not self._path_match(path, cookie_path):
-                continue
-                
-            # 检查是否过期
-            if cookie_data['expires'] and cookie_data['expires'] < current_time:
-                continue
-                
-            cookies[name] = cookie_data['value']
-            
-        return cookies
-    
-    def _domain_match(self, request_domain: str, cookie_domain: str) -> bool:
-        """
-        检查域名是否匹配。
-        
-        Args:
-            request_domain: 请求的域名。
-            cookie_domain: Cookie的域名。
-            
-        Returns:
-            是否匹配。
-        """
-        if request_domain == cookie_domain:
-            return True
-            
-        if cookie_domain.startswith('.'):
-            cookie_domain = cookie_domain[1:]
-            
-        return request_domain.endswith('.' + cookie_domain) or request_domain == cookie_domain
-    
-    def _path_match(self, request_path: str, cookie_path: str) -> bool:
-        """
-        检查路径是否匹配。
-        
-        Args:
-            request_path: 请求的路径。
-            cookie_path: Cookie的路径。
-            
-        Returns:
-            是否匹配。
-        """
-        if cookie_path == '/':
-            return True
-            
-        if not request_path.startswith(cookie_path):
-            return False
-            
-        if len(request_path) == len(cookie_path):
-            return True
-            
-        # 确保cookie路径是请求路径的前缀，且在路径分隔符处结束
-        return cookie_path.endswith('/') or request_path[len(cookie_path)] == '/'
-    
-    def clear_expired_cookies(self):
-        """清理过期的Cookie。"""
-        current_time = time.time()
-        expired_keys = []
-        
-        for key, cookie_data in self._cookies.items():
-            if cookie_data['expires'] and cookie_data['expires'] < current_time:
-                expired_keys.append(key)
-                
-        for key in expired_keys:
-            del self._cookies[key]
-    
-    def clear(self):
-        """清空所有Cookie。"""
-        self._cookies.clear()
+    timings = trace.get('timings') or {}
+    sent = trace.get('sent')
+    received = trace.get('received')
+    ttfb = None
+    if sent is not None and received is not None:
+        # 新连接在发送请求时才建立，扣除建立连接的耗时
+        ttfb = max(0.0, received - sent - sum(timings.values()))
+    return RequestEvent(
+        method, url, host_label(key),
+        response.status_code if response is not None else None, error, attempt,
+        time.perf_counter() - start, trace.get('protocol'), trace.get('reused'),
+        timings.get('dns'), timings.get('connect'), timings.get('tls'), ttfb,
+        trace.get('bytes_sent'), trace.get('bytes_received'))
 
 
-class HTTPClient:
+class HTTPClient(BaseClient):
     """
     一个简单的HTTP客户端，用于发起HTTP请求。
     
@@ -148,7 +108,20 @@ class HTTPClient:
 
     def __init__(self, base_url: Optional[str] = None, timeout: int = 30, 
                  max_retries: int = 3, max_connections: int = 10, 
-                 connection_ttl: int = 300, enable_cookies: bool = True):
+                 connection_ttl: int = 300, enable_cookies: bool = True,
+                 idle_timeout: int = 60,
+                 json_loads: Optional[Callable[[bytes], Any]] = None,
+                 decompress: bool = True, compress_threshold: Optional[int] = None,
+                 cookie_store: Optional[CookieStore] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 concurrency_limiter: Optional[AIMDLimiter] = None,
+                 http2: bool = False,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 dns_cache: Optional[DNSCache] = None,
+                 cache: Optional[HTTPCache] = None,
+                 single_flight: bool = False,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         初始化HTTP客户端。
         
@@ -159,109 +132,115 @@ class HTTPClient:
             max_connections: 连接池最大连接数。默认为10，与requests库一致。
             connection_ttl: 连接最大存活时间（秒）。默认为300秒（5分钟）。
             enable_cookies: 是否启用Cookie管理。默认为True。
+            idle_timeout: 连接最大空闲时间（秒），超过后不再复用。默认为60秒。
+            json_loads: 解码JSON响应的函数。默认优先使用orjson，未安装时使用标准库json。
+            decompress: 是否发送Accept-Encoding并自动解压响应体。默认为True。
+            compress_threshold: 请求体达到该字节数时使用gzip压缩。默认为None（不压缩）。
+            cookie_store: Cookie持久化存储，例如SQLiteCookieStore。默认为None（只保存在内存中）。
+            retry_policy: 重试策略，决定哪些失败可以重试以及退避时间。默认为RetryPolicy()。
+            circuit_breaker: 按主机划分的熔断器。默认为None（不熔断）。
+            concurrency_limiter: 按主机划分的自适应并发限制器，例如AIMDLimiter(max_connections)。
+                默认为None（不限制同时执行的请求数）。
+            http2: 是否使用HTTP/2（需要安装h2）。为True时每个主机只建立一条连接，
+                并发请求在这条连接上多路复用；https主机不支持HTTP/2时回退到HTTP/1.1。
+                http主机需要支持h2c先验知识。默认为False。
+            ssl_context: 所有https连接共享的SSL上下文。默认在首次建立https连接时创建
+                与http.client默认设置相同的上下文。http2为True时会在该上下文上设置ALPN。
+            dns_cache: 解析主机地址并建立连接的DNS缓存。默认为进程内所有客户端共享的缓存。
+            cache: HTTP响应缓存。设置后非流式的GET请求按Cache-Control复用缓存的响应，
+                成功的POST/PUT/DELETE请求使同一URL的缓存失效。多个客户端共享同一个缓存时不保存
+                Cache-Control: private的响应。默认为None（不缓存）。
+            single_flight: 是否合并同时进行的相同请求。为True时方法、URL、头部和请求体都相同的
+                非流式幂等请求只有一个访问上游，其余请求等待并得到相同的结果。默认为False。
+            rate_limiter: 按主机或URL前缀配置的令牌桶限流器，每次请求尝试（包括重试）前取出
+                一个令牌。可以被多个客户端共享。默认为None（不限流）。
+
+        Raises:
+            ImportError: 如果http2为True但没有安装h2。
         """
         self.base_url = base_url.rstrip('/') if base_url else None
         self.timeout = timeout
         self.max_retries = max_retries
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.concurrency_limiter = concurrency_limiter
         self.max_connections = max_connections
         self.connection_ttl = connection_ttl
         self.enable_cookies = enable_cookies
+        self.idle_timeout = idle_timeout
+        self.json_loads = json_loads
+        self.decompress = decompress
+        self.compress_threshold = compress_threshold
+        # 所有https连接共享的SSL上下文和TLS会话缓存，重新连接时恢复会话
+        if ssl_context is not None and http2:
+            ssl_context.set_alpn_protocols(ALPN_PROTOCOLS)
+        self._ssl_context = ssl_context
+        self._ssl_context_lock = threading.Lock()
+        self._alpn = ALPN_PROTOCOLS if http2 else None
+        self._tls_sessions = TLSSessionCache()
+        # 新连接通过DNS缓存解析地址，并用Happy Eyeballs交替尝试IPv6和IPv4
+        self.dns_cache = dns_cache or default_dns_cache()
+        self.cache = cache
+        if cache is not None:
+            cache.attach(self)
+        self.single_flight = SingleFlight() if single_flight else None
+        self.rate_limiter = rate_limiter
+        # 事件钩子，没有注册时请求路径上不计时也不创建事件对象
+        self.hooks = Hooks()
         self.default_headers = {
             'User-Agent': 'Python-HTTPClient/1.0',
             'Accept': '*/*'
         }
+        if decompress:
+            self.default_headers['Accept-Encoding'] = ACCEPT_ENCODING
         # Cookie管理器
-        self.cookie_jar = CookieJar() if enable_cookies else None
-        # 连接池，按主机名存储连接
-        self._connection_pool = {}
-        # 跟踪连接数
-        self._connection_count = {}
-        # 跟踪连接创建时间
-        self._connection_creation_time = {}
-        # 清理线程相关
-        self._cleanup_thread = None
-        self._cleanup_stop_event = threading.Event()
-        self._start_cleanup_thread()
-        
-    def _start_cleanup_thread(self):
-        """
-        启动后台清理线程。
+        self.cookie_jar = CookieJar(cookie_store) if enable_cookies else None
+        # 连接池，按(scheme, host, port)分主机管理连接
+        self._pool = ConnectionPool(max_connections, connection_ttl, idle_timeout)
+        # 在共享调度器中注册的维护任务
+        self._maintenance: Optional[ScheduledTask] = None
+        # HTTP/2传输，每个主机一条多路复用的连接；先置为None，创建失败时close()仍可调用
+        self._http2: Optional[HTTP2Transport] = None
+        if http2:
+            self._http2 = HTTP2Transport(timeout, self._get_ssl_context, self._tls_sessions,
+                                         self.dns_cache)
+        self._schedule_maintenance()
+        
+    def _schedule_maintenance(self):
         """
-        if self.connection_ttl > 0:
-            self._cleanup_thread = threading.Thread(target=self._cleanup_expired_connections, daemon=True)
-            self._cleanup_thread.start()
+        在进程内共享的调度器中注册定期清理任务。
+
+        调度器只持有客户端的弱引用，不再使用的客户端可以被回收，回收后任务自动移除。
+        """
+        if self.connection_ttl > 0 or self.cookie_jar is not None:
+            self._maintenance = default_scheduler().schedule(self._run_maintenance,
+                                                             CLEANUP_INTERVAL)
 
-    def _cleanup_expired_connections(self):
+    def _run_maintenance(self):
         """
-        定期清理超时连接的后台线程函数。
+        清理超时连接和过期的Cookie，并将Cookie的变更写回存储。由共享调度器定期调用。
         """
-        while not self._cleanup_stop_event.wait(30):  # 每30秒检查一次
-            try:
-                self._remove_expired_connections()
-                # 同时清理过期的Cookie
-                if self.cookie_jar:
-                    self.cookie_jar.clear_expired_cookies()
-            except Exception:
-                # 忽略清理过程中的任何异常，避免线程崩溃
-                pass
+        if self.connection_ttl > 0:
+            self._remove_expired_connections()
+        if self.cookie_jar:
+            self.cookie_jar.clear_expired_cookies()
+            self.cookie_jar.flush()
 
     def _remove_expired_connections(self):
         """
         移除超时的连接。
         """
-        current_time = time.time()
-        expired_keys = []
-        
-        for key, connections in self._connection_pool.items():
-            # 创建新的连接列表，只保留未超时的连接
-            valid_connections = []
-            for conn in connections:
-                conn_info = self._connection_creation_time.get(id(conn))
-                if conn_info:
-                    created_time, _ = conn_info
-                    if current_time - created_time < self.connection_ttl:
-                        valid_connections.append(conn)
-                    else:
-                        # 关闭超时的连接
-                        try:
-                            conn.close()
-                            self._connection_count[key] = max(0, self._connection_count.get(key, 1) - 1)
-                        except:
-                            pass
-                        # 从创建时间跟踪中移除
-                        if id(conn) in self._connection_creation_time:
-                            del self._connection_creation_time[id(conn)]
-                else:
-                    # 没有创建时间信息的连接，假设未超时
-                    valid_connections.append(conn)
-            
-            # 更新连接池
-            self._connection_pool[key] = valid_connections
-            
-            # 如果连接池为空且没有活跃连接，标记为可删除
-            if not valid_connections and self._connection_count.get(key, 0) <= 0:
-                expired_keys.append(key)
-        
-        # 清理空的连接池条目
-        for key in expired_keys:
-            if key in self._connection_pool:
-                del self._connection_pool[key]
-            if key in self._connection_count:
-                del self._connection_count[key]
-            # 清理相关的创建时间记录
-            keys_to_remove = [conn_id for conn_id, conn_info 
-                             in self._connection_creation_time.items() 
-                             if conn_info[1] == key]
-            for conn_id in keys_to_remove:
-                if conn_id in self._connection_creation_time:
-                    del self._connection_creation_time[conn_id]
+        self._pool.remove_expired()
+        if self._http2 is not None:
+            self._http2.remove_idle(self.idle_timeout)
 
     def get(
         self, 
         endpoint: str, 
         params: Optional[Dict[str, Any]] = None,
-        headers: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False
+    ) -> Response:
         """
         发起GET请求。
         
@@ -269,34 +248,39 @@ class HTTPClient:
             endpoint: 要请求的端点。
             params: 要包含在请求中的查询参数。
             headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。为True时content为StreamingBody。
             
         Returns:
-            包含状态码、头部和响应数据的字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
             
         Raises:
             HTTPException: 如果请求失败。
         """
         url = self._build_url(endpoint, params)
-        return self._make_request_with_retry('GET', url, headers=headers)
+        return self._make_request_with_retry('GET', url, headers=headers, stream=stream)
 
     def post(
         self,
         endpoint: str,
-        data: Optional[Union[Dict[str, Any], str]] = None,
+        data: Optional[RequestBody] = None,
         headers: Optional[Dict[str, str]] = None,
-        json_data: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        json_data: Optional[Dict[str, Any]] = None,
+        stream: bool = False
+    ) -> Response:
         """
         发起POST请求。
         
         Args:
             endpoint: 要请求的端点。
-            data: 要发送的表单数据或原始数据。
+            data: 要发送的表单数据或原始数据。也可以是文件类对象或字节块的
+                可迭代对象，此时以Transfer-Encoding: chunked分块发送；
+                或者MultipartEncoder，此时流式发送multipart/form-data请求体。
             headers: 要包含在请求中的头部信息。
             json_data: 要作为application/json发送的JSON数据。
+            stream: 是否以流式方式返回响应体。为True时content为StreamingBody。
             
         Returns:
-            包含状态码、头部和响应数据的字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
             
         Raises:
             HTTPException: 如果请求失败。
@@ -306,26 +290,31 @@ class HTTPClient:
             headers = headers or {}
             headers['Content-Type'] = 'application/json'
             data = json.dumps(json_data)
-        return self._make_request_with_retry('POST', url, data=data, headers=headers)
+        return self._make_request_with_retry('POST', url, data=data, headers=headers,
+                                             stream=stream)
 
     def put(
         self,
         endpoint: str,
-        data: Optional[Union[Dict[str, Any], str]] = None,
+        data: Optional[RequestBody] = None,
         headers: Optional[Dict[str, str]] = None,
-        json_data: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        json_data: Optional[Dict[str, Any]] = None,
+        stream: bool = False
+    ) -> Response:
         """
         发起PUT请求。
         
         Args:
             endpoint: 要请求的端点。
-            data: 要发送的表单数据或原始数据。
+            data: 要发送的表单数据或原始数据。也可以是文件类对象或字节块的
+                可迭代对象，此时以Transfer-Encoding: chunked分块发送；
+                或者MultipartEncoder，此时流式发送multipart/form-data请求体。
             headers: 要包含在请求中的头部信息。
             json_data: 要作为application/json发送的JSON数据。
+            stream: 是否以流式方式返回响应体。为True时content为StreamingBody。
             
         Returns:
-            包含状态码、头部和响应数据的字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
             
         Raises:
             HTTPException: 如果请求失败。
@@ -335,53 +324,140 @@ class HTTPClient:
             headers = headers or {}
             headers['Content-Type'] = 'application/json'
             data = json.dumps(json_data)
-        return self._make_request_with_retry('PUT', url, data=data, headers=headers)
+        return self._make_request_with_retry('PUT', url, data=data, headers=headers,
+                                             stream=stream)
 
     def delete(
         self,
         endpoint: str,
-        headers: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False
+    ) -> Response:
         """
         发起DELETE请求。
         
         Args:
             endpoint: 要请求的端点。
             headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。为True时content为StreamingBody。
             
         Returns:
-            包含状态码、头部和响应数据的字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
             
         Raises:
             HTTPException: 如果请求失败。
         """
         url = self._build_url(endpoint)
-        return self._make_request_with_retry('DELETE', url, headers=headers)
+        return self._make_request_with_retry('DELETE', url, headers=headers, stream=stream)
 
-    def _build_url(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    def map(
+        self,
+        requests: Iterable[BatchItem],
+        concurrency: int = 10,
+        per_host: Optional[int] = None,
+        ordered: bool = False,
+        stop_on_error: bool = False
+    ) -> Iterator[BatchResult]:
         """
-        从基础URL和端点构建完整URL。
-        
+        在有界线程池上并发执行一批请求，所有请求共享客户端的连接池。
+
+        请求按需从requests中读取。同一主机上超出per_host的请求在调度器中排队，
+        不占用工作线程，因此一个慢主机不会拖住其他主机的请求。
+
         Args:
-            endpoint: 要附加到基础URL的端点。
-            params: 要附加到URL的查询参数。
-            
+            requests: BatchRequest或端点字符串（GET请求）的可迭代对象。
+            concurrency: 同时执行的最大请求数（工作线程数）。默认为10。
+            per_host: 同一主机同时执行的最大请求数。默认为max_connections。
+            ordered: 是否按输入顺序返回结果。默认为False，按完成顺序返回。
+            stop_on_error: 是否在第一个请求失败时停止。为True时取消尚未开始的请求，
+                并抛出该请求的异常；默认为False，失败记录在结果的error中。
+
+        Yields:
+            BatchResult，包含请求序号、请求、响应和异常。
+
+        Raises:
+            HTTPException: stop_on_error为True且有请求失败时。
+            ValueError: 如果concurrency或per_host小于1。
+        """
+        scheduler = BatchScheduler(requests, self._build_url, concurrency,
+                                   per_host or self.max_connections, ordered)
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='http-batch')
+        futures = {}
+        try:
+            while True:
+                for job in scheduler.next_jobs():
+                    _, _, method, url, data, headers, _ = job
+                    future = executor.submit(self._make_request_with_retry,
+                                             method, url, data, headers)
+                    futures[future] = job
+                if not futures:
+                    break
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    error = future.exception()
+                    if error is not None and stop_on_error:
+                        raise error
+                    scheduler.finish(job, None if error else future.result(), error)
+                yield from scheduler.collect()
+        finally:
+            # 提前停止或调用者不再迭代时，不等待仍在执行的请求
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def gather(
+        self,
+        requests: Iterable[BatchItem],
+        concurrency: int = 10,
+        per_host: Optional[int] = None,
+        stop_on_error: bool = False
+    ) -> List[BatchResult]:
+        """
+        并发执行一批请求，按输入顺序返回全部结果。参数含义与map相同。
+
+        Args:
+            requests: BatchRequest或端点字符串（GET请求）的可迭代对象。
+            concurrency: 同时执行的最大请求数。默认为10。
+            per_host: 同一主机同时执行的最大请求数。默认为max_connections。
+            stop_on_error: 是否在第一个请求失败时停止并抛出异常。默认为False。
+
         Returns:
-            完整的URL字符串。
+            按输入顺序排列的BatchResult列表。
+
+        Raises:
+            HTTPException: stop_on_error为True且有请求失败时。
         """
-        if self.base_url:
-            url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        else:
-            url = endpoint
+        return list(self.map(requests, concurrency, per_host, ordered=True,
+                             stop_on_error=stop_on_error))
 
-        if params:
-            query_string = urlencode(params)
-            separator = '&' if '?' in url else '?'
-            url = f"{url}{separator}{query_string}"
+    def add_hook(self, event: str, callback: Callable[[Any], Any]):
+        """
+        注册事件钩子。钩子在请求线程中同步调用，抛出的异常会传给请求的调用者。
+        
+        Args:
+            event: 事件名：'connection'（从连接池获取连接后，参数为ConnectionEvent）、
+                'request'（每次请求尝试结束后，参数为RequestEvent）或
+                'retry'（重试退避之前，参数为RetryEvent）。
+            callback: 回调函数。
+            
+        Raises:
+            ValueError: 如果事件名未知。
+        """
+        self.hooks.add(event, callback)
 
-        return url
+    def remove_hook(self, event: str, callback: Callable[[Any], Any]):
+        """
+        移除事件钩子，没有注册时忽略。
+        
+        Args:
+            event: 事件名。
+            callback: 注册时的回调函数。
+            
+        Raises:
+            ValueError: 如果事件名未知。
+        """
+        self.hooks.remove(event, callback)
 
-    def _get_connection(self, parsed_url):
+    def _get_connection(self, parsed_url) -> PooledConnection:
         """
         获取或创建到指定主机的HTTP连接。
         
@@ -389,52 +465,73 @@ class HTTPClient:
             parsed_url: 解析后的URL对象。
             
         Returns:
-            HTTPConnection或HTTPSConnection实例。
+            包装了HTTPConnection或HTTPSConnection的连接对象。
         """
         # 构造连接键
         key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        callbacks = self.hooks.connection
+        start = time.perf_counter() if callbacks else 0.0
         
-        # 检查是否超过最大连接数
-        if key in self._connection_count and self._connection_count[key] >= self.max_connections:
-            # 清理最旧的连接
-            self._cleanup_oldest_connection(key)
+        while True:
+            conn = self._pool.checkout(key, lambda: self._create_connection(parsed_url))
+            # 非阻塞地检查套接字是否已被对端关闭，不产生额外的往返
+            if conn.is_alive():
+                if callbacks:
+                    Hooks.emit(callbacks, ConnectionEvent(host_label(key), conn.sock is not None,
+                                                          time.perf_counter() - start))
+                return conn
+            # 连接无效，丢弃后继续获取
+            self._pool.discard(conn)
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        """所有https连接共享的SSL上下文。"""
+        return self._get_ssl_context()
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        """
+        获取共享的SSL上下文，首次使用时创建（加载CA证书耗时数十毫秒）。
         
-        # 检查连接池中是否已有连接
-        if key in self._connection_pool and self._connection_pool[key]:
-            conn = self._connection_pool[key].pop()
-            # 检查连接是否仍然有效
-            try:
-                # 快速检查连接是否有效
-                if conn.sock:
-                    conn.sock.settimeout(1)
-                    conn.request("HEAD", "/")
-                    resp = conn.getresponse()
-                    resp.close()
-                    conn.sock.settimeout(self.timeout)
-                    # 更新连接计数
-                    self._connection_count[key] = max(0, self._connection_count.get(key, 1) - 1)
-                    # 更新连接创建时间
-                    if id(conn) in self._connection_creation_time:
-                        created_time, conn_key = self._connection_creation_time[id(conn)]
-                        self._connection_creation_time[id(conn)] = (created_time, conn_key)
-                    return conn
-            except:
-                # 连接无效，继续创建新连接
-                # 清理无效连接的创建时间记录
-                keys_to_remove = [conn_id for conn_id, conn_info 
-                                 in self._connection_creation_time.items() 
-                                 if conn_info[1] == key]
-                for conn_id in keys_to_remove:
-                    if conn_id in self._connection_creation_time:
-                        del self._connection_creation_time[conn_id]
-                pass
-        
-        # 创建新连接
+        Returns:
+            SSL上下文。
+        """
+        if self._ssl_context is None:
+            with self._ssl_context_lock:
+                if self._ssl_context is None:
+                    self._ssl_context = create_ssl_context(self._alpn)
+        return self._ssl_context
+
+    def tls_stats(self) -> dict:
+        """
+        TLS握手统计。
+        
+        Returns:
+            字典，包含完整握手次数full_handshakes、恢复会话的握手次数resumed_handshakes、
+            两种握手的平均耗时full_avg_ms和resumed_avg_ms，以及估计节省的握手时间saved_ms。
+        """
+        return self._tls_sessions.stats()
+
+    def _create_connection(self, parsed_url):
+        """
+        创建到指定主机的新HTTP连接。
+        
+        https连接使用客户端共享的SSL上下文，并尝试恢复该主机上一次的TLS会话。
+        连接通过客户端的DNS缓存解析地址。
+        
+        Args:
+            parsed_url: 解析后的URL对象。
+            
+        Returns:
+            HTTPConnection或ResumableHTTPSConnection实例。
+        """
         if parsed_url.scheme == "https":
-            conn = HTTPSConnection(
-                parsed_url.hostname, 
-                parsed_url.port or 443, 
-                timeout=self.timeout
+            conn = ResumableHTTPSConnection(
+                parsed_url.hostname,
+                parsed_url.port or 443,
+                self.timeout,
+                self._get_ssl_context(),
+                self._tls_sessions,
+                (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
             )
         else:
             conn = HTTPConnection(
@@ -442,13 +539,14 @@ class HTTPClient:
                 parsed_url.port or 80, 
                 timeout=self.timeout
             )
-        
-        # 记录连接创建时间
-        conn_key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
-        self._connection_creation_time[id(conn)] = (time.time(), conn_key)
-        
-        # 更新连接计数
-        self._connection_count[key] = self._connection_count.get(key, 0) + 1
+        # http.client通过该属性建立TCP连接，签名与socket.create_connection相同
+        if self.hooks.request:
+            # 记录DNS解析、TCP连接和TLS握手的耗时，供request事件使用
+            timings = conn.timings = {}
+            conn._create_connection = functools.partial(self.dns_cache.create_connection,
+                                                        timings=timings)
+        else:
+            conn._create_connection = self.dns_cache.create_connection
         return conn
 
     def _return_connection(self, parsed_url, conn):
@@ -459,72 +557,42 @@ class HTTPClient:
             parsed_url: 解析后的URL对象。
             conn: 要返回的连接。
         """
-        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
-        
-        # 检查连接是否超时
-        current_time = time.time()
-        conn_info = self._connection_creation_time.get(id(conn))
-        if conn_info:
-            created_time, _ = conn_info
-            if current_time - created_time >= self.connection_ttl:
-                # 连接已超时，直接关闭
-                try:
-                    conn.close()
-                    self._connection_count[key] = max(0, self._connection_count.get(key, 1) - 1)
-                except:
-                    pass
-                # 清理创建时间记录
-                if id(conn) in self._connection_creation_time:
-                    del self._connection_creation_time[id(conn)]
-                return
-        
-        # 初始化连接池列表
-        if key not in self._connection_pool:
-            self._connection_pool[key] = []
-        
-        # 如果连接池未满，则将连接放回池中
-        if len(self._connection_pool[key]) < self.max_connections:
-            self._connection_pool[key].append(conn)
-        else:
-            # 连接池已满，直接关闭连接
-            try:
-                conn.close()
-                self._connection_count[key] = max(0, self._connection_count.get(key, 1) - 1)
-            except:
-                pass
-            # 清理创建时间记录
-            if id(conn) in self._connection_creation_time:
-                del self._connection_creation_time[id(conn)]
+        if isinstance(conn, PooledConnection):
+            # 响应已读取，TLS 1.3的会话票据此时已到达，保存供重新连接时恢复
+            if isinstance(conn.sock, ssl.SSLSocket):
+                self._tls_sessions.save(conn.key, conn.sock)
+            self._pool.checkin(conn)
+            return
+        # 不是由连接池借出的连接，直接关闭
+        try:
+            conn.close()
+        except Exception:
+            pass
 
-    def _cleanup_oldest_connection(self, key):
+    def _discard_connection(self, conn):
         """
-        清理最旧的连接。
+        关闭并丢弃一个不可再用的连接。
         
         Args:
-            key: 连接键。
+            conn: 要丢弃的连接。
         """
-        if key in self._connection_pool and self._connection_pool[key]:
-            conn = self._connection_pool[key].pop(0)
-            try:
-                conn.close()
-                self._connection_count[key] = max(0, self._connection_count.get(key, 1) - 1)
-                # 清理创建时间记录
-                keys_to_remove = [conn_id for conn_id, conn_info 
-                                 in self._connection_creation_time.items() 
-                                 if conn_info[1] == key]
-                for conn_id in keys_to_remove:
-                    if conn_id in self._connection_creation_time:
-                        del self._connection_creation_time[conn_id]
-            except:
-                pass
+        if isinstance(conn, PooledConnection):
+            self._pool.discard(conn)
+            return
+        try:
+            conn.close()
+        except Exception:
+            pass
 
     def _make_request(
         self,
         method: str,
         url: str,
-        data: Optional[Union[Dict[str, Any], str]] = None,
-        headers: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+        data: Optional[RequestBody] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        trace: Optional[dict] = None
+    ) -> Response:
         """
         发起HTTP请求。
         
@@ -533,9 +601,11 @@ class HTTPClient:
             url: 要请求的完整URL。
             data: 要随请求发送的数据。
             headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。流式响应的连接在响应体读完后才归还。
+            trace: 提供时记录协议、连接复用、发送和收到响应头部的时间以及收发字节数。可选。
             
         Returns:
-            包含状态码、头部和响应数据的字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
             
         Raises:
             HTTPException: 如果请求失败。
@@ -543,259 +613,511 @@ class HTTPClient:
         # 解析URL
         parsed_url = urlparse(url)
         
-        # 准备头部信息
-        request_headers = self.default_headers.copy()
-        if headers:
-            request_headers.update(headers)
-        
-        # 添加Cookie头部
-        if self.cookie_jar and self.enable_cookies:
-            cookies = self.cookie_jar.get_cookies(parsed_url.hostname or '', parsed_url.path or '/')
-            if cookies:
-                cookie_header = '; '.join([f"{name}={value}" for name, value in cookies.items()])
-                request_headers['Cookie'] = cookie_header
+        # 准备头部信息（含Cookie）和数据
+        request_headers = self._prepare_headers(parsed_url, headers)
+        request_data = self._compress_body(self._encode_body(data, request_headers),
+                                           request_headers)
+        path = self._request_target(parsed_url)
+        if trace is not None:
+            trace['bytes_sent'] = _body_length(request_data)
+
+        if self._http2 is not None:
+            key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+            if self._http2.supports(key):
+                try:
+                    return self._make_http2_request(key, parsed_url, method, path,
+                                                    request_headers, request_data, stream,
+                                                    trace)
+                except HTTP2Unavailable:
+                    # 服务器不支持HTTP/2，该主机之后都使用HTTP/1.1连接池
+                    pass
         
         # 获取连接
         conn = self._get_connection(parsed_url)
-        
-        # 准备路径和数据
-        path = parsed_url.path or '/'
-        if parsed_url.query:
-            path += '?' + parsed_url.query
-            
-        request_data = None
-        if isinstance(data, dict):
-            request_data = urlencode(data)
-            request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
-        elif isinstance(data, str):
-            request_data = data
 
         try:
-            # 发起请求
-            conn.request(method, path, body=request_data, headers=request_headers)
-            
-            # 获取响应
-            response = conn.getresponse()
+            reused = conn.sock is not None
+            if trace is not None:
+                self._trace_connection(trace, conn, reused)
+            try:
+                # 发起请求
+                self._send_request(conn, method, path, request_data, request_headers)
+                
+                # 获取响应
+                response = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                # 复用的连接可能在检查之后被服务器关闭，幂等请求在新连接上重试一次
+                if (not reused or method not in IDEMPOTENT_METHODS
+                        or not self._is_replayable(data)):
+                    raise
+                self._discard_connection(conn)
+                conn = None
+                conn = self._get_connection(parsed_url)
+                if trace is not None:
+                    self._trace_connection(trace, conn, conn.sock is not None)
+                self._send_request(conn, method, path, request_data, request_headers)
+                response = conn.getresponse()
+            if trace is not None:
+                trace['received'] = time.perf_counter()
             
             # 处理Set-Cookie头部
             if self.cookie_jar and self.enable_cookies:
-                self._process_set_cookie_header(response.getheader('Set-Cookie', ''), 
-                                              parsed_url.hostname or '', 
-                                              parsed_url.path or '/')
+                self._process_set_cookie_header(response.msg.get_all('Set-Cookie'),
+                                                parsed_url.hostname or '',
+                                                parsed_url.path or '/')
             
-            # 读取响应数据
-            response_data = response.read()
+            response_headers = dict(response.getheaders())
+            content_encoding = (header_value(response_headers, 'Content-Encoding')
+                                if self.decompress else None)
             
-            # 尝试解码为JSON，失败则回退为字符串
-            try:
-                content = json.loads(response_data.decode('utf-8'))
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                content = response_data.decode('utf-8')
+            if stream:
+                # 连接在响应体读完（或关闭）时才归还或丢弃，压缩的响应体边读边解压
+                pooled = conn
+                body = StreamingBody(
+                    response,
+                    lambda reusable: (self._return_connection(parsed_url, pooled) if reusable
+                                      else self._discard_connection(pooled)),
+                    get_decoder(content_encoding)
+                )
+                return Response(response.status, response_headers, body, self.json_loads)
             
-            # 将连接返回到连接池
+            # 读取响应数据，文本和JSON在首次访问时才解码
+            response_data = response.read()
+            if trace is not None:
+                trace['bytes_received'] = len(response_data)
+            
+            # 将连接返回到连接池，之后的错误不应再丢弃该连接
             self._return_connection(parsed_url, conn)
+            conn = None
             
-            return {
-                'status_code': response.status,
-                'headers': dict(response.getheaders()),
-                'content': content
-            }
+            response_data = decode_body(response_data, content_encoding)
+            return Response(response.status, response_headers, response_data, self.json_loads)
         except HTTPError as e:
             # 将连接返回到连接池
-            self._return_connection(parsed_url, conn)
+            if conn is not None:
+                self._return_connection(parsed_url, conn)
             raise HTTPException(f"HTTP {e.code} {e.reason} for URL: {url}") from e
         except URLError as e:
             # 连接错误，不将连接返回到连接池
-            try:
-                conn.close()
-                key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
-                if key in self._connection_count:
-                    self._connection_count[key] = max(0, self._connection_count[key] - 1)
-                # 清理创建时间记录
-                keys_to_remove = [conn_id for conn_id, conn_info 
-                                 in self._connection_creation_time.items() 
-                                 if conn_info[1] == key]
-                for conn_id in keys_to_remove:
-                    if conn_id in self._connection_creation_time:
-                        del self._connection_creation_time[conn_id]
-            except:
-                pass
+            if conn is not None:
+                self._discard_connection(conn)
             raise HTTPException(f"URL错误: {e.reason}") from e
         except Exception as e:
-            # 其他错误，将连接返回到连接池
-            self._return_connection(parsed_url, conn)
+            # 其他错误，连接状态未知，不再复用
+            if conn is not None:
+                self._discard_connection(conn)
             raise HTTPException(f"请求失败: {str(e)}") from e
 
-    def _process_set_cookie_header(self, set_cookie_header: str, domain: str, path: str):
+    @staticmethod
+    def _send_request(conn, method: str, path: str, body, headers: Dict[str, str]):
         """
-        处理Set-Cookie头部，提取并存储Cookie。
+        在HTTP/1.1连接上发送请求行、头部和请求体。
+        
+        MultipartEncoder直接写入套接字，文件部分使用socket.sendfile；
+        其他请求体交给http.client发送。
         
         Args:
-            set_cookie_header: Set-Cookie头部的值。
-            domain: 默认域名。
-            path: 默认路径。
+            conn: 连接对象。
+            method: HTTP方法。
+            path: 请求路径和查询字符串。
+            body: 已编码的请求体。
+            headers: 已准备好的请求头部，multipart请求体已带有Content-Length。
         """
-        if not set_cookie_header:
+        if not isinstance(body, MultipartEncoder):
+            conn.request(method, path, body=body, headers=headers)
             return
+        conn = getattr(conn, 'conn', conn)
+        names = {name.lower() for name in headers}
+        conn.putrequest(method, path, skip_host='host' in names,
+                        skip_accept_encoding='accept-encoding' in names)
+        for name, value in headers.items():
+            conn.putheader(name, value)
+        # 发送头部，未连接时在这里建立连接
+        conn.endheaders()
+        body.send(conn.sock)
+
+    @staticmethod
+    def _trace_connection(trace: dict, conn, reused: bool):
+        """
+        在trace中记录即将发送请求的HTTP/1.1连接。
+        
+        Args:
+            trace: 请求的trace字典。
+            conn: 连接对象。
+            reused: 是否复用了已建立的连接。
+        """
+        trace['protocol'] = 'HTTP/1.1'
+        trace['reused'] = reused
+        # 新连接的耗时字典在发送请求时由DNS缓存和TLS握手填充
+        trace['timings'] = None if reused else getattr(getattr(conn, 'conn', conn),
+                                                       'timings', None)
+        trace['sent'] = time.perf_counter()
+
+    def _make_http2_request(
+        self,
+        key,
+        parsed_url,
+        method: str,
+        path: str,
+        request_headers: Dict[str, str],
+        request_data,
+        stream: bool,
+        trace: Optional[dict] = None
+    ) -> Response:
+        """
+        在主机的HTTP/2连接上以一个新的流发起请求。
+        
+        Args:
+            key: 主机键(scheme, host, port)。
+            parsed_url: 解析后的URL对象。
+            method: HTTP方法。
+            path: 请求路径和查询字符串。
+            request_headers: 已准备好的请求头部。
+            request_data: 已编码的请求体。
+            stream: 是否以流式方式返回响应体。
+            trace: 提供时记录协议、发送和收到响应头部的时间以及收到的字节数。可选。
             
-        # 简单解析Set-Cookie头部（实际实现可能需要更复杂的解析）
-        cookies = set_cookie_header.split(',') if isinstance(set_cookie_header, str) else []
-        for cookie in cookies:
-            parts = cookie.split(';')
-            if not parts:
-                continue
-                
-            # 解析cookie键值对
-            cookie_part = parts[0].strip()
-            if '=' not in cookie_part:
-                continue
-                
-            name, value = cookie_part.split('=', 1)
-            name = name.strip()
-            value = value.strip()
-            
-            # 解析其他属性
-            expires = None
-            cookie_domain = domain
-            cookie_path = path
-            
-            for part in parts[1:]:
-                part = part.strip()
-                if '=' in part:
-                    attr_name, attr_value = part.split('=', 1)
-                    attr_name = attr_name.strip().lower()
-                    attr_value = attr_value.strip()
-                    
-                    if attr_name == 'expires':
-                        # 简单处理过期时间（实际实现可能需要更复杂的解析）
-                        try:
-                            # 这里简化处理，实际应该解析HTTP日期格式
-                            expires = time.time() + 3600  # 默认1小时后过期
-                        except:
-                            pass
-                    elif attr_name == 'domain':
-                        cookie_domain = attr_value
-                    elif attr_name == 'path':
-                        cookie_path = attr_value
-            
-            # 存储Cookie
-            self.cookie_jar.set_cookie(cookie_domain, cookie_path, name, value, expires)
+        Returns:
+            响应对象。
+            
+        Raises:
+            HTTP2Unavailable: 如果服务器在ALPN协商中没有选择h2。
+            HTTPException: 如果请求失败。
+        """
+        try:
+            conn = self._http2.connection(key, parsed_url)
+            if trace is not None:
+                trace['protocol'] = 'HTTP/2'
+                trace['sent'] = time.perf_counter()
+            h2_stream = conn.request(method, path, request_headers, request_data)
+            if trace is not None:
+                trace['received'] = time.perf_counter()
+            try:
+                # 与HTTP/1.1相同，重复的头部在字典中保留最后一个值
+                response_headers = dict(h2_stream.headers)
+                if self.cookie_jar and self.enable_cookies:
+                    self._process_set_cookie_header(
+                        [value for name, value in h2_stream.headers if name == 'set-cookie'],
+                        parsed_url.hostname or '', parsed_url.path or '/')
+                content_encoding = (header_value(response_headers, 'Content-Encoding')
+                                    if self.decompress else None)
+                if stream:
+                    # 流没有需要归还的连接，关闭时取消未读完的流
+                    body = StreamingBody(h2_stream, lambda reusable: None,
+                                         get_decoder(content_encoding))
+                    return Response(h2_stream.status, response_headers, body, self.json_loads)
+                response_data = h2_stream.read()
+                if trace is not None:
+                    trace['bytes_received'] = len(response_data)
+                response_data = decode_body(response_data, content_encoding)
+            except BaseException:
+                h2_stream.close()
+                raise
+            return Response(h2_stream.status, response_headers, response_data, self.json_loads)
+        except HTTP2Unavailable:
+            raise
+        except Exception as e:
+            raise HTTPException(f"请求失败: {str(e)}") from e
+
+    def _guarded_request(
+        self,
+        key,
+        method: str,
+        url: str,
+        data: Optional[RequestBody],
+        headers: Optional[Dict[str, str]],
+        stream: bool,
+        trace: Optional[dict] = None
+    ) -> Response:
+        """
+        在熔断器和并发限制器的约束下发起一次请求，并向两者报告结果。
+        
+        异常、5xx和429响应视为失败。
+        
+        Args:
+            key: 主机键(scheme, host, port)。
+            method: HTTP方法。
+            url: 要请求的完整URL。
+            data: 要随请求发送的数据。
+            headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。
+            trace: 传给_make_request的trace字典。可选。
+            
+        Returns:
+            响应对象。
+            
+        Raises:
+            CircuitOpenError: 如果熔断器打开。
+            HTTPException: 如果请求失败或等待并发名额超时。
+        """
+        breaker = self.circuit_breaker
+        limiter = self.concurrency_limiter
+        probe = breaker.before_request(key) if breaker is not None else 0
+        try:
+            started = limiter.acquire(key, self.timeout) if limiter is not None else 0.0
+        except BaseException:
+            if breaker is not None:
+                breaker.record(key, None, probe)
+            raise
+        failed = True
+        deferred = False
+        try:
+            response = self._make_request(method, url, data, headers, stream=stream,
+                                          trace=trace)
+            failed = is_failure_status(response.status_code)
+            if response.stream is not None:
+                # 流式响应在响应体读完或关闭时才释放名额和报告结果，与连接的归还时机一致；
+                # 并发上限按收到响应头部的延迟调整
+                latency = time.monotonic() - started if limiter is not None else None
+                response.stream.add_done_callback(
+                    lambda error: self._release_guard(key, started, failed or error, probe,
+                                                      latency))
+                deferred = True
+            return response
+        finally:
+            if not deferred:
+                self._release_guard(key, started, failed, probe)
+
+    def _release_guard(self, key, started: float, failed: bool, probe: int,
+                       latency: Optional[float] = None):
+        """
+        释放并发名额并向熔断器报告请求结果。
+        
+        Args:
+            key: 主机键(scheme, host, port)。
+            started: 并发限制器acquire()的返回值。
+            failed: 请求是否失败。
+            probe: 熔断器before_request()的返回值。
+            latency: 用于调整并发上限的延迟（秒）。默认为从started到现在。
+        """
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.release(key, started, failed, latency)
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(key, failed, probe)
 
     def _make_request_with_retry(
         self,
         method: str,
         url: str,
-        data: Optional[Union[Dict[str, Any], str]] = None,
-        headers: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+        data: Optional[RequestBody] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False
+    ) -> Response:
         """
-        发起HTTP请求，支持重试机制。
+        发起HTTP请求。配置了响应缓存时，非流式请求先经过缓存，需要访问上游时
+        （可能带上条件请求头部）再按retry_policy发送。
         
         Args:
             method: HTTP方法（GET、POST、PUT、DELETE）。
             url: 要请求的完整URL。
             data: 要随请求发送的数据。
             headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。
             
         Returns:
-            包含状态码、头部和响应数据的字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
             
         Raises:
             HTTPException: 如果请求失败。
         """
-        last_exception = None
-        
-        for attempt in range(self.max_retries + 1):
-            try:
-                return self._make_request(method, url, data, headers)
-            except HTTPException as e:
-                last_exception = e
-                # 如果是客户端错误(4xx)，不重试
-                if "HTTP 4" in str(e):
-                    raise e
-                
-                # 如果不是最后一次尝试，等待后重试
-                if attempt < self.max_retries:
-                    # 指数退避策略
-                    wait_time = (2 ** attempt) + (0.1 * attempt)
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    raise e
-            except Exception as e:
-                last_exception = e
-                # 如果不是最后一次尝试，等待后重试
-                if attempt < self.max_retries:
-                    # 指数退避策略
-                    wait_time = (2 ** attempt) + (0.1 * attempt)
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    raise HTTPException(f"请求失败: {str(e)}") from e
-        
-        # 如果所有重试都失败了
-        raise HTTPException(f"请求失败，已重试{self.max_retries}次: {str(last_exception)}") from last_exception
+        if stream:
+            return self._send_with_retry(method, url, data, headers, stream)
+        if self.cache is None:
+            if self.single_flight is not None:
+                return self._send_coalesced(method, url, data, headers)
+            return self._send_with_retry(method, url, data, headers)
+
+        def fetch(conditional: Optional[Dict[str, str]]) -> Response:
+            request_headers = {**(headers or {}), **conditional} if conditional else headers
+            return self._send_with_retry(method, url, data, request_headers)
 
-    def set_cookie(self, domain: str, path: str, name: str, value: str, 
-                   expires: Optional[float] = None):
+        # 缓存键、Vary和合并都按实际发送的头部（包括Cookie）比较，不同会话的响应互不复用
+        return self.cache.request(method, url, self._prepare_headers(urlparse(url), headers),
+                                  fetch, self.json_loads)
+
+    def _send_coalesced(
+        self,
+        method: str,
+        url: str,
+        data: Optional[RequestBody],
+        headers: Optional[Dict[str, str]]
+    ) -> Response:
         """
-        手动设置Cookie。
+        发起幂等请求，与同时进行的相同请求合并为一次上游调用。
+        
+        等待者得到与执行者相同的状态码、头部和响应体（各自的Response对象），
+        或者相同的异常。请求体是文件类对象或迭代器时不合并。
         
         Args:
-            domain: Cookie的域名。
-            path: Cookie的路径。
-            name: Cookie名称。
-            value: Cookie值。
-            expires: 过期时间（时间戳）。
+            method: HTTP方法。
+            url: 要请求的完整URL。
+            data: 要随请求发送的数据。
+            headers: 要包含在请求中的头部信息。
+            
+        Returns:
+            响应对象。
+            
+        Raises:
+            HTTPException: 如果请求失败。
         """
-        if self.cookie_jar and self.enable_cookies:
-            self.cookie_jar.set_cookie(domain, path, name, value, expires)
+        if method not in IDEMPOTENT_METHODS or not isinstance(data, (type(None), bytes, str)):
+            return self._send_with_retry(method, url, data, headers)
+        # 按实际发送的头部（包括Cookie）合并，不同会话的请求不共享响应
+        prepared = self._prepare_headers(urlparse(url), headers)
+        key = (method, url, data,
+               frozenset((name.lower(), value) for name, value in prepared.items()))
+        response, leader = self.single_flight.do(
+            key, lambda: self._send_with_retry(method, url, data, headers))
+        if leader:
+            return response
+        # 每个调用者一个Response对象，惰性解码的text和json互不影响
+        return Response(response.status_code, dict(response.headers), response.body,
+                        self.json_loads)
 
-    def get_cookies(self, domain: str, path: str = '/') -> Dict[str, str]:
+    def _send_with_retry(
+        self,
+        method: str,
+        url: str,
+        data: Optional[RequestBody] = None,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False
+    ) -> Response:
         """
-        获取适用于指定域名和路径的Cookie。
+        发起HTTP请求，按retry_policy重试。
+        
+        出错或收到可重试的状态码（例如503）时，由重试策略决定是否重试以及
+        退避多久；重试次数用尽后抛出最后一次的异常或返回最后一次的响应。
+        文件类对象或迭代器形式的请求体只会发送一次，不会重试。
         
         Args:
-            domain: 域名。
-            path: 路径。
+            method: HTTP方法（GET、POST、PUT、DELETE）。
+            url: 要请求的完整URL。
+            data: 要随请求发送的数据。
+            headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。
             
         Returns:
-            Cookie字典。
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+            
+        Raises:
+            HTTPException: 如果请求失败。
         """
-        if self.cookie_jar and self.enable_cookies:
-            return self.cookie_jar.get_cookies(domain, path)
-        return {}
+        policy = self.retry_policy
+        max_retries = self.max_retries if self._is_replayable(data) else 0
+        parsed_url = urlparse(url)
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        policy.record_request(key)
+
+        guarded = self.circuit_breaker is not None or self.concurrency_limiter is not None
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                # 每次尝试（包括重试）消耗一个令牌，超出配额时直接抛出，不重试
+                limiter.acquire(url)
+            try:
+                response = self._attempt(key, method, url, data, headers, stream, guarded,
+                                         attempt)
+            except CircuitOpenError:
+                # 熔断期间重试没有意义
+                raise
+            except HTTPException as e:
+                delay = policy.retry_delay(method, attempt, key, error=e) \
+                    if attempt < max_retries else None
+                if delay is None:
+                    raise
+                status, error = None, e
+            except Exception as e:
+                delay = policy.retry_delay(method, attempt, key, error=e) \
+                    if attempt < max_retries else None
+                if delay is None:
+                    raise HTTPException(f"请求失败: {str(e)}") from e
+                status, error = None, e
+            else:
+                delay = policy.retry_delay(method, attempt, key, response=response) \
+                    if attempt < max_retries else None
+                if delay is None:
+                    return response
+                # 放弃这次响应，未读完的流式响应体会关闭连接
+                if response.stream is not None:
+                    response.stream.close()
+                status, error = response.status_code, None
+            callbacks = self.hooks.retry
+            if callbacks:
+                Hooks.emit(callbacks, RetryEvent(method, url, host_label(key), attempt + 1,
+                                                 delay, status, error))
+            time.sleep(delay)
+            attempt += 1
 
-    def clear_cookies(self):
+    def _attempt(
+        self,
+        key,
+        method: str,
+        url: str,
+        data: Optional[RequestBody],
+        headers: Optional[Dict[str, str]],
+        stream: bool,
+        guarded: bool,
+        attempt: int
+    ) -> Response:
         """
-        清空所有Cookie。
+        发起一次请求尝试。注册了request钩子时记录耗时和字节数，结束后触发request事件。
+        
+        Args:
+            key: 主机键(scheme, host, port)。
+            method: HTTP方法。
+            url: 要请求的完整URL。
+            data: 要随请求发送的数据。
+            headers: 要包含在请求中的头部信息。
+            stream: 是否以流式方式返回响应体。
+            guarded: 是否经过熔断器和并发限制器。
+            attempt: 第几次尝试，从0开始。
+            
+        Returns:
+            响应对象。
+            
+        Raises:
+            HTTPException: 如果请求失败。
         """
-        if self.cookie_jar and self.enable_cookies:
-            self.cookie_jar.clear()
+        callbacks = self.hooks.request
+        if not callbacks:
+            if guarded:
+                return self._guarded_request(key, method, url, data, headers, stream)
+            return self._make_request(method, url, data, headers, stream=stream)
+        trace: Dict[str, Any] = {}
+        start = time.perf_counter()
+        response = error = None
+        try:
+            if guarded:
+                response = self._guarded_request(key, method, url, data, headers, stream,
+                                                 trace)
+            else:
+                response = self._make_request(method, url, data, headers, stream=stream,
+                                              trace=trace)
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            Hooks.emit(callbacks, _request_event(method, url, key, attempt, start, trace,
+                                                 response, error))
 
     def close(self):
         """
         关闭所有连接并清理连接池。
         """
-        # 停止清理线程
-        self._cleanup_stop_event.set()
-        if self._cleanup_thread and self._cleanup_thread.is_alive():
-            self._cleanup_thread.join(timeout=1)
+        # 取消维护任务
+        if self._maintenance is not None:
+            self._maintenance.cancel()
         
         # 关闭所有连接
-        for conn_list in self._connection_pool.values():
-            for conn in conn_list:
-                try:
-                    conn.close()
-                except:
-                    pass
-        
-        # 清理所有跟踪数据
-        for key in self._connection_count:
-            self._connection_count[key] = 0
-            
-        self._connection_pool.clear()
-        self._connection_creation_time.clear()
+        self._pool.close_all()
+        if self._http2 is not None:
+            self._http2.close_all()
+
+        # 将Cookie的变更写回存储（存储由调用者关闭，可能被多个客户端共享）
+        if self.cookie_jar:
+            self.cookie_jar.flush()
 
     def __del__(self):
         """
@@ -804,8 +1126,99 @@ class HTTPClient:
         self.close()
 
 
+# 便捷函数共享的默认客户端，第一次使用时创建
+_default_client: Optional[HTTPClient] = None
+_default_client_lock = threading.Lock()
+# fork之前创建的默认客户端：子进程中不再使用也不关闭（连接属于父进程，锁可能被父进程的其他线程持有），
+# 保留引用避免析构时关闭连接
+_inherited_clients: List[HTTPClient] = []
+# session()中当前线程或协程使用的客户端
+_session_client: contextvars.ContextVar = contextvars.ContextVar('http_client_session',
+                                                                default=None)
+
+
+def default_client() -> HTTPClient:
+    """
+    获取便捷函数使用的客户端。
+
+    在session()中返回会话的客户端，否则返回进程内共享的默认客户端。默认客户端在第一次使用时创建，
+    不保存Cookie（与每次调用新建客户端时一样，调用之间不共享Cookie），fork之后子进程会创建自己的客户端。
+
+    Returns:
+        HTTP客户端。
+    """
+    client = _session_client.get()
+    if client is not None:
+        return client
+    global _default_client
+    client = _default_client
+    if client is None:
+        with _default_client_lock:
+            client = _default_client
+            if client is None:
+                client = _default_client = HTTPClient(enable_cookies=False)
+    return client
+
+
+@contextlib.contextmanager
+def session(client: Optional[HTTPClient] = None, **kwargs) -> Iterator[HTTPClient]:
+    """
+    在with块中让便捷函数使用同一个客户端，退出时关闭它。
+
+    会话只对当前线程（或协程）有效，可以嵌套，退出后恢复外层的客户端::
+
+        with session(base_url="https://api.example.com") as client:
+            get("/users")          # 复用client的连接和Cookie
+            client.post("/items", json_data={...})
+
+    Args:
+        client: 使用已有的客户端，退出时不关闭。可选。
+        **kwargs: 没有传入client时，用于创建HTTPClient的参数。
+
+    Yields:
+        会话使用的客户端。
+    """
+    owned = client is None
+    if owned:
+        client = HTTPClient(**kwargs)
+    token = _session_client.set(client)
+    try:
+        yield client
+    finally:
+        _session_client.reset(token)
+        if owned:
+            client.close()
+
+
+def _close_default_client():
+    """关闭默认客户端，下次使用时重新创建。"""
+    global _default_client
+    with _default_client_lock:
+        client, _default_client = _default_client, None
+    if client is not None:
+        client.close()
+
+
+def _after_fork():
+    """
+    fork后的子进程中丢弃继承的默认客户端，重建锁。
+
+    继承的维护任务已由调度器丢弃，子进程第一次使用时创建的新客户端注册自己的任务。
+    """
+    global _default_client, _default_client_lock
+    _default_client_lock = threading.Lock()
+    if _default_client is not None:
+        _inherited_clients.append(_default_client)
+        _default_client = None
+
+
+atexit.register(_close_default_client)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
 # 用于快速请求的便捷函数
-def get(url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def get(url: str, params: Optional[Dict[str, Any]] = None) -> Response:
     """
     使用默认HTTP客户端发起GET请求。
     
@@ -814,20 +1227,16 @@ def get(url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         params: 要包含在请求中的查询参数。
         
     Returns:
-        包含状态码、头部和响应数据的字典。
+        响应对象，兼容以字典方式访问状态码、头部和响应数据。
     """
-    client = HTTPClient()
-    try:
-        return client.get(url, params)
-    finally:
-        client.close()
+    return default_client().get(url, params)
 
 
 def post(
     url: str, 
     data: Optional[Union[Dict[str, Any], str]] = None,
     json_data: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
+) -> Response:
     """
     使用默认HTTP客户端发起POST请求。
     
@@ -837,20 +1246,16 @@ def post(
         json_data: 要作为application/json发送的JSON数据。
         
     Returns:
-        包含状态码、头部和响应数据的字典。
+        响应对象，兼容以字典方式访问状态码、头部和响应数据。
     """
-    client = HTTPClient()
-    try:
-        return client.post(url, data=data, json_data=json_data)
-    finally:
-        client.close()
+    return default_client().post(url, data=data, json_data=json_data)
 
 
 def put(
     url: str, 
     data: Optional[Union[Dict[str, Any], str]] = None,
     json_data: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
+) -> Response:
     """
     使用默认HTTP客户端发起PUT请求。
     
@@ -860,16 +1265,12 @@ def put(
         json_data: 要作为application/json发送的JSON数据。
         
     Returns:
-        包含状态码、头部和响应数据的字典。
+        响应对象，兼容以字典方式访问状态码、头部和响应数据。
     """
-    client = HTTPClient()
-    try:
-        return client.put(url, data=data, json_data=json_data)
-    finally:
-        client.close()
+    return default_client().put(url, data=data, json_data=json_data)
 
 
-def delete(url: str) -> Dict[str, Any]:
+def delete(url: str) -> Response:
     """
     使用默认HTTP客户端发起DELETE请求。
     
@@ -877,10 +1278,6 @@ def delete(url: str) -> Dict[str, Any]:
         url: 要请求的URL。
         
     Returns:
-        包含状态码、头部和响应数据的字典。
+        响应对象，兼容以字典方式访问状态码、头部和响应数据。
     """
-    client = HTTPClient()
-    try:
-        return client.delete(url)
-    finally:
-        client.close()
\ No newline at end of file
+    return default_client().delete(url)
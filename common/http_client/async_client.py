@@ -0,0 +1,747 @@
+"""
+异步HTTP客户端模块。
+
+基于asyncio流实现的HTTP/1.1客户端，接口与HTTPClient保持一致，
+支持按主机划分的连接池、全局并发限制和单请求超时。
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import re
+import ssl
+import time
+from collections import deque
+from typing import (Any, AsyncIterator, Callable, Deque, Dict, Hashable, Iterable, List, Optional,
+                    Tuple, Union)
+from urllib.parse import urlparse
+
+from .base import IDEMPOTENT_METHODS, BaseClient
+from .batch import BatchItem, BatchResult, BatchScheduler
+from .compression import ACCEPT_ENCODING, decode_body
+from .cookie_store import CookieStore
+from .cookies import CookieJar
+from .exceptions import HTTPException
+from .ratelimit import RateLimiter
+from .response import Response
+from .retry import RetryPolicy
+
+
+# 响应头部的最大行数，防止异常响应耗尽内存
+_MAX_HEADERS = 100
+# 不带响应体的状态码
+_NO_BODY_STATUSES = frozenset({204, 304})
+# 默认端口
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+# 方法、请求目标和主机中不允许的字符（控制字符和空白），与http.client的检查一致
+_ILLEGAL_TOKEN_CHARS = re.compile(r'[\x00-\x20\x7f]')
+# 合法的头部名称：不含冒号和换行，且不以空白开头，与http.client的检查一致
+_LEGAL_HEADER_NAME = re.compile(r'[^:\s][^:\r\n]*')
+# 头部值中不允许的字符，防止注入额外的头部或拆分请求
+_ILLEGAL_HEADER_VALUE_CHARS = re.compile(r'[\r\n\x00]')
+# 由客户端生成、忽略调用者提供的值的请求头部（小写）
+_GENERATED_HEADERS = frozenset({'host', 'content-length'})
+
+
+class _StreamConnection:
+    """
+    基于asyncio流的HTTP连接。
+
+    保存读写流以及创建时间、最近使用时间等连接池元数据。
+    """
+
+    __slots__ = ('reader', 'writer', 'key', 'created_at', 'last_used')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                 key: Hashable):
+        """
+        初始化连接。
+
+        Args:
+            reader: 读取流。
+            writer: 写入流。
+            key: 连接所属的主机键。
+        """
+        self.reader = reader
+        self.writer = writer
+        self.key = key
+        self.created_at = self.last_used = time.time()
+
+    def is_alive(self) -> bool:
+        """
+        检查空闲连接是否仍然可用。
+
+        只使用公开接口检查连接是否已关闭或已读到EOF。空闲时服务器发来的多余数据
+        在下一次读取响应时才能发现，按复用失败处理（见_read_response）。
+
+        Returns:
+            连接是否可用。
+        """
+        return not (self.writer.is_closing() or self.reader.at_eof())
+
+    def close(self):
+        """关闭连接。"""
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class _AsyncHostPool:
+    """单个主机的异步连接池。"""
+
+    __slots__ = ('idle', 'semaphore')
+
+    def __init__(self, max_connections: int):
+        """
+        初始化主机连接池。
+
+        Args:
+            max_connections: 该主机的最大并发连接数。
+        """
+        # 右端为最近归还的连接
+        self.idle: Deque[_StreamConnection] = deque()
+        self.semaphore = asyncio.Semaphore(max_connections)
+
+
+class AsyncHTTPClient(BaseClient):
+    """
+    基于asyncio的异步HTTP客户端。
+
+    接口与HTTPClient一致，所有请求方法均为协程。一个实例应只在一个事件循环中使用。
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 30,
+                 max_retries: int = 3, max_connections: int = 10,
+                 connection_ttl: int = 300, enable_cookies: bool = True,
+                 idle_timeout: int = 60, max_concurrency: int = 100,
+                 ssl_context: Optional[ssl.SSLContext] = None,
+                 json_loads: Optional[Callable[[bytes], Any]] = None,
+                 decompress: bool = True, compress_threshold: Optional[int] = None,
+                 cookie_store: Optional[CookieStore] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        初始化异步HTTP客户端。
+
+        Args:
+            base_url: 所有请求的基础URL。可选。
+            timeout: 默认请求超时时间（秒），包括连接、发送和读取响应。默认为30秒。
+            max_retries: 最大重试次数。默认为3次。
+            max_connections: 每个主机的最大并发连接数。默认为10。
+            connection_ttl: 连接最大存活时间（秒）。默认为300秒（5分钟）。
+            enable_cookies: 是否启用Cookie管理。默认为True。
+            idle_timeout: 连接最大空闲时间（秒），超过后不再复用。默认为60秒。
+            max_concurrency: 全局最大并发请求数。默认为100。
+            ssl_context: HTTPS连接使用的SSL上下文。默认为系统默认上下文。
+            json_loads: 解码JSON响应的函数。默认优先使用orjson，未安装时使用标准库json。
+            decompress: 是否发送Accept-Encoding并自动解压响应体。默认为True。
+            compress_threshold: 请求体达到该字节数时使用gzip压缩。默认为None（不压缩）。
+            cookie_store: Cookie持久化存储，例如SQLiteCookieStore。默认为None（只保存在内存中）。
+                存储的读写是同步的，只在首次访问某个域名和写回变更时发生。
+            retry_policy: 重试策略，决定哪些失败可以重试以及退避时间。默认为RetryPolicy()。
+            rate_limiter: 令牌桶限流器，每次请求尝试前在事件循环上等待令牌。默认为None（不限流）。
+        """
+        self.base_url = base_url.rstrip('/') if base_url else None
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter
+        self.max_connections = max_connections
+        self.connection_ttl = connection_ttl
+        self.enable_cookies = enable_cookies
+        self.idle_timeout = idle_timeout
+        self.max_concurrency = max_concurrency
+        self.ssl_context = ssl_context
+        self.json_loads = json_loads
+        self.decompress = decompress
+        self.compress_threshold = compress_threshold
+        self.default_headers = {
+            'User-Agent': 'Python-HTTPClient/1.0',
+            'Accept': '*/*'
+        }
+        if decompress:
+            self.default_headers['Accept-Encoding'] = ACCEPT_ENCODING
+        # Cookie管理器
+        self.cookie_jar = CookieJar(cookie_store) if enable_cookies else None
+        # 连接池，按(scheme, host, port)分主机管理连接
+        self._hosts: Dict[Hashable, _AsyncHostPool] = {}
+        # 全局并发限制，在首次请求时于事件循环内创建
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def get(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Response:
+        """
+        发起GET请求。
+
+        Args:
+            endpoint: 要请求的端点。
+            params: 要包含在请求中的查询参数。
+            headers: 要包含在请求中的头部信息。
+            timeout: 本次请求的超时时间（秒）。默认使用客户端的timeout。
+
+        Returns:
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+
+        Raises:
+            HTTPException: 如果请求失败。
+        """
+        url = self._build_url(endpoint, params)
+        return await self._make_request_with_retry('GET', url, headers=headers, timeout=timeout)
+
+    async def post(
+        self,
+        endpoint: str,
+        data: Optional[Union[Dict[str, Any], str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Response:
+        """
+        发起POST请求。
+
+        Args:
+            endpoint: 要请求的端点。
+            data: 要发送的表单数据或原始数据。
+            headers: 要包含在请求中的头部信息。
+            json_data: 要作为application/json发送的JSON数据。
+            timeout: 本次请求的超时时间（秒）。默认使用客户端的timeout。
+
+        Returns:
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+
+        Raises:
+            HTTPException: 如果请求失败。
+        """
+        url = self._build_url(endpoint)
+        if json_data:
+            headers = headers or {}
+            headers['Content-Type'] = 'application/json'
+            data = json.dumps(json_data)
+        return await self._make_request_with_retry('POST', url, data=data, headers=headers,
+                                                   timeout=timeout)
+
+    async def put(
+        self,
+        endpoint: str,
+        data: Optional[Union[Dict[str, Any], str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Response:
+        """
+        发起PUT请求。
+
+        Args:
+            endpoint: 要请求的端点。
+            data: 要发送的表单数据或原始数据。
+            headers: 要包含在请求中的头部信息。
+            json_data: 要作为application/json发送的JSON数据。
+            timeout: 本次请求的超时时间（秒）。默认使用客户端的timeout。
+
+        Returns:
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+
+        Raises:
+            HTTPException: 如果请求失败。
+        """
+        url = self._build_url(endpoint)
+        if json_data:
+            headers = headers or {}
+            headers['Content-Type'] = 'application/json'
+            data = json.dumps(json_data)
+        return await self._make_request_with_retry('PUT', url, data=data, headers=headers,
+                                                   timeout=timeout)
+
+    async def delete(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Response:
+        """
+        发起DELETE请求。
+
+        Args:
+            endpoint: 要请求的端点。
+            headers: 要包含在请求中的头部信息。
+            timeout: 本次请求的超时时间（秒）。默认使用客户端的timeout。
+
+        Returns:
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+
+        Raises:
+            HTTPException: 如果请求失败。
+        """
+        url = self._build_url(endpoint)
+        return await self._make_request_with_retry('DELETE', url, headers=headers, timeout=timeout)
+
+    async def map(
+        self,
+        requests: Iterable[BatchItem],
+        concurrency: int = 100,
+        per_host: Optional[int] = None,
+        ordered: bool = False,
+        stop_on_error: bool = False
+    ) -> AsyncIterator[BatchResult]:
+        """
+        在事件循环上并发执行一批请求，语义与HTTPClient.map相同。
+
+        同一主机上超出per_host的请求在调度器中排队，不会占用全局并发名额。
+
+        Args:
+            requests: BatchRequest或端点字符串（GET请求）的可迭代对象。
+            concurrency: 同时执行的最大请求数。默认为100。
+            per_host: 同一主机同时执行的最大请求数。默认为max_connections。
+            ordered: 是否按输入顺序返回结果。默认为False，按完成顺序返回。
+            stop_on_error: 是否在第一个请求失败时取消其余请求并抛出异常。默认为False。
+
+        Yields:
+            BatchResult，包含请求序号、请求、响应和异常。
+
+        Raises:
+            HTTPException: stop_on_error为True且有请求失败时。
+            ValueError: 如果concurrency或per_host小于1。
+        """
+        scheduler = BatchScheduler(requests, self._build_url, concurrency,
+                                   per_host or self.max_connections, ordered)
+        tasks: Dict[asyncio.Task, Any] = {}
+        try:
+            while True:
+                for job in scheduler.next_jobs():
+                    _, _, method, url, data, headers, _ = job
+                    task = asyncio.ensure_future(
+                        self._make_request_with_retry(method, url, data, headers))
+                    tasks[task] = job
+                if not tasks:
+                    break
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job = tasks.pop(task)
+                    error = task.exception()
+                    if error is not None and stop_on_error:
+                        raise error
+                    scheduler.finish(job, None if error else task.result(), error)
+                for result in scheduler.collect():
+                    yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def gather(
+        self,
+        requests: Iterable[BatchItem],
+        concurrency: int = 100,
+        per_host: Optional[int] = None,
+        stop_on_error: bool = False
+    ) -> List[BatchResult]:
+        """
+        并发执行一批请求，按输入顺序返回全部结果。参数含义与map相同。
+
+        Args:
+            requests: BatchRequest或端点字符串（GET请求）的可迭代对象。
+            concurrency: 同时执行的最大请求数。默认为100。
+            per_host: 同一主机同时执行的最大请求数。默认为max_connections。
+            stop_on_error: 是否在第一个请求失败时停止并抛出异常。默认为False。
+
+        Returns:
+            按输入顺序排列的BatchResult列表。
+
+        Raises:
+            HTTPException: stop_on_error为True且有请求失败时。
+        """
+        return [result async for result in self.map(requests, concurrency, per_host,
+                                                     ordered=True, stop_on_error=stop_on_error)]
+
+    def _host(self, key: Hashable) -> _AsyncHostPool:
+        """
+        获取指定主机的连接池，不存在时创建。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            主机连接池。
+        """
+        host = self._hosts.get(key)
+        if host is None:
+            host = self._hosts[key] = _AsyncHostPool(self.max_connections)
+        return host
+
+    def _take_idle(self, host: _AsyncHostPool) -> Optional[_StreamConnection]:
+        """
+        从主机连接池中取出一个可用的空闲连接，无效的连接会被关闭。
+
+        Args:
+            host: 主机连接池。
+
+        Returns:
+            可用的连接，没有时为None。
+        """
+        now = time.time()
+        while host.idle:
+            conn = host.idle.pop()
+            if (self.connection_ttl > 0 and now - conn.created_at >= self.connection_ttl) \
+                    or (self.idle_timeout > 0 and now - conn.last_used >= self.idle_timeout) \
+                    or not conn.is_alive():
+                conn.close()
+                continue
+            return conn
+        return None
+
+    async def _open_connection(self, parsed_url, key: Hashable) -> _StreamConnection:
+        """
+        建立到指定主机的新连接。
+
+        Args:
+            parsed_url: 解析后的URL对象。
+            key: 主机键。
+
+        Returns:
+            新建立的连接。
+        """
+        ssl_arg = None
+        if parsed_url.scheme == 'https':
+            if self.ssl_context is None:
+                self.ssl_context = ssl.create_default_context()
+            ssl_arg = self.ssl_context
+        reader, writer = await asyncio.open_connection(
+            parsed_url.hostname,
+            parsed_url.port or _DEFAULT_PORTS.get(parsed_url.scheme, 80),
+            ssl=ssl_arg
+        )
+        return _StreamConnection(reader, writer, key)
+
+    def _return_connection(self, host: _AsyncHostPool, conn: _StreamConnection):
+        """
+        将连接返回到主机连接池。
+
+        Args:
+            host: 主机连接池。
+            conn: 要返回的连接。
+        """
+        conn.last_used = time.time()
+        host.idle.append(conn)
+        if len(host.idle) > self.max_connections:
+            # 淘汰最久未使用的连接
+            host.idle.popleft().close()
+
+    def _build_request(self, method: str, parsed_url, path: str,
+                       request_headers: Dict[str, str], body: Optional[bytes]) -> bytes:
+        """
+        序列化HTTP/1.1请求。
+
+        Args:
+            method: HTTP方法。
+            parsed_url: 解析后的URL对象。
+            path: 请求路径和查询字符串。
+            request_headers: 请求头部。
+            body: 请求体。
+
+        Returns:
+            请求的字节串。
+
+        Raises:
+            ValueError: 如果方法、请求目标、主机或头部包含控制字符或换行。
+        """
+        host = parsed_url.hostname or ''
+        for label, token in (('方法', method), ('请求目标', path), ('主机', host)):
+            if not token or _ILLEGAL_TOKEN_CHARS.search(token):
+                raise ValueError(f"无效的{label}: {token!r}")
+        if ':' in host:
+            host = f'[{host}]'
+        if parsed_url.port and parsed_url.port != _DEFAULT_PORTS.get(parsed_url.scheme):
+            host = f'{host}:{parsed_url.port}'
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {host}']
+        for name, value in request_headers.items():
+            if name.lower() in _GENERATED_HEADERS:
+                continue
+            value = str(value)
+            if not _LEGAL_HEADER_NAME.fullmatch(name):
+                raise ValueError(f"无效的头部名称: {name!r}")
+            if _ILLEGAL_HEADER_VALUE_CHARS.search(value):
+                raise ValueError(f"头部{name}的值无效: {value!r}")
+            lines.append(f'{name}: {value}')
+        if body is not None or method in ('POST', 'PUT'):
+            lines.append(f'Content-Length: {len(body or b"")}')
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return head + body if body else head
+
+    async def _read_response(self, reader: asyncio.StreamReader, method: str,
+                             reused: bool = False
+                             ) -> Tuple[int, http.client.HTTPMessage, bytes, bool]:
+        """
+        读取并解析HTTP/1.1响应。
+
+        Args:
+            reader: 读取流。
+            method: 请求的HTTP方法。
+            reused: 连接是否为复用的空闲连接。复用的连接上第一行不是有效的状态行时，
+                说明空闲期间收到了多余的数据，抛出ConnectionResetError按复用失败处理。
+
+        Returns:
+            (状态码, 响应头部, 响应体, 是否需要关闭连接)。
+
+        Raises:
+            HTTPException: 如果响应格式错误。
+        """
+        while True:
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("服务器关闭了连接")
+            try:
+                version, status, _ = (status_line.decode('latin-1').rstrip('\r\n') + ' ').split(' ', 2)
+                status = int(status)
+            except ValueError:
+                if reused:
+                    raise ConnectionResetError(f"复用的连接上收到意外的数据: {status_line!r}")
+                raise HTTPException(f"无效的状态行: {status_line!r}")
+            reused = False
+
+            raw_headers: List[bytes] = []
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                raw_headers.append(line)
+                if len(raw_headers) > _MAX_HEADERS:
+                    raise HTTPException("响应头部过多")
+            # 跳过100 Continue等临时响应
+            if status < 200 and status != 101:
+                continue
+            break
+
+        message = http.client.parse_headers(io.BytesIO(b''.join(raw_headers) + b'\r\n'))
+        connection = (message.get('Connection') or '').lower()
+        will_close = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+        if method == 'HEAD' or status in _NO_BODY_STATUSES or status < 200:
+            return status, message, b'', will_close
+
+        if (message.get('Transfer-Encoding') or '').lower() == 'chunked':
+            body = await self._read_chunked(reader)
+        elif message.get('Content-Length') is not None:
+            body = await reader.readexactly(int(message['Content-Length']))
+        else:
+            # 没有长度信息，读到连接关闭为止
+            body = await reader.read()
+            will_close = True
+        return status, message, body, will_close
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        """
+        读取分块传输编码的响应体。
+
+        Args:
+            reader: 读取流。
+
+        Returns:
+            响应体字节串。
+        """
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # 跳过尾部头部
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def _send(self, conn: _StreamConnection, request: bytes, method: str,
+                    reused: bool = False) -> Tuple[int, http.client.HTTPMessage, bytes, bool]:
+        """
+        在连接上发送请求并读取响应。
+
+        Args:
+            conn: 连接。
+            request: 序列化后的请求。
+            method: HTTP方法。
+            reused: 连接是否为复用的空闲连接。
+
+        Returns:
+            (状态码, 响应头部, 响应体, 是否需要关闭连接)。
+        """
+        conn.writer.write(request)
+        await conn.writer.drain()
+        return await self._read_response(conn.reader, method, reused)
+
+    async def _make_request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Union[Dict[str, Any], str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        """
+        发起HTTP请求。
+
+        Args:
+            method: HTTP方法（GET、POST、PUT、DELETE）。
+            url: 要请求的完整URL。
+            data: 要随请求发送的数据。
+            headers: 要包含在请求中的头部信息。
+
+        Returns:
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+
+        Raises:
+            HTTPException: 如果请求失败。
+        """
+        parsed_url = urlparse(url)
+        request_headers = self._prepare_headers(parsed_url, headers)
+        body = self._compress_body(self._encode_body(data, request_headers), request_headers)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif body is not None and not isinstance(body, (bytes, bytearray)):
+            raise HTTPException("异步客户端暂不支持文件类对象或迭代器形式的请求体")
+        request = self._build_request(method, parsed_url, self._request_target(parsed_url),
+                                      request_headers, body)
+
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        host = self._host(key)
+        async with host.semaphore:
+            conn = self._take_idle(host)
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn = await self._open_connection(parsed_url, key)
+                try:
+                    status, message, response_data, will_close = await self._send(
+                        conn, request, method, reused)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    # 复用的连接可能已被服务器关闭或有多余数据，幂等请求在新连接上重试一次
+                    if not reused or method not in IDEMPOTENT_METHODS:
+                        raise
+                    conn.close()
+                    conn = None
+                    conn = await self._open_connection(parsed_url, key)
+                    status, message, response_data, will_close = await self._send(conn, request, method)
+            except asyncio.CancelledError:
+                if conn is not None:
+                    conn.close()
+                raise
+            except HTTPException:
+                if conn is not None:
+                    conn.close()
+                raise
+            except Exception as e:
+                if conn is not None:
+                    conn.close()
+                raise HTTPException(f"请求失败: {str(e)}") from e
+
+            if will_close:
+                conn.close()
+            else:
+                self._return_connection(host, conn)
+
+        # 处理Set-Cookie头部
+        if self.cookie_jar and self.enable_cookies:
+            self._process_set_cookie_header(message.get_all('Set-Cookie'),
+                                            parsed_url.hostname or '',
+                                            parsed_url.path or '/')
+
+        if self.decompress:
+            try:
+                response_data = decode_body(response_data, message.get('Content-Encoding'))
+            except Exception as e:
+                raise HTTPException(f"解压响应失败: {str(e)}") from e
+        return Response(status, dict(message.items()), response_data, self.json_loads)
+
+    async def _make_request_with_retry(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Union[Dict[str, Any], str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None
+    ) -> Response:
+        """
+        在全局并发限制和超时约束下发起HTTP请求，按retry_policy重试。
+
+        退避等待在事件循环上进行，不阻塞其他协程，也不占用并发名额。
+        重试次数用尽后抛出最后一次的异常或返回最后一次的响应。
+
+        Args:
+            method: HTTP方法（GET、POST、PUT、DELETE）。
+            url: 要请求的完整URL。
+            data: 要随请求发送的数据。
+            headers: 要包含在请求中的头部信息。
+            timeout: 单次尝试的超时时间（秒）。默认使用客户端的timeout。
+
+        Returns:
+            响应对象，兼容以字典方式访问状态码、头部和响应数据。
+
+        Raises:
+            HTTPException: 如果请求失败或超时。
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = self.timeout if timeout is None else timeout
+        policy = self.retry_policy
+        parsed_url = urlparse(url)
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        policy.record_request(key)
+
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                # 每次尝试（包括重试）消耗一个令牌，超出配额时直接抛出，不重试
+                await limiter.acquire_async(url)
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        self._make_request(method, url, data, headers), timeout)
+            except (HTTPException, asyncio.TimeoutError) as e:
+                delay = policy.retry_delay(method, attempt, key, error=e) \
+                    if attempt < self.max_retries else None
+                if delay is None:
+                    if isinstance(e, asyncio.TimeoutError):
+                        raise HTTPException(f"请求超时（{timeout}秒）: {url}") from e
+                    raise
+            else:
+                delay = policy.retry_delay(method, attempt, key, response=response) \
+                    if attempt < self.max_retries else None
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self):
+        """
+        关闭所有连接并清理连接池。
+        """
+        hosts = list(self._hosts.values())
+        self._hosts.clear()
+        writers = []
+        for host in hosts:
+            while host.idle:
+                conn = host.idle.pop()
+                conn.close()
+                writers.append(conn.writer)
+        for writer in writers:
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+        # 将Cookie的变更写回存储（存储由调用者关闭，可能被多个客户端共享）
+        if self.cookie_jar:
+            self.cookie_jar.flush()
+
+    async def __aenter__(self) -> 'AsyncHTTPClient':
+        """进入异步上下文。"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """退出异步上下文时关闭所有连接。"""
+        await self.close()
@@ -0,0 +1,225 @@
+"""
+HTTP客户端公共基类模块。
+
+同步客户端和异步客户端共享URL构建、请求头部准备、请求体编码、
+响应解码和Cookie处理等与传输方式无关的逻辑。
+"""
+
+import json
+import time
+from typing import IO, Any, Dict, Iterable, List, Optional, Union
+from urllib.parse import urlencode
+
+from .compression import compress_body
+from .cookies import parse_set_cookie
+from .multipart import MultipartEncoder
+from .response import header_value
+
+
+# 幂等方法：在复用的连接失效时可以安全地重发
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS', 'TRACE'})
+
+# 请求体类型：表单字典、字符串、字节串、multipart编码器、文件类对象或字节块的可迭代对象
+RequestBody = Union[Dict[str, Any], str, bytes, MultipartEncoder, IO[bytes], Iterable[bytes]]
+
+
+class BaseClient:
+    """
+    HTTP客户端的公共基类。
+
+    子类需要设置base_url、default_headers、cookie_jar、enable_cookies和
+    compress_threshold属性，并负责实际的请求发送。
+    """
+
+    def _build_url(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        从基础URL和端点构建完整URL。
+        
+        Args:
+            endpoint: 要附加到基础URL的端点。
+            params: 要附加到URL的查询参数。
+            
+        Returns:
+            完整的URL字符串。
+        """
+        if self.base_url:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        else:
+            url = endpoint
+
+        if params:
+            query_string = urlencode(params)
+            separator = '&' if '?' in url else '?'
+            url = f"{url}{separator}{query_string}"
+
+        return url
+
+    def _prepare_headers(self, parsed_url, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        合并默认头部、自定义头部和Cookie头部。
+        
+        Args:
+            parsed_url: 解析后的URL对象。
+            headers: 要包含在请求中的头部信息。
+            
+        Returns:
+            请求头部字典。
+        """
+        request_headers = self.default_headers.copy()
+        if headers:
+            request_headers.update(headers)
+        
+        # 添加Cookie头部
+        if self.cookie_jar and self.enable_cookies:
+            cookies = self.cookie_jar.get_cookies(parsed_url.hostname or '', parsed_url.path or '/')
+            if cookies:
+                cookie_header = '; '.join([f"{name}={value}" for name, value in cookies.items()])
+                request_headers['Cookie'] = cookie_header
+        return request_headers
+
+    @staticmethod
+    def _encode_body(data: Optional[RequestBody],
+                     request_headers: Dict[str, str]) -> Optional[Union[str, bytes, IO[bytes], Iterable[bytes]]]:
+        """
+        编码请求体。字典编码为表单数据并设置Content-Type头部。
+        
+        MultipartEncoder原样返回，并设置Content-Type和Content-Length头部。
+        字符串和字节串原样返回；文件类对象和可迭代对象也原样返回，
+        由传输层以Transfer-Encoding: chunked分块发送。
+        
+        Args:
+            data: 要随请求发送的数据。
+            request_headers: 请求头部字典，会被就地修改。
+            
+        Returns:
+            编码后的请求体，没有请求体时为None。
+        """
+        if isinstance(data, dict):
+            request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            return urlencode(data)
+        if isinstance(data, MultipartEncoder):
+            request_headers['Content-Type'] = data.content_type
+            request_headers['Content-Length'] = str(len(data))
+        return data
+
+    def _compress_body(self, body, request_headers: Dict[str, str]):
+        """
+        当请求体达到compress_threshold时使用gzip压缩并设置Content-Encoding头部。
+        
+        只压缩已知长度的请求体（字符串和字节串），调用方已指定
+        Content-Encoding时不做处理。
+        
+        Args:
+            body: 编码后的请求体。
+            request_headers: 请求头部字典，会被就地修改。
+            
+        Returns:
+            压缩后或原样的请求体。
+        """
+        threshold = self.compress_threshold
+        if threshold is None or not isinstance(body, (str, bytes, bytearray)):
+            return body
+        if len(body) < threshold or header_value(request_headers, 'Content-Encoding'):
+            return body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        request_headers['Content-Encoding'] = 'gzip'
+        return compress_body(body)
+
+    @staticmethod
+    def _is_replayable(data: Optional[RequestBody]) -> bool:
+        """
+        检查请求体是否可以重复发送。
+        
+        文件类对象和迭代器在发送后已被消耗，不能用于重试。MultipartEncoder
+        每次发送前把文件部分定位回起始位置，可以重复发送。
+        
+        Args:
+            data: 要随请求发送的数据。
+            
+        Returns:
+            是否可以重复发送。
+        """
+        return data is None or isinstance(data, (dict, str, bytes, bytearray, MultipartEncoder))
+
+    @staticmethod
+    def _request_target(parsed_url) -> str:
+        """
+        构造请求行中的路径部分。
+        
+        Args:
+            parsed_url: 解析后的URL对象。
+            
+        Returns:
+            路径和查询字符串。
+        """
+        path = parsed_url.path or '/'
+        if parsed_url.query:
+            path += '?' + parsed_url.query
+        return path
+
+    def _process_set_cookie_header(self, set_cookie_headers: Union[str, List[str], None],
+                                   domain: str, path: str):
+        """
+        处理Set-Cookie头部，提取并存储Cookie。
+
+        每个头部单独解析，不会按逗号拆分（Expires日期中包含逗号）。
+        已过期的Cookie（Max-Age小于等于0或Expires在过去）会删除已保存的同名Cookie。
+
+        Args:
+            set_cookie_headers: 全部Set-Cookie头部的值的列表，也可以是单个头部的值。
+            domain: 请求的主机名。
+            path: 请求的路径。
+        """
+        if not set_cookie_headers:
+            return
+        if isinstance(set_cookie_headers, str):
+            set_cookie_headers = [set_cookie_headers]
+
+        now = time.time()
+        for header in set_cookie_headers:
+            cookie = parse_set_cookie(header, domain, path, now)
+            if cookie is None:
+                continue
+            if cookie.expires is not None and cookie.expires <= now:
+                self.cookie_jar.delete_cookie(cookie.domain, cookie.path, cookie.name)
+                continue
+            self.cookie_jar.set_cookie(cookie.domain, cookie.path, cookie.name, cookie.value,
+                                       cookie.expires, cookie.host_only)
+
+    def set_cookie(self, domain: str, path: str, name: str, value: str, 
+                   expires: Optional[float] = None):
+        """
+        手动设置Cookie。
+        
+        Args:
+            domain: Cookie的域名。
+            path: Cookie的路径。
+            name: Cookie名称。
+            value: Cookie值。
+            expires: 过期时间（时间戳）。
+        """
+        if self.cookie_jar and self.enable_cookies:
+            self.cookie_jar.set_cookie(domain, path, name, value, expires)
+
+    def get_cookies(self, domain: str, path: str = '/') -> Dict[str, str]:
+        """
+        获取适用于指定域名和路径的Cookie。
+        
+        Args:
+            domain: 域名。
+            path: 路径。
+            
+        Returns:
+            Cookie字典。
+        """
+        if self.cookie_jar and self.enable_cookies:
+            return self.cookie_jar.get_cookies(domain, path)
+        return {}
+
+    def clear_cookies(self):
+        """
+        清空所有Cookie。
+        """
+        if self.cookie_jar and self.enable_cookies:
+            self.cookie_jar.clear()
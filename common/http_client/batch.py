@@ -0,0 +1,259 @@
+"""
+批量并发请求模块。
+
+HTTPClient.map/gather在有界线程池上并发执行一批请求，AsyncHTTPClient.map/gather
+在事件循环上并发执行，两者共享同一个调度器：
+
+- 请求从输入的可迭代对象中按需读取，不会一次性展开上万个请求；
+- 全局同时执行的请求数不超过concurrency，同一主机不超过per_host，
+  超出上限的请求在调度器中排队而不占用工作线程，慢主机不会拖住其他主机的请求；
+- 结果可以按完成顺序返回，也可以按输入顺序返回；
+- stop_on_error为True时，第一个失败的请求会取消尚未开始的请求并抛出异常。
+"""
+
+import json
+from collections import deque
+from typing import (Any, Callable, Deque, Dict, Hashable, Iterable, Iterator, List, NamedTuple,
+                    Optional, Tuple, Union)
+from urllib.parse import urlparse
+
+from .base import RequestBody
+
+
+# 调度器最多预读的请求数相对于concurrency的倍数，用于在某些主机达到上限时
+# 找到其他主机的请求
+LOOKAHEAD_FACTOR = 4
+
+# 按输入顺序返回结果时，已读取但尚未返回的请求数相对于concurrency的最大倍数，
+# 避免最前面的请求很慢时缓存的结果无限增长
+ORDERED_WINDOW_FACTOR = 16
+
+
+class BatchRequest:
+    """
+    批量请求中的单个请求。
+
+    字段与HTTPClient的get/post/put/delete参数一致。也可以直接传入端点字符串，
+    表示GET请求。
+    """
+
+    __slots__ = ('method', 'endpoint', 'params', 'data', 'json_data', 'headers')
+
+    def __init__(self, endpoint: str, method: str = 'GET',
+                 params: Optional[Dict[str, Any]] = None,
+                 data: Optional[RequestBody] = None,
+                 json_data: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        初始化请求。
+
+        Args:
+            endpoint: 要请求的端点或完整URL。
+            method: HTTP方法。默认为GET。
+            params: 查询参数。可选。
+            data: 请求体。可选。
+            json_data: 要作为application/json发送的JSON数据。可选。
+            headers: 请求头部。可选。
+        """
+        self.endpoint = endpoint
+        self.method = method.upper()
+        self.params = params
+        self.data = data
+        self.json_data = json_data
+        self.headers = headers
+
+    def prepare(self, build_url: Callable[..., str]) -> Tuple[str, str, Any, Optional[Dict[str, str]]]:
+        """
+        生成实际发送的请求参数。
+
+        Args:
+            build_url: 客户端的_build_url方法。
+
+        Returns:
+            (方法, 完整URL, 请求体, 头部)。
+        """
+        data = self.data
+        headers = self.headers
+        if self.json_data:
+            headers = dict(headers or {})
+            headers['Content-Type'] = 'application/json'
+            data = json.dumps(self.json_data)
+        return self.method, build_url(self.endpoint, self.params), data, headers
+
+    def __repr__(self) -> str:
+        """请求的简要表示。"""
+        return f"<BatchRequest {self.method} {self.endpoint}>"
+
+
+class BatchResult(NamedTuple):
+    """批量请求中单个请求的结果。"""
+
+    # 请求在输入中的序号（从0开始）
+    index: int
+    request: BatchRequest
+    # 成功时为响应对象，失败时为None
+    response: Any
+    # 失败时为异常，成功时为None
+    error: Optional[BaseException]
+
+    @property
+    def ok(self) -> bool:
+        """请求是否成功。"""
+        return self.error is None
+
+
+# 批量请求的输入项：BatchRequest或端点字符串（GET）
+BatchItem = Union[BatchRequest, str]
+
+# 调度器产生的任务：(序号, 请求, 方法, URL, 请求体, 头部, 主机键)
+_Job = Tuple[int, BatchRequest, str, str, Any, Optional[Dict[str, str]], Hashable]
+
+
+class BatchScheduler:
+    """
+    批量请求的调度器，与执行方式（线程池或事件循环）无关。
+
+    调用next_jobs()取得可以立即开始的任务，任务结束后调用finish()释放名额，
+    并通过collect()得到按要求顺序排列的结果。
+    """
+
+    def __init__(self, requests: Iterable[BatchItem], build_url: Callable[..., str],
+                 concurrency: int, per_host: int, ordered: bool):
+        """
+        初始化调度器。
+
+        Args:
+            requests: 请求的可迭代对象。
+            build_url: 客户端的_build_url方法。
+            concurrency: 全局最大并发数。
+            per_host: 每个主机的最大并发数。
+            ordered: 是否按输入顺序返回结果。
+
+        Raises:
+            ValueError: 如果concurrency或per_host小于1。
+        """
+        if concurrency < 1 or per_host < 1:
+            raise ValueError("concurrency和per_host必须大于等于1")
+        self._source = iter(requests)
+        self._build_url = build_url
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.ordered = ordered
+        self._lookahead = concurrency * LOOKAHEAD_FACTOR
+        self._window = concurrency * ORDERED_WINDOW_FACTOR if ordered else None
+        self._next_index = 0
+        self._exhausted = False
+        # 因主机达到上限而等待的任务，按主机分组，保持输入顺序
+        self._waiting: Dict[Hashable, Deque[_Job]] = {}
+        self._waiting_count = 0
+        self._host_active: Dict[Hashable, int] = {}
+        self.active = 0
+        # 按顺序返回时，已完成但前面还有未完成请求的结果
+        self._finished: Dict[int, BatchResult] = {}
+        self._next_yield = 0
+
+    def _read(self) -> Optional[_Job]:
+        """
+        从输入中读取下一个请求。
+
+        Returns:
+            任务，输入已读完时为None。
+        """
+        if self._exhausted:
+            return None
+        try:
+            item = next(self._source)
+        except StopIteration:
+            self._exhausted = True
+            return None
+        request = item if isinstance(item, BatchRequest) else BatchRequest(item)
+        index = self._next_index
+        self._next_index += 1
+        method, url, data, headers = request.prepare(self._build_url)
+        parsed = urlparse(url)
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        return index, request, method, url, data, headers, key
+
+    def next_jobs(self) -> List[_Job]:
+        """
+        取得可以立即开始的任务，并占用相应的并发名额。
+
+        Returns:
+            任务列表，可能为空。
+        """
+        jobs = []
+        # 先调度等待中的任务，保证同一主机上的请求按输入顺序开始
+        if self._waiting:
+            for key in list(self._waiting):
+                queue = self._waiting[key]
+                while (queue and self.active < self.concurrency
+                       and self._host_active.get(key, 0) < self.per_host):
+                    jobs.append(self._start(queue.popleft()))
+                    self._waiting_count -= 1
+                if not queue:
+                    del self._waiting[key]
+        while (self.active < self.concurrency and self._waiting_count < self._lookahead
+               and (self._window is None or self._next_index - self._next_yield < self._window)):
+            job = self._read()
+            if job is None:
+                break
+            key = job[-1]
+            if key in self._waiting or self._host_active.get(key, 0) >= self.per_host:
+                self._waiting.setdefault(key, deque()).append(job)
+                self._waiting_count += 1
+            else:
+                jobs.append(self._start(job))
+        return jobs
+
+    def _start(self, job: _Job) -> _Job:
+        """
+        占用任务的并发名额。
+
+        Args:
+            job: 任务。
+
+        Returns:
+            同一个任务。
+        """
+        key = job[-1]
+        self._host_active[key] = self._host_active.get(key, 0) + 1
+        self.active += 1
+        return job
+
+    def finish(self, job: _Job, response: Any, error: Optional[BaseException]):
+        """
+        记录任务结果并释放并发名额。
+
+        Args:
+            job: 已结束的任务。
+            response: 响应对象，失败时为None。
+            error: 异常，成功时为None。
+        """
+        key = job[-1]
+        remaining = self._host_active[key] - 1
+        if remaining:
+            self._host_active[key] = remaining
+        else:
+            del self._host_active[key]
+        self.active -= 1
+        self._finished[job[0]] = BatchResult(job[0], job[1], response, error)
+
+    def collect(self) -> Iterator[BatchResult]:
+        """
+        取出可以返回的结果。
+
+        Yields:
+            按完成顺序（ordered为False）或输入顺序（ordered为True）排列的结果。
+        """
+        if not self.ordered:
+            finished, self._finished = self._finished, {}
+            yield from finished.values()
+            return
+        while self._next_yield in self._finished:
+            yield self._finished.pop(self._next_yield)
+            self._next_yield += 1
+
+    @property
+    def done(self) -> bool:
+        """是否所有请求都已结束。"""
+        return self._exhausted and not self._waiting and self.active == 0
@@ -0,0 +1,5 @@
+"""
+HTTP客户端基准测试。
+
+每个bench_*.py脚本都可以直接运行，并会在本机启动一个测试服务器。
+"""
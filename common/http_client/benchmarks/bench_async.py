@@ -0,0 +1,85 @@
+"""
+同步客户端与异步客户端的吞吐量对比。
+
+同步客户端使用线程池（每个并发请求一个线程），异步客户端使用单线程事件循环，
+两者对同一个本地服务器发起相同数量的请求。
+
+用法::
+
+    python benchmarks/bench_async.py --requests 10000 --concurrency 100 --latency 0.005
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import AsyncHTTPClient, HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+
+def run_sync(url: str, requests: int, concurrency: int) -> float:
+    """
+    使用线程池驱动同步客户端。
+
+    Args:
+        url: 服务器基础URL。
+        requests: 请求总数。
+        concurrency: 线程数。
+
+    Returns:
+        耗时（秒）。
+    """
+    client = HTTPClient(base_url=url, max_connections=concurrency, max_retries=0)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda i: client.get("/get"), range(requests)))
+        return time.perf_counter() - start
+    finally:
+        client.close()
+
+
+async def run_async(url: str, requests: int, concurrency: int) -> float:
+    """
+    使用事件循环驱动异步客户端。
+
+    Args:
+        url: 服务器基础URL。
+        requests: 请求总数。
+        concurrency: 最大并发数。
+
+    Returns:
+        耗时（秒）。
+    """
+    async with AsyncHTTPClient(base_url=url, max_connections=concurrency,
+                               max_concurrency=concurrency, max_retries=0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client.get("/get") for _ in range(requests)))
+        return time.perf_counter() - start
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.005)
+    args = parser.parse_args()
+
+    for name, runner in (('sync', run_sync), ('async', run_async)):
+        with LocalServer(latency=args.latency) as server:
+            result = runner(server.url, args.requests, args.concurrency)
+            elapsed = asyncio.run(result) if asyncio.iscoroutine(result) else result
+            counters = server.counters
+        print(f"{name}: {args.requests / elapsed:.1f} req/s, "
+              f"耗时 {elapsed:.2f}s, 连接数 {counters['connections']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+轮询可缓存接口时响应缓存的效果：不使用缓存 vs HTTPCache。
+
+多个线程在固定时间内反复GET同一组URL，服务器每个请求延迟latency秒。分别测试三种服务器响应：
+max-age（新鲜期内直接命中）、no-cache加ETag（每次验证，返回304时不传输响应体）以及
+max-age加stale-while-revalidate（过期后先返回旧响应并在后台刷新）。统计客户端请求数、
+服务器收到的请求数、304数、服务器发送的字节数、客户端延迟p50/p99和缓存命中率。
+
+用法::
+
+    python benchmarks/bench_cache.py --threads 16 --urls 20 --duration 3
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPCache, HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+# 测试的服务器Cache-Control：(名称, Cache-Control)
+POLICIES = (
+    ('max-age=1', 'max-age=1'),
+    ('no-cache + ETag', 'no-cache'),
+    ('max-age=1, stale-while-revalidate=10', 'max-age=1, stale-while-revalidate=10'),
+)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench(args, cache_control: str, cache: Optional[HTTPCache]) -> dict:
+    """
+    在新的服务器上运行一轮轮询。
+
+    Args:
+        args: 命令行参数。
+        cache_control: 服务器响应的Cache-Control。
+        cache: 客户端使用的响应缓存，为None时不缓存。
+
+    Returns:
+        统计结果。
+    """
+    latencies = []
+    lock = threading.Lock()
+    stop = threading.Event()
+    with LocalServer(latency=args.latency, payload_size=args.payload) as server:
+        server.configure(cache_control=cache_control)
+        client = HTTPClient(base_url=server.url, max_connections=args.threads, cache=cache)
+
+        def worker(offset):
+            i = offset
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.get(f'/items/{i % args.urls}')
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                i += 1
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+        try:
+            for thread in threads:
+                thread.start()
+            time.sleep(args.duration)
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            client.close()
+        counters = server.counters
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'server_requests': counters['requests'],
+        'not_modified': counters['not_modified'],
+        'bytes_sent': counters['bytes_sent'],
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'hit_rate': cache.stats()['hit_rate'] if cache is not None else 0.0,
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--urls', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--payload', type=int, default=16 * 1024)
+    args = parser.parse_args()
+
+    for name, cache_control in POLICIES:
+        print(f"Cache-Control: {name}")
+        print(f"  不使用缓存: {bench(args, cache_control, None)}")
+        print(f"  HTTPCache:  {bench(args, cache_control, HTTPCache())}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+响应压缩的基准测试。
+
+本地服务器在客户端接受gzip时压缩响应体，并按配置限制带宽以模拟真实网络。
+对比关闭解压（identity）与开启解压（gzip）时的传输字节数和耗时。
+
+用法::
+
+    python benchmarks/bench_compression.py --payload-kb 512 --bandwidth-mb 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+
+def run(decompress: bool, requests: int, payload_size: int, bandwidth: int) -> dict:
+    """
+    顺序发起请求并统计传输情况。
+
+    Args:
+        decompress: 客户端是否协商压缩。
+        requests: 请求数。
+        payload_size: 响应体大小（字节）。
+        bandwidth: 服务器带宽（字节/秒），0表示不限制。
+
+    Returns:
+        测试结果字典。
+    """
+    with LocalServer(payload_size=payload_size, compress=True, bandwidth=bandwidth) as server:
+        client = HTTPClient(base_url=server.url, max_retries=0, decompress=decompress)
+        try:
+            start = time.perf_counter()
+            for _ in range(requests):
+                body = client.get("/get").body
+            elapsed = time.perf_counter() - start
+        finally:
+            client.close()
+        counters = server.counters
+    return {
+        'wire_bytes': counters['bytes_sent'],
+        'body_bytes': len(body) * requests,
+        'seconds': round(elapsed, 3),
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--payload-kb', type=int, default=512)
+    parser.add_argument('--bandwidth-mb', type=float, default=20,
+                        help="服务器带宽（MB/s），0表示不限制")
+    args = parser.parse_args()
+
+    payload_size = args.payload_kb * 1024
+    bandwidth = int(args.bandwidth_mb * 1024 * 1024)
+    identity = run(False, args.requests, payload_size, bandwidth)
+    compressed = run(True, args.requests, payload_size, bandwidth)
+    print(f"identity: {identity}")
+    print(f"gzip:     {compressed}")
+    print(f"传输字节减少: {1 - compressed['wire_bytes'] / identity['wire_bytes']:.1%}, "
+          f"耗时比: {compressed['seconds'] / identity['seconds']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
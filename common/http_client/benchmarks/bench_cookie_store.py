@@ -0,0 +1,151 @@
+"""
+Cookie持久化存储的启动时间和写回耗时基准测试。
+
+准备一个保存了大量Cookie的存储，对比两种方式：把整个Cookie管理器保存为一个JSON
+快照（启动时全部读入，每次保存重写整个文件），以及SQLiteCookieStore（按域名惰性
+加载，增量写回）。统计进程启动到第一次请求可以取到Cookie的耗时，以及修改少量Cookie
+后保存的耗时。
+
+用法::
+
+    python benchmarks/bench_cookie_store.py --cookies 200000 --hosts 20000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client.cookie_store import SQLiteCookieStore, StoredCookie
+from http_client.cookies import CookieJar
+
+# 每个主机上Cookie使用的路径
+PATHS = ('/', '/api', '/static/')
+
+# 启动后修改的Cookie数量
+CHANGED_COOKIES = 20
+
+
+def host_name(n: int) -> str:
+    """
+    生成第n个主机名。
+
+    Args:
+        n: 主机编号。
+
+    Returns:
+        主机名。
+    """
+    return f"h{n}.site{n // 100}.example.com"
+
+
+def records(cookies: int, hosts: int):
+    """
+    生成Cookie记录。
+
+    Args:
+        cookies: Cookie数量。
+        hosts: 主机数量。
+
+    Yields:
+        Cookie记录。
+    """
+    expires = time.time() + 86400
+    for i in range(cookies):
+        yield StoredCookie(host_name(i % hosts), PATHS[i % len(PATHS)], f"c{i}",
+                           f"value-{i:08d}", expires, False)
+
+
+def bench_snapshot(path: str, cookies: int, hosts: int) -> dict:
+    """
+    测试JSON快照方式。
+
+    Args:
+        path: 快照文件路径。
+        cookies: Cookie数量。
+        hosts: 主机数量。
+
+    Returns:
+        测试结果字典。
+    """
+    with open(path, 'w') as f:
+        json.dump([list(r) for r in records(cookies, hosts)], f)
+
+    start = time.perf_counter()
+    jar = CookieJar()
+    with open(path) as f:
+        for domain, cookie_path, name, value, expires, host_only in json.load(f):
+            jar.set_cookie(domain, cookie_path, name, value, expires, host_only)
+    jar.get_cookies(host_name(0), '/api')
+    startup = time.perf_counter() - start
+
+    for i in range(CHANGED_COOKIES):
+        jar.set_cookie(host_name(i), '/', f"new{i}", "v")
+    start = time.perf_counter()
+    snapshot = [[c.domain, c.path, c.name, c.value, c.expires, c.host_only]
+                for c in jar._cookies.values()]
+    with open(path, 'w') as f:
+        json.dump(snapshot, f)
+    save = time.perf_counter() - start
+    return {'startup_ms': round(startup * 1000, 1), 'save_ms': round(save * 1000, 2)}
+
+
+def bench_sqlite(path: str, cookies: int, hosts: int) -> dict:
+    """
+    测试SQLiteCookieStore方式。
+
+    Args:
+        path: 数据库文件路径。
+        cookies: Cookie数量。
+        hosts: 主机数量。
+
+    Returns:
+        测试结果字典。
+    """
+    with SQLiteCookieStore(path) as store:
+        store.write(records(cookies, hosts), [])
+
+    start = time.perf_counter()
+    store = SQLiteCookieStore(path)
+    jar = CookieJar(store, flush_threshold=0)
+    jar.get_cookies(host_name(0), '/api')
+    startup = time.perf_counter() - start
+    loaded = len(jar)
+
+    for i in range(CHANGED_COOKIES):
+        jar.set_cookie(host_name(i), '/', f"new{i}", "v")
+    start = time.perf_counter()
+    jar.flush()
+    save = time.perf_counter() - start
+    jar.close()
+    return {'startup_ms': round(startup * 1000, 1), 'save_ms': round(save * 1000, 2),
+            'cookies_loaded': loaded}
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cookies', type=int, default=200000)
+    parser.add_argument('--hosts', type=int, default=20000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        before = bench_snapshot(os.path.join(tmpdir, 'cookies.json'), args.cookies, args.hosts)
+        after = bench_sqlite(os.path.join(tmpdir, 'cookies.db'), args.cookies, args.hosts)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    print(f"JSON快照（全部加载，整体重写）: {before}")
+    print(f"SQLite（惰性加载，增量写回）: {after}")
+    print(f"启动加速: {before['startup_ms'] / after['startup_ms']:.0f}x, "
+          f"保存加速: {before['save_ms'] / after['save_ms']:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Cookie查找和过期清理的基准测试。
+
+在Cookie管理器中放入大量分布在不同主机和路径上的Cookie，对比旧的线性扫描实现与
+当前按域名标签和路径段建立索引的实现的查找耗时，以及清理少量过期Cookie的耗时。
+
+用法::
+
+    python benchmarks/bench_cookies.py --cookies 100000 --hosts 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client.cookies import CookieJar
+
+# 每个主机上Cookie使用的路径
+PATHS = ('/', '/api', '/api/v1', '/static/', '/account/settings')
+
+# 设置了过期时间的Cookie所占比例
+EXPIRING_RATIO = 0.1
+
+
+class LinearCookieJar:
+    """每次查找都扫描全部Cookie的Cookie管理器（旧实现）。"""
+
+    def __init__(self):
+        """初始化Cookie管理器。"""
+        self._cookies = {}
+
+    def set_cookie(self, domain, path, name, value, expires=None):
+        """设置Cookie。"""
+        self._cookies[(domain, path, name)] = {'value': value, 'expires': expires}
+
+    def get_cookies(self, domain, path):
+        """扫描全部Cookie，返回匹配的Cookie。"""
+        cookies = {}
+        current_time = time.time()
+        for (cookie_domain, cookie_path, name), data in self._cookies.items():
+            if not self._domain_match(domain, cookie_domain):
+                continue
+            if not self._path_match(path, cookie_path):
+                continue
+            if data['expires'] and data['expires'] < current_time:
+                continue
+            cookies[name] = data['value']
+        return cookies
+
+    @staticmethod
+    def _domain_match(request_domain, cookie_domain):
+        """检查域名是否匹配。"""
+        if request_domain == cookie_domain:
+            return True
+        cookie_domain = cookie_domain.lstrip('.')
+        return request_domain.endswith('.' + cookie_domain) or request_domain == cookie_domain
+
+    @staticmethod
+    def _path_match(request_path, cookie_path):
+        """检查路径是否匹配。"""
+        if cookie_path == '/':
+            return True
+        if not request_path.startswith(cookie_path):
+            return False
+        if len(request_path) == len(cookie_path):
+            return True
+        return cookie_path.endswith('/') or request_path[len(cookie_path)] == '/'
+
+    def clear_expired_cookies(self):
+        """扫描全部Cookie，删除过期的Cookie。"""
+        current_time = time.time()
+        expired = [key for key, data in self._cookies.items()
+                   if data['expires'] and data['expires'] < current_time]
+        for key in expired:
+            del self._cookies[key]
+        return len(expired)
+
+
+def fill(jar, cookies: int, hosts: int, seed: int):
+    """
+    向Cookie管理器中放入Cookie。
+
+    Args:
+        jar: Cookie管理器。
+        cookies: Cookie数量。
+        hosts: 主机数量。
+        seed: 随机数种子。
+
+    Returns:
+        设置了过期时间的Cookie数量。
+    """
+    rng = random.Random(seed)
+    now = time.time()
+    expiring = 0
+    for i in range(cookies):
+        host = f"h{i % hosts}.site{i % hosts // 100}.example.com"
+        expires = None
+        if rng.random() < EXPIRING_RATIO:
+            # 一半已过期，一半在一小时后过期
+            expires = now + rng.choice((-60, 3600))
+            expiring += 1
+        jar.set_cookie(host, PATHS[i % len(PATHS)], f"c{i}", "v", expires)
+    return expiring
+
+
+def measure(jar, lookups: int, hosts: int, seed: int) -> dict:
+    """
+    测量查找、清理过期Cookie以及没有过期Cookie时再次清理的耗时。
+
+    Args:
+        jar: 已填充的Cookie管理器。
+        lookups: 查找次数。
+        hosts: 主机数量。
+        seed: 随机数种子。
+
+    Returns:
+        测试结果字典。
+    """
+    rng = random.Random(seed)
+    targets = [(f"h{n}.site{n // 100}.example.com", '/api/v1/users')
+               for n in (rng.randrange(hosts) for _ in range(lookups))]
+    matched = 0
+    start = time.perf_counter()
+    for domain, path in targets:
+        matched += len(jar.get_cookies(domain, path))
+    lookup_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    removed = jar.clear_expired_cookies()
+    clear_elapsed = time.perf_counter() - start
+
+    # 清理线程定期运行，大多数时候没有新过期的Cookie
+    start = time.perf_counter()
+    jar.clear_expired_cookies()
+    idle_clear_elapsed = time.perf_counter() - start
+    return {
+        'lookup_us': round(lookup_elapsed / lookups * 1e6, 2),
+        'avg_matched': round(matched / lookups, 2),
+        'clear_ms': round(clear_elapsed * 1000, 2),
+        'expired_removed': removed,
+        'idle_clear_ms': round(idle_clear_elapsed * 1000, 3),
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--cookies', type=int, default=100000)
+    parser.add_argument('--hosts', type=int, default=10000)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    results = {}
+    for label, jar_class in (('线性扫描（旧）', LinearCookieJar), ('索引（新）', CookieJar)):
+        jar = jar_class()
+        start = time.perf_counter()
+        fill(jar, args.cookies, args.hosts, args.seed)
+        fill_elapsed = time.perf_counter() - start
+        result = measure(jar, args.lookups, args.hosts, args.seed)
+        result['fill_s'] = round(fill_elapsed, 2)
+        results[label] = result
+        print(f"{label}: {result}")
+    before, after = results.values()
+    print(f"查找加速: {before['lookup_us'] / after['lookup_us']:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
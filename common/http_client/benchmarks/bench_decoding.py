@@ -0,0 +1,100 @@
+"""
+响应解码的微基准测试。
+
+对比旧的立即解码方式（UTF-8解码后json.loads，失败回退为字符串）与Response的
+惰性解码，分别测试大JSON响应和二进制响应，以及标准库json与orjson解码器。
+
+用法::
+
+    python benchmarks/bench_decoding.py --size-mb 8 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import Response
+from http_client.response import orjson
+
+
+def eager_decode(data: bytes):
+    """
+    旧的立即解码方式。
+
+    Args:
+        data: 响应体。
+
+    Returns:
+        解码结果。
+    """
+    try:
+        return json.loads(data.decode('utf-8'))
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            return data
+
+
+def make_json(size: int) -> bytes:
+    """
+    生成约size字节的JSON数组。
+
+    Args:
+        size: 目标大小（字节）。
+
+    Returns:
+        JSON字节串。
+    """
+    item = {"id": 12345, "name": "benchmark item", "tags": ["a", "b", "c"], "score": 0.5}
+    item_size = len(json.dumps(item)) + 2
+    return json.dumps([item] * (size // item_size)).encode('utf-8')
+
+
+def measure(func, repeat: int) -> float:
+    """
+    测量函数的最佳耗时。
+
+    Args:
+        func: 被测函数。
+        repeat: 重复次数。
+
+    Returns:
+        最短耗时（毫秒）。
+    """
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    payloads = {
+        'json': (make_json(size), {'Content-Type': 'application/json'}),
+        'binary': (os.urandom(size), {'Content-Type': 'application/octet-stream'}),
+    }
+    stdlib_loads = json.loads
+
+    for name, (body, headers) in payloads.items():
+        print(f"== {name} ({len(body) / 1024 / 1024:.1f} MB) ==")
+        print(f"  立即解码（旧）:        {measure(lambda: eager_decode(body), args.repeat):9.2f} ms")
+        print(f"  惰性，未访问内容:      "
+              f"{measure(lambda: Response(200, headers, body), args.repeat):9.2f} ms")
+        print(f"  惰性，访问content:     "
+              f"{measure(lambda: Response(200, headers, body, stdlib_loads)['content'], args.repeat):9.2f} ms")
+        if name == 'json' and orjson is not None:
+            print(f"  惰性，orjson解码:      "
+                  f"{measure(lambda: Response(200, headers, body).json(), args.repeat):9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
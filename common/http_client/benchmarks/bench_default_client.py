@@ -0,0 +1,103 @@
+"""
+循环调用便捷函数get()：每次调用新建客户端 vs 共享的默认客户端 vs session()。
+
+每种方式在同一个本地服务器上顺序发起calls个GET请求，统计耗时、每次调用的p50/p99延迟和
+服务器接受的连接数。"每次新建"重现改动前便捷函数的做法：创建HTTPClient、请求、关闭。
+使用--tls时每条新连接还要完成一次TLS握手。
+
+用法::
+
+    python benchmarks/bench_default_client.py --calls 1000
+    python benchmarks/bench_default_client.py --calls 1000 --tls
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient, get, session
+from http_client.benchmarks.server import LocalServer
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def per_call_client(url: str):
+    """改动前的便捷函数：每次调用新建并关闭客户端。"""
+    client = HTTPClient()
+    try:
+        return client.get(url)
+    finally:
+        client.close()
+
+
+def run(call: Callable[[str], object], url: str, calls: int) -> dict:
+    """
+    顺序调用calls次并统计耗时。
+
+    Args:
+        call: 发起一次GET请求的函数。
+        url: 请求的URL。
+        calls: 调用次数。
+
+    Returns:
+        统计结果。
+    """
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        begin = time.perf_counter()
+        call(url)
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {'seconds': round(elapsed, 3),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 3)}
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=1000)
+    parser.add_argument('--tls', action='store_true')
+    args = parser.parse_args()
+
+    with LocalServer(tls=args.tls) as server:
+        if server.cafile:
+            os.environ['SSL_CERT_FILE'] = server.cafile
+        url = server.url + '/get'
+        print(f"顺序调用{args.calls}次:")
+        for name in ('per-call', 'default', 'session'):
+            before = server.counters['connections']
+            if name == 'per-call':
+                result = run(per_call_client, url, args.calls)
+            elif name == 'default':
+                result = run(get, url, args.calls)
+            else:
+                with session():
+                    result = run(get, url, args.calls)
+            result['connections'] = server.counters['connections'] - before
+            print(f"  {name:10s}{result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+连接频繁重建时DNS缓存的效果：每条新连接都解析主机名 vs 通过DNSCache复用解析结果。
+
+每个请求之前关闭连接池中的所有连接，模拟连接按存活时间回收或被服务器关闭的场景。
+本地解析localhost很快，--resolver-ms给解析器加上固定延迟，模拟上游DNS服务器的往返时间。
+
+用法::
+
+    python benchmarks/bench_dns.py --requests 500 --resolver-ms 5
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import DNSCache, HTTPClient
+from http_client.benchmarks.server import LocalServer
+from http_client.dns import system_resolver
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench(url: str, requests: int, cache: DNSCache) -> dict:
+    """
+    每个请求之前关闭所有连接，测量请求耗时。
+
+    Args:
+        url: 服务器地址。
+        requests: 请求数。
+        cache: 客户端使用的DNS缓存。
+
+    Returns:
+        统计结果。
+    """
+    client = HTTPClient(base_url=url, dns_cache=cache)
+    latencies = []
+    try:
+        start = time.perf_counter()
+        for _ in range(requests):
+            client._pool.close_all()
+            begin = time.perf_counter()
+            client.get('/item')
+            latencies.append(time.perf_counter() - begin)
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+    latencies.sort()
+    return {
+        'total_s': round(elapsed, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'resolver_calls': cache.stats()['misses'],
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--resolver-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    def resolver(host, port):
+        time.sleep(args.resolver_ms / 1000)
+        return system_resolver(host, port)
+
+    with LocalServer() as server:
+        url = server.url.replace('127.0.0.1', 'localhost')
+        for name, cache in (('每条连接都解析', DNSCache(ttl=0, negative_ttl=0, resolver=resolver)),
+                            ('DNSCache', DNSCache(resolver=resolver))):
+            print(f"{name}: {bench(url, args.requests, cache)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+HTTP/2多路复用与HTTP/1.1连接池的对比。
+
+多个线程共享同一个新建的客户端，对有固定处理延迟的本地服务器发起相同数量的请求：
+HTTP/1.1每个并发请求占用一条连接，HTTP/2所有请求在一条连接上多路复用。
+统计冷启动时第一批并发请求的耗时、之后的吞吐量和延迟p50/p99，以及服务器接受的
+连接数和TLS握手数。--tls使用自签名证书（需要openssl命令），此时HTTP/2通过ALPN协商。
+
+用法::
+
+    python benchmarks/bench_http2.py --requests 5000 --threads 64 --latency 0.005 --tls
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient
+from http_client.benchmarks.server import LocalH2Server, LocalServer
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(server, http2: bool, requests: int, threads: int) -> dict:
+    """
+    用线程池驱动一个客户端。
+
+    Args:
+        server: 已启动的LocalServer或LocalH2Server。
+        http2: 客户端是否使用HTTP/2。
+        requests: 请求总数。
+        threads: 线程数。
+
+    Returns:
+        测试结果字典。
+    """
+    if server.cafile:
+        # 让客户端默认的SSL上下文信任自签名证书
+        os.environ['SSL_CERT_FILE'] = server.cafile
+    client = HTTPClient(base_url=server.url, max_connections=threads, max_retries=0,
+                        http2=http2)
+
+    def timed(_):
+        start = time.perf_counter()
+        response = client.get('/item')
+        response.content
+        return time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            # 冷启动：第一批并发请求需要建立连接
+            start = time.perf_counter()
+            list(executor.map(timed, range(threads)))
+            first_burst = time.perf_counter() - start
+            start = time.perf_counter()
+            latencies = sorted(executor.map(timed, range(requests)))
+            elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+    counters = server.counters
+    return {
+        'first_burst_ms': round(first_burst * 1000, 1),
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'connections': counters['connections'],
+        'tls_handshakes': counters['handshakes'],
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--payload', type=int, default=1024)
+    parser.add_argument('--tls', action='store_true')
+    args = parser.parse_args()
+
+    with LocalServer(latency=args.latency, payload_size=args.payload, tls=args.tls) as server:
+        print(f"HTTP/1.1连接池: {run(server, False, args.requests, args.threads)}")
+    with LocalH2Server(latency=args.latency, payload_size=args.payload, tls=args.tls) as server:
+        print(f"HTTP/2多路复用: {run(server, True, args.requests, args.threads)}")
+
+
+if __name__ == '__main__':
+    main()
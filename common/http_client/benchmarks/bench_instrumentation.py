@@ -0,0 +1,189 @@
+"""
+插桩开销：没有钩子 vs 空钩子 vs MetricsCollector。
+
+第一部分用内存中的假连接（不经过网络）反复发送请求，测量客户端自身每个请求的CPU耗时，
+事件钩子的开销在这里最明显。第二部分用本地服务器测量真实往返的吞吐量，并打印收集器的
+按主机指标（连接池命中率、DNS/连接/首字节耗时分布、字节数）和Prometheus导出的行数。
+
+用法::
+
+    python benchmarks/bench_instrumentation.py --requests 20000 --http-requests 3000
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient, MetricsCollector
+from http_client.benchmarks.server import LocalServer
+
+# 假连接返回的响应体
+BODY = b'{"ok": true}'
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class _FakeMessage:
+    """假响应的头部对象。"""
+
+    def get_all(self, name, default=None):
+        return default
+
+
+class _FakeResponse:
+    """立即返回BODY的假响应。"""
+
+    status = 200
+    msg = _FakeMessage()
+
+    def getheaders(self):
+        return [('Content-Type', 'application/json'), ('Content-Length', str(len(BODY)))]
+
+    def read(self):
+        return BODY
+
+
+class _FakeConnection:
+    """不经过网络的假连接，套接字始终为None。"""
+
+    sock = None
+
+    def request(self, method, path, body=None, headers=None):
+        pass
+
+    def getresponse(self):
+        return _FakeResponse()
+
+    def close(self):
+        pass
+
+
+class _OfflineClient(HTTPClient):
+    """使用假连接的客户端。"""
+
+    def _create_connection(self, parsed_url):
+        return _FakeConnection()
+
+
+def _noop(event):
+    """什么也不做的钩子。"""
+    pass
+
+
+def _attach(client: HTTPClient, mode: str):
+    """按模式注册钩子，返回收集器（如果有）。"""
+    if mode == 'noop':
+        for event in ('connection', 'request', 'retry'):
+            client.add_hook(event, _noop)
+    elif mode == 'metrics':
+        return MetricsCollector().attach(client)
+    return None
+
+
+def bench_offline(requests: int, mode: str) -> dict:
+    """
+    用假连接测量每个请求的客户端耗时。
+
+    Args:
+        requests: 请求数。
+        mode: 'none'、'noop'或'metrics'。
+
+    Returns:
+        统计结果。
+    """
+    client = _OfflineClient(base_url='http://bench.invalid', enable_cookies=False)
+    _attach(client, mode)
+    try:
+        # 预热
+        for _ in range(1000):
+            client.get('/item')
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get('/item')
+        elapsed = time.perf_counter() - start
+    finally:
+        client.close()
+    return {'us_per_request': round(elapsed / requests * 1e6, 2),
+            'requests_per_s': round(requests / elapsed)}
+
+
+def bench_http(requests: int, mode: str) -> dict:
+    """
+    用本地服务器测量真实往返的吞吐量和延迟。
+
+    Args:
+        requests: 请求数。
+        mode: 'none'或'metrics'。
+
+    Returns:
+        统计结果，mode为'metrics'时包含收集器的指标摘要。
+    """
+    latencies = []
+    with LocalServer(payload_size=1024) as server:
+        client = HTTPClient(base_url=server.url)
+        collector = _attach(client, mode)
+        start = time.perf_counter()
+        try:
+            for _ in range(requests):
+                t0 = time.perf_counter()
+                client.get('/get')
+                latencies.append(time.perf_counter() - t0)
+        finally:
+            client.close()
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    result = {
+        'requests_per_s': round(requests / elapsed),
+        'p50_us': round(percentile(latencies, 50) * 1e6),
+        'p99_us': round(percentile(latencies, 99) * 1e6),
+    }
+    if collector is not None:
+        metrics = next(iter(collector.snapshot().values()))
+        histograms = metrics['histograms']
+        result.update({
+            'pool_hit_rate': metrics['pool_hit_rate'],
+            'connections_created': metrics['connections_created'],
+            'bytes_received': metrics['bytes_received'],
+            'connect_count': histograms['connect']['count'],
+            'ttfb_p50_s': histograms['ttfb']['p50'],
+            'prometheus_lines': len(collector.prometheus().splitlines()),
+        })
+    return result
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--http-requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    print("假连接（客户端CPU开销）:")
+    for mode in ('none', 'noop', 'metrics'):
+        print(f"  {mode:8s}{bench_offline(args.requests, mode)}")
+    print("本地服务器:")
+    for mode in ('none', 'metrics'):
+        print(f"  {mode:8s}{bench_http(args.http_requests, mode)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+连接存活检查策略的基准测试。
+
+对比旧的HEAD探测策略（每次复用连接前发送一次HEAD /请求）与当前的
+非阻塞套接字检查策略，统计本地长连接服务器上的请求吞吐量和服务器收到的请求数。
+
+用法::
+
+    python benchmarks/bench_liveness.py --requests 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+
+class HeadProbeClient(HTTPClient):
+    """复用连接前发送HEAD请求检查存活的客户端（旧策略）。"""
+
+    def _get_connection(self, parsed_url):
+        """
+        借出连接，复用的连接先用HEAD请求探测。
+
+        Args:
+            parsed_url: 解析后的URL对象。
+
+        Returns:
+            连接包装对象。
+        """
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        while True:
+            conn = self._pool.checkout(key, lambda: self._create_connection(parsed_url))
+            if not conn.sock:
+                return conn
+            try:
+                conn.sock.settimeout(1)
+                conn.request("HEAD", "/")
+                conn.getresponse().close()
+                conn.sock.settimeout(self.timeout)
+                return conn
+            except Exception:
+                self._pool.discard(conn)
+
+
+def run(client_class, requests: int, latency: float) -> dict:
+    """
+    使用指定的客户端类顺序发起请求。
+
+    Args:
+        client_class: 客户端类。
+        requests: 请求数。
+        latency: 服务器每个请求的处理延迟（秒）。
+
+    Returns:
+        测试结果字典。
+    """
+    with LocalServer(latency=latency) as server:
+        client = client_class(base_url=server.url, max_retries=0)
+        start = time.perf_counter()
+        for i in range(requests):
+            client.get("/get")
+        elapsed = time.perf_counter() - start
+        client.close()
+        counters = server.counters
+    return {
+        'rps': round(requests / elapsed, 1),
+        'server_requests': counters['requests'],
+        'connections_created': counters['connections'],
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    before = run(HeadProbeClient, args.requests, args.latency)
+    after = run(HTTPClient, args.requests, args.latency)
+    print(f"HEAD探测（旧）: {before}")
+    print(f"套接字检查（新）: {after}")
+    print(f"吞吐量提升: {after['rps'] / before['rps']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""
+负载测试：在不同并发数下驱动HTTPClient、便捷函数get/post/put/delete和AsyncHTTPClient，输出JSON结果。
+
+本地服务器（LocalServer）运行在父进程中，可配置延迟、响应体大小、长连接和gzip压缩；每个
+（驱动方式, 并发数）组合在独立的子进程中运行，互不影响峰值内存，也不和服务器争抢GIL。
+每个组合统计吞吐量（rps）、延迟百分位（p50/p90/p99/max）、服务器接受的连接数、
+子进程的峰值常驻内存和CPU时间。
+
+- client: 所有线程共享一个HTTPClient
+- helpers: 模块级便捷函数get/post/put/delete
+- async: 单线程事件循环中的AsyncHTTPClient，并发数为同时进行的协程数
+
+结果是JSON（--output写入文件，--json输出到标准输出），带有提交号和运行环境；
+--compare读取之前保存的结果，逐项打印吞吐量和p99延迟的变化。
+
+用法::
+
+    python benchmarks/bench_load.py --concurrency 1 8 64 --requests 2000 --output before.json
+    python benchmarks/bench_load.py --concurrency 1 8 64 --requests 2000 --compare before.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import http_client
+from http_client import AsyncHTTPClient, HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+# 驱动方式
+TARGETS = ('client', 'helpers', 'async')
+
+# 请求方法，按顺序轮流使用
+METHODS = ('get', 'post', 'put', 'delete')
+
+# POST和PUT请求发送的JSON请求体
+BODY = {'name': 'load-test', 'items': list(range(16))}
+
+# 请求路径
+PATH = '/load'
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def _functions(target: str, concurrency: int) -> Tuple[Dict[str, Callable], Optional[HTTPClient]]:
+    """
+    返回各请求方法对应的同步函数。
+
+    Args:
+        target: 'client'或'helpers'。
+        concurrency: 并发线程数，用作共享客户端的连接池大小。
+
+    Returns:
+        (方法名到函数的映射, 需要在结束时关闭的客户端或None)。
+    """
+    if target == 'helpers':
+        return {method: getattr(http_client, method) for method in METHODS}, None
+    client = HTTPClient(max_connections=concurrency, max_retries=0)
+    return {method: getattr(client, method) for method in METHODS}, client
+
+
+def run_threads(target: str, url: str, methods: List[str], concurrency: int,
+                requests: int) -> Tuple[List[float], int, float]:
+    """
+    用concurrency个线程发出requests个请求。
+
+    Args:
+        target: 'client'或'helpers'。
+        url: 请求的完整URL。
+        methods: 轮流使用的请求方法。
+        concurrency: 线程数。
+        requests: 请求总数。
+
+    Returns:
+        (每个请求的耗时列表（秒）, 失败的请求数, 总耗时（秒）)。
+    """
+    functions, client = _functions(target, concurrency)
+    calls = [(functions[method], {'json_data': BODY} if method in ('post', 'put') else {})
+             for method in methods]
+    latencies: List[float] = []
+    errors = [0]
+    # next()在GIL下是原子的，线程从同一个计数器领取请求序号
+    sequence = itertools.count()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker():
+        samples = []
+        failed = 0
+        barrier.wait()
+        for i in sequence:
+            if i >= requests:
+                break
+            function, kwargs = calls[i % len(calls)]
+            start = time.perf_counter()
+            try:
+                response = function(url, **kwargs)
+                if response.status_code >= 400:
+                    failed += 1
+            except Exception:
+                failed += 1
+            samples.append(time.perf_counter() - start)
+        latencies.extend(samples)
+        errors[0] += failed
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if client is not None:
+        client.close()
+    return latencies, errors[0], elapsed
+
+
+async def run_async(url: str, methods: List[str], concurrency: int,
+                    requests: int) -> Tuple[List[float], int, float]:
+    """
+    用concurrency个协程通过AsyncHTTPClient发出requests个请求。
+
+    Args:
+        url: 请求的完整URL。
+        methods: 轮流使用的请求方法。
+        concurrency: 协程数。
+        requests: 请求总数。
+
+    Returns:
+        (每个请求的耗时列表（秒）, 失败的请求数, 总耗时（秒）)。
+    """
+    latencies: List[float] = []
+    errors = 0
+    sequence = itertools.count()
+    async with AsyncHTTPClient(max_connections=concurrency, max_concurrency=concurrency,
+                               max_retries=0) as client:
+        calls = [(getattr(client, method), {'json_data': BODY} if method in ('post', 'put') else {})
+                 for method in methods]
+
+        async def worker():
+            nonlocal errors
+            for i in sequence:
+                if i >= requests:
+                    break
+                function, kwargs = calls[i % len(calls)]
+                start = time.perf_counter()
+                try:
+                    response = await function(url, **kwargs)
+                    if response.status_code >= 400:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def run_scenario(target: str, url: str, methods: List[str], concurrency: int,
+                 requests: int) -> dict:
+    """
+    在当前进程中运行一个组合并统计结果。
+
+    Args:
+        target: 驱动方式。
+        url: 请求的完整URL。
+        methods: 轮流使用的请求方法。
+        concurrency: 并发数。
+        requests: 请求总数。
+
+    Returns:
+        统计结果，延迟单位为毫秒。
+    """
+    cpu_start = time.process_time()
+    if target == 'async':
+        latencies, errors, elapsed = asyncio.run(run_async(url, methods, concurrency, requests))
+    else:
+        latencies, errors, elapsed = run_threads(target, url, methods, concurrency, requests)
+    cpu = time.process_time() - cpu_start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        'cpu_s': round(cpu, 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'threads_after': threading.active_count(),
+    }
+
+
+def environment() -> dict:
+    """
+    记录运行环境，便于比较不同机器或不同提交的结果。
+
+    Returns:
+        提交号、Python版本、平台、CPU数和运行时间。
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def compare(document: dict, baseline_path: str):
+    """
+    打印与之前保存的结果相比吞吐量和p99延迟的变化。
+
+    Args:
+        document: 本次的JSON结果。
+        baseline_path: 之前保存的JSON文件。
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        saved = json.load(f)
+    baseline = {(r['target'], r['concurrency']): r for r in saved['results']}
+    print(f"与{baseline_path}（提交{saved['environment']['commit']}）相比:")
+    if saved['server'] != document['server'] or saved['methods'] != document['methods']:
+        print(f"  注意：服务器配置或请求方法不同: {saved['server']} {saved['methods']}")
+    for result in document['results']:
+        before = baseline.get((result['target'], result['concurrency']))
+        if before is None:
+            continue
+        rps = (result['rps'] / before['rps'] - 1) * 100 if before['rps'] else 0.0
+        p99 = (result['p99_ms'] / before['p99_ms'] - 1) * 100 if before['p99_ms'] else 0.0
+        print(f"  {result['target']:8s}c={result['concurrency']:<5d}"
+              f"rps {before['rps']:>9.1f} -> {result['rps']:>9.1f} ({rps:+.1f}%)  "
+              f"p99 {before['p99_ms']:>8.2f} -> {result['p99_ms']:>8.2f}ms ({p99:+.1f}%)  "
+              f"connections {before['connections_created']} -> "
+              f"{result['connections_created']}")
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=list(TARGETS))
+    parser.add_argument('--methods', nargs='+', choices=METHODS, default=list(METHODS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 64])
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='每个组合的请求总数')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='服务器处理每个请求的延迟（秒）')
+    parser.add_argument('--payload-size', type=int, default=1024,
+                        help='响应体的近似大小（字节）')
+    parser.add_argument('--no-keep-alive', action='store_true',
+                        help='服务器每个响应后关闭连接')
+    parser.add_argument('--compress', action='store_true',
+                        help='客户端接受gzip时服务器压缩响应体')
+    parser.add_argument('--output', help='把JSON结果写入该文件')
+    parser.add_argument('--json', action='store_true', help='把JSON结果输出到标准输出')
+    parser.add_argument('--compare', help='与之前保存的JSON结果比较')
+    # 以下参数由父进程传给子进程
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        spec = json.loads(args.child)
+        print(json.dumps(run_scenario(**spec)))
+        return
+
+    server_config = {'latency': args.latency, 'payload_size': args.payload_size,
+                     'keep_alive': not args.no_keep_alive, 'compress': args.compress}
+    results = []
+    with LocalServer(**server_config) as server:
+        for target in args.targets:
+            for concurrency in args.concurrency:
+                spec = {'target': target, 'url': server.url + PATH, 'methods': args.methods,
+                        'concurrency': concurrency, 'requests': args.requests}
+                before = server.counters
+                process = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--child', json.dumps(spec)],
+                    capture_output=True, text=True)
+                after = server.counters
+                if process.returncode != 0:
+                    print(f"{target} c={concurrency} 失败: "
+                          f"{process.stderr.strip().splitlines()[-1]}", file=sys.stderr)
+                    continue
+                result = {'target': target, 'concurrency': concurrency}
+                result.update(json.loads(process.stdout))
+                result['connections_created'] = after['connections'] - before['connections']
+                result['server_requests'] = after['requests'] - before['requests']
+                results.append(result)
+                if not args.json:
+                    print(f"{target:8s}c={concurrency:<5d}{result['rps']:>9.1f} req/s  "
+                          f"p50 {result['p50_ms']:.2f}ms  p99 {result['p99_ms']:.2f}ms  "
+                          f"connections {result['connections_created']}  "
+                          f"rss {result['peak_rss_mb']}MB  errors {result['errors']}")
+
+    document = {'environment': environment(), 'server': server_config,
+                'methods': args.methods, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(document, ensure_ascii=False, indent=2))
+    if args.compare:
+        compare(document, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+批量并发请求（map/gather）的吞吐量基准测试。
+
+第一部分对比逐个调用client.get与不同并发数下的HTTPClient.map、AsyncHTTPClient.map
+的吞吐量；第二部分模拟一个慢主机和一个快主机混合的批次，对比不限制单主机并发的
+普通线程池与带单主机上限的map，统计快主机请求全部完成所需的时间。
+
+用法::
+
+    python benchmarks/bench_map.py --requests 2000 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import AsyncHTTPClient, HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+# 吞吐量测试使用的并发数
+CONCURRENCY_LEVELS = (8, 32, 64)
+
+
+def run_loop(url: str, requests: int) -> float:
+    """
+    逐个调用client.get。
+
+    Args:
+        url: 服务器基础URL。
+        requests: 请求数。
+
+    Returns:
+        耗时（秒）。
+    """
+    client = HTTPClient(base_url=url, max_retries=0)
+    try:
+        start = time.perf_counter()
+        for i in range(requests):
+            client.get(f"/item/{i}")
+        return time.perf_counter() - start
+    finally:
+        client.close()
+
+
+def run_map(url: str, requests: int, concurrency: int) -> float:
+    """
+    使用HTTPClient.map。
+
+    Args:
+        url: 服务器基础URL。
+        requests: 请求数。
+        concurrency: 并发数。
+
+    Returns:
+        耗时（秒）。
+    """
+    client = HTTPClient(base_url=url, max_connections=concurrency, max_retries=0)
+    try:
+        start = time.perf_counter()
+        for result in client.map((f"/item/{i}" for i in range(requests)), concurrency):
+            assert result.ok, result.error
+        return time.perf_counter() - start
+    finally:
+        client.close()
+
+
+async def run_async_map(url: str, requests: int, concurrency: int) -> float:
+    """
+    使用AsyncHTTPClient.map。
+
+    Args:
+        url: 服务器基础URL。
+        requests: 请求数。
+        concurrency: 并发数。
+
+    Returns:
+        耗时（秒）。
+    """
+    async with AsyncHTTPClient(base_url=url, max_connections=concurrency,
+                               max_concurrency=concurrency, max_retries=0) as client:
+        start = time.perf_counter()
+        async for result in client.map((f"/item/{i}" for i in range(requests)), concurrency):
+            assert result.ok, result.error
+        return time.perf_counter() - start
+
+
+def run_mixed(fast_url: str, slow_url: str, fast: int, slow: int, concurrency: int,
+              per_host_cap: bool) -> float:
+    """
+    慢主机的请求排在前面的混合批次。
+
+    Args:
+        fast_url: 快主机的基础URL。
+        slow_url: 慢主机的基础URL。
+        fast: 快主机的请求数。
+        slow: 慢主机的请求数。
+        concurrency: 并发数。
+        per_host_cap: 是否使用带单主机上限的map，否则使用普通线程池。
+
+    Returns:
+        快主机的请求全部完成所需的时间（秒）。
+    """
+    urls = [f"{slow_url}/slow/{i}" for i in range(slow)]
+    urls += [f"{fast_url}/fast/{i}" for i in range(fast)]
+    client = HTTPClient(max_connections=concurrency, max_retries=0)
+    done_at = []
+    try:
+        start = time.perf_counter()
+        if per_host_cap:
+            for result in client.map(urls, concurrency, per_host=concurrency // 4):
+                if result.index >= slow:
+                    done_at.append(time.perf_counter() - start)
+        else:
+            def fetch(url):
+                client.get(url)
+                if url.startswith(fast_url):
+                    done_at.append(time.perf_counter() - start)
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(fetch, urls))
+        return max(done_at)
+    finally:
+        client.close()
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--slow-latency', type=float, default=0.5)
+    args = parser.parse_args()
+
+    with LocalServer(latency=args.latency) as server:
+        elapsed = run_loop(server.url, args.requests)
+        print(f"逐个调用get: {args.requests / elapsed:.1f} req/s")
+        for concurrency in CONCURRENCY_LEVELS:
+            elapsed = run_map(server.url, args.requests, concurrency)
+            print(f"HTTPClient.map(concurrency={concurrency}): {args.requests / elapsed:.1f} req/s")
+            elapsed = asyncio.run(run_async_map(server.url, args.requests, concurrency))
+            print(f"AsyncHTTPClient.map(concurrency={concurrency}): "
+                  f"{args.requests / elapsed:.1f} req/s")
+
+    concurrency = CONCURRENCY_LEVELS[1]
+    slow = concurrency * 2
+    with LocalServer(latency=args.latency) as fast_server, \
+            LocalServer(latency=args.slow_latency) as slow_server:
+        for label, capped in (('普通线程池', False), (f'map(per_host={concurrency // 4})', True)):
+            elapsed = run_mixed(fast_server.url, slow_server.url, args.requests // 4, slow,
+                                concurrency, capped)
+            print(f"慢主机混合批次，{label}: 快主机请求全部完成用时 {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+大文件multipart上传的内存占用：整个请求体读入内存 vs MultipartEncoder（按块读取 / sendfile）。
+
+在临时目录创建size_mb大小的稀疏文件，每种方式在独立的子进程中上传到本地服务器
+（服务器按块读取并丢弃请求体），统计子进程的峰值常驻内存、耗时、CPU时间和吞吐量。
+
+- bytes: 把文件读入内存并拼接成完整的请求体（改动前调用者唯一的做法）
+- chunked-read: MultipartEncoder，文件没有文件描述符，按块读取后发送
+- sendfile: MultipartEncoder，磁盘文件通过socket.sendfile发送
+
+用法::
+
+    python benchmarks/bench_multipart.py --size-mb 2048
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient, MultipartEncoder
+from http_client.benchmarks.server import LocalServer
+
+# 上传方式
+MODES = ('bytes', 'chunked-read', 'sendfile')
+
+
+class _NoFileno:
+    """隐藏fileno的文件包装，让编码器按块读取文件。"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+
+    def read(self, size=-1):
+        return self._fileobj.read(size)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._fileobj.seek(offset, whence)
+
+    def tell(self):
+        return self._fileobj.tell()
+
+
+def upload(mode: str, url: str, path: str) -> dict:
+    """
+    在当前进程中按指定方式上传文件。
+
+    Args:
+        mode: 上传方式。
+        url: 上传地址。
+        path: 文件路径。
+
+    Returns:
+        统计结果。
+    """
+    client = HTTPClient(timeout=600, max_retries=0)
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    with open(path, 'rb') as f:
+        if mode == 'bytes':
+            boundary = uuid.uuid4().hex
+            body = b''.join([
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                f'filename="{os.path.basename(path)}"\r\n'
+                'Content-Type: application/octet-stream\r\n\r\n'.encode(),
+                f.read(),
+                f'\r\n--{boundary}--\r\n'.encode(),
+            ])
+            response = client.post(url, data=body, headers={
+                'Content-Type': f'multipart/form-data; boundary={boundary}'})
+        else:
+            fileobj = _NoFileno(f) if mode == 'chunked-read' else f
+            encoder = MultipartEncoder(files={'file': (os.path.basename(path), fileobj)})
+            response = client.post(url, data=encoder)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    client.close()
+    size = os.path.getsize(path)
+    return {
+        'status': response.status_code,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024),
+        'seconds': round(elapsed, 2),
+        'cpu_s': round(cpu, 2),
+        'mb_per_s': round(size / 1024 / 1024 / elapsed),
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=2048)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    # 以下参数由父进程传给子进程
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(upload(args.child, args.url, args.file)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory, LocalServer() as server:
+        path = os.path.join(directory, 'upload.bin')
+        with open(path, 'wb') as f:
+            f.truncate(args.size_mb * 1024 * 1024)
+        print(f"文件大小: {args.size_mb}MB")
+        for mode in args.modes:
+            result = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', mode,
+                 '--url', server.url + '/upload', '--file', path],
+                capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"  {mode:13s}失败: {result.stderr.strip().splitlines()[-1]}")
+                continue
+            print(f"  {mode:13s}{json.loads(result.stdout)}")
+        print(f"服务器收到的字节数: {server.counters['bytes_received']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+上游变慢并出错时熔断器和自适应并发限制器的效果模拟。
+
+本地服务器只有有限的工作线程，超出的请求在服务器端排队。固定数量的客户端线程持续
+发送请求，依次经历三个阶段：正常、上游变慢且一半请求返回503、恢复。对比不带保护的
+客户端与带CircuitBreaker和AIMDLimiter的客户端，统计每个阶段的成功数、失败数、
+被熔断器拒绝的请求数、实际发出的请求的客户端延迟p50/p99、服务器收到的请求数和服务器上同时排队的最大请求数。
+
+用法::
+
+    python benchmarks/bench_overload.py --threads 64 --workers 16
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import AIMDLimiter, CircuitBreaker, CircuitOpenError, HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+# 各阶段：(名称, 持续时间（秒）, 服务器延迟（秒）, 503比例)
+PHASES = (
+    ('正常', 2.0, 0.01, 0.0),
+    ('变慢且出错', 3.0, 0.1, 0.5),
+    ('恢复', 2.0, 0.01, 0.0),
+)
+
+# 熔断器打开后进入半开状态前等待的时间（秒），缩短以便在模拟中观察到恢复
+RECOVERY_TIMEOUT = 0.5
+
+# 请求被熔断器拒绝后客户端线程暂停的时间（秒），模拟调用者降级处理而不是原地空转
+REJECT_PAUSE = 0.01
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(server: LocalServer, threads: int, client: HTTPClient) -> List[dict]:
+    """
+    按阶段运行闭环负载。
+
+    Args:
+        server: 本地服务器。
+        threads: 客户端线程数。
+        client: 被测客户端。
+
+    Returns:
+        每个阶段的统计结果。
+    """
+    # 每个请求记录(结束时间, 耗时, 结果)，结果为'ok'、'failed'或'rejected'
+    samples = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            start = time.monotonic()
+            try:
+                outcome = 'ok' if client.get('/item').status_code == 200 else 'failed'
+            except CircuitOpenError:
+                outcome = 'rejected'
+            except Exception:
+                outcome = 'failed'
+            end = time.monotonic()
+            with lock:
+                samples.append((end, end - start, outcome))
+            if outcome == 'rejected':
+                time.sleep(REJECT_PAUSE)
+
+    # 先按第一个阶段配置服务器，再开始发送请求
+    server.configure(latency=PHASES[0][2], error_rate=PHASES[0][3])
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+
+    results = []
+    for name, duration, latency, error_rate in PHASES:
+        server.configure(latency=latency, error_rate=error_rate)
+        server.reset_max_active()
+        requests_before = server.counters['requests']
+        phase_start = time.monotonic()
+        time.sleep(duration)
+        phase_end = time.monotonic()
+        counters = server.counters
+        with lock:
+            phase = [s for s in samples if phase_start <= s[0] < phase_end]
+        # 延迟只统计实际发出的请求，被熔断器拒绝的请求单独计数
+        latencies = sorted(s[1] for s in phase if s[2] != 'rejected')
+        results.append({
+            'phase': name,
+            'ok': sum(1 for s in phase if s[2] == 'ok'),
+            'failed': sum(1 for s in phase if s[2] == 'failed'),
+            'rejected': sum(1 for s in phase if s[2] == 'rejected'),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'server_requests': counters['requests'] - requests_before,
+            'server_max_active': counters['max_active'],
+        })
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return results
+
+
+def bench(threads: int, workers: int, breaker: Optional[CircuitBreaker],
+          limiter: Optional[AIMDLimiter]) -> List[dict]:
+    """
+    在新的服务器上测试一种客户端配置。
+
+    Args:
+        threads: 客户端线程数。
+        workers: 服务器工作线程数。
+        breaker: 熔断器，为None时不使用。
+        limiter: 并发限制器，为None时不使用。
+
+    Returns:
+        每个阶段的统计结果。
+    """
+    with LocalServer(workers=workers) as server:
+        client = HTTPClient(base_url=server.url, max_connections=threads,
+                            circuit_breaker=breaker, concurrency_limiter=limiter)
+        try:
+            return run(server, threads, client)
+        finally:
+            client.close()
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    print("不带保护:")
+    for row in bench(args.threads, args.workers, None, None):
+        print(f"  {row}")
+
+    breaker = CircuitBreaker(recovery_timeout=RECOVERY_TIMEOUT)
+    limiter = AIMDLimiter(max_limit=args.threads)
+    print("CircuitBreaker + AIMDLimiter:")
+    for row in bench(args.threads, args.workers, breaker, limiter):
+        print(f"  {row}")
+    print(f"  熔断器: {breaker.snapshot()}")
+    print(f"  并发限制器: {limiter.snapshot()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+连接池多线程压力测试。
+
+多个工作线程共享同一个HTTPClient，对本地服务器并发发起请求，
+统计吞吐量、服务器接受的连接数，并检查结束后连接池计数是否一致。
+
+用法::
+
+    python benchmarks/bench_pool.py --threads 64 --requests 200
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+
+def run(threads: int, requests_per_thread: int, max_connections: int) -> dict:
+    """
+    执行一次压力测试。
+
+    Args:
+        threads: 工作线程数。
+        requests_per_thread: 每个线程发起的请求数。
+        max_connections: 每个主机保留的最大连接数。
+
+    Returns:
+        测试结果字典。
+    """
+    with LocalServer() as server:
+        client = HTTPClient(base_url=server.url, max_connections=max_connections,
+                            max_retries=0)
+        errors = []
+        barrier = threading.Barrier(threads + 1)
+
+        def worker():
+            barrier.wait()
+            for i in range(requests_per_thread):
+                try:
+                    client.get("/get", params={"i": i})
+                except Exception as e:
+                    errors.append(e)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in workers:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        pool_stats = client._pool.stats()
+        client.close()
+        counters = server.counters
+
+    total = threads * requests_per_thread
+    return {
+        'threads': threads,
+        'requests': total,
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'rps': round(total / elapsed, 1),
+        'connections_created': counters['connections'],
+        # 所有请求结束后，连接总数应等于空闲连接数
+        'pool_consistent': all(s['idle'] == s['total'] for s in pool_stats.values()),
+        'pool': {str(k): v for k, v in pool_stats.items()},
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--max-connections', type=int, default=10)
+    args = parser.parse_args()
+
+    result = run(args.threads, args.requests, args.max_connections)
+    for name, value in result.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+限流器的开销：没有匹配的规则 vs MemoryBackend vs SharedFileBackend。
+
+第一部分让令牌永远充足（rate很大），测量每次acquire的耗时（单线程和多线程），即每个请求
+额外的开销。第二部分用多个线程以阻塞方式按rate限流运行duration秒，检查实际速率和突发量。
+
+用法::
+
+    python benchmarks/bench_ratelimit.py --calls 100000 --threads 8 --rate 200 --duration 2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import MemoryBackend, RateLimit, RateLimiter, SharedFileBackend
+
+# 被限流的URL
+URL = 'https://api.example.com/cgi-bin/message/send'
+
+
+def _run_threads(threads: int, target) -> float:
+    """在threads个线程中运行target，返回总耗时（秒）。"""
+    workers = [threading.Thread(target=target) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def bench_overhead(limiter: RateLimiter, calls: int, threads: int) -> dict:
+    """
+    测量令牌充足时每次acquire的耗时。
+
+    Args:
+        limiter: 限流器。
+        calls: 每个线程的调用次数。
+        threads: 线程数。
+
+    Returns:
+        统计结果。
+    """
+    def worker():
+        acquire = limiter.acquire
+        for _ in range(calls):
+            acquire(URL)
+
+    elapsed = _run_threads(threads, worker)
+    total = calls * threads
+    return {'us_per_call': round(elapsed / total * 1e6, 2),
+            'calls_per_s': round(total / elapsed)}
+
+
+def bench_accuracy(limiter: RateLimiter, threads: int, duration: float) -> dict:
+    """
+    多线程阻塞限流duration秒，统计实际速率。
+
+    Args:
+        limiter: 限流器。
+        threads: 线程数。
+        duration: 运行时间（秒）。
+
+    Returns:
+        统计结果。
+    """
+    counts = [0] * threads
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        while time.perf_counter() < deadline:
+            limiter.acquire(URL)
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    elapsed = time.perf_counter() - start
+    return {'allowed': sum(counts), 'achieved_rate': round(sum(counts) / elapsed, 1),
+            'waited_s': limiter.stats()[URL.split('/')[2]]['waited_s']}
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=200)
+    parser.add_argument('--duration', type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'quota')
+        backends = {
+            'memory': MemoryBackend,
+            'shared-file': lambda: SharedFileBackend(path),
+        }
+        unlimited = RateLimit(1e12, burst=1e12)
+        print("令牌充足时每次acquire的耗时:")
+        limiter = RateLimiter({'other.example.com': unlimited})
+        for threads in (1, args.threads):
+            print(f"  {'no-match':12s}threads={threads}: "
+                  f"{bench_overhead(limiter, args.calls // threads, threads)}")
+        for name, backend in backends.items():
+            limiter = RateLimiter({'api.example.com': unlimited}, backend=backend())
+            for threads in (1, args.threads):
+                print(f"  {name:12s}threads={threads}: "
+                      f"{bench_overhead(limiter, args.calls // threads, threads)}")
+
+        print(f"阻塞限流，目标{args.rate}/s，突发{args.rate / 10:g}，{args.threads}个线程:")
+        for name, backend in backends.items():
+            limiter = RateLimiter({'api.example.com': RateLimit(args.rate, burst=args.rate / 10)},
+                                  backend=backend())
+            if isinstance(limiter.backend, SharedFileBackend):
+                limiter.backend.reset()
+            print(f"  {name:12s}{bench_accuracy(limiter, args.threads, args.duration)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+上游短暂故障时重试流量的分布。
+
+大量线程同时请求一个正在返回503的服务器，对比三种重试策略：原来的固定指数退避
+（所有线程在同一时刻一起重试）、只有完全抖动、以及RetryPolicy默认的完全抖动加重试预算。
+统计故障期间服务器收到的请求数、每个时间窗口内的重试峰值，以及最终成功的请求数。
+
+用法::
+
+    python benchmarks/bench_retry.py --threads 200 --outage 1.0
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient, RetryPolicy
+from http_client.benchmarks.server import LocalServer
+
+# 统计请求峰值的时间窗口（秒）
+WINDOW = 0.01
+
+# 各策略使用相同的退避基数（秒），与原来的2^attempt相比缩小以缩短测试时间
+BACKOFF_BASE = 0.25
+
+# 每个请求的最大重试次数
+MAX_RETRIES = 4
+
+
+class LockstepPolicy(RetryPolicy):
+    """原来的重试方式：固定的指数退避，没有抖动，没有重试预算。"""
+
+    def __init__(self):
+        """初始化策略。"""
+        super().__init__(backoff_base=BACKOFF_BASE, budget=None)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        固定的指数退避时间。
+
+        Args:
+            attempt: 已经失败的尝试序号（从0开始）。
+
+        Returns:
+            等待时间（秒）。
+        """
+        return self.backoff_base * (2 ** attempt)
+
+
+def run(policy: RetryPolicy, threads: int, outage: float) -> dict:
+    """
+    在故障开始时让所有线程同时发起请求。
+
+    Args:
+        policy: 重试策略。
+        threads: 线程数。
+        outage: 故障持续时间（秒）。
+
+    Returns:
+        测试结果字典。
+    """
+    with LocalServer() as server:
+        client = HTTPClient(base_url=server.url, max_connections=threads,
+                            max_retries=MAX_RETRIES, retry_policy=policy)
+        statuses = Counter()
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads + 1)
+
+        def worker():
+            barrier.wait()
+            try:
+                status = client.get('/item').status_code
+            except Exception:
+                status = 'error'
+            with lock:
+                statuses[status] += 1
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        server.start_outage(outage)
+        start = time.monotonic()
+        barrier.wait()
+        for thread in workers:
+            thread.join()
+        elapsed = time.monotonic() - start
+        client.close()
+
+        arrivals = [t - start for t in server.arrivals]
+        during = [t for t in arrivals if t < outage]
+        # 前threads个请求是各线程的首次请求，之后的都是重试
+        windows = Counter(int(t / WINDOW) for t in arrivals[threads:])
+        retry_peak = max(windows.values(), default=0)
+        return {
+            'requests_during_outage': len(during),
+            'total_requests': len(arrivals),
+            'retry_peak_per_window': retry_peak,
+            'succeeded': statuses[200],
+            'elapsed_s': round(elapsed, 2),
+        }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--outage', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{args.threads}个线程，故障{args.outage}秒，最多重试{MAX_RETRIES}次，"
+          f"重试峰值按{int(WINDOW * 1000)}ms窗口统计")
+    print(f"固定指数退避: {run(LockstepPolicy(), args.threads, args.outage)}")
+    print(f"完全抖动: {run(RetryPolicy(backoff_base=BACKOFF_BASE, budget=None), args.threads, args.outage)}")
+    print(f"完全抖动+重试预算: {run(RetryPolicy(backoff_base=BACKOFF_BASE), args.threads, args.outage)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+大量客户端的后台维护：每个客户端一个清理线程 vs 进程内共享的调度器。
+
+创建clients个客户端（按租户创建客户端的服务），把清理间隔缩短为interval秒，空闲运行
+duration秒。统计创建耗时、线程数、空闲期间的进程CPU时间和维护执行次数，最后丢弃全部
+客户端（不调用close），统计能被垃圾回收的客户端数。
+
+用法::
+
+    python benchmarks/bench_scheduler.py --clients 1000 --interval 0.5 --duration 5
+"""
+
+import argparse
+import gc
+import os
+import sys
+import threading
+import time
+import weakref
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import http_client
+from http_client import HTTPClient, default_scheduler
+
+
+class _ThreadPerClient(HTTPClient):
+    """改动前的实现：每个客户端启动一个后台线程，线程持有客户端的强引用。"""
+
+    def _schedule_maintenance(self):
+        self._stop = threading.Event()
+        thread = threading.Thread(target=self._loop, daemon=True)
+        thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(http_client.CLEANUP_INTERVAL):
+            try:
+                self._run_maintenance()
+            except Exception:
+                pass
+
+    def close(self):
+        self._stop.set()
+        super().close()
+
+
+class _Counting:
+    """统计维护执行次数的混入类。"""
+
+    runs = 0
+
+    def _run_maintenance(self):
+        _Counting.runs += 1
+        super()._run_maintenance()
+
+
+class _CountingThreaded(_Counting, _ThreadPerClient):
+    pass
+
+
+class _CountingShared(_Counting, HTTPClient):
+    pass
+
+
+def bench(args, client_class) -> dict:
+    """
+    创建客户端并空闲运行。
+
+    Args:
+        args: 命令行参数。
+        client_class: 客户端类。
+
+    Returns:
+        统计结果。
+    """
+    _Counting.runs = 0
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    clients = [client_class() for _ in range(args.clients)]
+    created = time.perf_counter() - start
+    threads = threading.active_count() - threads_before
+
+    cpu_start = time.process_time()
+    time.sleep(args.duration)
+    cpu = time.process_time() - cpu_start
+    runs = _Counting.runs
+
+    refs = [weakref.ref(client) for client in clients]
+    del clients
+    gc.collect()
+    collected = sum(ref() is None for ref in refs)
+    # 关闭没有被回收的客户端，避免影响下一组测试
+    client = None
+    for ref in refs:
+        client = ref()
+        if client is not None:
+            client.close()
+    del client
+    # 等待关闭的客户端的线程退出
+    deadline = time.monotonic() + args.interval * 2 + 1
+    while threading.active_count() > threads_before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return {
+        'create_ms': round(created * 1000, 1),
+        'extra_threads': threads,
+        'idle_cpu_ms': round(cpu * 1000, 1),
+        'maintenance_runs': runs,
+        'collected_without_close': collected,
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--interval', type=float, default=0.5)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    # 缩短清理间隔，让空闲期间的维护开销可以测量
+    http_client.CLEANUP_INTERVAL = args.interval
+    print(f"每个客户端一个线程: {bench(args, _CountingThreaded)}")
+    print(f"共享调度器:         {bench(args, _CountingShared)}")
+    print(f"调度器状态:         {default_scheduler().stats()}")
+
+
+if __name__ == '__main__':
+    main()
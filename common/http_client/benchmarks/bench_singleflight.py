@@ -0,0 +1,112 @@
+"""
+热点数据过期时的惊群效应：不合并请求 vs single_flight=True。
+
+每一轮所有线程在同一时刻（threading.Barrier）GET同一个URL，模拟缓存过期后大量调用者
+同时回源。服务器每个请求延迟latency秒。统计服务器收到的请求数、服务器同时处理的最大请求数、
+客户端延迟p50/p99和总耗时。
+
+用法::
+
+    python benchmarks/bench_singleflight.py --threads 200 --rounds 20 --latency 0.05
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import List
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench(args, single_flight: bool) -> dict:
+    """
+    在新的服务器上运行若干轮惊群请求。
+
+    Args:
+        args: 命令行参数。
+        single_flight: 客户端是否合并请求。
+
+    Returns:
+        统计结果。
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+    with LocalServer(latency=args.latency, payload_size=args.payload) as server:
+        client = HTTPClient(base_url=server.url, max_connections=args.threads,
+                            single_flight=single_flight)
+
+        def worker():
+            for _ in range(args.rounds):
+                barrier.wait()
+                start = time.perf_counter()
+                try:
+                    client.get('/hot-key')
+                except Exception as e:
+                    errors.append(e)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        start = time.perf_counter()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            client.close()
+        elapsed = time.perf_counter() - start
+        counters = server.counters
+    latencies.sort()
+    return {
+        'client_requests': len(latencies),
+        'errors': len(errors),
+        'server_requests': counters['requests'],
+        'server_max_active': counters['max_active'],
+        'server_connections': counters['connections'],
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'total_s': round(elapsed, 2),
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--payload', type=int, default=4096)
+    args = parser.parse_args()
+
+    print(f"不合并请求:         {bench(args, False)}")
+    print(f"single_flight=True: {bench(args, True)}")
+
+
+if __name__ == '__main__':
+    main()
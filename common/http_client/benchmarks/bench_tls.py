@@ -0,0 +1,121 @@
+"""
+TLS重新连接的开销：每条连接新建SSL上下文且不复用会话 vs 客户端共享SSL上下文并恢复会话。
+
+模拟连接超过connection_ttl被回收的场景：每个请求之前关闭连接池中的所有连接，迫使客户端重新
+建立TLS连接。旧的做法每条连接都调用ssl.create_default_context()（加载系统CA证书）并进行
+完整握手；新的做法复用客户端的SSL上下文，并用缓存的会话恢复握手。另外单独测量创建默认SSL
+上下文的耗时。
+
+用法::
+
+    python benchmarks/bench_tls.py --requests 200
+"""
+
+import argparse
+import os
+import ssl
+import sys
+import time
+from typing import List
+
+# 将common目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from http_client import HTTPClient
+from http_client.benchmarks.server import LocalServer
+
+# 测量创建默认SSL上下文耗时的重复次数
+CONTEXT_ROUNDS = 20
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    计算百分位数。
+
+    Args:
+        values: 已排序的样本。
+        p: 百分位（0到100）。
+
+    Returns:
+        百分位数，没有样本时为0。
+    """
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class _FreshContextClient(HTTPClient):
+    """每条连接新建SSL上下文且不恢复会话的客户端，模拟改动之前的行为。"""
+
+    def _create_connection(self, parsed_url):
+        """创建连接，https连接换用新建的SSL上下文。"""
+        conn = super()._create_connection(parsed_url)
+        if parsed_url.scheme == 'https':
+            conn._context = ssl.create_default_context()
+            # 每条连接使用唯一的键，查不到缓存的会话，握手耗时仍记入客户端的统计
+            conn._session_key = object()
+        return conn
+
+
+def bench_context() -> float:
+    """
+    测量创建默认SSL上下文的平均耗时。
+
+    Returns:
+        平均耗时（毫秒）。
+    """
+    start = time.perf_counter()
+    for _ in range(CONTEXT_ROUNDS):
+        ssl.create_default_context()
+    return (time.perf_counter() - start) / CONTEXT_ROUNDS * 1000
+
+
+def bench(client: HTTPClient, requests: int) -> dict:
+    """
+    每个请求之前关闭所有连接，测量请求耗时。
+
+    Args:
+        client: 被测客户端。
+        requests: 请求数。
+
+    Returns:
+        统计结果。
+    """
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        client._pool.close_all()
+        begin = time.perf_counter()
+        client.get('/item')
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'total_s': round(elapsed, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'tls': client.tls_stats(),
+    }
+
+
+def main():
+    """命令行入口。"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"ssl.create_default_context(): {bench_context():.2f}ms")
+    with LocalServer(tls=True) as server:
+        # 让两种客户端都信任本地服务器的自签名证书
+        os.environ['SSL_CERT_FILE'] = server.cafile
+        for name, cls in (('每条连接新建上下文', _FreshContextClient),
+                          ('共享上下文 + 会话恢复', HTTPClient)):
+            client = cls(base_url=server.url)
+            try:
+                print(f"{name}: {bench(client, args.requests)}")
+            finally:
+                client.close()
+
+
+if __name__ == '__main__':
+    main()
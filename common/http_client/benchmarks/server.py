@@ -0,0 +1,731 @@
+"""
+基准测试用的本地HTTP服务器。
+
+服务器运行在后台线程中，支持HTTP/1.1长连接，可配置响应延迟、响应体大小、
+gzip压缩和带宽限制，可以模拟一段时间内返回503的故障或按比例随机返回503，并统计接受的TCP连接数、
+处理的请求数、错误响应数、发送的响应体字节数以及每个请求的到达时间。
+
+LocalH2Server是对应的HTTP/2服务器，需要安装h2。两种服务器都可以使用TLS
+（由openssl命令行生成的自签名证书，客户端通过SSL_CERT_FILE环境变量信任它），
+LocalH2Server不使用TLS时为h2c（先验知识）。
+"""
+
+import gzip
+import hashlib
+import heapq
+import itertools
+import json
+import random
+import os
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:  # pragma: no cover - 可选依赖
+    h2 = None
+
+
+# 限速发送时每次写出的字节数
+_WRITE_BLOCK = 16 * 1024
+
+# HTTP/2服务器每次从套接字读取的字节数
+_READ_SIZE = 64 * 1024
+
+# 读取并丢弃请求体时每次读取的字节数
+_BODY_CHUNK_SIZE = 1024 * 1024
+
+# HTTP/2服务器允许的并发流数
+H2_MAX_CONCURRENT_STREAMS = 1000
+
+
+def make_certificate(directory: str) -> Tuple[str, str]:
+    """
+    用openssl命令行为127.0.0.1生成自签名证书。
+
+    Args:
+        directory: 保存证书和私钥的目录。
+
+    Returns:
+        (证书文件路径, 私钥文件路径)。证书同时作为客户端信任的CA文件。
+
+    Raises:
+        OSError: 如果没有openssl命令。
+        subprocess.CalledProcessError: 如果生成失败。
+    """
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'ec',
+                    '-pkeyopt', 'ec_paramgen_curve:prime256v1', '-nodes', '-days', '1',
+                    '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+                    '-keyout', keyfile, '-out', certfile],
+                   check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def make_server_context(alpn: Optional[List[str]] = None) -> Tuple[ssl.SSLContext, str]:
+    """
+    创建使用新生成的自签名证书的服务器端SSL上下文。
+
+    Args:
+        alpn: 服务器支持的ALPN协议。可选。
+
+    Returns:
+        (SSL上下文, 客户端应信任的CA文件路径)。
+    """
+    certfile, keyfile = make_certificate(tempfile.mkdtemp(prefix='bench-tls-'))
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile, keyfile)
+    if alpn:
+        context.set_alpn_protocols(alpn)
+    return context, certfile
+
+
+def make_payload(size: int) -> bytes:
+    """
+    生成约size字节、结构接近真实API响应的JSON数组。
+
+    Args:
+        size: 目标大小（字节）。
+
+    Returns:
+        JSON字节串。
+    """
+    records = []
+    total = 2
+    i = 0
+    while total < size:
+        record = {'id': i, 'name': f'user-{i}', 'email': f'user{i}@example.com',
+                  'active': i % 3 != 0, 'score': round(i * 0.37 % 100, 2)}
+        total += len(json.dumps(record)) + 2
+        records.append(record)
+        i += 1
+    return json.dumps(records).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """基准测试服务器的请求处理器。"""
+
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，需要关闭Nagle算法避免延迟确认带来的40ms停顿
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        """建立连接时记录连接数，使用TLS时在处理线程中完成握手。"""
+        if isinstance(self.request, ssl.SSLSocket):
+            self.request.do_handshake()
+            self.server.count('handshakes')
+        super().setup()
+        self.server.count('connections')
+
+    def log_message(self, format, *args):
+        """关闭访问日志，避免影响测试结果。"""
+        pass
+
+    def _read_body(self) -> int:
+        """
+        按块读取并丢弃请求体，上传大文件时服务器的内存占用不随请求体增长。
+
+        Returns:
+            请求体字节数。
+        """
+        remaining = length = int(self.headers.get('Content-Length') or 0)
+        while remaining:
+            chunk = self.rfile.read(min(_BODY_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        self.server.count('bytes_received', length - remaining)
+        return length - remaining
+
+    def _respond(self, include_body: bool = True):
+        """
+        发送响应。
+
+        Args:
+            include_body: 是否发送响应体（HEAD请求不发送）。
+        """
+        server = self.server
+        server.count('requests')
+        if (time.monotonic() < server.outage_until
+                or (server.error_rate and random.random() < server.error_rate)):
+            server.count('errors')
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        server.enter()
+        try:
+            if server.workers is not None:
+                # 工作线程有限时，超出的请求排队等待
+                with server.workers:
+                    time.sleep(server.latency)
+            elif server.latency:
+                time.sleep(server.latency)
+        finally:
+            server.leave()
+        cache_control = server.cache_control
+        if cache_control is not None:
+            if self.headers.get('If-None-Match') == server.etag:
+                server.count('not_modified')
+                self.send_response(304)
+                self.send_header('ETag', server.etag)
+                self.send_header('Cache-Control', cache_control)
+                self.end_headers()
+                return
+        body = self.server.payload
+        compressed = (self.server.gzip_payload is not None
+                      and 'gzip' in (self.headers.get('Accept-Encoding') or ''))
+        if compressed:
+            body = self.server.gzip_payload
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        if cache_control is not None:
+            self.send_header('ETag', server.etag)
+            self.send_header('Cache-Control', cache_control)
+        if not self.server.keep_alive:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        if include_body:
+            self._write_body(body)
+
+    def _write_body(self, body: bytes):
+        """
+        发送响应体，配置了带宽限制时按块限速发送。
+
+        Args:
+            body: 响应体。
+        """
+        self.server.count('bytes_sent', len(body))
+        bandwidth = self.server.bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        view = memoryview(body)
+        for start in range(0, len(view), _WRITE_BLOCK):
+            block = view[start:start + _WRITE_BLOCK]
+            self.wfile.write(block)
+            time.sleep(len(block) / bandwidth)
+
+    def do_GET(self):
+        """处理GET请求。"""
+        self._respond()
+
+    def do_HEAD(self):
+        """处理HEAD请求。"""
+        self._respond(include_body=False)
+
+    def do_POST(self):
+        """处理POST请求。"""
+        self._read_body()
+        self._respond()
+
+    def do_PUT(self):
+        """处理PUT请求。"""
+        self._read_body()
+        self._respond()
+
+    def do_DELETE(self):
+        """处理DELETE请求。"""
+        self._respond()
+
+
+class _Server(ThreadingHTTPServer):
+    """带计数器的线程化HTTP服务器。"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, latency: float, payload: bytes, keep_alive: bool,
+                 compress: bool, bandwidth: int, workers: int = 0,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        """
+        初始化服务器。
+
+        Args:
+            address: 监听地址。
+            latency: 每个请求的处理延迟（秒）。
+            payload: 响应体。
+            keep_alive: 是否保持长连接。
+            compress: 客户端接受gzip时是否压缩响应体。
+            bandwidth: 每个连接的发送带宽（字节/秒），0表示不限制。
+            workers: 同时处理请求的工作线程数，0表示不限制。
+            ssl_context: 服务器端SSL上下文，为None时不使用TLS。
+        """
+        super().__init__(address, _Handler)
+        if ssl_context is not None:
+            # 握手推迟到处理线程中进行，避免阻塞接受连接的线程
+            self.socket = ssl_context.wrap_socket(self.socket, server_side=True,
+                                                  do_handshake_on_connect=False)
+        self.latency = latency
+        self.payload = payload
+        self.gzip_payload = gzip.compress(payload) if compress else None
+        self.keep_alive = keep_alive
+        self.bandwidth = bandwidth
+        self.workers = threading.BoundedSemaphore(workers) if workers else None
+        self.counters = {'connections': 0, 'requests': 0, 'errors': 0, 'bytes_sent': 0,
+                         'max_active': 0, 'handshakes': 0, 'not_modified': 0,
+                         'bytes_received': 0}
+        # 正在处理或排队等待工作线程的请求数
+        self.active = 0
+        # 每个请求到达的单调时间
+        self.arrivals: List[float] = []
+        # 在该单调时间之前的请求都返回503
+        self.outage_until = 0.0
+        # 随机返回503的比例
+        self.error_rate = 0.0
+        # 设置后响应带上该Cache-Control和ETag，If-None-Match匹配时返回304
+        self.cache_control: Optional[str] = None
+        self.etag = '"%s"' % hashlib.sha1(payload).hexdigest()
+        self._counter_lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1):
+        """
+        增加计数器。
+
+        Args:
+            name: 计数器名称。
+            amount: 增加的数量。默认为1。
+        """
+        with self._counter_lock:
+            self.counters[name] += amount
+            if name == 'requests':
+                self.arrivals.append(time.monotonic())
+
+    def enter(self):
+        """记录一个请求开始处理，并更新最大并发数。"""
+        with self._counter_lock:
+            self.active += 1
+            if self.active > self.counters['max_active']:
+                self.counters['max_active'] = self.active
+
+    def leave(self):
+        """记录一个请求处理结束。"""
+        with self._counter_lock:
+            self.active -= 1
+
+    def reset_max_active(self):
+        """将最大并发数重置为当前并发数。"""
+        with self._counter_lock:
+            self.counters['max_active'] = self.active
+
+
+class LocalServer:
+    """
+    在后台线程中运行的本地HTTP服务器。
+
+    可作为上下文管理器使用::
+
+        with LocalServer(latency=0.001) as server:
+            client.get(server.url + "/get")
+    """
+
+    def __init__(self, latency: float = 0.0, payload_size: int = 64,
+                 keep_alive: bool = True, compress: bool = False, bandwidth: int = 0,
+                 host: str = '127.0.0.1', port: int = 0, workers: int = 0, tls: bool = False):
+        """
+        初始化本地服务器。
+
+        Args:
+            latency: 每个请求的处理延迟（秒）。默认为0。
+            payload_size: 响应体的近似大小（字节）。默认为64。
+            keep_alive: 是否保持长连接。默认为True。
+            compress: 客户端接受gzip时是否压缩响应体。默认为False。
+            bandwidth: 每个连接的发送带宽（字节/秒）。默认为0（不限制）。
+            host: 监听地址。默认为127.0.0.1。
+            port: 监听端口。默认为0（随机端口）。
+            workers: 同时处理请求的工作线程数，超出的请求排队，模拟容量有限的上游。
+                默认为0（不限制）。
+            tls: 是否使用TLS（自签名证书，需要openssl命令）。默认为False。
+        """
+        payload = make_payload(payload_size)
+        context, self.cafile = make_server_context() if tls else (None, None)
+        self._server = _Server((host, port), latency, payload, keep_alive, compress, bandwidth,
+                               workers, context)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务器的基础URL。"""
+        host, port = self._server.server_address[:2]
+        scheme = 'https' if self.cafile else 'http'
+        return f"{scheme}://{host}:{port}"
+
+    @property
+    def counters(self) -> dict:
+        """
+        服务器计数器快照，包含connections、requests、errors、bytes_sent、
+        max_active（同时处理或排队的最大请求数）、handshakes（完成的TLS握手数）和
+        not_modified（返回304的请求数）。
+        """
+        with self._server._counter_lock:
+            return dict(self._server.counters)
+
+    @property
+    def arrivals(self) -> List[float]:
+        """每个请求到达的单调时间（time.monotonic()）的副本。"""
+        with self._server._counter_lock:
+            return list(self._server.arrivals)
+
+    def reset_max_active(self):
+        """将计数器max_active重置为当前并发数，用于分阶段统计。"""
+        self._server.reset_max_active()
+
+    def configure(self, latency: Optional[float] = None, error_rate: Optional[float] = None,
+                  cache_control: Optional[str] = None):
+        """
+        在运行期间修改服务器行为，用于模拟上游变慢、出错或返回可缓存的响应。
+
+        Args:
+            latency: 每个请求的处理延迟（秒）。为None时不修改。
+            error_rate: 随机返回503的比例（0到1）。为None时不修改。
+            cache_control: 响应的Cache-Control头部，设置后响应同时带上ETag，
+                If-None-Match匹配时返回304。为None时不修改。
+        """
+        if latency is not None:
+            self._server.latency = latency
+        if error_rate is not None:
+            self._server.error_rate = error_rate
+        if cache_control is not None:
+            self._server.cache_control = cache_control
+
+    def start_outage(self, duration: float):
+        """
+        模拟上游故障：从现在起duration秒内的请求都立即返回503。
+
+        Args:
+            duration: 故障持续时间（秒）。
+        """
+        self._server.outage_until = time.monotonic() + duration
+
+    def start(self) -> 'LocalServer':
+        """
+        启动服务器。
+
+        Returns:
+            服务器自身。
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务器。"""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def __enter__(self) -> 'LocalServer':
+        """进入上下文时启动服务器。"""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文时停止服务器。"""
+        self.stop()
+
+
+class _H2Connection:
+    """HTTP/2服务器端的一条连接，每个请求在定时器线程中延迟响应。"""
+
+    def __init__(self, server: 'LocalH2Server', sock: socket.socket):
+        """
+        初始化连接。
+
+        Args:
+            server: 所属的服务器。
+            sock: 已接受的套接字。
+        """
+        self.server = server
+        self.sock = sock
+        self.lock = threading.Lock()
+        config = h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+        self.conn = h2.connection.H2Connection(config=config)
+        self.conn.local_settings = h2.settings.Settings(
+            client=False,
+            initial_values={h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS:
+                            H2_MAX_CONCURRENT_STREAMS})
+        # 等待流量控制窗口发送的响应体：流ID -> 剩余数据
+        self.pending: Dict[int, memoryview] = {}
+
+    def serve(self):
+        """读取请求直到连接关闭。"""
+        with self.lock:
+            self.conn.initiate_connection()
+            self.sock.sendall(self.conn.data_to_send())
+        try:
+            while True:
+                data = self.sock.recv(_READ_SIZE)
+                if not data:
+                    return
+                with self.lock:
+                    for event in self.conn.receive_data(data):
+                        self._handle(event)
+                    self.sock.sendall(self.conn.data_to_send())
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            self.sock.close()
+
+    def _handle(self, event):
+        """
+        处理一个h2事件。调用者必须持有锁。
+
+        Args:
+            event: h2事件。
+        """
+        if isinstance(event, h2.events.DataReceived):
+            self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+        elif isinstance(event, h2.events.StreamEnded):
+            self.server.count('requests')
+            self.server.enter()
+            if self.server.latency:
+                self.server.schedule(self.server.latency, self._respond, event.stream_id)
+            else:
+                self._respond(event.stream_id, locked=True)
+        elif isinstance(event, h2.events.WindowUpdated):
+            self._send_pending()
+        elif isinstance(event, h2.events.StreamReset):
+            self.pending.pop(event.stream_id, None)
+
+    def _respond(self, stream_id: int, locked: bool = False):
+        """
+        发送响应。
+
+        Args:
+            stream_id: 流ID。
+            locked: 调用者是否已持有锁。已持有锁时由调用者写出数据。
+        """
+        self.server.leave()
+        body = self.server.payload
+        self.server.count('bytes_sent', len(body))
+        if locked:
+            self._send_response(stream_id, body)
+            return
+        try:
+            with self.lock:
+                self._send_response(stream_id, body)
+                self.sock.sendall(self.conn.data_to_send())
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+
+    def _send_response(self, stream_id: int, body: bytes):
+        """
+        发送响应头部和流量控制窗口允许的响应体。调用者必须持有锁。
+
+        Args:
+            stream_id: 流ID。
+            body: 响应体。
+        """
+        self.conn.send_headers(stream_id, [(':status', '200'),
+                                           ('content-type', 'application/json'),
+                                           ('content-length', str(len(body)))])
+        self.pending[stream_id] = memoryview(body)
+        self._send_pending()
+
+    def _send_pending(self):
+        """在流量控制窗口内尽量发送等待中的响应体。调用者必须持有锁。"""
+        for stream_id, view in list(self.pending.items()):
+            while view:
+                size = min(self.conn.local_flow_control_window(stream_id),
+                           self.conn.max_outbound_frame_size, len(view))
+                if size <= 0:
+                    break
+                self.conn.send_data(stream_id, view[:size].tobytes())
+                view = view[size:]
+            if view:
+                self.pending[stream_id] = view
+            else:
+                del self.pending[stream_id]
+                self.conn.end_stream(stream_id)
+
+
+class LocalH2Server:
+    """
+    在后台线程中运行的本地HTTP/2服务器（h2c，客户端需要使用先验知识），需要安装h2。
+
+    每条连接一个线程，同一连接上的请求并发处理，计数器与LocalServer相同::
+
+        with LocalH2Server(latency=0.005) as server:
+            HTTPClient(base_url=server.url, http2=True).get("/get")
+    """
+
+    def __init__(self, latency: float = 0.0, payload_size: int = 64, host: str = '127.0.0.1',
+                 port: int = 0, tls: bool = False):
+        """
+        初始化本地服务器。
+
+        Args:
+            latency: 每个请求的处理延迟（秒）。默认为0。
+            payload_size: 响应体的近似大小（字节）。默认为64。
+            host: 监听地址。默认为127.0.0.1。
+            port: 监听端口。默认为0（随机端口）。
+            tls: 是否使用TLS并通过ALPN协商h2（自签名证书，需要openssl命令）。默认为False。
+
+        Raises:
+            ImportError: 如果没有安装h2。
+        """
+        if h2 is None:
+            raise ImportError("LocalH2Server需要安装h2: pip install h2")
+        self.latency = latency
+        self.payload = make_payload(payload_size)
+        self._context, self.cafile = make_server_context(['h2']) if tls else (None, None)
+        self._listener = socket.create_server((host, port))
+        self._counters = {'connections': 0, 'requests': 0, 'bytes_sent': 0, 'max_active': 0,
+                          'handshakes': 0}
+        self._active = 0
+        self._lock = threading.Lock()
+        self._sockets: List[socket.socket] = []
+        self._thread: Optional[threading.Thread] = None
+        # 延迟响应的定时任务：(到期的单调时间, 序号, 回调, 参数)，由一个线程按时执行
+        self._timers: List[tuple] = []
+        self._timer_sequence = itertools.count()
+        self._timer_condition = threading.Condition()
+        self._stopped = False
+
+    @property
+    def url(self) -> str:
+        """服务器的基础URL。"""
+        host, port = self._listener.getsockname()[:2]
+        scheme = 'https' if self.cafile else 'http'
+        return f"{scheme}://{host}:{port}"
+
+    @property
+    def counters(self) -> dict:
+        """服务器计数器快照，包含connections、requests、bytes_sent、max_active和handshakes。"""
+        with self._lock:
+            return dict(self._counters)
+
+    def count(self, name: str, amount: int = 1):
+        """
+        增加计数器。
+
+        Args:
+            name: 计数器名称。
+            amount: 增加的数量。默认为1。
+        """
+        with self._lock:
+            self._counters[name] += amount
+
+    def enter(self):
+        """记录一个请求开始处理，并更新最大并发数。"""
+        with self._lock:
+            self._active += 1
+            self._counters['max_active'] = max(self._counters['max_active'], self._active)
+
+    def leave(self):
+        """记录一个请求处理结束。"""
+        with self._lock:
+            self._active -= 1
+
+    def schedule(self, delay: float, callback, *args):
+        """
+        在delay秒后于定时线程中调用callback(*args)。
+
+        Args:
+            delay: 延迟（秒）。
+            callback: 回调函数。
+            *args: 回调的参数。
+        """
+        with self._timer_condition:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_sequence),
+                                          callback, args))
+            self._timer_condition.notify()
+
+    def _timer_loop(self):
+        """按到期时间执行定时任务，直到服务器停止。"""
+        while True:
+            with self._timer_condition:
+                while not self._stopped:
+                    delay = self._timers[0][0] - time.monotonic() if self._timers else None
+                    if delay is not None and delay <= 0:
+                        break
+                    self._timer_condition.wait(delay)
+                if self._stopped:
+                    return
+                _, _, callback, args = heapq.heappop(self._timers)
+            callback(*args)
+
+    def _accept_loop(self):
+        """接受连接，每条连接一个线程。"""
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._counters['connections'] += 1
+                self._sockets.append(sock)
+            threading.Thread(target=self._serve_connection, args=(sock,), daemon=True).start()
+
+    def _serve_connection(self, sock: socket.socket):
+        """
+        在连接线程中完成TLS握手（如果使用TLS）并处理请求。
+
+        Args:
+            sock: 已接受的套接字。
+        """
+        if self._context is not None:
+            try:
+                sock = self._context.wrap_socket(sock, server_side=True)
+            except (OSError, ssl.SSLError):
+                sock.close()
+                return
+            self.count('handshakes')
+        _H2Connection(self, sock).serve()
+
+    def start(self) -> 'LocalH2Server':
+        """
+        启动服务器。
+
+        Returns:
+            服务器自身。
+        """
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._timer_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        """停止服务器并关闭所有连接。"""
+        with self._timer_condition:
+            self._stopped = True
+            self._timer_condition.notify()
+        try:
+            # 唤醒阻塞在accept上的线程
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def __enter__(self) -> 'LocalH2Server':
+        """进入上下文时启动服务器。"""
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文时停止服务器。"""
+        self.stop()
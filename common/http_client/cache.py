@@ -0,0 +1,924 @@
+"""
+HTTP响应缓存模块。
+
+按RFC 9111实现的私有缓存：GET响应按URL保存在内存LRU中（总字节数有上限），可选地
+同时写入磁盘目录，进程重启后仍可命中。新鲜的响应直接返回；过期的响应带上
+If-None-Match/If-Modified-Since发送条件请求，服务器返回304时更新头部后复用缓存的响应体；
+stale-while-revalidate期间先返回过期的响应并在后台刷新，stale-if-error期间上游出错时
+返回过期的响应。成功的POST/PUT/DELETE请求使同一URL的缓存失效。
+
+同时发出的相同请求（URL和请求头部相同）只有一个会访问上游，其余请求等待并复用它的结果。
+被多个客户端共享时按共享缓存处理Cache-Control: private，不保存也不返回这样的响应。
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .cookies import parse_http_date
+from .exceptions import HTTPException
+from .response import Response, header_value
+from .singleflight import SingleFlight
+
+
+# 内存缓存的默认总字节数
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 磁盘缓存的默认总字节数
+DEFAULT_DISK_MAX_BYTES = 1024 * 1024 * 1024
+
+# 每个条目除响应体和头部之外的估计内存开销（字节）
+ENTRY_OVERHEAD = 512
+
+# 没有显式新鲜度信息时可以缓存的状态码（RFC 9110第15.1节）
+CACHEABLE_BY_DEFAULT = frozenset({200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501})
+
+# 启发式新鲜期占(Date - Last-Modified)的比例（RFC 9111第4.2.2节）
+HEURISTIC_FRACTION = 0.1
+
+# 启发式新鲜期的上限（秒）
+MAX_HEURISTIC_LIFETIME = 24 * 3600
+
+# 收到304时不用新头部覆盖的头部（小写）
+_KEEP_ON_UPDATE = frozenset({'content-length', 'content-encoding', 'transfer-encoding',
+                             'content-range'})
+
+# 安全方法，其余方法的成功响应使同一URL的缓存失效（RFC 9111第4.4节）
+_SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'TRACE'})
+
+# 带Authorization的请求的响应，共享缓存只有在带这些指令时才能保存（RFC 9111第3.5节）
+_AUTHORIZED_SHAREABLE = ('public', 's-maxage', 'must-revalidate')
+
+# 调用者自己发送这些头部时绕过缓存
+_BYPASS_HEADERS = ('If-None-Match', 'If-Modified-Since', 'If-Match', 'If-Unmodified-Since',
+                   'If-Range', 'Range')
+
+# 统计的请求结果：hit（新鲜命中）、stale（返回过期响应）、revalidated（304后复用）、
+# coalesced（复用同时进行的请求的结果）、miss（从上游获取）、bypass（不经过缓存）
+OUTCOMES = ('hit', 'stale', 'revalidated', 'coalesced', 'miss', 'bypass')
+
+# 磁盘缓存文件的扩展名
+_DISK_SUFFIX = '.cache'
+
+# 磁盘缓存文件中元数据长度前缀的格式
+_LENGTH_PREFIX = struct.Struct('>I')
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    解析Cache-Control头部。
+
+    Args:
+        value: 头部的值。
+
+    Returns:
+        小写指令名到参数的映射，没有参数的指令为None。
+    """
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+    for part in value.split(','):
+        name, sep, argument = part.partition('=')
+        name = name.strip().lower()
+        if name:
+            directives[name] = argument.strip().strip('"') if sep else None
+    return directives
+
+
+def _date_header(headers: Dict[str, str], name: str) -> Optional[float]:
+    """
+    读取并解析日期头部。
+
+    Args:
+        headers: 响应头部。
+        name: 头部名称。
+
+    Returns:
+        时间戳，头部不存在或无法解析时为None。
+    """
+    value = header_value(headers, name)
+    return parse_http_date(value) if value else None
+
+
+def _seconds(directives: Dict[str, Optional[str]], name: str) -> Optional[int]:
+    """
+    获取以秒为单位的指令参数。
+
+    Args:
+        directives: parse_cache_control的结果。
+        name: 指令名。
+
+    Returns:
+        秒数，没有该指令或参数无效时为None。
+    """
+    try:
+        return max(int(directives[name]), 0)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def is_storable(status_code: int, headers: Dict[str, str], shared: bool = False,
+                authorized: bool = False) -> bool:
+    """
+    GET响应是否可以存入缓存（RFC 9111第3节）。
+
+    Args:
+        status_code: 状态码。
+        headers: 响应头部。
+        shared: 缓存是否被多个客户端共享，共享缓存不保存private的响应。默认为False。
+        authorized: 请求是否带有Authorization头部。共享缓存只保存其中带public、s-maxage或
+            must-revalidate的响应。默认为False。
+
+    Returns:
+        是否可以缓存。
+    """
+    if status_code < 200 or status_code in (206, 304):
+        return False
+    directives = parse_cache_control(header_value(headers, 'Cache-Control'))
+    if 'no-store' in directives or (shared and 'private' in directives):
+        return False
+    if shared and authorized and not any(name in directives for name in _AUTHORIZED_SHAREABLE):
+        return False
+    if '*' in (header_value(headers, 'Vary') or ''):
+        return False
+    if status_code in CACHEABLE_BY_DEFAULT:
+        return True
+    return ('max-age' in directives or 'public' in directives or 'private' in directives
+            or header_value(headers, 'Expires') is not None)
+
+
+class CachedResponse:
+    """
+    缓存的响应及其新鲜度信息。
+    """
+
+    __slots__ = ('status_code', 'headers', 'body', 'request_time', 'response_time', 'vary',
+                 'directives', 'lifetime', 'initial_age', 'size')
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes,
+                 request_time: float, response_time: float, vary: Dict[str, Optional[str]]):
+        """
+        初始化缓存的响应。
+
+        Args:
+            status_code: 状态码。
+            headers: 响应头部。
+            body: 响应体。
+            request_time: 发出请求的时间戳。
+            response_time: 收到响应的时间戳。
+            vary: Vary头部列出的请求头部（小写）及其在原请求中的值。
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.request_time = request_time
+        self.response_time = response_time
+        self.vary = vary
+        self.directives = parse_cache_control(header_value(headers, 'Cache-Control'))
+        self.lifetime = self._freshness_lifetime()
+        self.initial_age = self._initial_age()
+        self.size = (len(body) + ENTRY_OVERHEAD
+                     + sum(len(name) + len(value) for name, value in headers.items()))
+
+    @classmethod
+    def from_response(cls, response: Response, request_headers: Dict[str, str],
+                      request_time: float, response_time: float,
+                      shared: bool = False) -> Optional['CachedResponse']:
+        """
+        从上游响应创建缓存条目。
+
+        Args:
+            response: 已读取响应体的响应。
+            request_headers: 请求头部，用于记录Vary列出的头部的值。
+            request_time: 发出请求的时间戳。
+            response_time: 收到响应的时间戳。
+            shared: 缓存是否被多个客户端共享。默认为False。
+
+        Returns:
+            缓存条目，响应不可缓存时为None。
+        """
+        authorization = header_value(request_headers, 'Authorization')
+        if response.stream is not None or not is_storable(
+                response.status_code, response.headers, shared, authorization is not None):
+            return None
+        vary = {}
+        for name in (header_value(response.headers, 'Vary') or '').split(','):
+            name = name.strip().lower()
+            if name:
+                vary[name] = header_value(request_headers, name)
+        directives = parse_cache_control(header_value(response.headers, 'Cache-Control'))
+        if authorization is not None and not any(name in directives
+                                                 for name in _AUTHORIZED_SHAREABLE):
+            # 只对同一凭据复用，缓存之后变为共享时也不会返回给其他凭据的请求
+            vary.setdefault('authorization', authorization)
+        return cls(response.status_code, dict(response.headers), response.body,
+                   request_time, response_time, vary)
+
+    def _freshness_lifetime(self) -> float:
+        """
+        计算新鲜期（RFC 9111第4.2.1节），私有缓存忽略s-maxage。
+
+        Returns:
+            新鲜期（秒）。
+        """
+        max_age = _seconds(self.directives, 'max-age')
+        if max_age is not None:
+            return float(max_age)
+        date = _date_header(self.headers, 'Date') or self.response_time
+        expires = header_value(self.headers, 'Expires')
+        if expires is not None:
+            expires_at = parse_http_date(expires)
+            # 无效的Expires表示已经过期
+            return max(expires_at - date, 0.0) if expires_at is not None else 0.0
+        last_modified = _date_header(self.headers, 'Last-Modified')
+        if last_modified is not None and self.status_code in CACHEABLE_BY_DEFAULT:
+            return min(max(date - last_modified, 0.0) * HEURISTIC_FRACTION,
+                       MAX_HEURISTIC_LIFETIME)
+        return 0.0
+
+    def _initial_age(self) -> float:
+        """
+        计算收到响应时的年龄（RFC 9111第4.2.3节）。
+
+        Returns:
+            年龄（秒）。
+        """
+        date = _date_header(self.headers, 'Date')
+        apparent_age = max(self.response_time - date, 0.0) if date is not None else 0.0
+        try:
+            age_value = max(int(header_value(self.headers, 'Age') or 0), 0)
+        except ValueError:
+            age_value = 0
+        return max(apparent_age, age_value + self.response_time - self.request_time)
+
+    def age(self, now: float) -> float:
+        """
+        当前年龄。
+
+        Args:
+            now: 当前时间戳。
+
+        Returns:
+            年龄（秒）。
+        """
+        return self.initial_age + max(now - self.response_time, 0.0)
+
+    def matches(self, request_headers: Dict[str, str]) -> bool:
+        """
+        请求中Vary列出的头部是否与原请求相同。
+
+        Args:
+            request_headers: 请求头部。
+
+        Returns:
+            是否可以用该条目响应请求。
+        """
+        return all(header_value(request_headers, name) == value
+                   for name, value in self.vary.items())
+
+    def is_fresh(self, request_directives: Dict[str, Optional[str]], now: float) -> bool:
+        """
+        是否可以不经验证直接使用。
+
+        Args:
+            request_directives: 请求的Cache-Control指令。
+            now: 当前时间戳。
+
+        Returns:
+            是否新鲜。
+        """
+        if 'no-cache' in self.directives or 'no-cache' in request_directives:
+            return False
+        age = self.age(now)
+        max_age = _seconds(request_directives, 'max-age')
+        if max_age is not None and age > max_age:
+            return False
+        return age < self.lifetime
+
+    def serves_stale(self, directive: str, request_directives: Dict[str, Optional[str]],
+                     now: float) -> bool:
+        """
+        是否在stale-while-revalidate或stale-if-error的窗口内，可以返回过期的响应。
+
+        Args:
+            directive: 'stale-while-revalidate'或'stale-if-error'。
+            request_directives: 请求的Cache-Control指令。
+            now: 当前时间戳。
+
+        Returns:
+            是否可以返回过期的响应。
+        """
+        if ('must-revalidate' in self.directives or 'no-cache' in self.directives
+                or 'no-cache' in request_directives or 'max-age' in request_directives):
+            return False
+        window = _seconds(self.directives, directive)
+        return window is not None and self.age(now) < self.lifetime + window
+
+    def validators(self) -> Dict[str, str]:
+        """
+        条件请求的头部。
+
+        Returns:
+            If-None-Match和/或If-Modified-Since，没有验证器时为空字典。
+        """
+        conditional = {}
+        etag = header_value(self.headers, 'ETag')
+        if etag:
+            conditional['If-None-Match'] = etag
+        last_modified = header_value(self.headers, 'Last-Modified')
+        if last_modified:
+            conditional['If-Modified-Since'] = last_modified
+        return conditional
+
+    def updated(self, headers: Dict[str, str], request_time: float,
+                response_time: float) -> 'CachedResponse':
+        """
+        用304响应的头部更新条目（RFC 9111第4.3.4节）。
+
+        Args:
+            headers: 304响应的头部。
+            request_time: 发出条件请求的时间戳。
+            response_time: 收到304响应的时间戳。
+
+        Returns:
+            新的条目。
+        """
+        merged = dict(self.headers)
+        lowered = {name.lower(): name for name in merged}
+        for name, value in headers.items():
+            if name.lower() in _KEEP_ON_UPDATE:
+                continue
+            merged.pop(lowered.get(name.lower(), name), None)
+            merged[name] = value
+        return CachedResponse(self.status_code, merged, self.body, request_time,
+                              response_time, self.vary)
+
+    def to_response(self, now: float, json_loads: Optional[Callable[[bytes], Any]]) -> Response:
+        """
+        创建返回给调用者的响应，带上当前的Age头部。
+
+        Args:
+            now: 当前时间戳。
+            json_loads: JSON解码函数。
+
+        Returns:
+            响应对象。
+        """
+        headers = {name: value for name, value in self.headers.items() if name.lower() != 'age'}
+        headers['Age'] = str(int(self.age(now)))
+        return Response(self.status_code, headers, self.body, json_loads)
+
+    def to_bytes(self) -> bytes:
+        """
+        序列化为磁盘缓存文件的内容：长度前缀、JSON元数据和响应体。
+
+        Returns:
+            序列化的字节串。
+        """
+        meta = json.dumps({
+            'status_code': self.status_code,
+            'headers': self.headers,
+            'request_time': self.request_time,
+            'response_time': self.response_time,
+            'vary': self.vary,
+        }).encode('utf-8')
+        return _LENGTH_PREFIX.pack(len(meta)) + meta + self.body
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CachedResponse':
+        """
+        从磁盘缓存文件的内容恢复条目。
+
+        Args:
+            data: to_bytes的结果。
+
+        Returns:
+            缓存条目。
+
+        Raises:
+            ValueError: 如果数据损坏。
+        """
+        if len(data) < _LENGTH_PREFIX.size:
+            raise ValueError("缓存文件不完整")
+        (length,) = _LENGTH_PREFIX.unpack_from(data)
+        end = _LENGTH_PREFIX.size + length
+        meta = json.loads(data[_LENGTH_PREFIX.size:end].decode('utf-8'))
+        return cls(meta['status_code'], meta['headers'], data[end:], meta['request_time'],
+                   meta['response_time'], meta['vary'])
+
+
+class MemoryStorage:
+    """
+    线程安全的内存LRU存储，按条目的估计字节数限制总大小。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化存储。
+
+        Args:
+            max_bytes: 总字节数上限。
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        获取条目并标记为最近使用。
+
+        Args:
+            key: 缓存键（URL）。
+
+        Returns:
+            条目，不存在时为None。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        """
+        保存条目，超出上限时淘汰最久未使用的条目。超过上限的单个条目不保存。
+
+        Args:
+            key: 缓存键。
+            entry: 条目。
+        """
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self.evictions += 1
+
+    def delete(self, key: str):
+        """
+        删除条目。
+
+        Args:
+            key: 缓存键。
+        """
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+
+    def clear(self):
+        """清空存储。"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """
+        存储统计。
+
+        Returns:
+            字典，包含entries、bytes和evictions。
+        """
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size,
+                    'evictions': self.evictions}
+
+
+class DiskStorage:
+    """
+    磁盘存储，每个条目一个文件，按文件大小限制总大小，超出时删除最久未使用的文件。
+
+    文件先写入临时文件再原子地替换，多个进程可以共享同一个目录；其他进程删除的文件视为未命中。
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        """
+        初始化存储，扫描目录中已有的缓存文件。
+
+        Args:
+            directory: 缓存目录，不存在时创建。
+            max_bytes: 总字节数上限。
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files: 'OrderedDict[str, int]' = OrderedDict()
+        self._size = 0
+        self.evictions = 0
+        existing = []
+        for item in os.scandir(directory):
+            if item.name.endswith(_DISK_SUFFIX) and item.is_file():
+                stat = item.stat()
+                existing.append((stat.st_mtime, item.name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._files[name] = size
+            self._size += size
+
+    @staticmethod
+    def _filename(key: str) -> str:
+        """
+        缓存键对应的文件名。
+
+        Args:
+            key: 缓存键。
+
+        Returns:
+            文件名。
+        """
+        return hashlib.sha256(key.encode('utf-8')).hexdigest() + _DISK_SUFFIX
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """
+        读取条目并标记为最近使用。
+
+        Args:
+            key: 缓存键。
+
+        Returns:
+            条目，不存在或文件损坏时为None。
+        """
+        name = self._filename(key)
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                entry = CachedResponse.from_bytes(f.read())
+        except FileNotFoundError:
+            self._forget(name)
+            return None
+        except (OSError, ValueError, KeyError):
+            self.delete(key)
+            return None
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse):
+        """
+        写入条目，超出上限时删除最久未使用的文件。超过上限的单个条目不保存。
+
+        Args:
+            key: 缓存键。
+            entry: 条目。
+        """
+        name = self._filename(key)
+        data = entry.to_bytes()
+        if len(data) > self.max_bytes:
+            self.delete(key)
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, os.path.join(self.directory, name))
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        evicted = []
+        with self._lock:
+            self._size += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            while self._size > self.max_bytes:
+                old_name, size = self._files.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                evicted.append(old_name)
+        for old_name in evicted:
+            self._unlink(old_name)
+
+    def delete(self, key: str):
+        """
+        删除条目。
+
+        Args:
+            key: 缓存键。
+        """
+        name = self._filename(key)
+        self._forget(name)
+        self._unlink(name)
+
+    def clear(self):
+        """删除所有缓存文件。"""
+        with self._lock:
+            names = list(self._files)
+            self._files.clear()
+            self._size = 0
+        for name in names:
+            self._unlink(name)
+
+    def _forget(self, name: str):
+        """
+        从索引中移除文件。
+
+        Args:
+            name: 文件名。
+        """
+        with self._lock:
+            self._size -= self._files.pop(name, 0)
+
+    def _unlink(self, name: str):
+        """
+        删除文件，文件不存在时忽略。
+
+        Args:
+            name: 文件名。
+        """
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        """
+        存储统计。
+
+        Returns:
+            字典，包含entries、bytes和evictions。
+        """
+        with self._lock:
+            return {'entries': len(self._files), 'bytes': self._size,
+                    'evictions': self.evictions}
+
+
+class HTTPCache:
+    """
+    HTTP响应缓存：内存LRU，可选的磁盘层，以及命中率和延迟统计。
+
+    缓存键是URL；Vary列出的请求头部与缓存条目不同时视为未命中，新的响应替换旧条目。
+    一个HTTPCache可以被多个客户端共享，此时不保存也不返回Cache-Control: private的响应。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, directory: Optional[str] = None,
+                 disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        """
+        初始化缓存。
+
+        Args:
+            max_bytes: 内存缓存的总字节数上限。默认为64MB。
+            directory: 磁盘缓存目录。默认为None（只使用内存）。
+            disk_max_bytes: 磁盘缓存的总字节数上限。默认为1GB。
+        """
+        self.memory = MemoryStorage(max_bytes)
+        self.disk = DiskStorage(directory, disk_max_bytes) if directory else None
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._revalidating = set()
+        # 使用该缓存的客户端，多于一个时按共享缓存处理private
+        self._clients = weakref.WeakSet()
+        # 每种结果的[次数, 总耗时（秒）]
+        self._outcomes: Dict[str, list] = {outcome: [0, 0.0] for outcome in OUTCOMES}
+
+    def attach(self, client: Any):
+        """
+        登记使用该缓存的客户端，客户端被回收后自动移除。
+
+        Args:
+            client: 客户端。
+        """
+        with self._lock:
+            self._clients.add(client)
+
+    @property
+    def shared(self) -> bool:
+        """是否有多个客户端使用该缓存。"""
+        return len(self._clients) > 1
+
+    def request(self, method: str, url: str, headers: Dict[str, str],
+                fetch: Callable[[Optional[Dict[str, str]]], Response],
+                json_loads: Optional[Callable[[bytes], Any]] = None) -> Response:
+        """
+        通过缓存执行请求。
+
+        Args:
+            method: HTTP方法。
+            url: 完整URL。
+            headers: 实际发送的请求头部（包括客户端的默认头部和Cookie），用于缓存键、
+                Cache-Control和Vary。
+            fetch: 访问上游的函数，参数为要额外发送的条件请求头部（或None），返回已读取响应体的响应。
+            json_loads: 缓存响应使用的JSON解码函数。
+
+        Returns:
+            响应对象。
+
+        Raises:
+            HTTPException: 如果上游请求失败且没有可用的过期响应。
+        """
+        start = time.perf_counter()
+        outcome, response = self._request(method, url, headers, fetch, json_loads)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            record = self._outcomes[outcome]
+            record[0] += 1
+            record[1] += elapsed
+        return response
+
+    def _request(self, method: str, url: str, headers: Dict[str, str],
+                 fetch: Callable[[Optional[Dict[str, str]]], Response],
+                 json_loads: Optional[Callable[[bytes], Any]]) -> Tuple[str, Response]:
+        """
+        执行请求，返回结果类别和响应。参数与request相同。
+
+        Returns:
+            (结果类别, 响应)。
+        """
+        if method != 'GET':
+            response = fetch(None)
+            if method not in _SAFE_METHODS and response.status_code < 400:
+                self.invalidate(url)
+            return 'bypass', response
+        request_directives = parse_cache_control(header_value(headers, 'Cache-Control'))
+        if 'no-store' in request_directives or any(
+                header_value(headers, name) is not None for name in _BYPASS_HEADERS):
+            return 'bypass', fetch(None)
+
+        key = (url, frozenset((name.lower(), value) for name, value in headers.items()))
+        now = time.time()
+        entry = self._lookup(url, headers)
+        if entry is not None:
+            if entry.is_fresh(request_directives, now):
+                return 'hit', entry.to_response(now, json_loads)
+            if entry.serves_stale('stale-while-revalidate', request_directives, now):
+                self._revalidate_in_background(key, url, headers, entry, fetch, json_loads)
+                return 'stale', entry.to_response(now, json_loads)
+        (outcome, response, shared), leader = self._flights.do(
+            key, lambda: self._fetch(url, headers, request_directives, entry, fetch, json_loads))
+        if leader:
+            return outcome, response
+        if shared is not None:
+            # 上游响应是在等待者发出请求之后取得的，可以直接复用
+            return 'coalesced', shared.to_response(time.time(), json_loads)
+        # 领头请求的响应不可缓存（例如no-store），等待者的请求头部与它完全相同（包括Cookie和
+        # Authorization），各自得到一份副本，不再访问上游
+        return 'coalesced', Response(response.status_code, dict(response.headers),
+                                     response.body, json_loads)
+
+    def _fetch(self, url: str, headers: Dict[str, str],
+               request_directives: Dict[str, Optional[str]], entry: Optional[CachedResponse],
+               fetch: Callable[[Optional[Dict[str, str]]], Response],
+               json_loads: Optional[Callable[[bytes], Any]]
+               ) -> Tuple[str, Response, Optional[CachedResponse]]:
+        """
+        访问上游，有缓存条目时发送条件请求，并保存可缓存的响应。
+
+        Args:
+            url: 完整URL。
+            headers: 请求头部。
+            request_directives: 请求的Cache-Control指令。
+            entry: 过期或需要验证的缓存条目。可选。
+            fetch: 访问上游的函数。
+            json_loads: JSON解码函数。
+
+        Returns:
+            (结果类别, 响应, 可供同时等待的请求复用的条目)，响应不可缓存时条目为None。
+
+        Raises:
+            HTTPException: 如果上游请求失败且不能返回过期的响应。
+        """
+        conditional = entry.validators() if entry is not None else None
+        request_time = time.time()
+        try:
+            response = fetch(conditional or None)
+        except HTTPException:
+            now = time.time()
+            if entry is not None and entry.serves_stale('stale-if-error', request_directives, now):
+                return 'stale', entry.to_response(now, json_loads), entry
+            raise
+        response_time = time.time()
+        if entry is not None:
+            if response.status_code == 304:
+                entry = entry.updated(response.headers, request_time, response_time)
+                self._store(url, entry)
+                return 'revalidated', entry.to_response(response_time, json_loads), entry
+            if response.status_code >= 500 and entry.serves_stale(
+                    'stale-if-error', request_directives, response_time):
+                return 'stale', entry.to_response(response_time, json_loads), entry
+        stored = CachedResponse.from_response(response, headers, request_time, response_time,
+                                              self.shared)
+        if stored is not None:
+            self._store(url, stored)
+        return 'miss', response, stored
+
+    def _revalidate_in_background(self, key: Hashable, url: str, headers: Dict[str, str],
+                                  entry: CachedResponse,
+                                  fetch: Callable[[Optional[Dict[str, str]]], Response],
+                                  json_loads: Optional[Callable[[bytes], Any]]):
+        """
+        在后台线程中刷新过期的条目，同一请求同时只刷新一次。
+
+        Args:
+            key: 请求键。
+            url: 完整URL。
+            headers: 请求头部。
+            entry: 过期的条目。
+            fetch: 访问上游的函数。
+            json_loads: JSON解码函数。
+        """
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            try:
+                self._fetch(url, headers, {}, entry, fetch, json_loads)
+            except Exception:
+                # 刷新失败时保留过期的条目，之后的请求会再次尝试
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=revalidate, name='http-cache-revalidate', daemon=True).start()
+
+    def _lookup(self, url: str, headers: Dict[str, str]) -> Optional[CachedResponse]:
+        """
+        查找与请求匹配的条目，内存未命中时查找磁盘并放入内存。
+
+        Args:
+            url: 完整URL。
+            headers: 请求头部。
+
+        Returns:
+            条目，没有匹配的条目时为None。
+        """
+        entry = self.memory.get(url)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(url)
+            if entry is not None:
+                self.memory.set(url, entry)
+        if entry is None or not entry.matches(headers):
+            return None
+        if 'private' in entry.directives and self.shared:
+            # 只有一个客户端时保存的private响应，不能返回给其他客户端
+            return None
+        return entry
+
+    def _store(self, url: str, entry: CachedResponse):
+        """
+        同时写入内存和磁盘。
+
+        Args:
+            url: 完整URL。
+            entry: 条目。
+        """
+        self.memory.set(url, entry)
+        if self.disk is not None:
+            self.disk.set(url, entry)
+
+    def invalidate(self, url: str):
+        """
+        删除URL的缓存条目。
+
+        Args:
+            url: 完整URL。
+        """
+        self.memory.delete(url)
+        if self.disk is not None:
+            self.disk.delete(url)
+
+    def clear(self):
+        """清空内存和磁盘缓存，统计保留。"""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        """
+        缓存统计。
+
+        Returns:
+            字典，包含：每种结果（hit、stale、revalidated、coalesced、miss、bypass）的次数和
+            平均耗时（{'count': ..., 'avg_ms': ...}）；hit_rate，即不访问上游就返回的请求
+            （hit、stale、coalesced）占经过缓存的请求（不含bypass）的比例；memory和disk
+            存储的条目数、字节数和淘汰次数（没有磁盘层时disk为None）。
+        """
+        with self._lock:
+            outcomes = {outcome: {'count': count,
+                                  'avg_ms': round(seconds / count * 1000, 3) if count else 0.0}
+                        for outcome, (count, seconds) in self._outcomes.items()}
+        lookups = sum(item['count'] for outcome, item in outcomes.items() if outcome != 'bypass')
+        served = sum(outcomes[outcome]['count'] for outcome in ('hit', 'stale', 'coalesced'))
+        return {
+            **outcomes,
+            'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats() if self.disk is not None else None,
+        }
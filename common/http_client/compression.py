@@ -0,0 +1,208 @@
+"""
+HTTP内容编码模块。
+
+提供gzip、deflate和brotli（安装了brotli或brotlicffi时）的增量解压，
+以及请求体的gzip压缩。
+"""
+
+import gzip
+import zlib
+from typing import List, Optional
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 可选依赖
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# 客户端支持的内容编码，按偏好排序
+SUPPORTED_ENCODINGS = ('gzip', 'deflate') + (('br',) if brotli is not None else ())
+
+# 默认发送的Accept-Encoding头部
+ACCEPT_ENCODING = ', '.join(SUPPORTED_ENCODINGS)
+
+# 请求体压缩使用的gzip压缩级别，兼顾速度和压缩率
+REQUEST_COMPRESS_LEVEL = 6
+
+
+class _ZlibDecoder:
+    """gzip和deflate的增量解码器。"""
+
+    def __init__(self, encoding: str):
+        """
+        初始化解码器。
+
+        Args:
+            encoding: 'gzip'或'deflate'。
+        """
+        self._encoding = encoding
+        # gzip使用16+MAX_WBITS；deflate按规范是zlib格式，但部分服务器发送裸deflate流
+        wbits = 16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS
+        self._obj = zlib.decompressobj(wbits)
+        self._first = encoding == 'deflate'
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        解压一段数据。
+
+        Args:
+            data: 压缩数据。
+
+        Returns:
+            解压后的数据，可能为空。
+        """
+        if not data:
+            return b''
+        if self._first:
+            self._first = False
+            try:
+                return self._obj.decompress(data)
+            except zlib.error:
+                # 回退为裸deflate流
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        """
+        输出剩余的解压数据。
+
+        Returns:
+            剩余数据。
+        """
+        return self._obj.flush()
+
+
+class _BrotliDecoder:
+    """brotli的增量解码器。"""
+
+    def __init__(self):
+        """初始化解码器。"""
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        解压一段数据。
+
+        Args:
+            data: 压缩数据。
+
+        Returns:
+            解压后的数据，可能为空。
+        """
+        if not data:
+            return b''
+        if hasattr(self._obj, 'process'):
+            return self._obj.process(data)
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        """
+        输出剩余的解压数据。
+
+        Returns:
+            剩余数据。
+        """
+        return b''
+
+
+class _MultiDecoder:
+    """按相反顺序依次应用多个内容编码的解码器。"""
+
+    def __init__(self, decoders: List):
+        """
+        初始化解码器。
+
+        Args:
+            decoders: 按解码顺序排列的解码器列表。
+        """
+        self._decoders = decoders
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        解压一段数据。
+
+        Args:
+            data: 压缩数据。
+
+        Returns:
+            解压后的数据，可能为空。
+        """
+        for decoder in self._decoders:
+            data = decoder.decompress(data)
+        return data
+
+    def flush(self) -> bytes:
+        """
+        输出剩余的解压数据。
+
+        Returns:
+            剩余数据。
+        """
+        data = b''
+        for decoder in self._decoders:
+            data = decoder.decompress(data) + decoder.flush()
+        return data
+
+
+def get_decoder(content_encoding: Optional[str]):
+    """
+    根据Content-Encoding头部创建增量解码器。
+
+    Args:
+        content_encoding: Content-Encoding头部的值。
+
+    Returns:
+        具有decompress和flush方法的解码器；无需解码或包含不支持的编码时为None。
+    """
+    if not content_encoding:
+        return None
+    encodings = [e.strip().lower() for e in content_encoding.split(',')]
+    decoders = []
+    # 编码按应用顺序列出，解码时需要反向处理
+    for encoding in reversed(encodings):
+        if encoding in ('', 'identity'):
+            continue
+        if encoding in ('gzip', 'x-gzip'):
+            decoders.append(_ZlibDecoder('gzip'))
+        elif encoding == 'deflate':
+            decoders.append(_ZlibDecoder('deflate'))
+        elif encoding == 'br' and brotli is not None:
+            decoders.append(_BrotliDecoder())
+        else:
+            return None
+    if not decoders:
+        return None
+    return decoders[0] if len(decoders) == 1 else _MultiDecoder(decoders)
+
+
+def decode_body(data: bytes, content_encoding: Optional[str]) -> bytes:
+    """
+    一次性解码完整的响应体。
+
+    Args:
+        data: 响应体。
+        content_encoding: Content-Encoding头部的值。
+
+    Returns:
+        解码后的响应体；无需解码时原样返回。
+    """
+    decoder = get_decoder(content_encoding)
+    if decoder is None:
+        return data
+    return decoder.decompress(data) + decoder.flush()
+
+
+def compress_body(data: bytes) -> bytes:
+    """
+    使用gzip压缩请求体。
+
+    Args:
+        data: 请求体。
+
+    Returns:
+        压缩后的数据。
+    """
+    return gzip.compress(data, compresslevel=REQUEST_COMPRESS_LEVEL, mtime=0)
@@ -0,0 +1,195 @@
+"""
+Cookie持久化存储模块。
+
+CookieJar可以挂载一个CookieStore，使Cookie在进程重启后仍然可用。
+CookieJar按域名惰性地从存储中加载Cookie，并且只把变更过的Cookie增量写回，
+不会在每次变更时重写整个Cookie管理器。
+
+SQLiteCookieStore使用标准库sqlite3实现，Cookie表以(domain, path, name)为主键，
+按域名加载只需一次主键前缀查询。
+"""
+
+import sqlite3
+import threading
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+# SQLite批量查询时单条语句的最大参数数（SQLite默认上限为999）
+MAX_QUERY_PARAMS = 500
+
+
+class StoredCookie(NamedTuple):
+    """存储中的一条Cookie记录。"""
+
+    domain: str
+    path: str
+    name: str
+    value: str
+    # 过期时间（时间戳），None表示会话Cookie
+    expires: Optional[float]
+    host_only: bool
+
+
+class CookieStore:
+    """
+    Cookie持久化存储的接口。
+
+    域名均为CookieJar规范化后的形式（小写，无前导点）。实现需要是线程安全的。
+    """
+
+    def load(self, domains: Sequence[str]) -> List[StoredCookie]:
+        """
+        加载指定域名下的全部Cookie。
+
+        Args:
+            domains: 规范化后的域名列表。
+
+        Returns:
+            Cookie记录列表。
+        """
+        raise NotImplementedError
+
+    def write(self, upserts: Iterable[StoredCookie], deletes: Iterable[Tuple[str, str, str]]):
+        """
+        在一个事务中写入变更。
+
+        Args:
+            upserts: 新增或替换的Cookie记录。
+            deletes: 要删除的Cookie键(domain, path, name)。
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        """删除全部Cookie。"""
+        raise NotImplementedError
+
+    def close(self):
+        """关闭存储，重复调用是安全的。"""
+
+    @property
+    def closed(self) -> bool:
+        """存储是否已关闭。"""
+        return False
+
+
+class SQLiteCookieStore(CookieStore):
+    """
+    基于SQLite的Cookie存储。
+
+    用法::
+
+        store = SQLiteCookieStore("cookies.db")
+        client = HTTPClient(cookie_store=store)
+        ...
+        client.close()  # 写回未保存的变更
+        store.close()
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cookies (
+            domain TEXT NOT NULL,
+            path TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires REAL,
+            host_only INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (domain, path, name)
+        ) WITHOUT ROWID
+    """
+
+    def __init__(self, path: str):
+        """
+        打开（必要时创建）Cookie数据库。
+
+        Args:
+            path: 数据库文件路径，':memory:'表示内存数据库。
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # 连接在多个线程间共享，由_lock串行化访问
+        self._conn: Optional[sqlite3.Connection] = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None)
+        # WAL模式下写入不阻塞读取，增量写入只需追加日志
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(self._SCHEMA)
+
+    def load(self, domains: Sequence[str]) -> List[StoredCookie]:
+        """
+        加载指定域名下的全部Cookie。
+
+        Args:
+            domains: 规范化后的域名列表。
+
+        Returns:
+            Cookie记录列表。
+        """
+        records = []
+        with self._lock:
+            for start in range(0, len(domains), MAX_QUERY_PARAMS):
+                batch = domains[start:start + MAX_QUERY_PARAMS]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    "SELECT domain, path, name, value, expires, host_only FROM cookies "
+                    f"WHERE domain IN ({placeholders})", batch)
+                records.extend(StoredCookie(d, p, n, v, e, bool(h)) for d, p, n, v, e, h in rows)
+        return records
+
+    def write(self, upserts: Iterable[StoredCookie], deletes: Iterable[Tuple[str, str, str]]):
+        """
+        在一个事务中写入变更。
+
+        Args:
+            upserts: 新增或替换的Cookie记录。
+            deletes: 要删除的Cookie键(domain, path, name)。
+        """
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "DELETE FROM cookies WHERE domain = ? AND path = ? AND name = ?", deletes)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cookies "
+                    "(domain, path, name, value, expires, host_only) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((c.domain, c.path, c.name, c.value, c.expires, int(c.host_only))
+                     for c in upserts))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def clear(self):
+        """删除全部Cookie。"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cookies")
+
+    def count(self) -> int:
+        """
+        统计存储的Cookie数量。
+
+        Returns:
+            Cookie数量。
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cookies").fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接，重复调用是安全的。"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def closed(self) -> bool:
+        """数据库连接是否已关闭。"""
+        return self._conn is None
+
+    def __enter__(self) -> 'SQLiteCookieStore':
+        """进入上下文。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文时关闭数据库连接。"""
+        self.close()
@@ -0,0 +1,728 @@
+"""
+Cookie管理模块。
+
+CookieJar按域名标签的逆序（例如com -> example -> www）建立索引树，每个域名节点
+下再按路径段建立路径树。查找时只沿请求域名和请求路径各走一遍，代价与匹配的
+Cookie数量成正比，而与Cookie总数无关。过期时间保存在最小堆中，清理过期Cookie
+时只需弹出堆顶已过期的条目。
+
+parse_set_cookie按RFC 6265一次扫描解析单个Set-Cookie头部，parse_http_date
+解析Expires属性中的各种HTTP日期格式，并缓存解析结果。
+
+挂载CookieStore（见cookie_store模块）后，Cookie按域名惰性加载，变更增量写回。
+"""
+
+import calendar
+import heapq
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .cookie_store import CookieStore, StoredCookie
+
+
+# 过期堆中失效条目（已被替换或删除的Cookie）超过有效Cookie数的倍数时重建堆
+HEAP_COMPACT_FACTOR = 2
+
+# 重建过期堆的最小失效条目数，避免小容量时频繁重建
+HEAP_COMPACT_MIN = 1024
+
+# 未写回存储的变更达到该数量时自动写回
+FLUSH_THRESHOLD = 100
+
+# 缓存的HTTP日期解析结果数量，同一站点的Expires值通常高度重复
+HTTP_DATE_CACHE_SIZE = 512
+
+# RFC 6265允许的最早年份
+MIN_COOKIE_YEAR = 1601
+
+# Set-Cookie的名称/值对和属性：名称到第一个等号为止，值到下一个分号为止
+_PAIR_RE = re.compile(r'([^=;]*)(?:=([^;]*))?;?')
+
+# RFC 6265第5.1.1节：日期由分隔符之间的记号组成
+_DATE_TOKEN_RE = re.compile(r'[^\x09\x20-\x2f\x3b-\x40\x5b-\x60\x7b-\x7e]+')
+_TIME_RE = re.compile(r'(\d{1,2}):(\d{1,2}):(\d{1,2})(?:\D|$)')
+_DAY_RE = re.compile(r'(\d{1,2})(?:\D|$)')
+_YEAR_RE = re.compile(r'(\d{2,4})(?:\D|$)')
+_MAX_AGE_RE = re.compile(r'-?\d+$')
+
+_MONTHS = {name: index for index, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+
+class _Cookie:
+    """单个Cookie。"""
+
+    __slots__ = ('domain', 'path', 'name', 'value', 'expires', 'host_only')
+
+    def __init__(self, domain: str, path: str, name: str, value: str,
+                 expires: Optional[float], host_only: bool = False):
+        """
+        初始化Cookie。
+
+        Args:
+            domain: 规范化后的域名（小写，无前导点）。
+            path: 规范化后的路径。
+            name: Cookie名称。
+            value: Cookie值。
+            expires: 过期时间（时间戳），None表示会话Cookie。
+            host_only: 是否只发送给完全相同的主机（Set-Cookie未指定Domain属性）。
+        """
+        self.domain = domain
+        self.path = path
+        self.name = name
+        self.value = value
+        self.expires = expires
+        self.host_only = host_only
+
+    def is_expired(self, now: float) -> bool:
+        """
+        检查Cookie是否已过期。
+
+        Args:
+            now: 当前时间（时间戳）。
+
+        Returns:
+            是否已过期。
+        """
+        return bool(self.expires) and self.expires < now
+
+
+class _PathNode:
+    """
+    路径树节点，对应一个路径段。
+
+    cookies保存路径恰好在此结束的Cookie（例如/api），匹配该路径及其所有子路径；
+    dir_cookies保存以斜杠结尾的Cookie（例如/api/），只匹配子路径。
+    """
+
+    __slots__ = ('children', 'cookies', 'dir_cookies')
+
+    def __init__(self):
+        """初始化路径树节点。"""
+        self.children: Dict[str, '_PathNode'] = {}
+        self.cookies: Dict[str, _Cookie] = {}
+        self.dir_cookies: Dict[str, _Cookie] = {}
+
+    def is_empty(self) -> bool:
+        """节点是否不再包含任何Cookie或子节点。"""
+        return not (self.children or self.cookies or self.dir_cookies)
+
+
+class _DomainNode:
+    """域名索引树节点，对应一个域名标签。"""
+
+    __slots__ = ('children', 'paths')
+
+    def __init__(self):
+        """初始化域名索引树节点。"""
+        self.children: Dict[str, '_DomainNode'] = {}
+        # 该域名下Cookie的路径树，没有Cookie时为None
+        self.paths: Optional[_PathNode] = None
+
+    def is_empty(self) -> bool:
+        """节点是否不再包含任何Cookie或子节点。"""
+        return not self.children and self.paths is None
+
+
+def _normalize_domain(domain: str) -> str:
+    """
+    规范化域名：转为小写并去掉前导点。
+
+    Args:
+        domain: 域名。
+
+    Returns:
+        规范化后的域名。
+    """
+    return domain.lstrip('.').lower()
+
+
+def _normalize_path(path: str) -> str:
+    """
+    规范化路径：空路径视为/，不以斜杠开头的路径补上斜杠。
+
+    Args:
+        path: 路径。
+
+    Returns:
+        规范化后的路径。
+    """
+    if not path:
+        return '/'
+    return path if path.startswith('/') else '/' + path
+
+
+def _domain_labels(domain: str) -> List[str]:
+    """
+    将规范化的域名拆分为逆序的标签列表。
+
+    Args:
+        domain: 规范化后的域名。
+
+    Returns:
+        逆序的域名标签，例如www.example.com为['com', 'example', 'www']。
+    """
+    labels = domain.split('.')
+    labels.reverse()
+    return labels
+
+
+def _split_cookie_path(path: str) -> Tuple[List[str], bool]:
+    """
+    将规范化的Cookie路径拆分为路径段。
+
+    Args:
+        path: 规范化后的Cookie路径。
+
+    Returns:
+        (路径段列表, 是否以斜杠结尾)。例如/api为(['api'], False)，
+        /api/为(['api'], True)，/为([], True)。
+    """
+    is_dir = path.endswith('/')
+    stripped = path[1:-1] if is_dir else path[1:]
+    return (stripped.split('/') if stripped else []), is_dir
+
+
+class ParsedCookie(NamedTuple):
+    """parse_set_cookie的解析结果。"""
+
+    name: str
+    value: str
+    domain: str
+    path: str
+    # 过期时间（时间戳），None表示会话Cookie
+    expires: Optional[float]
+    # 是否只发送给设置它的主机（未指定Domain属性）
+    host_only: bool
+
+
+@lru_cache(maxsize=HTTP_DATE_CACHE_SIZE)
+def parse_http_date(value: str) -> Optional[float]:
+    """
+    按RFC 6265第5.1.1节解析Cookie的Expires日期。
+
+    兼容IMF-fixdate（Sun, 06 Nov 1994 08:49:37 GMT）、旧的Netscape格式
+    （Sunday, 06-Nov-94 08:49:37 GMT）和asctime格式。结果会被缓存。
+
+    Args:
+        value: 日期字符串。
+
+    Returns:
+        UTC时间戳，无法解析时为None。
+    """
+    clock = day = month = year = None
+    for token in _DATE_TOKEN_RE.findall(value):
+        if clock is None:
+            match = _TIME_RE.match(token)
+            if match:
+                clock = tuple(int(part) for part in match.groups())
+                continue
+        if day is None:
+            match = _DAY_RE.match(token)
+            if match:
+                day = int(match.group(1))
+                continue
+        if month is None:
+            month = _MONTHS.get(token[:3].lower())
+            if month is not None:
+                continue
+        if year is None:
+            match = _YEAR_RE.match(token)
+            if match:
+                year = int(match.group(1))
+    if clock is None or day is None or month is None or year is None:
+        return None
+    if year < 70:
+        year += 2000
+    elif year < 100:
+        year += 1900
+    hour, minute, second = clock
+    if (year < MIN_COOKIE_YEAR or hour > 23 or minute > 59 or second > 59
+            or not 1 <= day <= calendar.monthrange(year, month)[1]):
+        return None
+    return float(calendar.timegm((year, month, day, hour, minute, second)))
+
+
+def default_cookie_path(request_path: str) -> str:
+    """
+    按RFC 6265第5.1.4节计算Cookie的默认路径：请求路径最后一个斜杠之前的部分。
+
+    Args:
+        request_path: 请求路径。
+
+    Returns:
+        默认路径。
+    """
+    if not request_path.startswith('/'):
+        return '/'
+    index = request_path.rfind('/')
+    return request_path[:index] if index > 0 else '/'
+
+
+def domain_matches(host: str, domain: str) -> bool:
+    """
+    检查主机名是否与Cookie域名匹配（相同或者是其子域名）。
+
+    Args:
+        host: 规范化后的主机名。
+        domain: 规范化后的Cookie域名。
+
+    Returns:
+        是否匹配。
+    """
+    return host == domain or host.endswith('.' + domain)
+
+
+def parse_set_cookie(header: str, request_host: str, request_path: str,
+                     now: Optional[float] = None) -> Optional[ParsedCookie]:
+    """
+    解析单个Set-Cookie头部。
+
+    Max-Age优先于Expires。Domain属性与请求主机不匹配的Cookie会被拒绝；
+    未指定Domain属性时Cookie为host-only；未指定或无效的Path使用默认路径。
+
+    Args:
+        header: 一个Set-Cookie头部的值（不能是多个头部用逗号拼接的结果）。
+        request_host: 请求的主机名。
+        request_path: 请求的路径。
+        now: 当前时间（时间戳），用于计算Max-Age。默认为当前时间。
+
+    Returns:
+        解析结果，头部无效或应被拒绝时为None。已过期的Cookie的expires小于等于now。
+    """
+    pairs = _PAIR_RE.finditer(header)
+    first = next(pairs, None)
+    if first is None or first.group(2) is None:
+        return None
+    name = first.group(1).strip()
+    if not name:
+        return None
+    value = first.group(2).strip()
+
+    host = _normalize_domain(request_host)
+    domain = None
+    path = None
+    expires = None
+    max_age = None
+    for match in pairs:
+        attr = match.group(1).strip().lower()
+        if not attr:
+            continue
+        attr_value = (match.group(2) or '').strip()
+        if attr == 'max-age':
+            if _MAX_AGE_RE.match(attr_value):
+                max_age = int(attr_value)
+        elif attr == 'expires':
+            parsed = parse_http_date(attr_value)
+            if parsed is not None:
+                expires = parsed
+        elif attr == 'domain':
+            if attr_value:
+                domain = _normalize_domain(attr_value)
+        elif attr == 'path':
+            if attr_value.startswith('/'):
+                path = attr_value
+
+    if max_age is not None:
+        if now is None:
+            now = time.time()
+        expires = now + max_age if max_age > 0 else float('-inf')
+    if domain is not None and not domain_matches(host, domain):
+        return None
+    return ParsedCookie(
+        name=name,
+        value=value,
+        domain=domain if domain is not None else host,
+        path=path if path is not None else default_cookie_path(request_path),
+        expires=expires,
+        host_only=domain is None,
+    )
+
+
+class CookieJar:
+    """
+    带索引的Cookie管理器。
+
+    域名匹配规则：Cookie域名与请求域名相同，或者是请求域名的上级域名时匹配
+    （前导点可有可无）；host-only的Cookie只匹配完全相同的域名。路径匹配规则：
+    Cookie路径为/，或者是请求路径在路径分隔符处结束的前缀时匹配。
+    同名Cookie以域名和路径更具体的一个为准。
+
+    挂载了存储时，首次查找某个域名的Cookie前才从存储加载该域名及其上级域名的Cookie；
+    新增、替换和删除的Cookie记录为待写回的变更，由flush()增量写入存储。
+
+    所有操作都是线程安全的。
+    """
+
+    def __init__(self, store: Optional[CookieStore] = None,
+                 flush_threshold: int = FLUSH_THRESHOLD):
+        """
+        初始化Cookie管理器。
+
+        Args:
+            store: Cookie持久化存储。可选，默认只保存在内存中。
+            flush_threshold: 待写回的变更达到该数量时自动写回存储，小于等于0表示只在
+                调用flush()时写回。默认为100。
+        """
+        # (规范化域名, 规范化路径, 名称) -> Cookie
+        self._cookies: Dict[Tuple[str, str, str], _Cookie] = {}
+        self._root = _DomainNode()
+        # (过期时间, 序号, Cookie)的最小堆，被替换或删除的Cookie在弹出时跳过
+        self._expiry_heap: List[Tuple[float, int, _Cookie]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._store = store
+        self.flush_threshold = flush_threshold
+        # 已从存储加载过的域名
+        self._loaded: Set[str] = set()
+        # 待写回的变更：键 -> 新的Cookie，None表示删除
+        self._dirty: Dict[Tuple[str, str, str], Optional[_Cookie]] = {}
+        # 串行化存储的读写，保证加载不会读到尚未写回的旧数据。锁顺序：先_io_lock后_lock
+        self._io_lock = threading.Lock()
+
+    def set_cookie(self, domain: str, path: str, name: str, value: str,
+                   expires: Optional[float] = None, host_only: bool = False):
+        """
+        设置Cookie。相同域名、路径和名称的Cookie会被替换。
+
+        Args:
+            domain: Cookie的域名。
+            path: Cookie的路径。
+            name: Cookie名称。
+            value: Cookie值。
+            expires: 过期时间（时间戳）。
+            host_only: 是否只发送给与domain完全相同的主机，而不发送给子域名。默认为False。
+        """
+        domain = _normalize_domain(domain)
+        cookie = _Cookie(domain, _normalize_path(path), name, value, expires, host_only)
+        with self._lock:
+            self._add(cookie)
+            self._mark_dirty((cookie.domain, cookie.path, name), cookie)
+        self._maybe_flush()
+
+    def delete_cookie(self, domain: str, path: str, name: str) -> bool:
+        """
+        删除Cookie。
+
+        Args:
+            domain: Cookie的域名。
+            path: Cookie的路径。
+            name: Cookie名称。
+
+        Returns:
+            Cookie是否存在。
+        """
+        domain = _normalize_domain(domain)
+        self._ensure_loaded([domain])
+        key = (domain, _normalize_path(path), name)
+        with self._lock:
+            if not self._remove(key):
+                return False
+            self._mark_dirty(key, None)
+        self._maybe_flush()
+        return True
+
+    def get_cookies(self, domain: str, path: str) -> Dict[str, str]:
+        """
+        获取适用于指定域名和路径的Cookie。
+
+        Args:
+            domain: 域名。
+            path: 路径。
+
+        Returns:
+            Cookie字典。
+        """
+        cookies = {}
+        current_time = time.time()
+        labels = _domain_labels(_normalize_domain(domain))
+        segments = _normalize_path(path)[1:].split('/')
+        if self._store is not None:
+            # 请求域名及其全部上级域名，例如com、example.com、www.example.com
+            self._ensure_loaded(['.'.join(reversed(labels[:depth]))
+                                 for depth in range(1, len(labels) + 1)])
+        with self._lock:
+            # 从顶级域名向下遍历，更具体的域名和路径覆盖同名Cookie
+            node = self._root
+            last = len(labels) - 1
+            for depth, label in enumerate(labels):
+                node = node.children.get(label)
+                if node is None:
+                    break
+                if node.paths is not None:
+                    # 上级域名节点上只匹配非host-only的Cookie
+                    exact = depth == last
+                    for cookie in self._match_path(node.paths, segments):
+                        if ((exact or not cookie.host_only)
+                                and not cookie.is_expired(current_time)):
+                            cookies[cookie.name] = cookie.value
+        return cookies
+
+    @staticmethod
+    def _match_path(root: _PathNode, segments: List[str]) -> Iterator[_Cookie]:
+        """
+        沿路径树查找匹配请求路径的Cookie。
+
+        Args:
+            root: 路径树的根节点。
+            segments: 请求路径的路径段。
+
+        Yields:
+            匹配的Cookie，按路径从短到长排列。
+        """
+        node = root
+        yield from node.cookies.values()
+        for segment in segments:
+            # 请求路径在此节点之后还有路径段，以斜杠结尾的Cookie匹配
+            yield from node.dir_cookies.values()
+            node = node.children.get(segment)
+            if node is None:
+                return
+            yield from node.cookies.values()
+
+    def _add(self, cookie: _Cookie):
+        """
+        保存Cookie，替换相同键的Cookie。调用者需持有锁。
+
+        Args:
+            cookie: 要保存的Cookie。
+        """
+        key = (cookie.domain, cookie.path, cookie.name)
+        old = self._cookies.get(key)
+        if old is not None:
+            self._unlink(old)
+        self._cookies[key] = cookie
+        self._link(cookie)
+        if cookie.expires:
+            self._sequence += 1
+            heapq.heappush(self._expiry_heap, (cookie.expires, self._sequence, cookie))
+            self._maybe_compact_heap()
+
+    def _remove(self, key: Tuple[str, str, str]) -> bool:
+        """
+        删除Cookie。调用者需持有锁。
+
+        Args:
+            key: Cookie键(domain, path, name)。
+
+        Returns:
+            Cookie是否存在。
+        """
+        cookie = self._cookies.pop(key, None)
+        if cookie is None:
+            return False
+        self._unlink(cookie)
+        return True
+
+    def _mark_dirty(self, key: Tuple[str, str, str], cookie: Optional[_Cookie]):
+        """
+        记录待写回存储的变更。调用者需持有锁。
+
+        Args:
+            key: Cookie键(domain, path, name)。
+            cookie: 新的Cookie，None表示删除。
+        """
+        if self._store is not None:
+            self._dirty[key] = cookie
+
+    def _maybe_flush(self):
+        """待写回的变更达到阈值时写回存储。"""
+        if 0 < self.flush_threshold <= len(self._dirty):
+            try:
+                self.flush()
+            except Exception:
+                # 不让存储故障影响请求；变更会保留，在下次写回时重试
+                pass
+
+    def _ensure_loaded(self, domains: List[str]):
+        """
+        从存储加载尚未加载的域名的Cookie。
+
+        内存中已存在或已被删除（尚未写回）的Cookie以内存为准，已过期的记录不会加载，
+        并会在下次写回时从存储中删除。
+
+        Args:
+            domains: 规范化后的域名列表。
+        """
+        store = self._store
+        if store is None:
+            return
+        # 不加锁的快速检查，绝大多数查找在这里返回
+        if all(domain in self._loaded for domain in domains):
+            return
+        with self._io_lock:
+            with self._lock:
+                missing = [domain for domain in domains if domain not in self._loaded]
+            if not missing or store.closed:
+                return
+            records = store.load(missing)
+            now = time.time()
+            with self._lock:
+                for record in records:
+                    key = (record.domain, record.path, record.name)
+                    if key in self._cookies or key in self._dirty:
+                        continue
+                    if record.expires is not None and record.expires < now:
+                        self._dirty[key] = None
+                        continue
+                    self._add(_Cookie(record.domain, record.path, record.name, record.value,
+                                      record.expires, record.host_only))
+                self._loaded.update(missing)
+
+    def flush(self) -> int:
+        """
+        将待写回的变更增量写入存储。
+
+        Returns:
+            写入的变更数量；没有挂载存储或存储已关闭时为0。
+        """
+        store = self._store
+        if store is None:
+            return 0
+        with self._io_lock:
+            if store.closed:
+                return 0
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+            if not dirty:
+                return 0
+            upserts = [StoredCookie(c.domain, c.path, c.name, c.value, c.expires, c.host_only)
+                       for c in dirty.values() if c is not None]
+            deletes = [key for key, c in dirty.items() if c is None]
+            try:
+                store.write(upserts, deletes)
+            except Exception:
+                # 写入失败时保留变更，下次重试；期间产生的更新的变更优先
+                with self._lock:
+                    for key, cookie in dirty.items():
+                        self._dirty.setdefault(key, cookie)
+                raise
+        return len(dirty)
+
+    def close(self):
+        """写回待写回的变更并关闭存储。"""
+        self.flush()
+        if self._store is not None:
+            self._store.close()
+
+    def _link(self, cookie: _Cookie):
+        """
+        将Cookie加入域名索引和路径树。调用者需持有锁。
+
+        Args:
+            cookie: 要加入的Cookie。
+        """
+        node = self._root
+        for label in _domain_labels(cookie.domain):
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _DomainNode()
+            node = child
+        if node.paths is None:
+            node.paths = _PathNode()
+        path_node = node.paths
+        segments, is_dir = _split_cookie_path(cookie.path)
+        for segment in segments:
+            child = path_node.children.get(segment)
+            if child is None:
+                child = path_node.children[segment] = _PathNode()
+            path_node = child
+        bucket = path_node.dir_cookies if is_dir else path_node.cookies
+        bucket[cookie.name] = cookie
+
+    def _unlink(self, cookie: _Cookie):
+        """
+        将Cookie从域名索引和路径树中移除，并删除变为空的节点。调用者需持有锁。
+
+        Args:
+            cookie: 要移除的Cookie。
+        """
+        domain_nodes = [self._root]
+        labels = _domain_labels(cookie.domain)
+        for label in labels:
+            domain_nodes.append(domain_nodes[-1].children[label])
+        owner = domain_nodes[-1]
+        path_nodes = [owner.paths]
+        segments, is_dir = _split_cookie_path(cookie.path)
+        for segment in segments:
+            path_nodes.append(path_nodes[-1].children[segment])
+        leaf = path_nodes[-1]
+        del (leaf.dir_cookies if is_dir else leaf.cookies)[cookie.name]
+
+        # 自底向上删除空节点
+        for i in range(len(segments), 0, -1):
+            if not path_nodes[i].is_empty():
+                return
+            del path_nodes[i - 1].children[segments[i - 1]]
+        if not path_nodes[0].is_empty():
+            return
+        owner.paths = None
+        for i in range(len(labels), 0, -1):
+            if not domain_nodes[i].is_empty():
+                return
+            del domain_nodes[i - 1].children[labels[i - 1]]
+
+    def _maybe_compact_heap(self):
+        """失效条目过多时重建过期堆，限制堆的大小。调用者需持有锁。"""
+        stale = len(self._expiry_heap) - len(self._cookies)
+        if stale < HEAP_COMPACT_MIN or stale < HEAP_COMPACT_FACTOR * len(self._cookies):
+            return
+        self._expiry_heap = [entry for entry in self._expiry_heap
+                             if self._is_current(entry[2])]
+        heapq.heapify(self._expiry_heap)
+
+    def _is_current(self, cookie: _Cookie) -> bool:
+        """
+        检查Cookie是否仍保存在Cookie管理器中（没有被替换或删除）。
+
+        Args:
+            cookie: 要检查的Cookie。
+
+        Returns:
+            是否仍然有效。
+        """
+        return self._cookies.get((cookie.domain, cookie.path, cookie.name)) is cookie
+
+    def clear_expired_cookies(self) -> int:
+        """
+        清理过期的Cookie。
+
+        Returns:
+            被清理的Cookie数量。
+        """
+        current_time = time.time()
+        removed = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] < current_time:
+                _, _, cookie = heapq.heappop(heap)
+                if self._is_current(cookie):
+                    key = (cookie.domain, cookie.path, cookie.name)
+                    self._remove(key)
+                    self._mark_dirty(key, None)
+                    removed += 1
+        self._maybe_flush()
+        return removed
+
+    def clear(self):
+        """清空所有Cookie，挂载了存储时同时清空存储。"""
+        with self._io_lock:
+            with self._lock:
+                self._cookies.clear()
+                self._root = _DomainNode()
+                self._expiry_heap = []
+                self._dirty.clear()
+                self._loaded.clear()
+            if self._store is not None and not self._store.closed:
+                self._store.clear()
+
+    def __len__(self) -> int:
+        """内存中的Cookie数量（包括尚未清理的过期Cookie，不包括尚未从存储加载的Cookie）。"""
+        return len(self._cookies)
+
+    def __bool__(self) -> bool:
+        """Cookie管理器始终为真，空的Cookie管理器也不应被`if jar`判断为未启用。"""
+        return True
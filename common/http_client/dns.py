@@ -0,0 +1,457 @@
+"""
+DNS缓存模块。
+
+http.client每建立一条新连接都会调用一次getaddrinfo，连接按存活时间回收、频繁重建时，
+解析延迟会直接叠加到请求上。DNSCache在进程内按(主机, 端口)缓存解析结果，解析失败的结果
+也会缓存一小段时间（负缓存），同一主机的并发解析只会调用一次解析器。所有HTTPClient默认共享
+同一个缓存。
+
+建立连接时按RFC 8305（Happy Eyeballs）交替尝试IPv6和IPv4地址：前一个地址在
+HAPPY_EYEBALLS_DELAY内没有连上就并行尝试下一个，先连上的胜出，某个地址族不可达时
+不需要等待连接超时。
+"""
+
+import errno
+import ipaddress
+import os
+import selectors
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# getaddrinfo返回的地址信息：(family, type, proto, canonname, sockaddr)
+AddressInfo = Tuple[int, int, int, str, tuple]
+
+# 解析器：接受主机名和端口，返回地址信息列表，解析失败时抛出socket.gaierror
+Resolver = Callable[[str, int], List[AddressInfo]]
+
+# 解析结果的缓存时间（秒）。getaddrinfo不返回记录的TTL，使用固定值
+DEFAULT_TTL = 60.0
+
+# 解析失败结果的缓存时间（秒）
+NEGATIVE_TTL = 5.0
+
+# 最多缓存的(主机, 端口)数，超出时淘汰最久未使用的
+MAX_ENTRIES = 4096
+
+# 前一个地址未连上时开始尝试下一个地址前等待的时间（秒），RFC 8305推荐值
+HAPPY_EYEBALLS_DELAY = 0.25
+
+# 非阻塞connect正在进行中的错误码
+_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN,
+                getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK)}
+
+
+def system_resolver(host: str, port: int) -> List[AddressInfo]:
+    """
+    使用系统的getaddrinfo解析TCP地址。
+
+    Args:
+        host: 主机名。
+        port: 端口。
+
+    Returns:
+        地址信息列表。
+
+    Raises:
+        socket.gaierror: 如果解析失败。
+    """
+    return socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+
+
+def numeric_address(host: str, port: int) -> Optional[AddressInfo]:
+    """
+    把IP地址字面量转换为地址信息。
+
+    Args:
+        host: 主机名或IP地址。
+        port: 端口。
+
+    Returns:
+        地址信息，host不是IP地址时为None。
+    """
+    try:
+        ip = ipaddress.ip_address(host)
+    except ValueError:
+        return None
+    if ip.version == 6:
+        return (socket.AF_INET6, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (host, port, 0, 0))
+    return (socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (host, port))
+
+
+class StaticResolver:
+    """
+    按固定映射解析主机名的解析器，用于测试和离线环境。映射中没有的主机抛出socket.gaierror。
+    """
+
+    def __init__(self, hosts: Dict[str, Iterable[str]]):
+        """
+        初始化解析器。
+
+        Args:
+            hosts: 主机名到IP地址列表的映射。
+        """
+        self.hosts = {host.lower(): list(addresses) for host, addresses in hosts.items()}
+        self.calls = 0
+
+    def __call__(self, host: str, port: int) -> List[AddressInfo]:
+        """
+        解析主机名。
+
+        Args:
+            host: 主机名。
+            port: 端口。
+
+        Returns:
+            地址信息列表。
+
+        Raises:
+            socket.gaierror: 如果主机不在映射中。
+        """
+        self.calls += 1
+        addresses = self.hosts.get(host.lower())
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"未知主机: {host}")
+        return [numeric_address(address, port) for address in addresses]
+
+
+def interleave_families(addresses: List[AddressInfo]) -> List[AddressInfo]:
+    """
+    按RFC 8305交替排列不同地址族的地址，第一个地址族保持解析器给出的优先顺序。
+
+    Args:
+        addresses: 地址信息列表。
+
+    Returns:
+        交替排列后的地址信息列表。
+    """
+    families: Dict[int, List[AddressInfo]] = {}
+    for info in addresses:
+        families.setdefault(info[0], []).append(info)
+    groups = list(families.values())
+    result = []
+    for i in range(max((len(group) for group in groups), default=0)):
+        result.extend(group[i] for group in groups if i < len(group))
+    return result
+
+
+def happy_eyeballs_connect(addresses: List[AddressInfo], timeout: Optional[float],
+                           delay: float = HAPPY_EYEBALLS_DELAY,
+                           source_address: Optional[tuple] = None) -> socket.socket:
+    """
+    依次错开delay秒并行尝试连接各个地址，返回最先连上的套接字，其余尝试被关闭。
+    某个尝试失败时立即开始下一个。
+
+    Args:
+        addresses: 地址信息列表，按interleave_families排列后依次尝试。
+        timeout: 总超时时间（秒），同时设置为返回的套接字的超时。None表示不超时。
+        delay: 开始下一个尝试前等待的时间（秒）。
+        source_address: 绑定的本地地址。可选。
+
+    Returns:
+        已连接的套接字。
+
+    Raises:
+        socket.timeout: 如果在超时时间内没有任何地址连上。
+        OSError: 如果所有地址都连接失败。
+    """
+    if not addresses:
+        raise OSError("没有可连接的地址")
+    pending = interleave_families(addresses)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    selector = selectors.DefaultSelector()
+    attempts: Dict[socket.socket, tuple] = {}
+    last_error: Optional[OSError] = None
+    next_attempt = 0.0
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if pending and (not attempts or now >= next_attempt):
+                family, type_, proto, _, sockaddr = pending.pop(0)
+                sock = socket.socket(family, type_, proto)
+                try:
+                    sock.setblocking(False)
+                    if source_address:
+                        sock.bind(source_address)
+                    error = sock.connect_ex(sockaddr)
+                except OSError as e:
+                    sock.close()
+                    last_error = e
+                    continue
+                if error == 0:
+                    sock.settimeout(timeout)
+                    return sock
+                if error not in _IN_PROGRESS:
+                    sock.close()
+                    last_error = OSError(error, os.strerror(error), sockaddr)
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE)
+                attempts[sock] = sockaddr
+                next_attempt = now + delay
+                continue
+
+            wait = max(next_attempt - now, 0.0) if pending else None
+            if deadline is not None:
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise socket.timeout("连接超时")
+                wait = remaining if wait is None else min(wait, remaining)
+            for key, _ in selector.select(wait):
+                sock = key.fileobj
+                selector.unregister(sock)
+                sockaddr = attempts.pop(sock)
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error == 0:
+                    sock.settimeout(timeout)
+                    return sock
+                sock.close()
+                last_error = OSError(error, os.strerror(error), sockaddr)
+                # 失败时立即开始下一个尝试
+                next_attempt = 0.0
+        raise last_error
+    finally:
+        for sock in attempts:
+            sock.close()
+        selector.close()
+
+
+class _Entry:
+    """缓存条目：过期时间，以及解析结果或解析失败的异常。"""
+
+    __slots__ = ('expires_at', 'addresses', 'error')
+
+    def __init__(self, expires_at: float, addresses: Optional[List[AddressInfo]],
+                 error: Optional[socket.gaierror]):
+        self.expires_at = expires_at
+        self.addresses = addresses
+        self.error = error
+
+
+class DNSCache:
+    """
+    线程安全的DNS缓存，支持TTL、负缓存、固定主机地址和Happy Eyeballs连接。
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, negative_ttl: float = NEGATIVE_TTL,
+                 resolver: Optional[Resolver] = None, max_entries: int = MAX_ENTRIES,
+                 happy_eyeballs_delay: float = HAPPY_EYEBALLS_DELAY):
+        """
+        初始化缓存。
+
+        Args:
+            ttl: 解析结果的缓存时间（秒）。为0时不缓存。
+            negative_ttl: 解析失败结果的缓存时间（秒）。为0时不缓存。
+            resolver: 解析器。默认为system_resolver。
+            max_entries: 最多缓存的(主机, 端口)数。
+            happy_eyeballs_delay: 连接时开始尝试下一个地址前等待的时间（秒）。
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.resolver = resolver or system_resolver
+        self.max_entries = max_entries
+        self.happy_eyeballs_delay = happy_eyeballs_delay
+        self._entries: 'OrderedDict[Tuple[str, int], _Entry]' = OrderedDict()
+        self._pins: Dict[str, List[str]] = {}
+        self._inflight: Dict[Tuple[str, int], threading.Event] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._negative_hits = 0
+
+    def pin(self, host: str, addresses: Iterable[str]):
+        """
+        把主机固定到指定的IP地址，不再解析该主机。
+
+        Args:
+            host: 主机名。
+            addresses: IP地址列表，按顺序优先尝试。
+
+        Raises:
+            ValueError: 如果地址列表为空或包含非IP地址。
+        """
+        addresses = [str(ipaddress.ip_address(address)) for address in addresses]
+        if not addresses:
+            raise ValueError("固定的地址列表不能为空")
+        with self._lock:
+            self._pins[host.lower()] = addresses
+
+    def unpin(self, host: str):
+        """
+        取消主机的固定地址。
+
+        Args:
+            host: 主机名。
+        """
+        with self._lock:
+            self._pins.pop(host.lower(), None)
+
+    def invalidate(self, host: Optional[str] = None):
+        """
+        删除缓存的解析结果，固定的地址不受影响。
+
+        Args:
+            host: 主机名。为None时清空整个缓存。
+        """
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+                return
+            host = host.lower()
+            for key in [key for key in self._entries if key[0] == host]:
+                del self._entries[key]
+
+    def resolve(self, host: str, port: int) -> List[AddressInfo]:
+        """
+        解析主机地址，优先使用固定的地址和未过期的缓存。
+
+        Args:
+            host: 主机名或IP地址。
+            port: 端口。
+
+        Returns:
+            地址信息列表。
+
+        Raises:
+            socket.gaierror: 如果解析失败（包括缓存的失败结果）。
+        """
+        numeric = numeric_address(host, port)
+        if numeric is not None:
+            return [numeric]
+        key = (host.lower(), port)
+        while True:
+            with self._lock:
+                pinned = self._pins.get(key[0])
+                if pinned is not None:
+                    return [numeric_address(address, port) for address in pinned]
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    if entry.error is not None:
+                        self._negative_hits += 1
+                        raise socket.gaierror(*entry.error.args)
+                    self._hits += 1
+                    return entry.addresses
+                # 同一主机同时只解析一次，其他线程等待结果
+                event = self._inflight.get(key)
+                if event is None:
+                    event = self._inflight[key] = threading.Event()
+                    self._misses += 1
+                    break
+            event.wait()
+        return self._lookup(key, host, port, event)
+
+    def _lookup(self, key: Tuple[str, int], host: str, port: int,
+                event: threading.Event) -> List[AddressInfo]:
+        """
+        调用解析器并缓存结果，完成后唤醒等待同一主机的线程。
+
+        Args:
+            key: 缓存键。
+            host: 主机名。
+            port: 端口。
+            event: 本次解析的完成事件。
+
+        Returns:
+            地址信息列表。
+
+        Raises:
+            socket.gaierror: 如果解析失败。
+        """
+        entry = None
+        try:
+            try:
+                addresses = list(self.resolver(host, port))
+                if not addresses:
+                    raise socket.gaierror(socket.EAI_NONAME, f"{host}没有地址")
+                entry = _Entry(time.monotonic() + self.ttl, addresses, None)
+            except socket.gaierror as e:
+                entry = _Entry(time.monotonic() + self.negative_ttl, None, e)
+        finally:
+            with self._lock:
+                if entry is not None and entry.expires_at > time.monotonic():
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                del self._inflight[key]
+            event.set()
+        if entry.error is not None:
+            raise entry.error
+        return entry.addresses
+
+    def create_connection(self, address: Tuple[str, int],
+                          timeout: Optional[float] = socket._GLOBAL_DEFAULT_TIMEOUT,
+                          source_address: Optional[tuple] = None,
+                          timings: Optional[Dict[str, float]] = None) -> socket.socket:
+        """
+        与socket.create_connection签名相同：通过缓存解析地址并用Happy Eyeballs连接。
+        所有地址都连接失败时删除该主机的缓存，下次连接重新解析。
+
+        Args:
+            address: (主机, 端口)。
+            timeout: 超时时间（秒）。默认使用socket.getdefaulttimeout()。
+            source_address: 绑定的本地地址。可选。
+            timings: 提供时写入'dns'和'connect'两项耗时（秒）。可选。
+
+        Returns:
+            已连接的套接字。
+
+        Raises:
+            socket.gaierror: 如果解析失败。
+            OSError: 如果连接失败或超时。
+        """
+        host, port = address[:2]
+        if timeout is socket._GLOBAL_DEFAULT_TIMEOUT:
+            timeout = socket.getdefaulttimeout()
+        if timings is None:
+            addresses = self.resolve(host, port)
+            connect_start = 0.0
+        else:
+            start = time.perf_counter()
+            addresses = self.resolve(host, port)
+            connect_start = time.perf_counter()
+            timings['dns'] = connect_start - start
+        try:
+            sock = happy_eyeballs_connect(addresses, timeout, self.happy_eyeballs_delay,
+                                          source_address)
+            if timings is not None:
+                timings['connect'] = time.perf_counter() - connect_start
+            return sock
+        except socket.timeout:
+            raise
+        except OSError:
+            self.invalidate(host)
+            raise
+
+    def stats(self) -> dict:
+        """
+        缓存统计。
+
+        Returns:
+            字典，包含hits（命中次数）、negative_hits（命中缓存的失败结果次数）、
+            misses（调用解析器的次数）、entries（缓存条目数）和pinned（固定地址的主机数）。
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'negative_hits': self._negative_hits,
+                'misses': self._misses,
+                'entries': len(self._entries),
+                'pinned': len(self._pins),
+            }
+
+
+# 所有HTTPClient默认共享的DNS缓存
+_default_cache = DNSCache()
+
+
+def default_dns_cache() -> DNSCache:
+    """
+    获取进程内共享的DNS缓存。
+
+    Returns:
+        共享的DNS缓存。
+    """
+    return _default_cache
@@ -0,0 +1,40 @@
+"""
+HTTP客户端异常模块。
+"""
+
+
+class HTTPException(Exception):
+    """HTTP客户端错误的自定义异常。"""
+    pass
+
+
+class CircuitOpenError(HTTPException):
+    """熔断器打开时拒绝请求的异常，请求没有发送到服务器。"""
+
+    def __init__(self, key, retry_after: float):
+        """
+        初始化异常。
+
+        Args:
+            key: 被熔断的主机键(scheme, host, port)。
+            retry_after: 距离熔断器进入半开状态的秒数。
+        """
+        super().__init__(f"熔断器已打开，拒绝请求: {key}（{retry_after:.1f}秒后重试）")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class RateLimitExceeded(HTTPException):
+    """超出客户端限流配额的异常，请求没有发送到服务器。"""
+
+    def __init__(self, key: str, retry_after: float):
+        """
+        初始化异常。
+
+        Args:
+            key: 限流规则的键（主机名或URL前缀）。
+            retry_after: 距离令牌足够的秒数。
+        """
+        super().__init__(f"超出限流配额: {key}（{retry_after:.2f}秒后重试）")
+        self.key = key
+        self.retry_after = retry_after
@@ -0,0 +1,844 @@
+"""
+HTTP/2传输模块（可选，需要安装h2）。
+
+每个主机只建立一条连接，并发请求作为独立的流在这条连接上多路复用，
+只需要一次TCP（和TLS）握手。后台线程读取帧并分发到各个流；发送请求体时遵守
+对端的流量控制窗口，接收的数据在被读取后才确认，流式读取慢时对端会暂停发送。
+对端限制的并发流数用尽时，等待的请求按优先级获得空闲的流：优先级取自请求的
+Priority头部（RFC 9218，u=0最高，默认u=3），同一优先级按先来先得。
+
+https连接通过ALPN协商h2，服务器不支持时该主机回退到HTTP/1.1连接池；
+http连接使用先验知识（prior knowledge，即h2c）直接发送HTTP/2。
+"""
+
+import heapq
+import itertools
+import socket
+import ssl
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Iterable, List, Optional, Tuple
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    import h2.settings
+except ImportError:  # pragma: no cover - 可选依赖
+    h2 = None
+
+from .dns import DNSCache
+from .tls import TLSChannel, TLSSessionCache, create_ssl_context
+
+
+# ALPN协商的协议，服务器不支持h2时选择http/1.1
+ALPN_PROTOCOLS = ['h2', 'http/1.1']
+
+# 每个流的接收窗口（字节），大于协议默认的65535，减少大响应的WINDOW_UPDATE往返
+STREAM_WINDOW_SIZE = 1024 * 1024
+
+# 连接级接收窗口（字节），允许多个流同时以完整窗口接收数据
+CONNECTION_WINDOW_SIZE = 16 * 1024 * 1024
+
+# 协议规定的连接级初始窗口（字节）
+_DEFAULT_CONNECTION_WINDOW = 65535
+
+# 每次从套接字读取的字节数
+READ_SIZE = 64 * 1024
+
+# 未声明Priority头部时的优先级（RFC 9218）
+DEFAULT_URGENCY = 3
+
+# 优先级的取值范围
+_MAX_URGENCY = 7
+
+# 帧头部的长度（字节）：3字节长度、1字节类型、1字节标志、4字节流ID
+_FRAME_HEADER_SIZE = 9
+
+# GOAWAY帧的类型
+_GOAWAY_FRAME_TYPE = 0x7
+
+# GOAWAY帧负载的开头：最后处理的流ID（最高位保留）、错误码
+_GOAWAY_PAYLOAD = struct.Struct('>II')
+
+# HTTP/2禁止的逐跳头部，Host由:authority伪头部代替
+_HOP_BY_HOP_HEADERS = frozenset({'connection', 'keep-alive', 'proxy-connection',
+                                 'transfer-encoding', 'upgrade', 'host', 'te'})
+
+
+class HTTP2Unavailable(Exception):
+    """服务器在ALPN协商中没有选择h2，应改用HTTP/1.1。"""
+
+
+def parse_urgency(headers: Dict[str, str]) -> int:
+    """
+    从Priority头部（RFC 9218）解析优先级。
+
+    Args:
+        headers: 请求头部字典。
+
+    Returns:
+        优先级0到7，数字越小越优先。没有或无法解析时为DEFAULT_URGENCY。
+    """
+    for name, value in headers.items():
+        if name.lower() != 'priority':
+            continue
+        for item in str(value).split(','):
+            key, _, number = item.strip().partition('=')
+            if key == 'u' and number.isdigit():
+                return min(int(number), _MAX_URGENCY)
+    return DEFAULT_URGENCY
+
+
+class HTTP2Stream:
+    """
+    一个请求对应的流，同时作为响应对象。
+
+    提供与http.client.HTTPResponse相同的read()、isclosed()和close()方法，
+    可以直接交给StreamingBody流式读取。
+    """
+
+    def __init__(self, connection: 'HTTP2Connection', stream_id: int, lock: threading.Lock):
+        """
+        初始化流。
+
+        Args:
+            connection: 所属的连接。
+            stream_id: 流ID。
+            lock: 连接的锁。
+        """
+        self.connection = connection
+        self.stream_id = stream_id
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[str, str]] = []
+        # 已收到但尚未读取的(数据, 流量控制长度)
+        self._chunks: Deque[Tuple[bytes, int]] = deque()
+        # 对端已发送完响应
+        self.ended = False
+        # 流或连接出错时的异常
+        self.error: Optional[BaseException] = None
+        self.condition = threading.Condition(lock)
+
+    def _wait(self, ready, timeout: Optional[float]):
+        """
+        在连接的锁内等待条件成立。
+
+        Args:
+            ready: 无参数的条件函数。
+            timeout: 最长等待时间（秒）。
+
+        Raises:
+            socket.timeout: 等待超时。
+            Exception: 流或连接出错。
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not ready():
+            if self.error is not None:
+                raise self.error
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self.connection._cancel(self)
+                raise socket.timeout(f"等待HTTP/2流{self.stream_id}超时")
+            self.condition.wait(remaining)
+
+    def wait_headers(self, timeout: Optional[float]):
+        """
+        等待响应头部。
+
+        Args:
+            timeout: 最长等待时间（秒）。
+        """
+        with self.condition:
+            self._wait(lambda: self.status is not None, timeout)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """
+        读取响应体，读取后的数据才会向对端确认（释放流量控制窗口）。
+
+        Args:
+            amt: 最多读取的字节数。默认读取全部剩余数据。
+
+        Returns:
+            读取到的数据，已读完时返回空字节串。
+        """
+        timeout = self.connection.timeout
+        parts = []
+        size = 0
+        acknowledged = 0
+        with self.condition:
+            while amt is None or size < amt:
+                if not self._chunks:
+                    if self.ended:
+                        break
+                    if parts and amt is not None:
+                        # 已有数据时不等待更多数据
+                        break
+                    if acknowledged:
+                        # 等待前先确认已读取的数据，否则对端可能因窗口耗尽而停止发送
+                        self.connection._acknowledge(self.stream_id, acknowledged)
+                        acknowledged = 0
+                    self._wait(lambda: self._chunks or self.ended, timeout)
+                    continue
+                data, flow_length = self._chunks.popleft()
+                if amt is not None and size + len(data) > amt:
+                    # 剩余部分放回队首，流量控制长度已随本次确认
+                    keep = amt - size
+                    self._chunks.appendleft((data[keep:], 0))
+                    data = data[:keep]
+                parts.append(data)
+                size += len(data)
+                acknowledged += flow_length
+            if acknowledged:
+                self.connection._acknowledge(self.stream_id, acknowledged)
+        return b''.join(parts)
+
+    def isclosed(self) -> bool:
+        """响应体是否已全部读取。"""
+        return self.ended and not self._chunks
+
+    def close(self):
+        """关闭流，响应尚未接收完时取消该流。丢弃的未读数据同样向对端确认。"""
+        with self.condition:
+            if not self.ended:
+                self.connection._cancel(self)
+            unread = sum(flow_length for _, flow_length in self._chunks)
+            self._chunks.clear()
+            if unread:
+                self.connection._acknowledge(self.stream_id, unread)
+
+
+class HTTP2Connection:
+    """
+    到一个主机的HTTP/2连接，可以被多个线程同时使用。
+
+    h2的状态机不是线程安全的，所有对它的调用以及套接字写入都在同一把锁内进行；
+    读取套接字在后台线程中进行，不持有锁。
+    """
+
+    def __init__(self, sock: socket.socket, authority: str, scheme: str, timeout: float,
+                 tls: Optional[TLSChannel] = None,
+                 on_first_response: Optional[Callable[[TLSChannel], None]] = None):
+        """
+        在已建立的套接字上初始化HTTP/2连接并启动读取线程。
+
+        Args:
+            sock: 已连接的原始套接字。
+            authority: :authority伪头部的值（主机[:端口]）。
+            scheme: http或https。
+            timeout: 等待响应和流量控制窗口的超时时间（秒）。
+            tls: 已完成握手的TLS连接，为None时不加密（h2c）。所有TLS操作都在锁内进行。
+            on_first_response: 第一个响应完整接收后以tls为参数调用（在锁内），
+                用于保存TLS 1.3在握手之后才发送的会话票据。可选。
+        """
+        self.authority = authority
+        self.scheme = scheme
+        self.timeout = timeout
+        self.last_used = time.monotonic()
+        self._sock = sock
+        self._tls = tls
+        self._lock = threading.Lock()
+        self._streams: Dict[int, HTTP2Stream] = {}
+        # 尚未关闭的本地发起的流数
+        self._active = 0
+        # 等待空闲流的请求：[优先级, 序号, Condition]
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        # 连接出错后的异常，之后的请求都会失败
+        self._error: Optional[BaseException] = None
+        # 收到GOAWAY后不再发起新的流
+        self._closing = False
+        # 尚未组成完整帧的接收数据
+        self._inbound = bytearray()
+        self._on_first_response = on_first_response
+
+        # 请求头部已在request()中转为小写并去掉了逐跳头部，不再由h2逐个校验
+        config = h2.config.H2Configuration(client_side=True, header_encoding='utf-8',
+                                           validate_outbound_headers=False)
+        self._conn = h2.connection.H2Connection(config=config)
+        self._conn.local_settings = h2.settings.Settings(
+            client=True,
+            initial_values={
+                h2.settings.SettingCodes.ENABLE_PUSH: 0,
+                h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: STREAM_WINDOW_SIZE,
+            })
+        with self._lock:
+            self._conn.initiate_connection()
+            self._conn.increment_flow_control_window(
+                CONNECTION_WINDOW_SIZE - _DEFAULT_CONNECTION_WINDOW)
+            self._flush()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True,
+                                        name=f'http2-{authority}')
+        self._reader.start()
+
+    def is_usable(self) -> bool:
+        """连接是否可以发起新的流。"""
+        return self._error is None and not self._closing
+
+    @property
+    def failed(self) -> bool:
+        """连接是否已出错或已关闭。"""
+        return self._error is not None
+
+    @property
+    def active_streams(self) -> int:
+        """尚未关闭的流数。"""
+        return self._active
+
+    def request(self, method: str, path: str, headers: Dict[str, str], body: Any) -> HTTP2Stream:
+        """
+        在新的流上发送请求，并等待响应头部。
+
+        Args:
+            method: HTTP方法。
+            path: 请求路径和查询字符串。
+            headers: 请求头部。
+            body: 请求体：None、字符串、字节串、文件类对象或字节块的可迭代对象。
+
+        Returns:
+            已收到响应头部的流，响应体通过它的read()读取。
+
+        Raises:
+            socket.timeout: 等待空闲流、流量控制窗口或响应超时。
+            Exception: 连接或流出错。
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        urgency = parse_urgency(headers)
+        request_headers = [(':method', method), (':scheme', self.scheme),
+                           (':authority', self.authority), (':path', path)]
+        for name, value in headers.items():
+            name = name.lower()
+            if name not in _HOP_BY_HOP_HEADERS and name != 'content-length':
+                request_headers.append((name, str(value)))
+        if isinstance(body, (bytes, bytearray)):
+            request_headers.append(('content-length', str(len(body))))
+
+        self.last_used = time.monotonic()
+        with self._lock:
+            self._acquire_slot(urgency)
+            try:
+                stream_id = self._conn.get_next_available_stream_id()
+                stream = HTTP2Stream(self, stream_id, self._lock)
+                self._streams[stream_id] = stream
+                self._conn.send_headers(stream_id, request_headers, end_stream=body is None)
+                self._flush()
+            except BaseException:
+                self._release_slot()
+                raise
+        if body is not None:
+            self._send_body(stream, body)
+        stream.wait_headers(self.timeout)
+        return stream
+
+    def _acquire_slot(self, urgency: int):
+        """
+        占用一个并发流名额，名额用尽时按优先级排队等待。调用者必须持有锁。
+
+        Args:
+            urgency: 请求的优先级。
+
+        Raises:
+            socket.timeout: 等待超时。
+        """
+        if not self._waiters and self._has_free_slot():
+            self._active += 1
+            return
+        entry = [urgency, next(self._sequence), threading.Condition(self._lock)]
+        heapq.heappush(self._waiters, entry)
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                if self._error is not None:
+                    raise self._error
+                if self._waiters[0] is entry and self._has_free_slot():
+                    heapq.heappop(self._waiters)
+                    self._active += 1
+                    self._wake_next_waiter()
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout("等待HTTP/2并发流名额超时")
+                entry[2].wait(remaining)
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._wake_next_waiter()
+            raise
+
+    def _has_free_slot(self) -> bool:
+        """对端允许的并发流数是否还有剩余。调用者必须持有锁。"""
+        if self._error is not None:
+            raise self._error
+        if self._closing:
+            raise ConnectionError("HTTP/2连接正在关闭")
+        return self._active < self._conn.remote_settings.max_concurrent_streams
+
+    def _wake_next_waiter(self):
+        """唤醒优先级最高的等待者。调用者必须持有锁。"""
+        if self._waiters:
+            self._waiters[0][2].notify()
+
+    def _release_slot(self):
+        """释放一个并发流名额。调用者必须持有锁。"""
+        self._active -= 1
+        self._wake_next_waiter()
+
+    def _send_body(self, stream: HTTP2Stream, body: Any):
+        """
+        按流量控制窗口分帧发送请求体，窗口用尽时等待对端的WINDOW_UPDATE。
+
+        Args:
+            stream: 请求的流。
+            body: 字节串、文件类对象或字节块的可迭代对象。
+        """
+        if isinstance(body, (bytes, bytearray)):
+            chunks: Iterable[bytes] = (body,)
+        elif hasattr(body, 'read'):
+            chunks = iter(lambda: body.read(READ_SIZE), b'')
+        else:
+            chunks = body
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            view = memoryview(chunk)
+            while view:
+                with self._lock:
+                    stream._wait(lambda: stream.ended or self._send_window(stream) > 0,
+                                 self.timeout)
+                    if stream.ended:
+                        # 服务器没有读完请求体就已经完成响应
+                        return
+                    size = min(self._send_window(stream), len(view))
+                    self._conn.send_data(stream.stream_id, view[:size].tobytes())
+                    self._flush()
+                view = view[size:]
+        with self._lock:
+            if stream.error is not None:
+                raise stream.error
+            if stream.ended:
+                return
+            self._conn.end_stream(stream.stream_id)
+            self._flush()
+
+    def _send_window(self, stream: HTTP2Stream) -> int:
+        """
+        当前可以在流上发送的字节数。调用者必须持有锁。
+
+        Args:
+            stream: 请求的流。
+
+        Returns:
+            字节数，不超过最大帧大小。
+        """
+        if stream.error is not None:
+            raise stream.error
+        return min(self._conn.local_flow_control_window(stream.stream_id),
+                   self._conn.max_outbound_frame_size)
+
+    def _acknowledge(self, stream_id: int, size: int):
+        """
+        确认已读取的数据，需要时向对端发送WINDOW_UPDATE。调用者必须持有锁。
+
+        Args:
+            stream_id: 流ID。
+            size: 已读取数据的流量控制长度。
+        """
+        if self._error is not None:
+            return
+        try:
+            self._conn.acknowledge_received_data(size, stream_id)
+            self._flush()
+        except Exception:
+            # 流已关闭时只需要确认连接级窗口，h2会自行处理
+            pass
+
+    def _cancel(self, stream: HTTP2Stream):
+        """
+        以CANCEL取消未完成的流。调用者必须持有锁。
+
+        Args:
+            stream: 要取消的流。
+        """
+        if self._streams.pop(stream.stream_id, None) is None:
+            return
+        stream.error = stream.error or ConnectionAbortedError(f"HTTP/2流{stream.stream_id}已取消")
+        self._release_slot()
+        if self._error is None:
+            try:
+                self._conn.reset_stream(stream.stream_id, h2.errors.ErrorCodes.CANCEL)
+                self._flush()
+            except Exception:
+                pass
+
+    def _flush(self):
+        """将h2产生的待发送数据（使用TLS时加密后）写入套接字。调用者必须持有锁。"""
+        data = self._conn.data_to_send()
+        if self._tls is not None:
+            data = self._tls.encrypt(data)
+        if data:
+            self._sock.sendall(data)
+
+    def _read_loop(self):
+        """后台线程：读取帧并分发事件，直到连接关闭或出错。"""
+        try:
+            while True:
+                data = self._sock.recv(READ_SIZE)
+                if not data:
+                    raise ConnectionResetError("HTTP/2连接已被服务器关闭")
+                with self._lock:
+                    if self._tls is not None:
+                        data = self._tls.decrypt(data)
+                    self._receive(data)
+                    self._flush()
+        except Exception as e:
+            with self._lock:
+                self._fail(e)
+
+    def _receive(self, data: bytes):
+        """
+        按帧边界把数据交给h2，GOAWAY帧由连接自己处理。调用者必须持有锁。
+
+        h2收到GOAWAY后进入CLOSED状态，之后同一连接上的任何帧都会引发ProtocolError，
+        last_stream_id及之前的流无法完成。因此GOAWAY帧不交给h2，h2的状态保持打开，
+        这些流的响应和请求体照常收发。
+
+        Args:
+            data: 解密后的数据。
+        """
+        buffer = self._inbound
+        buffer += data
+        start = offset = 0
+        while len(buffer) - offset >= _FRAME_HEADER_SIZE:
+            length = int.from_bytes(buffer[offset:offset + 3], 'big')
+            end = offset + _FRAME_HEADER_SIZE + length
+            if end > len(buffer):
+                break
+            if buffer[offset + 3] == _GOAWAY_FRAME_TYPE and length >= _GOAWAY_PAYLOAD.size:
+                self._dispatch(bytes(buffer[start:offset]))
+                last_stream_id, error_code = _GOAWAY_PAYLOAD.unpack_from(
+                    buffer, offset + _FRAME_HEADER_SIZE)
+                self._goaway(last_stream_id & 0x7FFFFFFF, error_code)
+                start = end
+            offset = end
+        self._dispatch(bytes(buffer[start:offset]))
+        del buffer[:offset]
+
+    def _dispatch(self, data: bytes):
+        """
+        把完整的帧交给h2并处理产生的事件。调用者必须持有锁。
+
+        Args:
+            data: 零个或多个完整的帧。
+        """
+        if data:
+            for event in self._conn.receive_data(data):
+                self._handle_event(event)
+
+    def _goaway(self, last_stream_id: int, error_code: int):
+        """
+        处理GOAWAY：last_stream_id之后的流没有被处理，以错误结束；其余的流继续完成。
+        之后不再发起新的流。调用者必须持有锁。
+
+        Args:
+            last_stream_id: 服务器处理过的最大流ID。
+            error_code: 错误码。
+        """
+        self._closing = True
+        try:
+            error_code = h2.errors.ErrorCodes(error_code)
+        except ValueError:
+            pass
+        error = ConnectionResetError(f"HTTP/2连接被服务器关闭，错误码{error_code}")
+        for stream_id in [sid for sid in self._streams if sid > last_stream_id]:
+            self._finish_stream(self._streams[stream_id], error)
+        for entry in self._waiters:
+            entry[2].notify()
+
+    def _handle_event(self, event: Any):
+        """
+        处理一个h2事件。调用者必须持有锁。
+
+        Args:
+            event: h2事件。
+        """
+        if isinstance(event, h2.events.WindowUpdated):
+            # 连接级窗口更新时所有发送方都可能继续
+            targets = (self._streams.values() if event.stream_id == 0
+                       else [self._streams.get(event.stream_id)])
+            for stream in targets:
+                if stream is not None:
+                    stream.condition.notify_all()
+            return
+        if isinstance(event, h2.events.RemoteSettingsChanged):
+            self._wake_next_waiter()
+            return
+        stream = self._streams.get(getattr(event, 'stream_id', None))
+        if stream is None:
+            if isinstance(event, h2.events.DataReceived):
+                # 已取消的流上仍在到达的数据，确认后释放连接级窗口
+                self._acknowledge(event.stream_id, event.flow_controlled_length)
+            return
+        if isinstance(event, h2.events.ResponseReceived):
+            for name, value in event.headers:
+                if name == ':status':
+                    stream.status = int(value)
+                else:
+                    stream.headers.append((name, value))
+        elif isinstance(event, h2.events.DataReceived):
+            stream._chunks.append((event.data, event.flow_controlled_length))
+        elif isinstance(event, h2.events.StreamEnded):
+            self._finish_stream(stream, None)
+            return
+        elif isinstance(event, h2.events.StreamReset):
+            self._finish_stream(stream, ConnectionResetError(
+                f"HTTP/2流{stream.stream_id}被重置，错误码{event.error_code}"))
+            return
+        stream.condition.notify_all()
+
+    def _finish_stream(self, stream: HTTP2Stream, error: Optional[BaseException]):
+        """
+        流结束（正常结束或出错），释放并发流名额。调用者必须持有锁。
+
+        Args:
+            stream: 结束的流。
+            error: 出错时的异常，正常结束时为None。
+        """
+        if self._streams.pop(stream.stream_id, None) is None:
+            return
+        if error is None:
+            stream.ended = True
+            if self._on_first_response is not None:
+                callback, self._on_first_response = self._on_first_response, None
+                callback(self._tls)
+        else:
+            stream.error = error
+        self._release_slot()
+        stream.condition.notify_all()
+
+    def _fail(self, error: BaseException):
+        """
+        连接出错，所有未完成的流和等待者都以该异常失败。调用者必须持有锁。
+
+        Args:
+            error: 异常。
+        """
+        if self._error is None:
+            self._error = error
+        for stream in list(self._streams.values()):
+            self._finish_stream(stream, error)
+        for entry in self._waiters:
+            entry[2].notify()
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        """发送GOAWAY并关闭连接。"""
+        with self._lock:
+            if self._error is None:
+                try:
+                    self._conn.close_connection()
+                    self._flush()
+                except Exception:
+                    pass
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._fail(ConnectionAbortedError("HTTP/2连接已关闭"))
+
+
+class HTTP2Transport:
+    """
+    按主机管理HTTP/2连接，每个主机（scheme, host, port）一条连接。
+
+    连接出错或收到GOAWAY后，下一个请求会建立新的连接；收到GOAWAY的连接移入排空集合，
+    其上进行中的流全部结束后才关闭。https主机在ALPN协商中没有选择h2时被记住，
+    之后该主机的请求都使用HTTP/1.1。
+    """
+
+    def __init__(self, timeout: float,
+                 ssl_context_factory: Optional[Callable[[], ssl.SSLContext]] = None,
+                 sessions: Optional[TLSSessionCache] = None,
+                 dns_cache: Optional[DNSCache] = None):
+        """
+        初始化传输。
+
+        Args:
+            timeout: 连接和等待响应的超时时间（秒）。
+            ssl_context_factory: 返回https连接使用的SSL上下文（需要包含h2的ALPN）的函数，
+                首次建立https连接时调用。默认使用create_ssl_context(ALPN_PROTOCOLS)。
+            sessions: TLS会话缓存，重新连接时恢复会话。默认为新的缓存。
+            dns_cache: 解析主机地址并建立TCP连接的DNS缓存。默认直接使用socket.create_connection。
+
+        Raises:
+            ImportError: 如果没有安装h2。
+        """
+        if h2 is None:
+            raise ImportError("使用HTTP/2需要安装h2: pip install h2")
+        self.timeout = timeout
+        self._connections: Dict[Hashable, HTTP2Connection] = {}
+        # 收到GOAWAY、等待进行中的流结束的连接
+        self._draining = set()
+        # 每个主机一把锁，避免同时为同一主机建立多条连接
+        self._host_locks: Dict[Hashable, threading.Lock] = {}
+        self._http1_hosts = set()
+        self._lock = threading.Lock()
+        self._ssl_context_factory = ssl_context_factory or (
+            lambda: create_ssl_context(ALPN_PROTOCOLS))
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self.sessions = sessions or TLSSessionCache()
+        self._create_connection = (dns_cache.create_connection if dns_cache is not None
+                                   else socket.create_connection)
+        # 建立过的连接数
+        self.connections_opened = 0
+
+    def supports(self, key: Hashable) -> bool:
+        """
+        主机是否可能支持HTTP/2。
+
+        Args:
+            key: 主机键(scheme, host, port)。
+
+        Returns:
+            已知该主机只支持HTTP/1.1时为False。
+        """
+        return key not in self._http1_hosts
+
+    def connection(self, key: Hashable, parsed_url) -> HTTP2Connection:
+        """
+        获取到主机的可用连接，没有时建立新连接。
+
+        Args:
+            key: 主机键(scheme, host, port)。
+            parsed_url: 解析后的URL对象。
+
+        Returns:
+            HTTP/2连接。
+
+        Raises:
+            HTTP2Unavailable: 如果服务器没有选择h2。
+            OSError: 如果连接失败。
+        """
+        conn = self._connections.get(key)
+        if conn is not None and conn.is_usable():
+            return conn
+        with self._lock:
+            host_lock = self._host_locks.setdefault(key, threading.Lock())
+        with host_lock:
+            conn = self._connections.get(key)
+            if conn is not None and conn.is_usable():
+                return conn
+            if conn is not None:
+                # 新连接与旧连接并存，旧连接上的流完成后再关闭
+                self._retire(conn)
+            conn = self._connect(key, parsed_url)
+            self._connections[key] = conn
+            return conn
+
+    def _retire(self, conn: HTTP2Connection):
+        """
+        停止使用连接：没有进行中的流时立即关闭，否则移入排空集合。
+
+        Args:
+            conn: 不再发起新流的连接。
+        """
+        if conn.active_streams > 0 and not conn.failed:
+            with self._lock:
+                self._draining.add(conn)
+        else:
+            conn.close()
+
+    def _connect(self, key: Hashable, parsed_url) -> HTTP2Connection:
+        """
+        建立新连接，https时通过ALPN协商h2。
+
+        Args:
+            key: 主机键(scheme, host, port)。
+            parsed_url: 解析后的URL对象。
+
+        Returns:
+            HTTP/2连接。
+
+        Raises:
+            HTTP2Unavailable: 如果服务器没有选择h2。
+        """
+        https = parsed_url.scheme == 'https'
+        host = parsed_url.hostname
+        port = parsed_url.port or (443 if https else 80)
+        sock = self._create_connection((host, port), timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            tls = on_first_response = None
+            if https:
+                tls = TLSChannel(sock, self._get_ssl_context(), host, self.sessions.get(key))
+                start = time.perf_counter()
+                tls.handshake()
+                self.sessions.record(tls.session_reused, time.perf_counter() - start)
+                if tls.selected_alpn_protocol() != 'h2':
+                    self._http1_hosts.add(key)
+                    raise HTTP2Unavailable(f"{host}:{port}不支持HTTP/2")
+                on_first_response = lambda channel: self.sessions.save(key, channel)
+            # 读取线程阻塞等待数据，超时由各个请求自行控制
+            sock.settimeout(None)
+            authority = host if parsed_url.port is None else f"{host}:{port}"
+            conn = HTTP2Connection(sock, authority, parsed_url.scheme, self.timeout, tls,
+                                   on_first_response)
+        except BaseException:
+            sock.close()
+            raise
+        self.connections_opened += 1
+        return conn
+
+    def _get_ssl_context(self) -> ssl.SSLContext:
+        """
+        获取带ALPN的SSL上下文，首次使用时创建。
+
+        Returns:
+            SSL上下文。
+        """
+        if self._ssl_context is None:
+            self._ssl_context = self._ssl_context_factory()
+        return self._ssl_context
+
+    def remove_idle(self, idle_timeout: float):
+        """
+        关闭没有进行中的流且空闲超过idle_timeout的连接；已失效的连接不再使用，
+        其上的流全部结束后关闭。
+
+        Args:
+            idle_timeout: 最大空闲时间（秒）。
+        """
+        now = time.monotonic()
+        for key, conn in list(self._connections.items()):
+            idle = conn.active_streams == 0 and now - conn.last_used > idle_timeout
+            if idle or not conn.is_usable():
+                if self._connections.get(key) is conn:
+                    del self._connections[key]
+                self._retire(conn)
+        with self._lock:
+            drained = [conn for conn in self._draining
+                       if conn.active_streams == 0 or conn.failed]
+            self._draining.difference_update(drained)
+        for conn in drained:
+            conn.close()
+
+    @property
+    def draining(self) -> int:
+        """收到GOAWAY后等待进行中的流结束的连接数。"""
+        return len(self._draining)
+
+    def close_all(self):
+        """关闭所有连接，包括正在排空的连接。"""
+        connections = list(self._connections.values())
+        self._connections.clear()
+        with self._lock:
+            connections.extend(self._draining)
+            self._draining.clear()
+        for conn in connections:
+            conn.close()
@@ -0,0 +1,432 @@
+"""
+插桩模块：事件钩子和指标收集器。
+
+HTTPClient在三个位置触发事件：从连接池获取连接之后（connection）、每次请求尝试结束之后
+（request，无论成功还是失败）以及重试退避之前（retry）。钩子在请求线程中同步调用，
+抛出的异常会传给调用者。没有注册钩子时客户端只检查一次列表是否为空，不计时也不创建事件对象。
+
+MetricsCollector是内置的钩子实现，按主机统计请求数、错误数、状态码分类、连接池命中率、
+收发字节数和重试次数，并用固定桶的直方图记录总耗时以及DNS解析、TCP连接、TLS握手和
+首字节时间，可以导出为字典快照或Prometheus文本格式。
+"""
+
+import bisect
+import threading
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+# 支持的事件
+EVENTS = ('connection', 'request', 'retry')
+
+# 耗时直方图的默认桶上界（秒），与Prometheus客户端库的默认值一致
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0,
+                   7.5, 10.0)
+
+# 各协议的默认端口，用于生成主机标签
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 直方图的名称和说明
+_HISTOGRAMS = (
+    ('duration', '请求总耗时'),
+    ('dns', '新连接的DNS解析耗时'),
+    ('connect', '新连接的TCP连接耗时'),
+    ('tls', '新连接的TLS握手耗时'),
+    ('ttfb', '从发出请求到收到响应头部的耗时（不含建立连接）'),
+    ('connection_wait', '从连接池获取连接的耗时'),
+)
+
+# 计数器的名称和说明
+_COUNTERS = (
+    ('requests', '请求尝试次数'),
+    ('errors', '抛出异常的请求尝试次数'),
+    ('retries', '重试次数'),
+    ('connections_created', '新建的连接数'),
+    ('connections_reused', '复用的连接数'),
+    ('bytes_sent', '发送的请求体字节数'),
+    ('bytes_received', '收到的响应体字节数（解压前）'),
+)
+
+
+def host_label(key: Hashable) -> str:
+    """
+    把主机键转换为标签。
+
+    Args:
+        key: 主机键(scheme, host, port)。
+
+    Returns:
+        形如'https://api.example.com:443'的字符串。
+    """
+    scheme, host, port = key
+    return f"{scheme}://{host}:{port or _DEFAULT_PORTS.get(scheme, 80)}"
+
+
+class ConnectionEvent(NamedTuple):
+    """从连接池获取连接的事件。"""
+
+    host: str
+    # 是否复用了已建立的连接；False表示新连接，将在发送请求时建立
+    reused: bool
+    # 获取连接的耗时（秒）
+    wait: float
+
+
+class RequestEvent(NamedTuple):
+    """一次请求尝试结束的事件。"""
+
+    method: str
+    url: str
+    host: str
+    # 状态码，请求抛出异常时为None
+    status_code: Optional[int]
+    error: Optional[BaseException]
+    # 第几次尝试，从0开始
+    attempt: int
+    # 总耗时（秒），包括熔断器和并发限制器的等待
+    duration: float
+    # 'HTTP/1.1'或'HTTP/2'，在获取连接之前失败时为None
+    protocol: Optional[str]
+    # 是否复用了已建立的连接，未知时为None
+    reused: Optional[bool]
+    # 新连接的DNS解析、TCP连接和TLS握手耗时（秒），复用的连接为None
+    dns: Optional[float]
+    connect: Optional[float]
+    tls: Optional[float]
+    # 从发出请求到收到响应头部的耗时（秒），不含建立连接
+    ttfb: Optional[float]
+    # 请求体字节数，文件类对象或迭代器时为None
+    bytes_sent: Optional[int]
+    # 响应体字节数（解压前），流式响应时为None
+    bytes_received: Optional[int]
+
+
+class RetryEvent(NamedTuple):
+    """重试退避之前的事件。"""
+
+    method: str
+    url: str
+    host: str
+    # 即将进行的尝试序号，从1开始
+    attempt: int
+    # 退避时间（秒）
+    delay: float
+    # 触发重试的状态码，因异常重试时为None
+    status_code: Optional[int]
+    error: Optional[BaseException]
+
+
+class Hooks:
+    """
+    事件钩子注册表。
+
+    每个事件一个回调列表，注册和移除时替换整个列表（写时复制），触发事件时无需加锁。
+    """
+
+    __slots__ = ('connection', 'request', 'retry', '_lock')
+
+    def __init__(self):
+        """初始化空的注册表。"""
+        self.connection: List[Callable[[ConnectionEvent], Any]] = []
+        self.request: List[Callable[[RequestEvent], Any]] = []
+        self.retry: List[Callable[[RetryEvent], Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, event: str, callback: Callable[[Any], Any]):
+        """
+        注册钩子。
+
+        Args:
+            event: 事件名，'connection'、'request'或'retry'。
+            callback: 回调函数，参数为对应的事件对象。
+
+        Raises:
+            ValueError: 如果事件名未知。
+        """
+        if event not in EVENTS:
+            raise ValueError(f"未知的事件: {event}，可选: {', '.join(EVENTS)}")
+        with self._lock:
+            setattr(self, event, getattr(self, event) + [callback])
+
+    def remove(self, event: str, callback: Callable[[Any], Any]):
+        """
+        移除钩子，没有注册时忽略。
+
+        Args:
+            event: 事件名。
+            callback: 注册时的回调函数。
+
+        Raises:
+            ValueError: 如果事件名未知。
+        """
+        if event not in EVENTS:
+            raise ValueError(f"未知的事件: {event}，可选: {', '.join(EVENTS)}")
+        with self._lock:
+            setattr(self, event, [cb for cb in getattr(self, event) if cb != callback])
+
+    @staticmethod
+    def emit(callbacks: Sequence[Callable[[Any], Any]], payload: Any):
+        """
+        依次调用回调。
+
+        Args:
+            callbacks: 事件的回调列表（调用者读取的快照）。
+            payload: 事件对象。
+        """
+        for callback in callbacks:
+            callback(payload)
+
+
+class Histogram:
+    """
+    固定桶的直方图。
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Sequence[float]):
+        """
+        初始化直方图。
+
+        Args:
+            bounds: 升序的桶上界，最后隐含一个+Inf桶。
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """
+        记录一个样本。
+
+        Args:
+            value: 样本值。
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """
+        各桶的累计计数（小于等于上界的样本数），最后一项为+Inf桶。
+
+        Returns:
+            累计计数列表。
+        """
+        total = 0
+        result = []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """
+        按桶估算分位数（取样本所在桶的上界）。
+
+        Args:
+            q: 分位（0到1）。
+
+        Returns:
+            估算值，没有样本时为0；落在+Inf桶时返回最大的有限上界。
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, total in zip(self.bounds, self.cumulative()):
+            if total >= rank:
+                return bound
+        return self.bounds[-1] if self.bounds else 0.0
+
+    def snapshot(self) -> dict:
+        """
+        直方图快照。
+
+        Returns:
+            字典，包含count、sum、p50、p99和buckets（上界到累计计数的映射，+Inf为'+Inf'）。
+        """
+        labels = [str(bound) for bound in self.bounds] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip(labels, self.cumulative())),
+        }
+
+
+class _HostMetrics:
+    """单个主机的计数器和直方图。"""
+
+    __slots__ = ('counters', 'statuses', 'histograms')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.counters = {name: 0 for name, _ in _COUNTERS}
+        # 状态码分类（'2xx'等）到次数的映射
+        self.statuses: Dict[str, int] = {}
+        self.histograms = {name: Histogram(buckets) for name, _ in _HISTOGRAMS}
+
+
+class MetricsCollector:
+    """
+    按主机收集请求指标的钩子实现。一个收集器可以挂到多个客户端上。
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        初始化收集器。
+
+        Args:
+            buckets: 耗时直方图的桶上界（秒）。默认为DEFAULT_BUCKETS。
+        """
+        self.buckets = tuple(buckets)
+        self._hosts: Dict[str, _HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    def attach(self, client) -> 'MetricsCollector':
+        """
+        把收集器注册到客户端的全部事件上。
+
+        Args:
+            client: HTTPClient实例。
+
+        Returns:
+            收集器自身。
+        """
+        client.add_hook('connection', self.on_connection)
+        client.add_hook('request', self.on_request)
+        client.add_hook('retry', self.on_retry)
+        return self
+
+    def detach(self, client):
+        """
+        从客户端移除收集器。
+
+        Args:
+            client: HTTPClient实例。
+        """
+        client.remove_hook('connection', self.on_connection)
+        client.remove_hook('request', self.on_request)
+        client.remove_hook('retry', self.on_retry)
+
+    def _host(self, host: str) -> _HostMetrics:
+        """获取主机的指标，调用者需持有锁。"""
+        metrics = self._hosts.get(host)
+        if metrics is None:
+            metrics = self._hosts[host] = _HostMetrics(self.buckets)
+        return metrics
+
+    def on_connection(self, event: ConnectionEvent):
+        """
+        connection事件的钩子。
+
+        Args:
+            event: 事件对象。
+        """
+        with self._lock:
+            metrics = self._host(event.host)
+            if event.reused:
+                metrics.counters['connections_reused'] += 1
+            else:
+                metrics.counters['connections_created'] += 1
+            metrics.histograms['connection_wait'].observe(event.wait)
+
+    def on_request(self, event: RequestEvent):
+        """
+        request事件的钩子。
+
+        Args:
+            event: 事件对象。
+        """
+        with self._lock:
+            metrics = self._host(event.host)
+            counters = metrics.counters
+            counters['requests'] += 1
+            if event.error is not None:
+                counters['errors'] += 1
+            else:
+                status = f"{event.status_code // 100}xx"
+                metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            if event.bytes_sent:
+                counters['bytes_sent'] += event.bytes_sent
+            if event.bytes_received:
+                counters['bytes_received'] += event.bytes_received
+            histograms = metrics.histograms
+            histograms['duration'].observe(event.duration)
+            for name in ('dns', 'connect', 'tls', 'ttfb'):
+                value = getattr(event, name)
+                if value is not None:
+                    histograms[name].observe(value)
+
+    def on_retry(self, event: RetryEvent):
+        """
+        retry事件的钩子。
+
+        Args:
+            event: 事件对象。
+        """
+        with self._lock:
+            self._host(event.host).counters['retries'] += 1
+
+    def reset(self):
+        """清空所有指标。"""
+        with self._lock:
+            self._hosts.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        指标快照。
+
+        Returns:
+            主机标签到指标的映射。每个主机包含各计数器、statuses（状态码分类到次数）、
+            pool_hit_rate（复用连接占获取连接次数的比例）和histograms（各直方图的快照）。
+        """
+        with self._lock:
+            result = {}
+            for host, metrics in self._hosts.items():
+                counters = metrics.counters
+                acquired = counters['connections_reused'] + counters['connections_created']
+                result[host] = {
+                    **counters,
+                    'statuses': dict(metrics.statuses),
+                    'pool_hit_rate': (round(counters['connections_reused'] / acquired, 4)
+                                      if acquired else 0.0),
+                    'histograms': {name: histogram.snapshot()
+                                   for name, histogram in metrics.histograms.items()},
+                }
+            return result
+
+    def prometheus(self, prefix: str = 'http_client') -> str:
+        """
+        导出为Prometheus文本格式。
+
+        Args:
+            prefix: 指标名前缀。默认为'http_client'。
+
+        Returns:
+            Prometheus文本格式的指标。
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, description in _COUNTERS:
+            metric = f"{prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for host, metrics in snapshot.items():
+                lines.append(f'{metric}{{host="{host}"}} {metrics[name]}')
+        metric = f"{prefix}_responses_total"
+        lines.append(f"# HELP {metric} 按状态码分类的响应数")
+        lines.append(f"# TYPE {metric} counter")
+        for host, metrics in snapshot.items():
+            for status, count in sorted(metrics['statuses'].items()):
+                lines.append(f'{metric}{{host="{host}",status="{status}"}} {count}')
+        for name, description in _HISTOGRAMS:
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} histogram")
+            for host, metrics in snapshot.items():
+                histogram = metrics['histograms'][name]
+                for bound, count in histogram['buckets'].items():
+                    lines.append(f'{metric}_bucket{{host="{host}",le="{bound}"}} {count}')
+                lines.append(f'{metric}_sum{{host="{host}"}} {histogram["sum"]}')
+                lines.append(f'{metric}_count{{host="{host}"}} {histogram["count"]}')
+        return '\n'.join(lines) + '\n'
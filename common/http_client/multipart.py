@@ -0,0 +1,231 @@
+"""
+multipart/form-data编码模块。
+
+MultipartEncoder不拼接请求体：各部分的头部、内存中的数据（以memoryview引用，不复制）和
+文件在发送时依次写出，内存占用与文件大小无关。文件部分从构造时的位置读到末尾，总长度在
+构造时计算，因此请求带有Content-Length而不需要分块传输编码。
+
+HTTPClient通过send()直接写入套接字：有文件描述符的文件部分使用socket.sendfile，
+在明文连接上由内核直接从页缓存发送（Linux上的sendfile系统调用），TLS连接上自动退回
+分块读取后发送。文件部分在每次发送前都会回到起始位置，请求失败时可以重试。
+"""
+
+import mimetypes
+import os
+import uuid
+from typing import IO, Any, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+# 读取文件部分的块大小（字节）
+CHUNK_SIZE = 256 * 1024
+
+# 没有文件名或无法从文件名推断时使用的内容类型
+DEFAULT_CONTENT_TYPE = 'application/octet-stream'
+
+# 字段的值：字符串、字节串、memoryview或文件类对象
+FieldValue = Union[str, bytes, bytearray, memoryview, IO[bytes]]
+
+# 文件字段：文件类对象、字节串，或(文件名, 数据[, 内容类型])
+FileValue = Union[FieldValue, Tuple[str, FieldValue], Tuple[str, FieldValue, str]]
+
+
+class _FileSegment:
+    """请求体中的文件片段：从offset开始的length个字节。"""
+
+    __slots__ = ('fileobj', 'offset', 'length')
+
+    def __init__(self, fileobj: IO[bytes], offset: int, length: int):
+        self.fileobj = fileobj
+        self.offset = offset
+        self.length = length
+
+
+def _items(values: Optional[Union[Mapping[str, Any], Iterable[Tuple[str, Any]]]]):
+    """把字典或(名称, 值)序列统一为(名称, 值)序列。"""
+    if values is None:
+        return []
+    if isinstance(values, Mapping):
+        return list(values.items())
+    return list(values)
+
+
+def _quote(value: str) -> str:
+    """转义Content-Disposition中的引号参数（与浏览器的处理一致）。"""
+    return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+def _file_segment(fileobj: IO[bytes]) -> _FileSegment:
+    """
+    计算文件从当前位置到末尾的长度。
+
+    Args:
+        fileobj: 可定位的二进制文件类对象。
+
+    Returns:
+        文件片段。
+
+    Raises:
+        ValueError: 如果文件不能定位，无法预先计算长度。
+    """
+    try:
+        offset = fileobj.tell()
+        end = fileobj.seek(0, os.SEEK_END)
+        fileobj.seek(offset)
+    except (AttributeError, OSError) as e:
+        raise ValueError("multipart的文件部分必须是可定位的文件对象") from e
+    return _FileSegment(fileobj, offset, max(0, end - offset))
+
+
+class MultipartEncoder:
+    """
+    流式的multipart/form-data请求体。
+
+    作为HTTPClient的data参数使用时自动设置Content-Type和Content-Length头部::
+
+        with open('video.mp4', 'rb') as f:
+            client.post('/upload', data=MultipartEncoder(
+                fields={'title': '演示'},
+                files={'video': ('video.mp4', f, 'video/mp4')}))
+    """
+
+    def __init__(self, fields: Optional[Union[Mapping[str, FieldValue],
+                                              Iterable[Tuple[str, FieldValue]]]] = None,
+                 files: Optional[Union[Mapping[str, FileValue],
+                                       Iterable[Tuple[str, FileValue]]]] = None,
+                 boundary: Optional[str] = None):
+        """
+        初始化编码器。文件对象在发送完成前必须保持打开，由调用者关闭。
+
+        Args:
+            fields: 普通字段，字典或(名称, 值)序列。值为字符串（按UTF-8编码）、字节串、
+                memoryview或文件类对象。
+            files: 文件字段，字典或(名称, 值)序列。值为文件类对象、字节串，或者元组
+                (文件名, 数据)、(文件名, 数据, 内容类型)。没有给出文件名时使用文件对象的
+                name属性，内容类型按文件名推断。
+            boundary: 分隔符。默认随机生成。
+
+        Raises:
+            ValueError: 如果文件对象不能定位。
+            TypeError: 如果字段的值类型不受支持。
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        # 请求体的各个片段：memoryview或_FileSegment
+        self._segments: List[Union[memoryview, _FileSegment]] = []
+        for name, value in _items(fields):
+            self._add_part(name, value, None, None)
+        for name, value in _items(files):
+            filename = content_type = None
+            if isinstance(value, tuple):
+                filename, value, content_type = (value + (None,))[:3]
+            if filename is None:
+                path = getattr(value, 'name', None)
+                # 通过文件描述符打开的文件，name是整数
+                filename = os.path.basename(path) if isinstance(path, str) else name
+            if content_type is None:
+                content_type = mimetypes.guess_type(filename)[0] or DEFAULT_CONTENT_TYPE
+            self._add_part(name, value, filename, content_type)
+        self._segments.append(memoryview(f'--{self.boundary}--\r\n'.encode('ascii')))
+        self._length = sum(segment.length if isinstance(segment, _FileSegment)
+                           else segment.nbytes for segment in self._segments)
+
+    def _add_part(self, name: str, value: FieldValue, filename: Optional[str],
+                  content_type: Optional[str]):
+        """
+        添加一个部分的头部和数据。
+
+        Args:
+            name: 字段名。
+            value: 字段的值。
+            filename: 文件名，普通字段为None。
+            content_type: 内容类型，普通字段为None。
+
+        Raises:
+            ValueError: 如果文件对象不能定位。
+            TypeError: 如果值的类型不受支持。
+        """
+        disposition = f'form-data; name="{_quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{_quote(filename)}"'
+        header = f'--{self.boundary}\r\nContent-Disposition: {disposition}\r\n'
+        if content_type is not None:
+            header += f'Content-Type: {content_type}\r\n'
+        if isinstance(value, str):
+            data: Union[memoryview, _FileSegment] = memoryview(value.encode('utf-8'))
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            data = memoryview(value).cast('B')
+        elif hasattr(value, 'read'):
+            data = _file_segment(value)
+        else:
+            raise TypeError(f"不支持的multipart字段类型: {type(value).__name__}")
+        self._segments.append(memoryview((header + '\r\n').encode('utf-8')))
+        self._segments.append(data)
+        self._segments.append(memoryview(b'\r\n'))
+
+    def __len__(self) -> int:
+        """请求体的总字节数。"""
+        return self._length
+
+    def __iter__(self) -> Iterator[Union[bytes, memoryview]]:
+        """
+        依次产生请求体的数据块。内存中的部分以memoryview产生，文件部分按CHUNK_SIZE读取。
+
+        Yields:
+            数据块。
+
+        Raises:
+            ValueError: 如果文件在构造之后被截短。
+        """
+        for segment in self._segments:
+            if not isinstance(segment, _FileSegment):
+                yield segment
+                continue
+            fileobj = segment.fileobj
+            fileobj.seek(segment.offset)
+            remaining = segment.length
+            while remaining:
+                chunk = fileobj.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    raise ValueError("multipart的文件部分在发送前被截短")
+                remaining -= len(chunk)
+                yield chunk
+
+    def send(self, sock) -> int:
+        """
+        把请求体写入已连接的套接字。有文件描述符的文件部分使用socket.sendfile。
+
+        Args:
+            sock: 套接字（可以是ssl.SSLSocket）。
+
+        Returns:
+            发送的字节数。
+
+        Raises:
+            ValueError: 如果文件在构造之后被截短。
+            OSError: 如果发送失败。
+        """
+        total = 0
+        for segment in self._segments:
+            if not isinstance(segment, _FileSegment):
+                sock.sendall(segment)
+                total += segment.nbytes
+                continue
+            if not segment.length:
+                continue
+            try:
+                segment.fileobj.fileno()
+            except (AttributeError, OSError):
+                # 内存中的文件对象（例如BytesIO），按块读取后发送
+                sent = 0
+                segment.fileobj.seek(segment.offset)
+                while sent < segment.length:
+                    chunk = segment.fileobj.read(min(CHUNK_SIZE, segment.length - sent))
+                    if not chunk:
+                        break
+                    sock.sendall(chunk)
+                    sent += len(chunk)
+            else:
+                sent = sock.sendfile(segment.fileobj, segment.offset, segment.length)
+            if sent != segment.length:
+                raise ValueError("multipart的文件部分在发送前被截短")
+            total += sent
+        return total
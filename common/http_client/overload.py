@@ -0,0 +1,419 @@
+"""
+过载保护模块。
+
+上游变慢或出错时，继续按max_connections打满并发、继续重试只会让尾延迟更差。
+本模块提供两种按主机（scheme, host, port）划分的保护机制：
+
+- CircuitBreaker：熔断器。连续失败达到阈值后打开，在恢复时间内直接拒绝请求；
+  之后进入半开状态，放行少量探测请求，成功则关闭，失败则重新打开。
+- AIMDLimiter：自适应并发限制器。请求失败或延迟明显升高时按比例缩小并发上限
+  （乘性减），正常时每轮并发上限加一（加性增），超出上限的请求等待名额。
+
+两者都是线程安全的，可以被多个客户端共享，并通过snapshot()导出状态用于监控。
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+from .exceptions import CircuitOpenError, HTTPException
+
+
+# 熔断器状态
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# 打开熔断器所需的连续失败次数
+DEFAULT_FAILURE_THRESHOLD = 5
+
+# 熔断器打开后进入半开状态前等待的时间（秒）
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+
+# 半开状态下同时放行的探测请求数
+DEFAULT_HALF_OPEN_MAX_CALLS = 1
+
+# 限流状态码，与5xx一样视为上游过载
+_OVERLOAD_STATUS = 429
+
+# 服务器错误状态码的下限
+_SERVER_ERROR_MIN = 500
+
+# 自适应并发限制器的默认上限
+DEFAULT_MAX_LIMIT = 10
+
+# 过载时并发上限乘以的系数
+DEFAULT_BACKOFF_RATIO = 0.9
+
+# 短期平均延迟超过长期平均延迟的该倍数时视为过载
+DEFAULT_LATENCY_TOLERANCE = 2.0
+
+# 短期延迟的指数移动平均系数，约反映最近10个请求
+SHORT_EMA_ALPHA = 0.1
+
+# 长期延迟的指数移动平均系数，约反映最近100个请求，作为延迟基线。
+# 不使用最小延迟作为基线，同一主机上快慢不同的接口混在一起时不会把并发压到最低
+LONG_EMA_ALPHA = 0.01
+
+# 判断过载时允许的绝对延迟余量（秒），避免本机或局域网上亚毫秒级的抖动被误判为过载
+LATENCY_SLACK = 0.005
+
+
+def is_failure_status(status_code: int) -> bool:
+    """
+    判断响应状态码是否表示上游失败或过载。
+
+    Args:
+        status_code: HTTP状态码。
+
+    Returns:
+        5xx和429返回True。
+    """
+    return status_code >= _SERVER_ERROR_MIN or status_code == _OVERLOAD_STATUS
+
+
+class _Circuit:
+    """单个主机的熔断器状态。"""
+
+    __slots__ = ('state', 'failures', 'opened_at', 'probes', 'generation', 'opened', 'rejected')
+
+    def __init__(self):
+        """初始化为关闭状态。"""
+        self.state = CLOSED
+        # 连续失败次数
+        self.failures = 0
+        self.opened_at = 0.0
+        # 半开状态下正在执行的探测请求数
+        self.probes = 0
+        # 当前半开阶段的编号，只有同一阶段放行的探测请求才计入probes
+        self.generation = 0
+        # 累计打开次数和拒绝的请求数
+        self.opened = 0
+        self.rejected = 0
+
+
+class CircuitBreaker:
+    """
+    按主机划分的熔断器。
+
+    调用者在发送请求前调用before_request()，请求结束后调用record()报告结果。
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+                 half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS):
+        """
+        初始化熔断器。
+
+        Args:
+            failure_threshold: 打开熔断器所需的连续失败次数。默认为5。
+            recovery_timeout: 打开后进入半开状态前等待的时间（秒）。默认为30秒。
+            half_open_max_calls: 半开状态下同时放行的探测请求数。默认为1。
+
+        Raises:
+            ValueError: 如果failure_threshold或half_open_max_calls小于1。
+        """
+        if failure_threshold < 1 or half_open_max_calls < 1:
+            raise ValueError("failure_threshold和half_open_max_calls必须大于等于1")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._circuits: Dict[Hashable, _Circuit] = {}
+        self._lock = threading.Lock()
+        # 半开阶段的编号，所有主机共用且只增不减，重置后新建的状态不会与旧的探测请求混淆
+        self._generations = itertools.count(1)
+
+    def _circuit(self, key: Hashable) -> _Circuit:
+        """
+        获取主机的熔断器状态，不存在时创建，调用者需持有锁。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            熔断器状态。
+        """
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit()
+        return circuit
+
+    def before_request(self, key: Hashable) -> int:
+        """
+        检查是否允许向主机发送请求。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            半开状态下的探测请求返回所属半开阶段的编号（大于0），其他请求返回0，
+            需要原样传给record()。
+
+        Raises:
+            CircuitOpenError: 如果熔断器打开，或半开状态下探测请求已满。
+        """
+        circuit = self._circuits.get(key)
+        # 关闭状态是最常见的情况，不需要加锁
+        if circuit is None or circuit.state is CLOSED:
+            return 0
+        with self._lock:
+            if circuit.state is OPEN:
+                remaining = circuit.opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(key, remaining)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+                circuit.generation = next(self._generations)
+            if circuit.state is HALF_OPEN:
+                if circuit.probes >= self.half_open_max_calls:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(key, 0.0)
+                circuit.probes += 1
+                return circuit.generation
+            return 0
+
+    def record(self, key: Hashable, failed: Optional[bool], probe: int = 0):
+        """
+        报告请求的结果。
+
+        属于更早的半开阶段（例如期间调用过reset()）的探测请求按普通请求处理。
+
+        Args:
+            key: 主机键。
+            failed: 请求是否失败，为None时表示请求没有发出（只释放探测名额）。
+            probe: before_request()的返回值。
+        """
+        circuit = self._circuits.get(key)
+        if circuit is None and not failed:
+            return
+        with self._lock:
+            circuit = self._circuit(key)
+            if probe and probe != circuit.generation:
+                probe = 0
+            if probe:
+                circuit.probes -= 1
+            if failed is None:
+                return
+            if not failed:
+                if circuit.state is HALF_OPEN and probe:
+                    circuit.state = CLOSED
+                if circuit.state is CLOSED:
+                    circuit.failures = 0
+                return
+            if circuit.state is HALF_OPEN and probe:
+                self._open(circuit)
+            elif circuit.state is CLOSED:
+                circuit.failures += 1
+                if circuit.failures >= self.failure_threshold:
+                    self._open(circuit)
+
+    @staticmethod
+    def _open(circuit: _Circuit):
+        """
+        打开熔断器，调用者需持有锁。
+
+        Args:
+            circuit: 熔断器状态。
+        """
+        circuit.state = OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.failures = 0
+        circuit.opened += 1
+
+    def state(self, key: Hashable) -> str:
+        """
+        查询主机的熔断器状态。
+
+        打开状态超过恢复时间后，在下一个请求到来之前仍报告为open。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            'closed'、'open'或'half_open'。
+        """
+        circuit = self._circuits.get(key)
+        return CLOSED if circuit is None else circuit.state
+
+    def reset(self, key: Optional[Hashable] = None):
+        """
+        将熔断器恢复为关闭状态。
+
+        Args:
+            key: 主机键。为None时重置所有主机。
+        """
+        with self._lock:
+            if key is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(key, None)
+
+    def snapshot(self) -> Dict[Hashable, Dict[str, object]]:
+        """
+        导出所有主机的熔断器状态。
+
+        Returns:
+            以主机键为键的字典，值包含state、failures（连续失败次数）、
+            opened（累计打开次数）和rejected（累计拒绝的请求数）。
+        """
+        with self._lock:
+            return {key: {'state': c.state, 'failures': c.failures,
+                          'opened': c.opened, 'rejected': c.rejected}
+                    for key, c in self._circuits.items()}
+
+
+class _HostLimit:
+    """单个主机的并发限制状态。"""
+
+    __slots__ = ('limit', 'inflight', 'short_latency', 'long_latency', 'last_decrease',
+                 'condition', 'decreases')
+
+    def __init__(self, limit: float, lock: threading.Lock):
+        """
+        初始化主机的并发限制。
+
+        Args:
+            limit: 初始并发上限。
+            lock: 所有主机共享的锁。
+        """
+        self.limit = limit
+        self.inflight = 0
+        self.short_latency: Optional[float] = None
+        self.long_latency: Optional[float] = None
+        # 最近一次缩小上限的时间，之前开始的请求不会再次缩小上限
+        self.last_decrease = float('-inf')
+        self.condition = threading.Condition(lock)
+        self.decreases = 0
+
+
+class AIMDLimiter:
+    """
+    按主机划分的AIMD自适应并发限制器。
+
+    请求开始前调用acquire()取得名额，结束后调用release()报告结果。失败（异常、5xx、429）
+    或短期平均延迟超过长期平均延迟的latency_tolerance倍时，并发上限乘以backoff_ratio；
+    同一时刻开始的一批请求只会缩小一次上限。请求正常完成且并发接近上限时，
+    上限增加1/limit，即每完成一轮请求增加1。
+    """
+
+    def __init__(self, max_limit: int = DEFAULT_MAX_LIMIT, min_limit: int = 1,
+                 initial_limit: Optional[int] = None,
+                 backoff_ratio: float = DEFAULT_BACKOFF_RATIO,
+                 latency_tolerance: float = DEFAULT_LATENCY_TOLERANCE):
+        """
+        初始化限制器。
+
+        Args:
+            max_limit: 每个主机的最大并发上限。默认为10，与max_connections的默认值一致。
+            min_limit: 每个主机的最小并发上限。默认为1。
+            initial_limit: 初始并发上限。默认为max_limit。
+            backoff_ratio: 过载时并发上限乘以的系数。默认为0.9。
+            latency_tolerance: 短期平均延迟超过长期平均延迟的该倍数时视为过载。默认为2。
+
+        Raises:
+            ValueError: 如果参数无效。
+        """
+        if not 1 <= min_limit <= max_limit or not 0 < backoff_ratio < 1:
+            raise ValueError("需要1 <= min_limit <= max_limit且0 < backoff_ratio < 1")
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.initial_limit = max_limit if initial_limit is None else initial_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self._hosts: Dict[Hashable, _HostLimit] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, timeout: Optional[float] = None) -> float:
+        """
+        取得向主机发送请求的名额，已达到并发上限时等待。
+
+        Args:
+            key: 主机键。
+            timeout: 最长等待时间（秒）。默认为None（一直等待）。
+
+        Returns:
+            请求开始的单调时间，需要原样传给release()。
+
+        Raises:
+            HTTPException: 如果等待超时。
+        """
+        with self._lock:
+            host = self._hosts.get(key)
+            if host is None:
+                host = self._hosts[key] = _HostLimit(self.initial_limit, self._lock)
+            if host.inflight >= int(host.limit):
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while host.inflight >= int(host.limit):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise HTTPException(f"等待并发名额超时: {key}")
+                    host.condition.wait(remaining)
+            host.inflight += 1
+            return time.monotonic()
+
+    def release(self, key: Hashable, started: float, failed: bool,
+                latency: Optional[float] = None):
+        """
+        释放名额并根据请求结果调整并发上限。
+
+        Args:
+            key: 主机键。
+            started: acquire()的返回值。
+            failed: 请求是否失败（异常、5xx或429）。
+            latency: 用于调整上限的延迟（秒）。默认为从started到现在；流式响应传入收到
+                响应头部的延迟，读取响应体的时间不计入。
+        """
+        now = time.monotonic()
+        if latency is None:
+            latency = now - started
+        with self._lock:
+            host = self._hosts[key]
+            inflight = host.inflight
+            host.inflight -= 1
+            if host.long_latency is None:
+                host.short_latency = host.long_latency = latency
+            else:
+                host.short_latency += SHORT_EMA_ALPHA * (latency - host.short_latency)
+                host.long_latency += LONG_EMA_ALPHA * (latency - host.long_latency)
+            overloaded = failed or (host.short_latency > host.long_latency * self.latency_tolerance
+                                    + LATENCY_SLACK)
+            if overloaded:
+                if started >= host.last_decrease:
+                    host.limit = max(self.min_limit, host.limit * self.backoff_ratio)
+                    host.last_decrease = now
+                    host.decreases += 1
+            elif inflight * 2 >= host.limit:
+                # 并发远低于上限时不增加，避免空闲期间上限无限增长
+                host.limit = min(self.max_limit, host.limit + 1 / host.limit)
+            host.condition.notify(max(1, int(host.limit) - host.inflight))
+
+    def limit(self, key: Hashable) -> int:
+        """
+        查询主机当前的并发上限。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            并发上限。
+        """
+        with self._lock:
+            host = self._hosts.get(key)
+            return self.initial_limit if host is None else int(host.limit)
+
+    def snapshot(self) -> Dict[Hashable, Dict[str, object]]:
+        """
+        导出所有主机的并发限制状态。
+
+        Returns:
+            以主机键为键的字典，值包含limit（当前上限）、inflight（正在执行的请求数）、
+            latency_ms（短期平均延迟）、baseline_ms（长期平均延迟）和decreases（累计缩小上限的次数）。
+        """
+        with self._lock:
+            return {key: {'limit': int(h.limit), 'inflight': h.inflight,
+                          'latency_ms': round((h.short_latency or 0) * 1000, 2),
+                          'baseline_ms': round((h.long_latency or 0) * 1000, 2),
+                          'decreases': h.decreases}
+                    for key, h in self._hosts.items()}
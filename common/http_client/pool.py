@@ -0,0 +1,340 @@
+"""
+HTTP连接池模块。
+
+该模块提供线程安全的连接池实现。每个主机（scheme, host, port）拥有独立的
+锁和空闲连接双端队列，连接的创建时间等元数据直接保存在包装对象上，
+借出、归还和淘汰操作均为O(1)。
+"""
+
+import select
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+
+class PooledConnection:
+    """
+    连接池中的连接包装对象。
+
+    包装底层的HTTPConnection/HTTPSConnection，并携带连接所属的主机键、
+    创建时间和最近使用时间等元数据。常用的连接方法会直接转发给底层连接。
+    """
+
+    __slots__ = ('conn', 'key', 'created_at', 'last_used', 'closed', '_host')
+
+    def __init__(self, conn: Any, key: Hashable, created_at: Optional[float] = None):
+        """
+        初始化连接包装对象。
+
+        Args:
+            conn: 底层连接对象。
+            key: 连接所属的主机键。
+            created_at: 创建时间（时间戳）。默认为当前时间。
+        """
+        self.conn = conn
+        self.key = key
+        self._host = None
+        self.created_at = created_at if created_at is not None else time.time()
+        self.last_used = self.created_at
+        self.closed = False
+
+    @property
+    def sock(self):
+        """底层连接的套接字，未建立连接时为None。"""
+        return self.conn.sock
+
+    def request(self, *args, **kwargs):
+        """转发到底层连接的request方法。"""
+        return self.conn.request(*args, **kwargs)
+
+    def getresponse(self):
+        """转发到底层连接的getresponse方法。"""
+        return self.conn.getresponse()
+
+    def is_alive(self) -> bool:
+        """
+        不发送任何请求地检查复用的连接是否仍然可用。
+
+        空闲的HTTP/1.1连接上不应有可读数据：套接字可读意味着对端已关闭连接
+        （读到EOF）或发送了多余的数据，两种情况下连接都不能再复用。
+
+        Returns:
+            连接是否可用。尚未建立套接字的连接视为可用（会在请求时自动连接）。
+        """
+        sock = self.conn.sock
+        if sock is None:
+            return True
+        try:
+            if sock.fileno() < 0:
+                return False
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def is_expired(self, ttl: float, now: Optional[float] = None) -> bool:
+        """
+        检查连接是否超过最大存活时间。
+
+        Args:
+            ttl: 最大存活时间（秒），小于等于0表示永不过期。
+            now: 当前时间（时间戳）。默认为当前时间。
+
+        Returns:
+            是否已过期。
+        """
+        if ttl <= 0:
+            return False
+        if now is None:
+            now = time.time()
+        return now - self.created_at >= ttl
+
+    def close(self):
+        """关闭底层连接，重复调用是安全的。"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class _HostPool:
+    """
+    单个主机的连接池。
+
+    空闲连接按归还顺序存放在双端队列中：右端为最近归还的连接，
+    左端为最久未使用的连接。
+    """
+
+    __slots__ = ('lock', 'idle', 'total', 'retired')
+
+    def __init__(self):
+        """初始化主机连接池。"""
+        self.lock = threading.Lock()
+        self.idle: Deque[PooledConnection] = deque()
+        # 已创建且尚未关闭的连接数（空闲 + 借出）
+        self.total = 0
+        # 已从连接池中移除的主机条目不再接收连接
+        self.retired = False
+
+
+class ConnectionPool:
+    """
+    线程安全的多主机连接池。
+
+    借出时优先使用最近归还的连接（LIFO），以提高连接仍然存活的概率；
+    连接池已满时淘汰最久未使用的连接（FIFO端）。
+    """
+
+    def __init__(self, max_connections: int = 10, connection_ttl: float = 300,
+                 idle_timeout: float = 60):
+        """
+        初始化连接池。
+
+        Args:
+            max_connections: 每个主机保留的最大连接数。
+            connection_ttl: 连接最大存活时间（秒），小于等于0表示永不过期。
+            idle_timeout: 连接最大空闲时间（秒），超过后不再复用，小于等于0表示不限制。
+        """
+        self.max_connections = max_connections
+        self.connection_ttl = connection_ttl
+        self.idle_timeout = idle_timeout
+        self._hosts: Dict[Hashable, _HostPool] = {}
+        self._hosts_lock = threading.Lock()
+
+    def _host(self, key: Hashable) -> _HostPool:
+        """
+        获取指定主机的连接池，不存在时创建。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            主机连接池。
+        """
+        host = self._hosts.get(key)
+        if host is None:
+            with self._hosts_lock:
+                host = self._hosts.get(key)
+                if host is None:
+                    host = self._hosts[key] = _HostPool()
+        return host
+
+    def checkout(self, key: Hashable, factory: Callable[[], Any]) -> PooledConnection:
+        """
+        借出一个连接。
+
+        优先复用空闲连接，过期或空闲过久的连接会被直接关闭；没有可用的空闲连接时
+        调用factory创建新连接。
+
+        Args:
+            key: 主机键。
+            factory: 创建底层连接的可调用对象。
+
+        Returns:
+            连接包装对象。
+        """
+        expired: List[PooledConnection] = []
+        pooled = None
+        now = time.time()
+        while True:
+            host = self._host(key)
+            host.lock.acquire()
+            if not host.retired:
+                break
+            host.lock.release()
+        try:
+            while host.idle:
+                candidate = host.idle.pop()
+                if (candidate.is_expired(self.connection_ttl, now)
+                        or self._is_idle_too_long(candidate, now)):
+                    host.total -= 1
+                    expired.append(candidate)
+                    continue
+                pooled = candidate
+                break
+            if pooled is None:
+                host.total += 1
+        finally:
+            host.lock.release()
+        for conn in expired:
+            conn.close()
+
+        if pooled is not None:
+            pooled.last_used = now
+            return pooled
+
+        try:
+            conn = factory()
+        except Exception:
+            with host.lock:
+                host.total -= 1
+            raise
+        pooled = PooledConnection(conn, key, now)
+        pooled._host = host
+        return pooled
+
+    def _is_idle_too_long(self, pooled: PooledConnection, now: float) -> bool:
+        """
+        检查连接的空闲时间是否超过阈值。
+
+        Args:
+            pooled: 连接包装对象。
+            now: 当前时间（时间戳）。
+
+        Returns:
+            是否空闲过久。
+        """
+        return self.idle_timeout > 0 and now - pooled.last_used >= self.idle_timeout
+
+    def checkin(self, pooled: PooledConnection):
+        """
+        归还连接到连接池。
+
+        已关闭、已过期或超出容量的连接会被关闭而不是放回连接池。
+
+        Args:
+            pooled: 要归还的连接包装对象。
+        """
+        host = pooled._host
+        now = time.time()
+        evicted = None
+        with host.lock:
+            if (host.retired or pooled.closed
+                    or pooled.is_expired(self.connection_ttl, now)):
+                host.total -= 1
+                evicted = pooled
+            elif len(host.idle) >= self.max_connections:
+                # 空闲队列已满，淘汰最久未使用的连接
+                evicted = host.idle.popleft()
+                host.total -= 1
+                pooled.last_used = now
+                host.idle.append(pooled)
+            else:
+                pooled.last_used = now
+                host.idle.append(pooled)
+        if evicted is not None:
+            evicted.close()
+
+    def discard(self, pooled: PooledConnection):
+        """
+        关闭并丢弃一个借出的连接。
+
+        Args:
+            pooled: 要丢弃的连接包装对象。
+        """
+        host = pooled._host
+        with host.lock:
+            host.total -= 1
+        pooled.close()
+
+    def remove_expired(self, now: Optional[float] = None) -> int:
+        """
+        关闭所有超过最大存活时间或空闲过久的空闲连接，并移除空的主机条目。
+
+        Args:
+            now: 当前时间（时间戳）。默认为当前时间。
+
+        Returns:
+            被关闭的连接数。
+        """
+        if now is None:
+            now = time.time()
+        expired: List[PooledConnection] = []
+        with self._hosts_lock:
+            items = list(self._hosts.items())
+        for key, host in items:
+            with host.lock:
+                if host.idle:
+                    valid = deque()
+                    for pooled in host.idle:
+                        if (pooled.is_expired(self.connection_ttl, now)
+                                or self._is_idle_too_long(pooled, now)):
+                            expired.append(pooled)
+                            host.total -= 1
+                        else:
+                            valid.append(pooled)
+                    host.idle = valid
+                empty = not host.idle and host.total <= 0
+            if empty:
+                # 锁顺序：先全局锁后主机锁，与checkout一致
+                with self._hosts_lock, host.lock:
+                    if (self._hosts.get(key) is host and not host.idle
+                            and host.total <= 0):
+                        host.retired = True
+                        del self._hosts[key]
+        for pooled in expired:
+            pooled.close()
+        return len(expired)
+
+    def close_all(self):
+        """关闭所有空闲连接并清空连接池。"""
+        with self._hosts_lock:
+            hosts = list(self._hosts.values())
+            self._hosts.clear()
+        for host in hosts:
+            with host.lock:
+                idle = list(host.idle)
+                host.idle.clear()
+                host.total -= len(idle)
+                host.retired = True
+            for pooled in idle:
+                pooled.close()
+
+    def stats(self) -> Dict[Hashable, Dict[str, int]]:
+        """
+        获取连接池状态快照。
+
+        Returns:
+            以主机键为键的字典，值包含空闲连接数（idle）和连接总数（total）。
+        """
+        with self._hosts_lock:
+            items = list(self._hosts.items())
+        snapshot = {}
+        for key, host in items:
+            with host.lock:
+                snapshot[key] = {'idle': len(host.idle), 'total': host.total}
+        return snapshot
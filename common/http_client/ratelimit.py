@@ -0,0 +1,413 @@
+"""
+客户端限流模块。
+
+第三方接口（例如企业微信、小程序）按调用方限制每秒或每分钟的调用次数，超出后返回限流错误
+甚至封禁一段时间。RateLimiter在请求发出之前按令牌桶限流：每条规则对应一个桶，桶以rate
+个/秒的速度补充令牌，最多积累burst个；每个请求（包括重试）消耗一个令牌，令牌不足时
+等待补充或立即抛出RateLimitExceeded。
+
+规则按主机名或URL前缀配置，URL前缀优先（最长匹配），其次是主机名，最后是默认规则（按主机
+分别计数）。桶的状态保存在后端中：
+
+- MemoryBackend：进程内共享，默认使用。
+- SharedFileBackend：保存在内存映射的文件中并用文件锁互斥，同一台机器上的多个进程
+  （例如gunicorn的多个worker）共享同一份配额。
+"""
+
+import asyncio
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+
+from .exceptions import RateLimitExceeded
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# SharedFileBackend的默认槽位数，每条规则或主机占用一个槽位
+DEFAULT_SLOTS = 1024
+
+# 等待令牌时单次休眠的最短时间（秒），避免令牌即将补足时忙等
+MIN_SLEEP = 0.001
+
+
+class RateLimit(NamedTuple):
+    """限流规则：每秒补充rate个令牌，最多积累burst个。"""
+
+    rate: float
+    # 桶容量，允许的突发请求数。默认为None，表示max(1, rate)，即最多积累一秒的令牌
+    burst: Optional[float] = None
+
+    @classmethod
+    def per_minute(cls, count: float, burst: Optional[float] = None) -> 'RateLimit':
+        """
+        按每分钟的调用次数创建规则。
+
+        Args:
+            count: 每分钟允许的调用次数。
+            burst: 允许的突发请求数。默认为None（一秒的令牌，至少为1）。
+
+        Returns:
+            限流规则。
+        """
+        return cls(count / 60.0, burst)
+
+    @property
+    def capacity(self) -> float:
+        """桶容量。"""
+        return self.burst if self.burst is not None else max(1.0, self.rate)
+
+
+def take_token(tokens: float, updated: float, now: float, rate: float, capacity: float,
+               count: float) -> Tuple[float, float]:
+    """
+    按经过的时间补充令牌，并尝试取出count个。
+
+    Args:
+        tokens: 上次更新后的令牌数。
+        updated: 上次更新的时间，0表示新建的桶（令牌是满的）。
+        now: 当前时间。
+        rate: 每秒补充的令牌数。
+        capacity: 桶容量。
+        count: 要取出的令牌数。
+
+    Returns:
+        (更新后的令牌数, 需要等待的秒数)。等待时间为0表示已取出，否则没有取出。
+    """
+    if updated <= 0:
+        tokens = capacity
+    else:
+        # 时钟回拨时不补充令牌
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= count:
+        return tokens - count, 0.0
+    if rate <= 0:
+        return tokens, float('inf')
+    return tokens, (count - tokens) / rate
+
+
+class MemoryBackend:
+    """
+    保存在进程内存中的令牌桶，线程安全。
+    """
+
+    # try_acquire只持有很短的线程锁，可以直接在事件循环中调用
+    blocking = False
+
+    def __init__(self):
+        """初始化空的后端。"""
+        # 键 -> [令牌数, 上次更新的时间]
+        self._buckets: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, rate: float, capacity: float, count: float = 1) -> float:
+        """
+        尝试从桶中取出令牌。
+
+        Args:
+            key: 桶的键。
+            rate: 每秒补充的令牌数。
+            capacity: 桶容量。
+            count: 要取出的令牌数。默认为1。
+
+        Returns:
+            0表示已取出；否则为令牌足够前需要等待的秒数（没有取出）。
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [0.0, 0.0]
+            bucket[0], wait = take_token(bucket[0], bucket[1], now, rate, capacity, count)
+            bucket[1] = now
+            return wait
+
+    def reset(self):
+        """清空所有桶。"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class SharedFileBackend:
+    """
+    保存在内存映射文件中的令牌桶，同一台机器上打开同一个文件的进程共享配额。
+
+    文件由slots个槽位组成，每个槽位保存键的哈希、令牌数和更新时间，按哈希开放寻址。
+    读写桶时持有整个文件的flock（进程间）和一个线程锁（进程内，flock不区分同一进程的线程）。
+    时间使用time.time()，各进程可比较。
+    """
+
+    # 槽位：键的64位哈希（0表示空槽位）、令牌数、上次更新的时间
+    _SLOT = struct.Struct('=Qdd')
+
+    # try_acquire可能等待其他进程持有的文件锁，协程中在线程池里调用
+    blocking = True
+
+    def __init__(self, path: str, slots: int = DEFAULT_SLOTS):
+        """
+        打开或创建共享文件。
+
+        Args:
+            path: 文件路径，共享配额的进程使用同一个路径。
+            slots: 槽位数，所有进程必须一致。默认为1024。
+
+        Raises:
+            ImportError: 如果平台不支持fcntl。
+            OSError: 如果无法打开文件。
+        """
+        if fcntl is None:
+            raise ImportError("SharedFileBackend需要fcntl模块（仅支持类Unix系统）")
+        self.path = path
+        self.slots = slots
+        size = slots * self._SLOT.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size < size:
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._map = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        """键的64位哈希，不为0。"""
+        value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(),
+                               'little')
+        return value or 1
+
+    def _find(self, digest: int) -> int:
+        """
+        查找键的槽位偏移，没有时返回第一个空槽位。调用者需持有锁。
+
+        所有槽位都被占用时返回哈希对应的槽位，多个键共享同一个桶（限流更严格）。
+        """
+        start = digest % self.slots
+        for i in range(self.slots):
+            offset = (start + i) % self.slots * self._SLOT.size
+            stored = self._SLOT.unpack_from(self._map, offset)[0]
+            if stored == digest or stored == 0:
+                return offset
+        return start * self._SLOT.size
+
+    def try_acquire(self, key: str, rate: float, capacity: float, count: float = 1) -> float:
+        """
+        尝试从桶中取出令牌。
+
+        Args:
+            key: 桶的键。
+            rate: 每秒补充的令牌数。
+            capacity: 桶容量。
+            count: 要取出的令牌数。默认为1。
+
+        Returns:
+            0表示已取出；否则为令牌足够前需要等待的秒数（没有取出）。
+        """
+        digest = self._hash(key)
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                offset = self._find(digest)
+                stored, tokens, updated = self._SLOT.unpack_from(self._map, offset)
+                if stored != digest:
+                    # 空槽位，或所有槽位都被占用时共享的槽位
+                    tokens = tokens if stored else 0.0
+                    updated = updated if stored else 0.0
+                now = time.time()
+                tokens, wait = take_token(tokens, updated, now, rate, capacity, count)
+                self._SLOT.pack_into(self._map, offset, stored or digest, tokens, now)
+                return wait
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def reset(self):
+        """清空所有桶（影响所有共享该文件的进程）。"""
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                self._map[:] = bytes(len(self._map))
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        """关闭文件映射，文件本身保留。"""
+        with self._lock:
+            if not self._map.closed:
+                self._map.close()
+                os.close(self._fd)
+
+
+class RateLimiter:
+    """
+    按主机名或URL前缀配置的令牌桶限流器，线程安全，可以被多个客户端共享。
+    """
+
+    def __init__(self, rules: Optional[Mapping[str, RateLimit]] = None,
+                 default: Optional[RateLimit] = None, backend=None,
+                 block: bool = True, max_wait: Optional[float] = None):
+        """
+        初始化限流器。
+
+        Args:
+            rules: 规则，键为主机名（例如'qyapi.weixin.qq.com'）或以http://、https://开头的
+                URL前缀（例如'https://api.weixin.qq.com/cgi-bin/message/'），同一规则匹配的
+                请求共享一个桶。
+            default: 没有匹配规则的请求使用的规则，按主机分别计数。默认为None（不限流）。
+            backend: 保存桶状态的后端。默认为新建的MemoryBackend()。
+            block: 令牌不足时是否等待。为False时立即抛出RateLimitExceeded。默认为True。
+            max_wait: 等待令牌的最长时间（秒），需要等待更久时抛出RateLimitExceeded。
+                默认为None（一直等待）。
+        """
+        self.default = default
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.block = block
+        self.max_wait = max_wait
+        self._hosts: Dict[str, RateLimit] = {}
+        # URL前缀按长度从长到短排列，最长的前缀优先匹配
+        self._prefixes: List[Tuple[str, RateLimit]] = []
+        for pattern, limit in (rules or {}).items():
+            if pattern.startswith(('http://', 'https://')):
+                self._prefixes.append((pattern, limit))
+            else:
+                self._hosts[pattern.lower()] = limit
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        self._stats: Dict[str, List[float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def match(self, url: str) -> Optional[Tuple[str, RateLimit]]:
+        """
+        查找URL对应的规则。
+
+        Args:
+            url: 完整的请求URL。
+
+        Returns:
+            (桶的键, 规则)，没有匹配的规则时为None。
+        """
+        for prefix, limit in self._prefixes:
+            if url.startswith(prefix):
+                return prefix, limit
+        host = (urlparse(url).hostname or '').lower()
+        limit = self._hosts.get(host)
+        if limit is not None:
+            return host, limit
+        if self.default is not None:
+            return host, self.default
+        return None
+
+    def _check(self, key: str, limit: RateLimit, block: bool, waited: float) -> float:
+        """
+        尝试取出令牌。
+
+        Returns:
+            0表示已取出，否则为需要休眠的秒数。
+
+        Raises:
+            RateLimitExceeded: 如果不等待或需要等待的时间超过max_wait。
+        """
+        wait = self.backend.try_acquire(key, limit.rate, limit.capacity)
+        if not wait:
+            self._record(key, waited, False)
+            return 0.0
+        if not block or (self.max_wait is not None and waited + wait > self.max_wait):
+            self._record(key, waited, True)
+            raise RateLimitExceeded(key, wait)
+        return max(wait, MIN_SLEEP)
+
+    def acquire(self, url: str, block: Optional[bool] = None) -> float:
+        """
+        为请求取出一个令牌。
+
+        Args:
+            url: 完整的请求URL。
+            block: 令牌不足时是否等待。默认使用限流器的block。
+
+        Returns:
+            等待的秒数。
+
+        Raises:
+            RateLimitExceeded: 如果不等待或需要等待的时间超过max_wait。
+        """
+        matched = self.match(url)
+        if matched is None:
+            return 0.0
+        key, limit = matched
+        block = self.block if block is None else block
+        waited = 0.0
+        while True:
+            sleep = self._check(key, limit, block, waited)
+            if not sleep:
+                return waited
+            time.sleep(sleep)
+            waited += sleep
+
+    async def acquire_async(self, url: str, block: Optional[bool] = None) -> float:
+        """
+        acquire的协程版本，等待令牌时不阻塞事件循环。
+
+        Args:
+            url: 完整的请求URL。
+            block: 令牌不足时是否等待。默认使用限流器的block。
+
+        Returns:
+            等待的秒数。
+
+        Raises:
+            RateLimitExceeded: 如果不等待或需要等待的时间超过max_wait。
+        """
+        matched = self.match(url)
+        if matched is None:
+            return 0.0
+        key, limit = matched
+        block = self.block if block is None else block
+        # 后端可能阻塞（例如等待其他进程的文件锁）时在线程池中取令牌
+        loop = asyncio.get_running_loop() if getattr(self.backend, 'blocking', False) else None
+        waited = 0.0
+        while True:
+            if loop is None:
+                sleep = self._check(key, limit, block, waited)
+            else:
+                sleep = await loop.run_in_executor(None, self._check, key, limit, block, waited)
+            if not sleep:
+                return waited
+            await asyncio.sleep(sleep)
+            waited += sleep
+
+    def _record(self, key: str, waited: float, rejected: bool):
+        """记录统计。"""
+        with self._stats_lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = [0, 0, 0, 0.0]
+            if rejected:
+                stats[1] += 1
+            else:
+                stats[0] += 1
+            if waited:
+                stats[2] += 1
+                stats[3] += waited
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        限流统计（仅本进程）。
+
+        Returns:
+            桶的键到统计的映射，包含allowed（放行的请求数）、rejected（拒绝的请求数）、
+            delayed（等待过令牌的请求数）和waited_s（累计等待的秒数）。
+        """
+        with self._stats_lock:
+            return {key: {'allowed': allowed, 'rejected': rejected, 'delayed': delayed,
+                          'waited_s': round(waited, 3)}
+                    for key, (allowed, rejected, delayed, waited) in self._stats.items()}
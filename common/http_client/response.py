@@ -0,0 +1,262 @@
+"""
+HTTP响应模块。
+
+Response在构造时只保存状态码、头部和原始字节，文本和JSON在首次访问时
+才按Content-Type和charset解码，并缓存结果。为了兼容旧接口，Response也可以像
+字典一样通过'status_code'、'headers'和'content'键访问。
+"""
+
+import json
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+from .streaming import StreamingBody
+
+
+# 未声明charset时文本内容使用的编码
+DEFAULT_CHARSET = 'utf-8'
+
+# 以文本形式处理的非text/*媒体类型
+_TEXTUAL_TYPES = frozenset({
+    'application/xml',
+    'application/javascript',
+    'application/x-www-form-urlencoded',
+})
+
+# 兼容字典访问时支持的键
+_MAPPING_KEYS = ('status_code', 'headers', 'content')
+
+# 缓存未计算的标记
+_UNSET = object()
+
+
+def default_json_loads(data: bytes) -> Any:
+    """
+    默认的JSON解码函数。安装了orjson时使用orjson，否则使用标准库json。
+
+    Args:
+        data: JSON字节串。
+
+    Returns:
+        解码后的对象。
+
+    Raises:
+        ValueError: 如果数据不是合法的JSON。
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def header_value(headers: Dict[str, str], name: str) -> Optional[str]:
+    """
+    不区分大小写地获取头部的值。
+
+    Args:
+        headers: 头部字典。
+        name: 头部名称。
+
+    Returns:
+        头部的值，不存在时为None。
+    """
+    value = headers.get(name)
+    if value is not None:
+        return value
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+def parse_content_type(value: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    解析Content-Type头部。
+
+    Args:
+        value: Content-Type头部的值。
+
+    Returns:
+        (小写的媒体类型, charset)，未声明charset时为None。
+    """
+    if not value:
+        return '', None
+    mime, _, params = value.partition(';')
+    charset = None
+    for param in params.split(';'):
+        name, _, param_value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = param_value.strip().strip('"\'') or None
+    return mime.strip().lower(), charset
+
+
+class Response(Mapping):
+    """
+    HTTP响应。
+
+    原始字节通过body立即可用，text和json()在首次访问时解码并缓存。
+    """
+
+    __slots__ = ('status_code', 'headers', 'stream', '_body', '_json_loads',
+                 '_content_type', '_text', '_json', '_content')
+
+    def __init__(self, status_code: int, headers: Dict[str, str],
+                 body: Union[bytes, StreamingBody],
+                 json_loads: Optional[Callable[[bytes], Any]] = None):
+        """
+        初始化响应。
+
+        Args:
+            status_code: HTTP状态码。
+            headers: 响应头部。
+            body: 响应体字节串，流式响应时为StreamingBody。
+            json_loads: JSON解码函数。默认为default_json_loads。
+        """
+        self.status_code = status_code
+        self.headers = headers
+        if isinstance(body, StreamingBody):
+            self.stream: Optional[StreamingBody] = body
+            self._body = None
+        else:
+            self.stream = None
+            self._body = body
+        self._json_loads = json_loads or default_json_loads
+        self._content_type = _UNSET
+        self._text = _UNSET
+        self._json = _UNSET
+        self._content = _UNSET
+
+    @property
+    def content_type(self) -> Tuple[str, Optional[str]]:
+        """(小写的媒体类型, charset)。"""
+        if self._content_type is _UNSET:
+            self._content_type = parse_content_type(header_value(self.headers, 'Content-Type'))
+        return self._content_type
+
+    @property
+    def body(self) -> bytes:
+        """响应体的原始字节。流式响应在首次访问时读取剩余的全部数据。"""
+        if self._body is None:
+            self._body = self.stream.read()
+        return self._body
+
+    @property
+    def encoding(self) -> str:
+        """文本解码使用的编码：Content-Type声明的charset，未声明时为utf-8。"""
+        return self.content_type[1] or DEFAULT_CHARSET
+
+    @property
+    def text(self) -> str:
+        """按encoding解码的响应文本，无法解码的字节以替换字符表示。"""
+        if self._text is _UNSET:
+            try:
+                self._text = self.body.decode(self.encoding, errors='replace')
+            except LookupError:
+                # 未知的charset，回退到默认编码
+                self._text = self.body.decode(DEFAULT_CHARSET, errors='replace')
+        return self._text
+
+    def json(self) -> Any:
+        """
+        将响应体解码为JSON，结果会被缓存。
+
+        Returns:
+            解码后的对象。
+
+        Raises:
+            ValueError: 如果响应体不是合法的JSON。
+        """
+        if self._json is _UNSET:
+            charset = self.content_type[1]
+            if charset and charset.lower().replace('-', '') != 'utf8':
+                self._json = self._json_loads(self.text.encode('utf-8'))
+            else:
+                self._json = self._json_loads(self.body)
+        return self._json
+
+    @property
+    def is_json(self) -> bool:
+        """Content-Type是否为JSON（application/json或+json后缀）。"""
+        mime = self.content_type[0]
+        return mime == 'application/json' or mime.endswith('+json')
+
+    @property
+    def is_text(self) -> bool:
+        """Content-Type是否为文本类型，或者声明了charset。"""
+        mime, charset = self.content_type
+        return (mime.startswith('text/') or mime in _TEXTUAL_TYPES
+                or mime.endswith('+xml') or charset is not None)
+
+    @property
+    def content(self) -> Any:
+        """
+        兼容旧接口的响应内容。
+
+        流式响应为StreamingBody；JSON类型解码为对象（失败时回退为文本）；
+        文本类型为字符串；未声明Content-Type时依次尝试JSON和UTF-8文本；
+        其他二进制类型为原始字节。
+        """
+        if self._content is _UNSET:
+            self._content = self._legacy_content()
+        return self._content
+
+    def _legacy_content(self) -> Any:
+        """
+        计算兼容旧接口的响应内容。
+
+        Returns:
+            解码后的响应内容。
+        """
+        if self.stream is not None and self._body is None:
+            return self.stream
+        if self.is_json:
+            try:
+                return self.json()
+            except ValueError:
+                return self.text
+        if self.is_text:
+            return self.text
+        if not self.content_type[0]:
+            try:
+                return self.json()
+            except ValueError:
+                pass
+            try:
+                return self.body.decode(DEFAULT_CHARSET)
+            except UnicodeDecodeError:
+                pass
+        return self.body
+
+    def __getitem__(self, key: str) -> Any:
+        """
+        兼容字典访问：支持'status_code'、'headers'和'content'。
+
+        Args:
+            key: 键名。
+
+        Returns:
+            对应的值。
+
+        Raises:
+            KeyError: 如果键不存在。
+        """
+        if key not in _MAPPING_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        """迭代兼容字典访问的键。"""
+        return iter(_MAPPING_KEYS)
+
+    def __len__(self) -> int:
+        """兼容字典访问的键数量。"""
+        return len(_MAPPING_KEYS)
+
+    def __repr__(self) -> str:
+        """响应的简要表示。"""
+        return f"<Response [{self.status_code}]>"
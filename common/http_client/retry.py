@@ -0,0 +1,285 @@
+"""
+重试策略模块。
+
+RetryPolicy决定一次失败的请求是否重试以及重试前等待多久，同步客户端和异步客户端
+共用同一套规则：
+
+- 退避使用完全抖动（full jitter），等待时间在[0, min(backoff_max, backoff_base * 2^attempt)]
+  内均匀分布，同时失败的大量请求不会在同一时刻一起重试；
+- 响应状态码为429、502、503、504时重试，并遵守Retry-After头部；
+- 只有幂等方法会在出错或收到可重试状态码后重试，非幂等方法只在请求确定
+  没有发出（连接被拒绝、域名解析失败）时重试；
+- 每个主机有一个令牌桶形式的重试预算，重试次数不超过请求数的一定比例，
+  上游故障时重试不会把流量放大数倍。
+"""
+
+import random
+import socket
+import threading
+import time
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional
+
+from .base import IDEMPOTENT_METHODS
+from .cookies import parse_http_date
+from .response import header_value
+
+
+# 默认重试的响应状态码：限流、网关错误、服务不可用和网关超时
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# 第一次重试的最大退避时间（秒），之后每次翻倍
+DEFAULT_BACKOFF_BASE = 0.5
+
+# 单次退避的最大时间（秒）
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Retry-After超过该值（秒）时不再重试，直接返回响应，避免调用者被长时间阻塞
+DEFAULT_MAX_RETRY_AFTER = 60.0
+
+# 每个请求为重试预算存入的令牌数，即重试次数最多约为请求数的20%
+DEFAULT_BUDGET_RATIO = 0.2
+
+# 重试预算每秒固定补充的令牌数，保证请求很少的主机也能重试
+DEFAULT_BUDGET_MIN_PER_SECOND = 1.0
+
+# 重试预算的令牌桶容量，也是新主机的初始令牌数
+DEFAULT_BUDGET_CAPACITY = 10.0
+
+# 表示请求确定没有发送到服务器的异常，非幂等请求也可以安全地重试
+_NOT_SENT_ERRORS = (ConnectionRefusedError, socket.gaierror)
+
+# 沿异常链向上查找的最大层数
+_MAX_CAUSE_DEPTH = 8
+
+# 未指定参数的标记
+_UNSET = object()
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    解析Retry-After头部。
+
+    Args:
+        value: 头部的值，可以是秒数或HTTP日期。
+        now: 当前时间戳。默认为time.time()。
+
+    Returns:
+        需要等待的秒数，无法解析时为None。
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    timestamp = parse_http_date(value)
+    if timestamp is None:
+        return None
+    return max(0.0, timestamp - (time.time() if now is None else now))
+
+
+def request_not_sent(error: BaseException) -> bool:
+    """
+    检查异常是否表示请求确定没有发送到服务器。
+
+    客户端会把底层异常包装为HTTPException，因此沿异常链向上查找。
+
+    Args:
+        error: 请求抛出的异常。
+
+    Returns:
+        请求是否确定没有发出。
+    """
+    for _ in range(_MAX_CAUSE_DEPTH):
+        if error is None:
+            break
+        if isinstance(error, _NOT_SENT_ERRORS):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class RetryBudget:
+    """
+    按主机划分的重试预算（令牌桶）。
+
+    每个请求存入ratio个令牌，每次重试取出一个令牌，另外每秒固定补充
+    min_per_second个令牌。令牌不足时不再重试，上游持续故障时重试流量
+    不超过正常流量的ratio倍。线程安全，可以被多个客户端共享。
+    """
+
+    def __init__(self, ratio: float = DEFAULT_BUDGET_RATIO,
+                 min_per_second: float = DEFAULT_BUDGET_MIN_PER_SECOND,
+                 capacity: float = DEFAULT_BUDGET_CAPACITY):
+        """
+        初始化重试预算。
+
+        Args:
+            ratio: 每个请求存入的令牌数。默认为0.2。
+            min_per_second: 每秒固定补充的令牌数。默认为1。
+            capacity: 令牌桶容量。默认为10。
+
+        Raises:
+            ValueError: 如果参数为负数。
+        """
+        if ratio < 0 or min_per_second < 0 or capacity < 0:
+            raise ValueError("重试预算的参数不能为负数")
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        # 主机键 -> [令牌数, 上次补充的时间]
+        self._buckets: Dict[Hashable, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: Hashable, now: float) -> List[float]:
+        """
+        获取主机的令牌桶并按经过的时间补充令牌，调用者需持有锁。
+
+        Args:
+            key: 主机键。
+            now: 当前的单调时间。
+
+        Returns:
+            令牌桶。
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.capacity, now]
+        elif now > bucket[1]:
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.min_per_second)
+            bucket[1] = now
+        return bucket
+
+    def deposit(self, key: Hashable):
+        """
+        记录一个请求，存入ratio个令牌。
+
+        Args:
+            key: 主机键。
+        """
+        with self._lock:
+            bucket = self._bucket(key, time.monotonic())
+            bucket[0] = min(self.capacity, bucket[0] + self.ratio)
+
+    def withdraw(self, key: Hashable) -> bool:
+        """
+        为一次重试取出一个令牌。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            是否取到令牌（允许重试）。
+        """
+        with self._lock:
+            bucket = self._bucket(key, time.monotonic())
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+    def available(self, key: Hashable) -> float:
+        """
+        查询主机当前可用的令牌数。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            令牌数。
+        """
+        with self._lock:
+            return self._bucket(key, time.monotonic())[0]
+
+
+class RetryPolicy:
+    """
+    重试策略。
+
+    最大重试次数由客户端的max_retries决定，策略只负责判断某次失败是否可以重试
+    以及等待多久。一个策略可以被多个客户端共享，此时它们共享同一个重试预算。
+    """
+
+    def __init__(self, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 retry_methods: Iterable[str] = IDEMPOTENT_METHODS,
+                 respect_retry_after: bool = True,
+                 max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+                 budget=_UNSET):
+        """
+        初始化重试策略。
+
+        Args:
+            backoff_base: 第一次重试的最大退避时间（秒），之后每次翻倍。默认为0.5秒。
+            backoff_max: 单次退避的最大时间（秒）。默认为30秒。
+            retry_statuses: 需要重试的响应状态码。默认为429、502、503、504。
+            retry_methods: 出错或收到可重试状态码后可以重试的方法。默认为幂等方法。
+            respect_retry_after: 是否遵守Retry-After头部。默认为True。
+            max_retry_after: Retry-After超过该值（秒）时不再重试，直接返回响应。默认为60秒。
+            budget: 重试预算。默认为新建的RetryBudget()，为None时不限制重试次数。
+        """
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses: FrozenSet[int] = frozenset(retry_statuses)
+        self.retry_methods: FrozenSet[str] = frozenset(m.upper() for m in retry_methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.budget: Optional[RetryBudget] = RetryBudget() if budget is _UNSET else budget
+
+    def backoff(self, attempt: int) -> float:
+        """
+        计算完全抖动的退避时间。
+
+        Args:
+            attempt: 已经失败的尝试序号（从0开始）。
+
+        Returns:
+            等待时间（秒）。
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def record_request(self, key: Hashable):
+        """
+        记录一个新请求（不含重试），为主机的重试预算存入令牌。
+
+        Args:
+            key: 主机键。
+        """
+        if self.budget is not None:
+            self.budget.deposit(key)
+
+    def retry_delay(self, method: str, attempt: int, key: Hashable,
+                    response=None, error: Optional[BaseException] = None) -> Optional[float]:
+        """
+        判断一次尝试的结果是否需要重试。
+
+        允许重试时会从重试预算中取出一个令牌，因此只应在确实会重试之前调用。
+
+        Args:
+            method: HTTP方法。
+            attempt: 本次尝试的序号（从0开始）。
+            key: 主机键。
+            response: 本次尝试的响应，出错时为None。
+            error: 本次尝试的异常，收到响应时为None。
+
+        Returns:
+            重试前需要等待的秒数，不应重试时为None。
+        """
+        idempotent = method in self.retry_methods
+        if error is not None:
+            if not idempotent and not request_not_sent(error):
+                return None
+            delay = self.backoff(attempt)
+        else:
+            if response is None or response.status_code not in self.retry_statuses or not idempotent:
+                return None
+            delay = self.backoff(attempt)
+            if self.respect_retry_after:
+                retry_after = parse_retry_after(header_value(response.headers, 'Retry-After'))
+                if retry_after is not None:
+                    if retry_after > self.max_retry_after:
+                        return None
+                    delay = retry_after
+        if self.budget is not None and not self.budget.withdraw(key):
+            return None
+        return delay
@@ -0,0 +1,242 @@
+"""
+进程内共享的维护任务调度器。
+
+每个客户端都需要定期关闭过期的连接、清理过期的Cookie并把变更写回存储。
+为每个客户端启动一个后台线程时，按租户创建客户端的服务会积累成百上千个空闲线程，
+而且线程持有客户端的强引用，被遗弃的客户端永远不会被回收。
+
+MaintenanceScheduler用一个后台线程和按到期时间排序的最小堆执行所有客户端的周期任务。
+任务通过弱引用持有回调的绑定对象：对象被回收后任务自动移除。没有任务到期时线程阻塞在
+条件变量上，不消耗CPU。线程在第一次注册任务时启动；fork之后子进程丢弃从父进程继承的任务，
+线程在子进程第一次注册任务时重新启动。
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+import weakref
+from typing import Callable, List, Optional, Tuple
+
+# 已取消的任务超过堆大小的该比例时重建堆，避免频繁创建和关闭客户端时堆无限增长
+COMPACT_RATIO = 0.5
+
+# 重建堆的最小堆大小
+COMPACT_MIN_SIZE = 64
+
+
+class ScheduledTask:
+    """
+    周期任务的句柄。
+    """
+
+    __slots__ = ('_callback', 'interval', 'deadline', 'cancelled', '_scheduler',
+                 '__weakref__')
+
+    def __init__(self, callback: Callable[[], Optional[Callable[[], None]]], interval: float,
+                 deadline: float, scheduler: 'MaintenanceScheduler'):
+        """
+        初始化任务。
+
+        Args:
+            callback: 返回回调函数的函数；回调的绑定对象已被回收时返回None。
+            interval: 执行间隔（秒）。
+            deadline: 下次执行的时间（time.monotonic()）。
+            scheduler: 所属的调度器。
+        """
+        self._callback = callback
+        self.interval = interval
+        self.deadline = deadline
+        self.cancelled = False
+        self._scheduler = scheduler
+
+    def cancel(self):
+        """取消任务，正在执行的这一次不受影响。重复调用时忽略。"""
+        self._scheduler._cancel(self)
+
+
+class MaintenanceScheduler:
+    """
+    用单个后台线程执行周期任务的调度器。
+
+    任务依次在调度线程中执行，回调应当很快返回；回调抛出的异常被忽略。
+    """
+
+    def __init__(self, name: str = 'http-client-maintenance'):
+        """
+        初始化调度器，不会立即启动线程。
+
+        Args:
+            name: 后台线程的名称。
+        """
+        self.name = name
+        # (到期时间, 序号, 任务)，序号保证到期时间相同的任务按注册顺序执行
+        self._heap: List[Tuple[float, int, ScheduledTask]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._active = 0
+        self._cancelled = 0
+        self._runs = 0
+        # 调度线程正在执行的任务，不在堆中
+        self._running: Optional[ScheduledTask] = None
+
+    def schedule(self, callback: Callable[[], None], interval: float,
+                 delay: Optional[float] = None) -> ScheduledTask:
+        """
+        注册周期任务。
+
+        绑定方法通过弱引用持有其对象，对象被回收后任务自动移除；其他可调用对象被强引用。
+
+        Args:
+            callback: 回调函数，不接受参数。
+            interval: 执行间隔（秒），从上一次执行结束开始计算。
+            delay: 第一次执行前的等待时间（秒）。默认等于interval。
+
+        Returns:
+            任务句柄，可用于取消任务。
+
+        Raises:
+            ValueError: 如果interval不是正数。
+        """
+        if interval <= 0:
+            raise ValueError("任务的执行间隔必须是正数")
+        try:
+            ref = weakref.WeakMethod(callback)
+        except TypeError:
+            # 普通函数没有绑定对象，直接持有
+            ref = lambda: callback
+        deadline = time.monotonic() + (interval if delay is None else delay)
+        task = ScheduledTask(ref, interval, deadline, self)
+        with self._cond:
+            self._push(task)
+            self._active += 1
+            self._ensure_thread()
+            self._cond.notify()
+        return task
+
+    def _push(self, task: ScheduledTask):
+        """把任务按到期时间放入堆中，调用者需持有锁。"""
+        heapq.heappush(self._heap, (task.deadline, next(self._counter), task))
+
+    def _ensure_thread(self):
+        """线程未运行（尚未启动或fork后的子进程）时启动线程，调用者需持有锁。"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _cancel(self, task: ScheduledTask):
+        """
+        取消任务。任务留在堆中，到期时丢弃；已取消的任务过多时重建堆。
+
+        Args:
+            task: 要取消的任务。
+        """
+        with self._cond:
+            if task.cancelled:
+                return
+            task.cancelled = True
+            self._active -= 1
+            self._cancelled += 1
+            if (len(self._heap) >= COMPACT_MIN_SIZE
+                    and self._cancelled > len(self._heap) * COMPACT_RATIO):
+                self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+                heapq.heapify(self._heap)
+                # 正在执行的任务不在堆中，取消后不会再放回，不计入
+                self._cancelled = 0
+
+    def _next(self) -> Tuple[ScheduledTask, Callable[[], None]]:
+        """
+        等待下一个到期的任务。
+
+        Returns:
+            (任务, 回调函数)。
+        """
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                deadline, _, task = self._heap[0]
+                if task.cancelled:
+                    heapq.heappop(self._heap)
+                    self._cancelled = max(0, self._cancelled - 1)
+                    continue
+                now = time.monotonic()
+                if deadline > now:
+                    self._cond.wait(deadline - now)
+                    continue
+                heapq.heappop(self._heap)
+                callback = task._callback()
+                if callback is None:
+                    # 绑定对象已被回收
+                    task.cancelled = True
+                    self._active -= 1
+                    continue
+                self._running = task
+                return task, callback
+
+    def _run(self):
+        """后台线程：依次执行到期的任务，执行结束后按间隔重新排入堆中。"""
+        while True:
+            task, callback = self._next()
+            try:
+                callback()
+            except Exception:
+                # 忽略任务中的异常，避免影响其他任务
+                pass
+            # 释放回调，不延长绑定对象的生命周期
+            del callback
+            with self._cond:
+                self._runs += 1
+                self._running = None
+                if not task.cancelled:
+                    task.deadline = time.monotonic() + task.interval
+                    self._push(task)
+
+    def _after_fork(self):
+        """
+        fork后的子进程中重建锁并丢弃继承的任务，线程在下次注册任务时重新启动。
+
+        继承的任务属于父进程的客户端，在子进程中执行会重复关闭父进程的连接和写回Cookie；
+        它们被标记为已取消，子进程中对其句柄调用cancel()会被忽略。需要维护的客户端在
+        子进程中重新注册任务。
+        """
+        self._cond = threading.Condition()
+        self._thread = None
+        for _, _, task in self._heap:
+            task.cancelled = True
+        if self._running is not None:
+            self._running.cancelled = True
+            self._running = None
+        self._heap = []
+        self._active = 0
+        self._cancelled = 0
+
+    def stats(self) -> dict:
+        """
+        调度统计。
+
+        Returns:
+            字典，包含tasks（未取消的任务数）、queued（堆中的条目数，含尚未丢弃的已取消任务）、
+            runs（已执行的次数）和running（后台线程是否在运行）。
+        """
+        with self._cond:
+            return {'tasks': self._active, 'queued': len(self._heap), 'runs': self._runs,
+                    'running': self._thread is not None and self._thread.is_alive()}
+
+
+_default_scheduler = MaintenanceScheduler()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_default_scheduler._after_fork)
+
+
+def default_scheduler() -> MaintenanceScheduler:
+    """
+    进程内所有客户端共享的调度器。
+
+    Returns:
+        默认调度器。
+    """
+    return _default_scheduler
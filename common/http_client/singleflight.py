@@ -0,0 +1,84 @@
+"""
+请求合并（single-flight）模块。
+
+热点数据过期时，大量线程会同时请求同一个URL。SingleFlight保证同一个键同时只有一个调用
+在执行，其余调用者等待它完成并得到相同的结果（或相同的异常）。调用结束后键被移除，
+之后的调用会重新执行，因此它只合并同时进行的调用，不缓存结果。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """正在执行的调用，等待者在完成后读取它的结果。"""
+
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    线程安全的调用合并器。
+    """
+
+    def __init__(self):
+        """初始化合并器。"""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行fn，同一个键同时只执行一次。
+
+        Args:
+            key: 调用的键，键相同的调用视为相同的调用。
+            fn: 要执行的函数。
+
+        Returns:
+            (fn的返回值, 是否由当前线程执行)。等待者得到的是同一个返回值对象。
+
+        Raises:
+            Exception: fn抛出的异常，所有等待者都会收到同一个异常。
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            else:
+                self._shared += 1
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, False
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.value, True
+
+    def stats(self) -> dict:
+        """
+        合并统计。
+
+        Returns:
+            字典，包含executed（实际执行的次数）、shared（等待并复用结果的调用次数）
+            和in_flight（正在执行的键数）。
+        """
+        with self._lock:
+            return {'executed': self._executed, 'shared': self._shared,
+                    'in_flight': len(self._calls)}
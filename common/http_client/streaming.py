@@ -0,0 +1,194 @@
+"""
+流式响应体模块。
+
+StreamingBody按块读取响应体，内存占用与块大小成正比而与响应体大小无关。
+压缩的响应体在读取时增量解压。响应体被完整读取后连接才会归还到连接池；
+提前关闭时连接会被丢弃。
+"""
+
+from typing import Any, BinaryIO, Callable, Iterator, Optional, Tuple
+
+
+# 默认的读取块大小（字节）
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class StreamingBody:
+    """
+    流式响应体。
+
+    可以直接迭代得到字节块，也可以写入任意具有write方法的对象::
+
+        response = client.get("/large-file", stream=True)
+        with response['content'] as body:
+            for chunk in body:
+                handle(chunk)
+    """
+
+    def __init__(self, response: Any, release: Callable[[bool], None], decoder: Any = None):
+        """
+        初始化流式响应体。
+
+        Args:
+            response: http.client.HTTPResponse对象。
+            release: 释放连接的回调，参数表示连接是否可以复用。
+            decoder: 内容编码的增量解码器（见compression.get_decoder）。可选。
+        """
+        self._response = response
+        self._release = release
+        self._decoder = decoder
+        self._released = False
+        # 释放后调用的回调，参数表示是否因读取出错而结束
+        self._callbacks = []
+        # 从连接读取的原始（未解压）字节数
+        self.bytes_read = 0
+
+    def _finish(self, reusable: bool, error: bool = False):
+        """
+        释放连接并调用释放回调，只会执行一次。
+
+        Args:
+            reusable: 连接是否可以复用。
+            error: 是否因读取出错而结束。默认为False。
+        """
+        if self._released:
+            return
+        self._released = True
+        try:
+            if not reusable:
+                self._response.close()
+            self._release(reusable)
+        finally:
+            for callback in self._callbacks:
+                callback(error)
+
+    def add_done_callback(self, callback: Callable[[bool], None]):
+        """
+        添加响应体读完或关闭时调用的回调，已释放时立即调用。
+
+        Args:
+            callback: 回调函数，参数表示是否因读取出错而结束。
+        """
+        if self._released:
+            callback(False)
+            return
+        self._callbacks.append(callback)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """
+        读取响应体。
+
+        Args:
+            amt: 最多从连接读取的字节数。默认读取全部剩余数据。
+                压缩的响应体解压后返回的数据可能多于amt。
+
+        Returns:
+            读取到的数据，已读完时返回空字节串。
+
+        Raises:
+            Exception: 底层读取或解压失败时抛出，此时连接会被丢弃。
+        """
+        if self._released:
+            return b''
+        try:
+            data, done = self._read_raw(amt)
+            if self._decoder is not None:
+                data, done = self._decode(data, done, amt)
+        except Exception:
+            self._finish(False, error=True)
+            raise
+        if done:
+            # 响应体已完整读取，连接可以复用
+            self._finish(True)
+        return data
+
+    def _read_raw(self, amt: Optional[int]) -> Tuple[bytes, bool]:
+        """
+        从连接读取原始数据。
+
+        Args:
+            amt: 最多读取的字节数。
+
+        Returns:
+            (数据, 是否已读完)。
+        """
+        data = self._response.read(amt)
+        self.bytes_read += len(data)
+        return data, not data or self._response.isclosed()
+
+    def _decode(self, data: bytes, done: bool, amt: Optional[int]) -> Tuple[bytes, bool]:
+        """
+        解压数据。一段压缩数据可能解压为空（例如只包含gzip头部），
+        此时继续读取，直到得到数据或读完为止。
+
+        Args:
+            data: 已读取的原始数据。
+            done: 是否已读完。
+            amt: 后续每次最多读取的字节数。
+
+        Returns:
+            (解压后的数据, 是否已读完)。
+        """
+        while True:
+            decoded = self._decoder.decompress(data)
+            if done:
+                return decoded + self._decoder.flush(), True
+            if decoded:
+                return decoded, False
+            data, done = self._read_raw(amt)
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        按块迭代响应体。
+
+        Args:
+            chunk_size: 每次从连接读取的最大字节数。
+
+        Yields:
+            响应体数据块。
+        """
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self) -> Iterator[bytes]:
+        """以默认块大小迭代响应体。"""
+        return self.iter_chunks()
+
+    def write_to(self, sink: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        将剩余的响应体写入文件类对象。
+
+        Args:
+            sink: 具有write方法的对象，例如以二进制模式打开的文件。
+            chunk_size: 每次从连接读取的最大字节数。
+
+        Returns:
+            写入的字节数。
+        """
+        written = 0
+        for chunk in self.iter_chunks(chunk_size):
+            sink.write(chunk)
+            written += len(chunk)
+        return written
+
+    @property
+    def consumed(self) -> bool:
+        """响应体是否已被完整读取或已关闭。"""
+        return self._released
+
+    def close(self):
+        """
+        关闭响应体。未读完的响应会导致连接被丢弃而不是归还到连接池。
+        """
+        self._finish(False)
+
+    def __enter__(self) -> 'StreamingBody':
+        """进入上下文。"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文时关闭响应体。"""
+        self.close()
@@ -0,0 +1,194 @@
+"""
+异步HTTP客户端的单元测试。
+"""
+
+import sys
+import os
+import asyncio
+import json
+import unittest
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import AsyncHTTPClient, HTTPException
+
+
+class _FakeServer:
+    """按路径返回预设响应的asyncio测试服务器。"""
+
+    def __init__(self):
+        """初始化服务器。"""
+        self.connections = 0
+        self.requests = []
+        self._server = None
+
+    async def start(self) -> str:
+        """
+        启动服务器。
+
+        Returns:
+            服务器的基础URL。
+        """
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        """停止服务器。"""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        """处理一个连接上的所有请求。"""
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    name, value = line.decode('latin-1').split(':', 1)
+                    name = name.strip().lower()
+                    # 重复的头部按逗号合并，便于检查是否重复发送
+                    headers[name] = (f"{headers[name]}, {value.strip()}" if name in headers
+                                     else value.strip())
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                self.requests.append((method, path, headers, body))
+                if path == '/slow':
+                    await asyncio.sleep(1)
+                writer.write(self._response(path, method, body))
+                if path == '/trailing':
+                    # 响应之后的多余数据，复用该连接时会被当作下一个响应读到
+                    writer.write(b'garbage\r\n')
+                await writer.drain()
+                if path == '/close':
+                    break
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _response(path: str, method: str, body: bytes) -> bytes:
+        """根据路径构造响应。"""
+        if path == '/chunked':
+            return (b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                    b'7\r\n{"a": 1\r\n1\r\n}\r\n0\r\n\r\n')
+        if path == '/cookie':
+            return (b'HTTP/1.1 200 OK\r\nSet-Cookie: sid=abc; Path=/\r\n'
+                    b'Set-Cookie: seen=1; Path=/; Expires=Wed, 21 Oct 2037 07:28:00 GMT\r\n'
+                    b'Content-Length: 2\r\n\r\nok')
+        if path == '/close':
+            return b'HTTP/1.1 200 OK\r\nConnection: close\r\n\r\nbye'
+        payload = json.dumps({"method": method, "body": body.decode()}).encode()
+        return b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(payload), payload)
+
+
+class TestAsyncHTTPClient(unittest.IsolatedAsyncioTestCase):
+    """AsyncHTTPClient类的测试用例。"""
+
+    async def asyncSetUp(self):
+        """启动测试服务器并创建客户端。"""
+        self.server = _FakeServer()
+        base_url = await self.server.start()
+        self.client = AsyncHTTPClient(base_url=base_url, max_retries=0, timeout=5)
+
+    async def asyncTearDown(self):
+        """关闭客户端和服务器。"""
+        await self.client.close()
+        await self.server.stop()
+
+    async def test_methods(self):
+        """测试GET、POST、PUT、DELETE请求。"""
+        result = await self.client.get("/get", params={"q": "1"})
+        self.assertEqual(result['status_code'], 200)
+        self.assertEqual(result['content']['method'], 'GET')
+        self.assertEqual(self.server.requests[-1][1], '/get?q=1')
+
+        result = await self.client.post("/post", json_data={"name": "test"})
+        self.assertEqual(result['content']['method'], 'POST')
+        self.assertEqual(self.server.requests[-1][2]['content-type'], 'application/json')
+
+        result = await self.client.put("/put", data="raw")
+        self.assertEqual(result['content']['body'], 'raw')
+
+        result = await self.client.delete("/delete")
+        self.assertEqual(result['content']['method'], 'DELETE')
+
+    async def test_connection_reuse(self):
+        """测试顺序请求复用同一个连接。"""
+        for _ in range(5):
+            await self.client.get("/get")
+        self.assertEqual(self.server.connections, 1)
+
+    async def test_connection_close_not_reused(self):
+        """测试服务器要求关闭的连接不会被复用。"""
+        result = await self.client.get("/close")
+        self.assertEqual(result['content'], 'bye')
+        await self.client.get("/get")
+        self.assertEqual(self.server.connections, 2)
+
+    async def test_unexpected_data_on_idle_connection(self):
+        """测试空闲连接上的多余数据按复用失败处理，幂等请求在新连接上重试。"""
+        await self.client.get("/trailing")
+        await asyncio.sleep(0.05)
+        result = await self.client.get("/get")
+        self.assertEqual(result['content']['method'], 'GET')
+        self.assertEqual(self.server.connections, 2)
+
+    async def test_chunked_response(self):
+        """测试分块传输编码的响应。"""
+        result = await self.client.get("/chunked")
+        self.assertEqual(result['content'], {"a": 1})
+
+    async def test_cookies(self):
+        """测试Cookie的保存和发送与同步客户端一致。"""
+        await self.client.get("/cookie")
+        self.assertEqual(self.client.get_cookies("127.0.0.1"), {"sid": "abc", "seen": "1"})
+        await self.client.get("/get")
+        self.assertEqual(self.server.requests[-1][2]['cookie'], 'sid=abc; seen=1')
+
+    async def test_timeout(self):
+        """测试单请求超时。"""
+        with self.assertRaises(HTTPException) as context:
+            await self.client.get("/slow", timeout=0.1)
+        self.assertIn("超时", str(context.exception))
+
+    async def test_header_injection_rejected(self):
+        """测试包含换行或非法字符的头部和请求目标被拒绝，不会发出请求。"""
+        invalid = [("/get", {"X-Test": "a\r\nInjected: 1"}),
+                   ("/get", {"X-Test": "a\nb"}),
+                   ("/get", {"X-Test": "a\x00b"}),
+                   ("/get", {"Bad:Name": "1"}),
+                   ("/get", {"Bad\r\nName": "1"}),
+                   ("/a b", None)]
+        for endpoint, headers in invalid:
+            with self.subTest(endpoint=endpoint, headers=headers):
+                with self.assertRaises(ValueError):
+                    await self.client.get(endpoint, headers=headers)
+        self.assertEqual(self.server.requests, [])
+
+    async def test_content_length_not_duplicated(self):
+        """测试调用者提供的Content-Length被忽略，只发送按请求体计算的值。"""
+        await self.client.post("/post", data="raw", headers={"Content-Length": "99"})
+        self.assertEqual(self.server.requests[-1][2]['content-length'], '3')
+        await self.client.get("/get", headers={"content-length": "5"})
+        self.assertNotIn('content-length', self.server.requests[-1][2])
+
+    async def test_concurrency_limit(self):
+        """测试每个主机的并发连接数受max_connections限制。"""
+        client = AsyncHTTPClient(base_url=self.client.base_url, max_connections=2,
+                                 max_retries=0)
+        try:
+            await asyncio.gather(*(client.get("/get") for _ in range(20)))
+        finally:
+            await client.close()
+        self.assertLessEqual(self.server.connections, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
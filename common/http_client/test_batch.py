@@ -0,0 +1,266 @@
+"""
+批量并发请求的单元测试。
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import AsyncHTTPClient, BatchRequest, HTTPClient, HTTPException
+from http_client.batch import BatchScheduler
+
+
+# 慢请求的处理时间（秒）
+SLOW_DELAY = 0.2
+
+# 无法连接的地址（端口1通常没有服务监听），用于产生请求失败
+FAIL_URL = "http://127.0.0.1:1/fail"
+
+
+def _build_url(endpoint, params=None):
+    """测试用的URL构建函数。"""
+    return endpoint
+
+
+class TestBatchScheduler(unittest.TestCase):
+    """BatchScheduler的测试用例。"""
+
+    def test_global_and_per_host_limits(self):
+        """测试全局和单主机并发上限，被限制的主机不会阻塞其他主机的请求。"""
+        urls = ["http://slow/1", "http://slow/2", "http://slow/3", "http://fast/1", "http://fast/2"]
+        scheduler = BatchScheduler(urls, _build_url, concurrency=3, per_host=1, ordered=False)
+        jobs = scheduler.next_jobs()
+        self.assertEqual([job[3] for job in jobs], ["http://slow/1", "http://fast/1"])
+        self.assertEqual(scheduler.next_jobs(), [])
+
+        scheduler.finish(jobs[1], 'ok', None)
+        self.assertEqual([job[3] for job in scheduler.next_jobs()], ["http://fast/2"])
+        scheduler.finish(jobs[0], 'ok', None)
+        self.assertEqual([job[3] for job in scheduler.next_jobs()], ["http://slow/2"])
+
+    def test_ordered_collect(self):
+        """测试按输入顺序返回结果。"""
+        scheduler = BatchScheduler([f"http://h{i}/" for i in range(3)], _build_url,
+                                   concurrency=3, per_host=1, ordered=True)
+        jobs = scheduler.next_jobs()
+        scheduler.finish(jobs[2], 'c', None)
+        scheduler.finish(jobs[1], 'b', None)
+        self.assertEqual(list(scheduler.collect()), [])
+        scheduler.finish(jobs[0], 'a', None)
+        self.assertEqual([r.response for r in scheduler.collect()], ['a', 'b', 'c'])
+        scheduler.next_jobs()
+        self.assertTrue(scheduler.done)
+
+    def test_unordered_collect(self):
+        """测试按完成顺序返回结果。"""
+        scheduler = BatchScheduler(["http://a/", "http://b/"], _build_url,
+                                   concurrency=2, per_host=1, ordered=False)
+        jobs = scheduler.next_jobs()
+        scheduler.finish(jobs[1], 'b', None)
+        self.assertEqual([r.index for r in scheduler.collect()], [1])
+
+    def test_reads_input_lazily(self):
+        """测试按需读取输入，不会一次性展开全部请求。"""
+        consumed = []
+
+        def source():
+            for i in range(10000):
+                consumed.append(i)
+                yield f"http://h/{i}"
+
+        scheduler = BatchScheduler(source(), _build_url, concurrency=2, per_host=2, ordered=False)
+        scheduler.next_jobs()
+        self.assertLess(len(consumed), 100)
+
+    def test_invalid_limits(self):
+        """测试无效的并发上限。"""
+        with self.assertRaises(ValueError):
+            BatchScheduler([], _build_url, concurrency=0, per_host=1, ordered=False)
+
+    def test_json_request(self):
+        """测试BatchRequest的JSON请求体。"""
+        request = BatchRequest("/items", method="post", json_data={"a": 1}, headers={"X": "1"})
+        method, url, data, headers = request.prepare(_build_url)
+        self.assertEqual((method, url, json.loads(data)), ("POST", "/items", {"a": 1}))
+        self.assertEqual(headers, {"X": "1", "Content-Type": "application/json"})
+        self.assertEqual(request.headers, {"X": "1"})
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """回显路径并支持慢请求的处理器，同时记录最大并发请求数。"""
+
+    protocol_version = 'HTTP/1.1'
+    # 头部和响应体分开写入，避免Nagle算法与延迟确认叠加产生的40ms延迟
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """/slow/...延迟返回，其余直接回显路径。"""
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(SLOW_DELAY)
+            payload = json.dumps({'path': self.path}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+def _start_server():
+    """启动本地服务器。"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.active = 0
+    server.max_active = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestHTTPClientMap(unittest.TestCase):
+    """HTTPClient.map和gather的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动两个本地服务器，模拟两个主机。"""
+        cls.server, cls.url = _start_server()
+        cls.slow_server, cls.slow_url = _start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭本地服务器。"""
+        cls.server.shutdown()
+        cls.slow_server.shutdown()
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.client = HTTPClient(max_retries=0)
+        self.server.max_active = 0
+        self.slow_server.max_active = 0
+
+    def tearDown(self):
+        """清理测试夹具。"""
+        self.client.close()
+
+    def test_gather_in_order(self):
+        """测试gather按输入顺序返回全部结果。"""
+        urls = [f"{self.url}/item/{i}" for i in range(50)]
+        results = self.client.gather(urls, concurrency=8)
+        self.assertEqual([r.index for r in results], list(range(50)))
+        self.assertEqual([r.response.json()['path'] for r in results],
+                         [f"/item/{i}" for i in range(50)])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertLessEqual(self.server.max_active, 8)
+
+    def test_slow_host_does_not_starve_others(self):
+        """测试慢主机受单主机上限约束，其他主机的请求不必等待慢请求。"""
+        requests = [f"{self.slow_url}/slow/{i}" for i in range(6)]
+        requests += [f"{self.url}/item/{i}" for i in range(20)]
+        start = time.monotonic()
+        finished = {}
+        for result in self.client.map(requests, concurrency=6, per_host=2):
+            finished[result.index] = time.monotonic() - start
+        self.assertEqual(len(finished), 26)
+        self.assertLessEqual(self.slow_server.max_active, 2)
+        # 全部快请求在第一批慢请求完成之前就已完成
+        self.assertLess(max(finished[i] for i in range(6, 26)), SLOW_DELAY)
+
+    def test_errors_recorded(self):
+        """测试失败的请求记录在结果中，不影响其他请求。"""
+        results = self.client.gather([f"{self.url}/a", FAIL_URL, f"{self.url}/b"])
+        self.assertEqual([r.ok for r in results], [True, False, True])
+        self.assertIsInstance(results[1].error, HTTPException)
+        self.assertIsNone(results[1].response)
+
+    def test_stop_on_error(self):
+        """测试stop_on_error时抛出异常，且不再开始其余请求。"""
+        consumed = []
+
+        def source():
+            yield FAIL_URL
+            for i in range(1000):
+                consumed.append(i)
+                yield f"{self.slow_url}/slow/{i}"
+
+        with self.assertRaises(HTTPException):
+            for _ in self.client.map(source(), concurrency=2, per_host=1, stop_on_error=True):
+                pass
+        self.assertLess(len(consumed), 100)
+
+    def test_batch_request_objects(self):
+        """测试BatchRequest和端点字符串可以混用，端点相对于base_url。"""
+        client = HTTPClient(base_url=self.url, max_retries=0)
+        try:
+            results = client.gather(["/x", BatchRequest("/y", params={"q": "1"})])
+            self.assertEqual([r.response.json()['path'] for r in results], ["/x", "/y?q=1"])
+        finally:
+            client.close()
+
+
+class TestAsyncHTTPClientMap(unittest.IsolatedAsyncioTestCase):
+    """AsyncHTTPClient.map和gather的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动两个本地服务器，模拟两个主机。"""
+        cls.server, cls.url = _start_server()
+        cls.slow_server, cls.slow_url = _start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭本地服务器。"""
+        cls.server.shutdown()
+        cls.slow_server.shutdown()
+
+    async def asyncSetUp(self):
+        """设置测试夹具。"""
+        self.client = AsyncHTTPClient(max_retries=0)
+
+    async def asyncTearDown(self):
+        """清理测试夹具。"""
+        await self.client.close()
+
+    async def test_gather_in_order(self):
+        """测试gather按输入顺序返回全部结果。"""
+        urls = [f"{self.url}/item/{i}" for i in range(30)]
+        results = await self.client.gather(urls, concurrency=10)
+        self.assertEqual([r.response.json()['path'] for r in results],
+                         [f"/item/{i}" for i in range(30)])
+
+    async def test_per_host_limit_and_errors(self):
+        """测试单主机上限和失败记录。"""
+        requests = [f"{self.slow_url}/slow/{i}" for i in range(4)] + [FAIL_URL]
+        results = [r async for r in self.client.map(requests, concurrency=10, per_host=2)]
+        self.assertEqual(len(results), 5)
+        self.assertLessEqual(self.slow_server.max_active, 2)
+        # 失败的请求不必等待慢请求，最先完成
+        self.assertEqual(results[0].index, 4)
+        self.assertFalse(results[0].ok)
+
+    async def test_stop_on_error(self):
+        """测试stop_on_error时抛出异常。"""
+        with self.assertRaises(HTTPException):
+            await self.client.gather([FAIL_URL, f"{self.slow_url}/slow/1"],
+                                     stop_on_error=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,398 @@
+"""
+HTTP响应缓存的单元测试。
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPCache, HTTPClient, MemoryStorage
+from http_client.cache import CachedResponse, parse_cache_control
+from http_client.exceptions import HTTPException
+from http_client.response import Response
+
+# 测试开始时的时间戳
+NOW = 1_700_000_000.0
+
+# 等待后台刷新的超时时间（秒）
+WAIT_TIMEOUT = 5
+
+
+class _Upstream:
+    """
+    模拟上游的fetch函数：按顺序返回预设的响应，并记录每次调用的条件请求头部。
+    """
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.called = threading.Event()
+
+    def __call__(self, conditional):
+        self.calls.append(conditional)
+        self.called.set()
+        result = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(result, Exception):
+            raise result
+        status, headers, body = result
+        return Response(status, dict(headers), body)
+
+
+class TestCachePolicy(unittest.TestCase):
+    """HTTPCache缓存策略的测试用例。"""
+
+    def setUp(self):
+        """固定时间。"""
+        patcher = patch('http_client.cache.time.time', return_value=NOW)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = HTTPCache()
+
+    def _get(self, upstream, url='http://api.test/item', headers=None):
+        """通过缓存发送GET请求。"""
+        return self.cache.request('GET', url, headers or {}, upstream)
+
+    def test_parse_cache_control(self):
+        """测试解析Cache-Control指令。"""
+        self.assertEqual(parse_cache_control('Max-Age=60, no-cache, private="x"'),
+                         {'max-age': '60', 'no-cache': None, 'private': 'x'})
+        self.assertEqual(parse_cache_control(None), {})
+
+    def test_fresh_hit_then_revalidate(self):
+        """测试新鲜期内直接命中，过期后发送条件请求并在304后复用响应体。"""
+        upstream = _Upstream(
+            (200, {'Cache-Control': 'max-age=60', 'ETag': '"v1"'}, b'data'),
+            (304, {'Cache-Control': 'max-age=120', 'ETag': '"v1"'}, b''))
+        self.assertEqual(self._get(upstream).body, b'data')
+        self.clock.return_value = NOW + 30
+        response = self._get(upstream)
+        self.assertEqual((response.body, response.headers['Age']), (b'data', '30'))
+        self.assertEqual(len(upstream.calls), 1)
+
+        self.clock.return_value = NOW + 61
+        response = self._get(upstream)
+        self.assertEqual((response.status_code, response.body), (200, b'data'))
+        self.assertEqual(upstream.calls[1], {'If-None-Match': '"v1"'})
+        # 304更新了新鲜期
+        self.clock.return_value = NOW + 150
+        self._get(upstream)
+        self.assertEqual(len(upstream.calls), 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats['hit']['count'], stats['revalidated']['count'],
+                          stats['miss']['count']), (2, 1, 1))
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_no_store_and_no_cache(self):
+        """测试no-store不缓存，请求的no-cache强制验证，调用者的条件请求绕过缓存。"""
+        upstream = _Upstream((200, {'Cache-Control': 'no-store'}, b'x'))
+        self._get(upstream)
+        self._get(upstream)
+        self.assertEqual(upstream.calls, [None, None])
+
+        upstream = _Upstream((200, {'Cache-Control': 'max-age=60',
+                                    'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}, b'x'))
+        self._get(upstream, 'http://api.test/other')
+        self._get(upstream, 'http://api.test/other', {'Cache-Control': 'no-cache'})
+        self.assertEqual(upstream.calls[1],
+                         {'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'})
+        self._get(upstream, 'http://api.test/other', {'If-None-Match': '"mine"'})
+        self.assertEqual(upstream.calls[2], None)
+        self.assertEqual(self.cache.stats()['bypass']['count'], 1)
+
+    def test_heuristic_freshness(self):
+        """测试没有显式新鲜期时按Last-Modified估算新鲜期。"""
+        headers = {'Date': formatdate(NOW, usegmt=True),
+                   'Last-Modified': formatdate(NOW - 1000, usegmt=True)}
+        entry = CachedResponse(200, headers, b'', NOW, NOW, {})
+        self.assertAlmostEqual(entry.lifetime, 100)
+        self.assertEqual(CachedResponse(200, {}, b'', NOW, NOW, {}).lifetime, 0)
+        expires = {'Date': formatdate(NOW, usegmt=True),
+                   'Expires': formatdate(NOW + 30, usegmt=True)}
+        self.assertAlmostEqual(CachedResponse(200, expires, b'', NOW, NOW, {}).lifetime, 30)
+
+    def test_stale_while_revalidate(self):
+        """测试stale-while-revalidate窗口内返回过期响应并在后台刷新。"""
+        upstream = _Upstream(
+            (200, {'Cache-Control': 'max-age=10, stale-while-revalidate=60'}, b'old'),
+            (200, {'Cache-Control': 'max-age=10, stale-while-revalidate=60'}, b'new'))
+        self._get(upstream)
+        upstream.called.clear()
+        self.clock.return_value = NOW + 20
+        self.assertEqual(self._get(upstream).body, b'old')
+        self.assertTrue(upstream.called.wait(WAIT_TIMEOUT))
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while self.cache._revalidating and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self._get(upstream).body, b'new')
+        self.assertEqual(len(upstream.calls), 2)
+        self.assertEqual(self.cache.stats()['stale']['count'], 1)
+
+    def test_stale_if_error(self):
+        """测试stale-if-error窗口内上游出错时返回过期响应。"""
+        upstream = _Upstream(
+            (200, {'Cache-Control': 'max-age=10, stale-if-error=60'}, b'old'),
+            HTTPException("连接失败"),
+            (503, {}, b''))
+        self._get(upstream)
+        self.clock.return_value = NOW + 20
+        self.assertEqual(self._get(upstream).body, b'old')
+        self.assertEqual(self._get(upstream).body, b'old')
+        self.clock.return_value = NOW + 100
+        self.assertEqual(self._get(upstream).status_code, 503)
+
+    def test_vary(self):
+        """测试Vary列出的请求头部不同时不复用缓存。"""
+        upstream = _Upstream((200, {'Cache-Control': 'max-age=60', 'Vary': 'Accept-Language'},
+                              b'x'))
+        self._get(upstream, headers={'Accept-Language': 'zh'})
+        self._get(upstream, headers={'accept-language': 'zh'})
+        self.assertEqual(len(upstream.calls), 1)
+        self._get(upstream, headers={'Accept-Language': 'en'})
+        self.assertEqual(len(upstream.calls), 2)
+
+    def test_unsafe_method_invalidates(self):
+        """测试成功的POST请求使同一URL的缓存失效。"""
+        upstream = _Upstream((200, {'Cache-Control': 'max-age=60'}, b'x'))
+        self._get(upstream)
+        self.cache.request('POST', 'http://api.test/item', {}, upstream)
+        self._get(upstream)
+        self.assertEqual(len(upstream.calls), 3)
+
+    def test_concurrent_requests_coalesced(self):
+        """测试同时发出的相同请求只访问一次上游。"""
+        release = threading.Event()
+        calls = []
+
+        def fetch(conditional):
+            calls.append(conditional)
+            release.wait()
+            return Response(200, {'Cache-Control': 'max-age=60'}, b'x')
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self._get(fetch).body))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [b'x'] * 10)
+        self.assertEqual(self.cache.stats()['coalesced']['count'], 9)
+
+    def test_uncacheable_response_shared_with_waiters(self):
+        """测试领头请求的响应不可缓存时，等待者得到它的副本而不是各自访问上游。"""
+        release = threading.Event()
+        calls = []
+
+        def fetch(conditional):
+            calls.append(conditional)
+            release.wait()
+            return Response(200, {'Cache-Control': 'no-store'}, b'x')
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self._get(fetch)))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([response.body for response in results], [b'x'] * 10)
+        self.assertEqual(len({id(response) for response in results}), 10)
+        self.assertEqual(self.cache.stats()['coalesced']['count'], 9)
+        # 没有保存，之后的请求仍然访问上游
+        self._get(fetch)
+        self.assertEqual(len(calls), 2)
+
+    def test_authorization_in_shared_cache(self):
+        """测试共享缓存只保存带public、s-maxage或must-revalidate的带凭据请求的响应。"""
+        clients = [_Client(), _Client()]
+        for client in clients:
+            self.cache.attach(client)
+        alice = {'Authorization': 'Bearer alice'}
+        upstream = _Upstream((200, {'Cache-Control': 'max-age=60'}, b'x'))
+        self._get(upstream, headers=alice)
+        self._get(upstream, headers=alice)
+        self.assertEqual(len(upstream.calls), 2)
+        self.assertIsNone(self.cache.memory.get('http://api.test/item'))
+        for directive in ('public, max-age=60', 's-maxage=60', 'max-age=60, must-revalidate'):
+            with self.subTest(directive=directive):
+                url = f'http://api.test/{directive}'
+                self._get(_Upstream((200, {'Cache-Control': directive}, b'x')), url, alice)
+                self.assertIsNotNone(self.cache.memory.get(url))
+        # 明确允许共享的响应也返回给其他凭据的请求
+        upstream = _Upstream((200, {}, b'y'))
+        self._get(upstream, 'http://api.test/public, max-age=60', {'Authorization': 'Bearer bob'})
+        self.assertEqual(upstream.calls, [])
+
+    def test_authorization_reused_only_for_same_credentials(self):
+        """测试单个客户端保存的带凭据请求的响应不会返回给其他凭据，包括缓存变为共享之后。"""
+        upstream = _Upstream((200, {'Cache-Control': 'max-age=60'}, b'x'))
+        self._get(upstream, headers={'Authorization': 'Bearer alice'})
+        self._get(upstream, headers={'Authorization': 'Bearer alice'})
+        self.assertEqual(len(upstream.calls), 1)
+        self._get(upstream)
+        self.assertEqual(len(upstream.calls), 2)
+
+
+class _Client:
+    """登记到缓存的客户端占位对象。"""
+
+
+class TestCacheStorage(unittest.TestCase):
+    """内存和磁盘存储的测试用例。"""
+
+    def setUp(self):
+        """创建临时目录。"""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _entry(self, size):
+        """创建响应体为size字节的条目。"""
+        return CachedResponse(200, {'Cache-Control': 'max-age=60'}, b'x' * size, NOW, NOW, {})
+
+    def test_memory_lru_size_cap(self):
+        """测试内存存储超出字节数上限时淘汰最久未使用的条目。"""
+        size = self._entry(1000).size
+        storage = MemoryStorage(max_bytes=size * 2)
+        storage.set('a', self._entry(1000))
+        storage.set('b', self._entry(1000))
+        storage.get('a')
+        storage.set('c', self._entry(1000))
+        self.assertIsNone(storage.get('b'))
+        self.assertIsNotNone(storage.get('a'))
+        storage.set('huge', self._entry(size * 3))
+        self.assertIsNone(storage.get('huge'))
+        self.assertEqual(storage.stats(), {'entries': 2, 'bytes': size * 2, 'evictions': 1})
+
+    def test_disk_tier_survives_restart(self):
+        """测试磁盘层在新的缓存实例中仍可命中，并限制总大小。"""
+        upstream = _Upstream((200, {'Cache-Control': 'max-age=60', 'X-Test': '1'}, b'disk'))
+        HTTPCache(directory=self.directory).request('GET', 'http://api.test/a', {}, upstream)
+        cache = HTTPCache(directory=self.directory)
+        response = cache.request('GET', 'http://api.test/a', {}, upstream)
+        self.assertEqual((response.body, response.headers['X-Test']), (b'disk', '1'))
+        self.assertEqual(len(upstream.calls), 1)
+        self.assertEqual(cache.stats()['disk']['entries'], 1)
+
+        directory = os.path.join(self.directory, 'small')
+        small = HTTPCache(directory=directory,
+                          disk_max_bytes=len(self._entry(10).to_bytes()) * 2)
+        for name in 'bcd':
+            small.disk.set(name, self._entry(10))
+        self.assertEqual(small.disk.stats()['entries'], 2)
+        self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertIsNone(small.disk.get('b'))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """带ETag的处理器，If-None-Match匹配时返回304。"""
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """处理GET请求，/me和/private返回请求中的Cookie。"""
+        if self.path in ('/me', '/private'):
+            body = (self.headers.get('Cookie') or '').encode()
+            self.send_response(200)
+            if self.path == '/me':
+                self.send_header('Vary', 'Cookie')
+                self.send_header('Cache-Control', 'max-age=60')
+            else:
+                self.send_header('Cache-Control', 'private, max-age=60')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.send_header('ETag', '"v1"')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Content-Length', '5')
+        self.end_headers()
+        self.wfile.write(b'hello')
+
+
+class TestHTTPClientCache(unittest.TestCase):
+    """HTTPClient使用响应缓存的测试用例。"""
+
+    def setUp(self):
+        """启动服务器。"""
+        _Handler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_conditional_requests(self):
+        """测试缓存的响应通过ETag验证，304时返回缓存的响应体。"""
+        client = HTTPClient(base_url=f"http://127.0.0.1:{self.server.server_address[1]}",
+                            cache=HTTPCache())
+        self.addCleanup(client.close)
+        for _ in range(3):
+            response = client.get('/poll')
+            self.assertEqual((response.status_code, response.text), (200, 'hello'))
+        self.assertEqual(_Handler.requests, [None, '"v1"', '"v1"'])
+        self.assertEqual(client.cache.stats()['revalidated']['count'], 2)
+        # 流式请求不经过缓存
+        client.get('/poll', stream=True).body
+        self.assertEqual(_Handler.requests[-1], None)
+
+    def _client(self, cache, session):
+        """创建使用共享缓存、带会话Cookie的客户端。"""
+        client = HTTPClient(base_url=f"http://127.0.0.1:{self.server.server_address[1]}",
+                            cache=cache)
+        self.addCleanup(client.close)
+        client.cookie_jar.set_cookie('127.0.0.1', '/', 'session', session)
+        return client
+
+    def test_cookie_sessions_not_shared(self):
+        """测试Vary: Cookie和private的响应不会返回给另一个会话的客户端。"""
+        cache = HTTPCache()
+        alice = self._client(cache, 'alice')
+        bob = self._client(cache, 'bob')
+        for _ in range(2):
+            self.assertEqual(alice.get('/me').text, 'session=alice')
+            self.assertEqual(bob.get('/me').text, 'session=bob')
+        self.assertEqual(alice.get('/private').text, 'session=alice')
+        self.assertEqual(bob.get('/private').text, 'session=bob')
+        # 同一个客户端切换会话后也不复用
+        alice.cookie_jar.set_cookie('127.0.0.1', '/', 'session', 'carol')
+        self.assertEqual(alice.get('/me').text, 'session=carol')
+        self.assertEqual(cache.stats()['hit']['count'], 0)
+
+    def test_private_cached_for_single_client(self):
+        """测试只有一个客户端使用缓存时保存private的响应。"""
+        client = self._client(HTTPCache(), 'alice')
+        for _ in range(2):
+            self.assertEqual(client.get('/private').text, 'session=alice')
+        self.assertEqual(client.cache.stats()['hit']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -25,7 +25,7 @@ def test_cleanup_thread():
     
     try:
         print(f"客户端创建完成，连接TTL: {client.connection_ttl}秒")
-        print(f"清理线程是否存活: {client._cleanup_thread.is_alive()}")
+        print(f"维护任务是否已注册: {not client._maintenance.cancelled}")
         
         # 发送几个请求来创建连接
         print("\n发送请求创建连接...")
@@ -34,10 +34,10 @@ def test_cleanup_thread():
             print(f"  请求 {i+1} 状态码: {response['status_code']}")
         
         print(f"\n当前连接池状态:")
-        print(f"  连接计数: {client._connection_count}")
-        print(f"  连接池大小: {len(client._connection_pool)}")
-        for key, connections in client._connection_pool.items():
-            print(f"    {key}: {len(connections)} 个连接")
+        pool_stats = client._pool.stats()
+        print(f"  连接池大小: {len(pool_stats)}")
+        for key, stats in pool_stats.items():
+            print(f"    {key}: {stats['idle']} 个空闲连接, 共 {stats['total']} 个连接")
         
         print("\n等待3秒让连接超时...")
         time.sleep(3)
@@ -46,18 +46,17 @@ def test_cleanup_thread():
         client._remove_expired_connections()
         
         print(f"\n清理后连接池状态:")
-        print(f"  连接计数: {client._connection_count}")
-        print(f"  连接池大小: {len(client._connection_pool)}")
-        for key, connections in client._connection_pool.items():
-            print(f"    {key}: {len(connections)} 个连接")
+        pool_stats = client._pool.stats()
+        print(f"  连接池大小: {len(pool_stats)}")
+        for key, stats in pool_stats.items():
+            print(f"    {key}: {stats['idle']} 个空闲连接, 共 {stats['total']} 个连接")
         
         print("\n再发送一个请求...")
         response = client.get("/get", params={"test": "after_cleanup"})
         print(f"  请求状态码: {response['status_code']}")
         
         print(f"\n最终连接池状态:")
-        print(f"  连接计数: {client._connection_count}")
-        print(f"  连接池大小: {len(client._connection_pool)}")
+        print(f"  连接池大小: {len(client._pool.stats())}")
         
     except Exception as e:
         print(f"错误: {e}")
@@ -81,7 +80,7 @@ def test_normal_ttl():
     
     try:
         print(f"客户端创建完成，连接TTL: {client.connection_ttl}秒")
-        print(f"清理线程是否存活: {client._cleanup_thread.is_alive()}")
+        print(f"维护任务是否已注册: {not client._maintenance.cancelled}")
         
         # 发送几个请求来创建连接
         print("\n发送请求创建连接...")
@@ -90,13 +89,10 @@ def test_normal_ttl():
             print(f"  请求 {i+1} 状态码: {response['status_code']}")
         
         print(f"\n当前连接池状态:")
-        print(f"  连接计数: {client._connection_count}")
-        print(f"  连接池大小: {len(client._connection_pool)}")
-        for key, connections in client._connection_pool.items():
-            print(f"    {key}: {len(connections)} 个连接")
-            
-        # 检查创建时间记录
-        print(f"\n创建时间记录数量: {len(client._connection_creation_time)}")
+        pool_stats = client._pool.stats()
+        print(f"  连接池大小: {len(pool_stats)}")
+        for key, stats in pool_stats.items():
+            print(f"    {key}: {stats['idle']} 个空闲连接, 共 {stats['total']} 个连接")
         
     except Exception as e:
         print(f"错误: {e}")
@@ -0,0 +1,167 @@
+"""
+内容编码（压缩/解压）的单元测试。
+"""
+
+import sys
+import os
+import gzip
+import io
+import json
+import threading
+import unittest
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient
+from http_client.compression import ACCEPT_ENCODING, decode_body, get_decoder
+from http_client.streaming import StreamingBody
+
+
+PAYLOAD = json.dumps([{"id": i, "name": f"item-{i}"} for i in range(5000)]).encode()
+
+
+class TestDecoders(unittest.TestCase):
+    """增量解码器的测试用例。"""
+
+    def _feed(self, decoder, data: bytes, step: int = 7) -> bytes:
+        """逐段喂入数据并返回解码结果。"""
+        out = b''.join(decoder.decompress(data[i:i + step]) for i in range(0, len(data), step))
+        return out + decoder.flush()
+
+    def test_gzip(self):
+        """测试gzip增量解码。"""
+        self.assertEqual(self._feed(get_decoder('gzip'), gzip.compress(PAYLOAD)), PAYLOAD)
+
+    def test_deflate_zlib_and_raw(self):
+        """测试zlib格式和裸deflate格式的deflate编码。"""
+        self.assertEqual(decode_body(zlib.compress(PAYLOAD), 'deflate'), PAYLOAD)
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        raw_data = raw.compress(PAYLOAD) + raw.flush()
+        self.assertEqual(self._feed(get_decoder('deflate'), raw_data), PAYLOAD)
+
+    def test_multiple_encodings(self):
+        """测试多个编码按相反顺序解码。"""
+        data = gzip.compress(zlib.compress(PAYLOAD))
+        self.assertEqual(decode_body(data, 'deflate, gzip'), PAYLOAD)
+
+    def test_identity_and_unknown(self):
+        """测试identity和不支持的编码不做处理。"""
+        self.assertIsNone(get_decoder('identity'))
+        self.assertIsNone(get_decoder('compress'))
+        self.assertEqual(decode_body(b'raw', 'zstd-unknown'), b'raw')
+
+    def test_accept_encoding(self):
+        """测试默认的Accept-Encoding包含gzip和deflate。"""
+        self.assertIn('gzip', ACCEPT_ENCODING)
+        self.assertIn('deflate', ACCEPT_ENCODING)
+
+    def test_streaming_body_inflates_incrementally(self):
+        """测试流式响应体边读边解压。"""
+        raw = io.BytesIO(gzip.compress(PAYLOAD))
+        response = Mock()
+        response.read.side_effect = raw.read
+        response.isclosed.side_effect = lambda: raw.tell() == len(raw.getvalue())
+        release = Mock()
+        body = StreamingBody(response, release, get_decoder('gzip'))
+        chunks = list(body.iter_chunks(1024))
+        self.assertEqual(b''.join(chunks), PAYLOAD)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(body.bytes_read, len(raw.getvalue()))
+        release.assert_called_once_with(True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """按Accept-Encoding压缩响应并回显请求体信息的请求处理器。"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """返回可能被gzip压缩的PAYLOAD。"""
+        body = PAYLOAD
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """回显请求体的编码和解压后的长度。"""
+        data = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        encoding = self.headers.get('Content-Encoding')
+        if encoding == 'gzip':
+            data = gzip.decompress(data)
+        payload = json.dumps({'encoding': encoding, 'size': len(data)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestClientCompression(unittest.TestCase):
+    """HTTPClient压缩协商的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动本地服务器。"""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        """停止本地服务器。"""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_transparent_decompression(self):
+        """测试响应被透明解压。"""
+        client = HTTPClient(base_url=self.base_url, max_retries=0)
+        try:
+            response = client.get("/")
+            self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+            self.assertEqual(response.body, PAYLOAD)
+            self.assertEqual(len(response['content']), 5000)
+
+            with client.get("/", stream=True)['content'] as body:
+                self.assertEqual(b''.join(body.iter_chunks(4096)), PAYLOAD)
+                self.assertLess(body.bytes_read, len(PAYLOAD))
+        finally:
+            client.close()
+
+    def test_decompress_disabled(self):
+        """测试关闭解压后不协商压缩。"""
+        client = HTTPClient(base_url=self.base_url, max_retries=0, decompress=False)
+        try:
+            response = client.get("/")
+            self.assertNotIn('Content-Encoding', response['headers'])
+            self.assertEqual(response.body, PAYLOAD)
+        finally:
+            client.close()
+
+    def test_request_compression_threshold(self):
+        """测试请求体超过阈值时才压缩。"""
+        client = HTTPClient(base_url=self.base_url, max_retries=0, compress_threshold=1000)
+        try:
+            response = client.post("/", data=b'x' * 5000)
+            self.assertEqual(response['content'], {'encoding': 'gzip', 'size': 5000})
+            response = client.post("/", data=b'x' * 10)
+            self.assertEqual(response['content'], {'encoding': None, 'size': 10})
+        finally:
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
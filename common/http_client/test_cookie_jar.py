@@ -0,0 +1,255 @@
+"""
+CookieJar的单元测试。
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client.cookies import (HEAP_COMPACT_MIN, CookieJar, default_cookie_path,
+                                  parse_http_date, parse_set_cookie)
+
+
+class TestCookieJarMatching(unittest.TestCase):
+    """CookieJar域名和路径匹配的测试用例。"""
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.jar = CookieJar()
+
+    def test_exact_domain(self):
+        """测试完全相同的域名匹配。"""
+        self.jar.set_cookie("example.com", "/", "a", "1")
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {"a": "1"})
+        self.assertEqual(self.jar.get_cookies("other.com", "/"), {})
+
+    def test_parent_domain_matches_subdomain(self):
+        """测试上级域名的Cookie匹配子域名，前导点可有可无。"""
+        self.jar.set_cookie(".example.com", "/", "dot", "1")
+        self.jar.set_cookie("example.com", "/", "plain", "2")
+        expected = {"dot": "1", "plain": "2"}
+        self.assertEqual(self.jar.get_cookies("api.example.com", "/"), expected)
+        self.assertEqual(self.jar.get_cookies("a.b.example.com", "/"), expected)
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), expected)
+
+    def test_subdomain_does_not_match_parent_or_suffix(self):
+        """测试子域名的Cookie不匹配上级域名，也不匹配只有字符串后缀相同的域名。"""
+        self.jar.set_cookie("api.example.com", "/", "a", "1")
+        self.jar.set_cookie("example.com", "/", "b", "2")
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {"b": "2"})
+        self.assertEqual(self.jar.get_cookies("badexample.com", "/"), {})
+
+    def test_domain_is_case_insensitive(self):
+        """测试域名不区分大小写。"""
+        self.jar.set_cookie("Example.COM", "/", "a", "1")
+        self.assertEqual(self.jar.get_cookies("www.example.com", "/"), {"a": "1"})
+
+    def test_path_prefix_on_segment_boundary(self):
+        """测试路径前缀必须在路径分隔符处结束。"""
+        self.jar.set_cookie("example.com", "/api", "a", "1")
+        self.assertEqual(self.jar.get_cookies("example.com", "/api"), {"a": "1"})
+        self.assertEqual(self.jar.get_cookies("example.com", "/api/v1"), {"a": "1"})
+        self.assertEqual(self.jar.get_cookies("example.com", "/apix"), {})
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {})
+
+    def test_trailing_slash_path(self):
+        """测试以斜杠结尾的Cookie路径只匹配子路径。"""
+        self.jar.set_cookie("example.com", "/api/", "a", "1")
+        self.assertEqual(self.jar.get_cookies("example.com", "/api/"), {"a": "1"})
+        self.assertEqual(self.jar.get_cookies("example.com", "/api/v1"), {"a": "1"})
+        self.assertEqual(self.jar.get_cookies("example.com", "/api"), {})
+
+    def test_root_path_matches_everything(self):
+        """测试根路径的Cookie匹配所有路径。"""
+        self.jar.set_cookie("example.com", "/", "a", "1")
+        for path in ("/", "/api", "/api/v1/users", ""):
+            self.assertEqual(self.jar.get_cookies("example.com", path), {"a": "1"})
+
+    def test_more_specific_cookie_wins(self):
+        """测试同名Cookie以域名和路径更具体的一个为准。"""
+        self.jar.set_cookie("example.com", "/", "sid", "root")
+        self.jar.set_cookie("example.com", "/api", "sid", "api")
+        self.jar.set_cookie("www.example.com", "/", "sid", "www")
+        self.assertEqual(self.jar.get_cookies("example.com", "/api/x"), {"sid": "api"})
+        self.assertEqual(self.jar.get_cookies("www.example.com", "/"), {"sid": "www"})
+
+    def test_replace_cookie(self):
+        """测试相同域名、路径和名称的Cookie会被替换。"""
+        self.jar.set_cookie("example.com", "/", "a", "1")
+        self.jar.set_cookie(".example.com", "/", "a", "2")
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {"a": "2"})
+        self.assertEqual(len(self.jar), 1)
+
+    def test_expired_cookie_not_returned(self):
+        """测试过期的Cookie不会被返回。"""
+        self.jar.set_cookie("example.com", "/", "old", "1", expires=time.time() - 1)
+        self.jar.set_cookie("example.com", "/", "new", "2", expires=time.time() + 3600)
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {"new": "2"})
+
+
+class TestCookieJarMaintenance(unittest.TestCase):
+    """CookieJar删除、清理和并发的测试用例。"""
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.jar = CookieJar()
+
+    def test_delete_cookie_prunes_index(self):
+        """测试删除Cookie后索引中的空节点被移除。"""
+        self.jar.set_cookie("a.example.com", "/x/y", "n", "1")
+        self.assertTrue(self.jar.delete_cookie("a.example.com", "/x/y", "n"))
+        self.assertFalse(self.jar.delete_cookie("a.example.com", "/x/y", "n"))
+        self.assertEqual(self.jar._root.children, {})
+        self.assertEqual(len(self.jar), 0)
+
+    def test_delete_keeps_siblings(self):
+        """测试删除Cookie不影响同一节点下的其他Cookie。"""
+        self.jar.set_cookie("example.com", "/x", "a", "1")
+        self.jar.set_cookie("example.com", "/x/y", "b", "2")
+        self.jar.delete_cookie("example.com", "/x/y", "b")
+        self.assertEqual(self.jar.get_cookies("example.com", "/x/y"), {"a": "1"})
+
+    def test_clear_expired_cookies(self):
+        """测试清理过期的Cookie，替换过的Cookie以最新的过期时间为准。"""
+        now = time.time()
+        self.jar.set_cookie("example.com", "/", "old", "1", expires=now - 10)
+        self.jar.set_cookie("example.com", "/", "session", "2")
+        self.jar.set_cookie("example.com", "/", "renewed", "3", expires=now - 5)
+        self.jar.set_cookie("example.com", "/", "renewed", "4", expires=now + 3600)
+        self.assertEqual(self.jar.clear_expired_cookies(), 1)
+        self.assertEqual(self.jar.get_cookies("example.com", "/"),
+                         {"session": "2", "renewed": "4"})
+        self.assertEqual(len(self.jar), 2)
+
+    def test_heap_is_compacted(self):
+        """测试反复替换Cookie时过期堆不会无限增长。"""
+        expires = time.time() + 3600
+        for i in range(HEAP_COMPACT_MIN * 4):
+            self.jar.set_cookie("example.com", "/", "a", str(i), expires=expires)
+        self.assertLessEqual(len(self.jar._expiry_heap), HEAP_COMPACT_MIN + 1)
+
+    def test_clear(self):
+        """测试清空所有Cookie。"""
+        self.jar.set_cookie("example.com", "/", "a", "1", expires=time.time() + 60)
+        self.jar.clear()
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {})
+        # 空的Cookie管理器仍然为真，客户端通过`if self.cookie_jar`判断是否启用
+        self.assertTrue(self.jar)
+        self.assertEqual(self.jar.clear_expired_cookies(), 0)
+
+    def test_concurrent_set_and_get(self):
+        """测试多线程同时设置和读取Cookie。"""
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(500):
+                    self.jar.set_cookie(f"h{n}.example.com", f"/p{i % 7}", f"c{i}", "v")
+                    self.jar.get_cookies(f"h{n}.example.com", "/p1/x")
+            except Exception as e:  # pragma: no cover - 失败时记录
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.jar), 8 * 500)
+
+    def test_host_only_cookie(self):
+        """测试host-only的Cookie不匹配子域名。"""
+        self.jar.set_cookie("example.com", "/", "a", "1", host_only=True)
+        self.jar.set_cookie("example.com", "/", "b", "2")
+        self.assertEqual(self.jar.get_cookies("example.com", "/"), {"a": "1", "b": "2"})
+        self.assertEqual(self.jar.get_cookies("www.example.com", "/"), {"b": "2"})
+
+
+class TestParseHttpDate(unittest.TestCase):
+    """parse_http_date函数的测试用例。"""
+
+    EXPECTED = 784111777.0
+
+    def test_formats(self):
+        """测试IMF-fixdate、Netscape和asctime格式。"""
+        for value in ("Sun, 06 Nov 1994 08:49:37 GMT",
+                      "Sunday, 06-Nov-94 08:49:37 GMT",
+                      "Sun Nov  6 08:49:37 1994"):
+            self.assertEqual(parse_http_date(value), self.EXPECTED, value)
+
+    def test_two_digit_years(self):
+        """测试两位数年份按RFC 6265转换。"""
+        self.assertEqual(parse_http_date("Wed, 01-Jan-37 00:00:00 GMT"), 2114380800.0)
+        self.assertEqual(parse_http_date("Thu, 01-Jan-70 00:00:00 GMT"), 0.0)
+
+    def test_invalid(self):
+        """测试无法解析的日期。"""
+        for value in ("", "garbage", "Sun, 31 Feb 2030 00:00:00 GMT",
+                      "Sun, 06 Nov 1994 25:00:00 GMT", "06 Nov 1500 00:00:00"):
+            self.assertIsNone(parse_http_date(value), value)
+
+
+class TestParseSetCookie(unittest.TestCase):
+    """parse_set_cookie函数的测试用例。"""
+
+    def test_basic_attributes(self):
+        """测试解析名称、值和属性，属性名不区分大小写，未知属性被忽略。"""
+        cookie = parse_set_cookie("sid=abc; path=/api; HttpOnly; Secure; SameSite=Lax",
+                                  "example.com", "/login")
+        self.assertEqual((cookie.name, cookie.value, cookie.domain, cookie.path),
+                         ("sid", "abc", "example.com", "/api"))
+        self.assertIsNone(cookie.expires)
+        self.assertTrue(cookie.host_only)
+
+    def test_value_may_contain_equals_and_quotes(self):
+        """测试值中可以包含等号和引号。"""
+        cookie = parse_set_cookie('token="a=b=="; Path=/', "example.com", "/")
+        self.assertEqual(cookie.value, '"a=b=="')
+
+    def test_invalid_pairs(self):
+        """测试没有等号或名称为空的头部被忽略。"""
+        self.assertIsNone(parse_set_cookie("novalue; Path=/", "example.com", "/"))
+        self.assertIsNone(parse_set_cookie("=abc", "example.com", "/"))
+        self.assertIsNone(parse_set_cookie("", "example.com", "/"))
+
+    def test_max_age_overrides_expires(self):
+        """测试Max-Age优先于Expires。"""
+        cookie = parse_set_cookie("a=1; Max-Age=60; Expires=Sun, 06 Nov 1994 08:49:37 GMT",
+                                  "example.com", "/", now=1000.0)
+        self.assertEqual(cookie.expires, 1060.0)
+        cookie = parse_set_cookie("a=1; Expires=Sun, 06 Nov 1994 08:49:37 GMT",
+                                  "example.com", "/", now=1000.0)
+        self.assertEqual(cookie.expires, TestParseHttpDate.EXPECTED)
+
+    def test_non_positive_max_age_expires_immediately(self):
+        """测试Max-Age小于等于0的Cookie立即过期，无效的Max-Age被忽略。"""
+        cookie = parse_set_cookie("a=; Max-Age=0", "example.com", "/", now=1000.0)
+        self.assertLessEqual(cookie.expires, 1000.0)
+        cookie = parse_set_cookie("a=1; Max-Age=soon", "example.com", "/", now=1000.0)
+        self.assertIsNone(cookie.expires)
+
+    def test_domain_attribute(self):
+        """测试Domain属性：去掉前导点，匹配子域名，不匹配的Cookie被拒绝。"""
+        cookie = parse_set_cookie("a=1; Domain=.Example.COM", "api.example.com", "/")
+        self.assertEqual(cookie.domain, "example.com")
+        self.assertFalse(cookie.host_only)
+        self.assertIsNone(parse_set_cookie("a=1; Domain=evil.com", "example.com", "/"))
+        self.assertIsNone(parse_set_cookie("a=1; Domain=api.example.com", "example.com", "/"))
+
+    def test_default_path(self):
+        """测试未指定或无效的Path使用默认路径。"""
+        self.assertEqual(default_cookie_path("/"), "/")
+        self.assertEqual(default_cookie_path("/login"), "/")
+        self.assertEqual(default_cookie_path("/a/b/c"), "/a/b")
+        self.assertEqual(default_cookie_path(""), "/")
+        cookie = parse_set_cookie("a=1; Path=relative", "example.com", "/a/b")
+        self.assertEqual(cookie.path, "/a")
+
+
+if __name__ == '__main__':
+    unittest.main()
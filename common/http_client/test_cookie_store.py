@@ -0,0 +1,175 @@
+"""
+Cookie持久化存储的单元测试。
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient
+from http_client.cookie_store import SQLiteCookieStore, StoredCookie
+from http_client.cookies import CookieJar
+
+
+class RecordingStore(SQLiteCookieStore):
+    """记录加载和写入调用的存储。"""
+
+    def __init__(self, path):
+        """初始化存储。"""
+        super().__init__(path)
+        self.loads = []
+        self.writes = []
+
+    def load(self, domains):
+        """记录加载的域名。"""
+        self.loads.append(list(domains))
+        return super().load(domains)
+
+    def write(self, upserts, deletes):
+        """记录写入的变更。"""
+        upserts, deletes = list(upserts), list(deletes)
+        self.writes.append((upserts, deletes))
+        return super().write(upserts, deletes)
+
+
+class TestSQLiteCookieStore(unittest.TestCase):
+    """SQLiteCookieStore与CookieJar配合的测试用例。"""
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cookies.db')
+
+    def tearDown(self):
+        """清理测试夹具。"""
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _reopen(self):
+        """打开同一个数据库文件的新存储和新Cookie管理器，模拟进程重启。"""
+        store = RecordingStore(self.path)
+        self.addCleanup(store.close)
+        return store, CookieJar(store)
+
+    def test_cookies_survive_restart(self):
+        """测试Cookie在重新打开后仍然可用。"""
+        store, jar = self._reopen()
+        jar.set_cookie("example.com", "/", "sid", "abc", expires=time.time() + 3600)
+        jar.set_cookie("api.example.com", "/v1", "token", "t", host_only=True)
+        jar.close()
+
+        store, jar = self._reopen()
+        self.assertEqual(jar.get_cookies("api.example.com", "/v1/x"), {"sid": "abc", "token": "t"})
+        self.assertEqual(jar.get_cookies("www.example.com", "/"), {"sid": "abc"})
+
+    def test_lazy_load_per_domain(self):
+        """测试只在首次查找时加载请求域名及其上级域名，且每个域名只加载一次。"""
+        store, jar = self._reopen()
+        jar.set_cookie("a.com", "/", "x", "1")
+        jar.set_cookie("b.com", "/", "y", "2")
+        jar.close()
+
+        store, jar = self._reopen()
+        self.assertEqual(len(jar), 0)
+        self.assertEqual(jar.get_cookies("www.a.com", "/"), {"x": "1"})
+        self.assertEqual(store.loads, [["com", "a.com", "www.a.com"]])
+        self.assertEqual(len(jar), 1)
+        jar.get_cookies("www.a.com", "/")
+        jar.get_cookies("a.com", "/")
+        self.assertEqual(len(store.loads), 1)
+
+    def test_incremental_writes(self):
+        """测试只写回变更过的Cookie，删除也会写回。"""
+        store, jar = self._reopen()
+        for i in range(10):
+            jar.set_cookie("example.com", "/", f"c{i}", "v")
+        jar.flush()
+        jar.set_cookie("example.com", "/", "c3", "changed")
+        jar.delete_cookie("example.com", "/", "c4")
+        self.assertEqual(jar.flush(), 2)
+        upserts, deletes = store.writes[-1]
+        self.assertEqual([(c.name, c.value) for c in upserts], [("c3", "changed")])
+        self.assertEqual(deletes, [("example.com", "/", "c4")])
+        self.assertEqual(jar.flush(), 0)
+        self.assertEqual(store.count(), 9)
+
+    def test_memory_wins_over_store(self):
+        """测试加载时内存中已设置或已删除的Cookie不会被存储中的旧数据覆盖。"""
+        store, jar = self._reopen()
+        jar.set_cookie("example.com", "/", "a", "old")
+        jar.set_cookie("example.com", "/", "b", "old")
+        jar.close()
+
+        store, jar = self._reopen()
+        jar.set_cookie("example.com", "/", "a", "new")
+        self.assertTrue(jar.delete_cookie("example.com", "/", "b"))
+        self.assertEqual(jar.get_cookies("example.com", "/"), {"a": "new"})
+
+    def test_expired_records_purged_on_load(self):
+        """测试存储中已过期的记录不会被加载，并在写回时删除。"""
+        store, jar = self._reopen()
+        store.write([StoredCookie("example.com", "/", "old", "v", time.time() - 10, False),
+                     StoredCookie("example.com", "/", "live", "v", None, False)], [])
+        self.assertEqual(jar.get_cookies("example.com", "/"), {"live": "v"})
+        jar.flush()
+        self.assertEqual(store.count(), 1)
+
+    def test_expired_cookies_removed_from_store(self):
+        """测试清理过期的Cookie时同时从存储中删除。"""
+        store, jar = self._reopen()
+        jar.set_cookie("example.com", "/", "old", "v", expires=time.time() - 1)
+        jar.flush()
+        self.assertEqual(jar.clear_expired_cookies(), 1)
+        jar.flush()
+        self.assertEqual(store.count(), 0)
+
+    def test_flush_threshold(self):
+        """测试待写回的变更达到阈值时自动写回。"""
+        store = RecordingStore(self.path)
+        self.addCleanup(store.close)
+        jar = CookieJar(store, flush_threshold=3)
+        jar.set_cookie("example.com", "/", "a", "1")
+        jar.set_cookie("example.com", "/", "b", "2")
+        self.assertEqual(store.writes, [])
+        jar.set_cookie("example.com", "/", "c", "3")
+        self.assertEqual(len(store.writes), 1)
+        self.assertEqual(store.count(), 3)
+
+    def test_clear_clears_store(self):
+        """测试清空Cookie时同时清空存储。"""
+        store, jar = self._reopen()
+        jar.set_cookie("example.com", "/", "a", "1")
+        jar.flush()
+        jar.clear()
+        self.assertEqual(store.count(), 0)
+        self.assertEqual(jar.get_cookies("example.com", "/"), {})
+
+    def test_closed_store(self):
+        """测试存储关闭后写回不会报错。"""
+        store, jar = self._reopen()
+        jar.set_cookie("example.com", "/", "a", "1")
+        store.close()
+        store.close()
+        self.assertEqual(jar.flush(), 0)
+
+    def test_client_close_flushes(self):
+        """测试客户端关闭时写回Cookie的变更。"""
+        store = SQLiteCookieStore(self.path)
+        client = HTTPClient(cookie_store=store)
+        client.set_cookie("example.com", "/", "sid", "abc")
+        client.close()
+        store.close()
+
+        with SQLiteCookieStore(self.path) as store:
+            client = HTTPClient(cookie_store=store)
+            self.assertEqual(client.get_cookies("example.com"), {"sid": "abc"})
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
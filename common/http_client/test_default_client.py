@@ -0,0 +1,135 @@
+"""
+便捷函数共享的默认客户端和session()的单元测试。
+"""
+
+import sys
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import http_client
+from http_client import HTTPClient, default_client, delete, get, post, put, session
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """统计连接数，设置Cookie并返回收到的Cookie头部。"""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        """记录连接数。"""
+        super().setup()
+        _Handler.connections += 1
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def _respond(self):
+        """读取请求体，返回请求方法和收到的Cookie。"""
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        body = f"{self.command} {self.headers.get('Cookie') or ''}".encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'sid=1; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+
+class TestDefaultClient(unittest.TestCase):
+    """默认客户端和session()的测试用例。"""
+
+    def setUp(self):
+        """启动服务器，每个测试使用新的默认客户端。"""
+        _Handler.connections = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        http_client._close_default_client()
+        self.addCleanup(http_client._close_default_client)
+
+    def test_helpers_reuse_connection(self):
+        """测试便捷函数共享一个客户端和一条连接，调用之间不保存Cookie。"""
+        self.assertEqual(get(self.url).content, 'GET ')
+        self.assertEqual(post(self.url, json_data={'a': 1}).content, 'POST ')
+        self.assertEqual(put(self.url, data='x').content, 'PUT ')
+        self.assertEqual(delete(self.url).content, 'DELETE ')
+        self.assertEqual(_Handler.connections, 1)
+        self.assertIs(default_client(), default_client())
+
+    def test_created_once_across_threads(self):
+        """测试多个线程同时第一次使用时只创建一个客户端。"""
+        clients = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            clients.append(default_client())
+
+        workers = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    def test_session(self):
+        """测试会话内便捷函数使用会话的客户端（保存Cookie），退出后关闭并恢复默认客户端。"""
+        shared = default_client()
+        with session(max_retries=0) as client:
+            self.assertIs(default_client(), client)
+            get(self.url)
+            self.assertEqual(get(self.url).content, 'GET sid=1')
+            with session(HTTPClient()) as inner:
+                self.assertIs(default_client(), inner)
+            self.assertIs(default_client(), client)
+            self.assertFalse(inner._maintenance.cancelled)
+            inner.close()
+        self.assertTrue(client._maintenance.cancelled)
+        self.assertIs(default_client(), shared)
+
+    def test_session_is_per_thread(self):
+        """测试会话不影响其他线程。"""
+        seen = []
+        with session() as client:
+            thread = threading.Thread(target=lambda: seen.append(default_client()))
+            thread.start()
+            thread.join()
+        self.assertIsNot(seen[0], client)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), '需要os.fork')
+    def test_fork(self):
+        """测试fork后的子进程创建自己的客户端和连接。"""
+        parent = default_client()
+        get(self.url)
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                child = default_client()
+                ok = child is not parent and get(self.url).status_code == 200
+                os.write(write_fd, b'1' if ok else b'0')
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        self.assertEqual(result, b'1')
+        self.assertEqual(_Handler.connections, 2)
+        self.assertIs(default_client(), parent)
+
+
+if __name__ == '__main__':
+    unittest.main()
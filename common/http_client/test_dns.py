@@ -0,0 +1,228 @@
+"""
+DNS缓存和Happy Eyeballs连接的单元测试。
+"""
+
+import sys
+import os
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import DNSCache, HTTPClient, StaticResolver
+from http_client.dns import interleave_families, numeric_address
+
+# 测试中缩短的Happy Eyeballs等待时间（秒）
+DELAY = 0.1
+
+# 填满监听队列所用的连接数，之后新的连接请求会被丢弃而一直挂起
+BACKLOG_FILL = 4
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回固定内容的处理器。"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """处理GET请求。"""
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+
+class TestDNSCache(unittest.TestCase):
+    """DNSCache的测试用例。"""
+
+    def setUp(self):
+        """固定时间。"""
+        patcher = patch('http_client.dns.time.monotonic', return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.resolver = StaticResolver({'api.test': ['10.0.0.1', '10.0.0.2']})
+        self.cache = DNSCache(ttl=60, negative_ttl=5, resolver=self.resolver)
+
+    def test_ttl(self):
+        """测试解析结果在TTL内被复用，过期后重新解析。"""
+        first = self.cache.resolve('api.test', 80)
+        self.assertEqual([info[4] for info in first], [('10.0.0.1', 80), ('10.0.0.2', 80)])
+        self.assertEqual(self.cache.resolve('API.test', 80), first)
+        self.assertEqual(self.resolver.calls, 1)
+        self.clock.return_value = 1061.0
+        self.cache.resolve('api.test', 80)
+        self.assertEqual(self.resolver.calls, 2)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_negative_cache(self):
+        """测试解析失败的结果被缓存negative_ttl秒。"""
+        for _ in range(3):
+            with self.assertRaises(socket.gaierror):
+                self.cache.resolve('missing.test', 80)
+        self.assertEqual(self.resolver.calls, 1)
+        self.assertEqual(self.cache.stats()['negative_hits'], 2)
+        self.clock.return_value = 1006.0
+        with self.assertRaises(socket.gaierror):
+            self.cache.resolve('missing.test', 80)
+        self.assertEqual(self.resolver.calls, 2)
+
+    def test_pin_and_numeric_hosts(self):
+        """测试固定地址的主机和IP地址不调用解析器。"""
+        self.cache.pin('api.test', ['::1', '127.0.0.1'])
+        infos = self.cache.resolve('api.test', 8080)
+        self.assertEqual([info[4] for info in infos], [('::1', 8080, 0, 0), ('127.0.0.1', 8080)])
+        self.assertEqual(self.cache.resolve('10.1.2.3', 80)[0][4], ('10.1.2.3', 80))
+        self.assertEqual(self.resolver.calls, 0)
+        with self.assertRaises(ValueError):
+            self.cache.pin('api.test', ['not-an-ip'])
+        self.cache.unpin('api.test')
+        self.cache.resolve('api.test', 8080)
+        self.assertEqual(self.resolver.calls, 1)
+
+    def test_eviction_and_invalidate(self):
+        """测试超出max_entries时淘汰最久未使用的条目，以及按主机删除缓存。"""
+        resolver = StaticResolver({'a.test': ['10.0.0.1'], 'b.test': ['10.0.0.2'],
+                                   'c.test': ['10.0.0.3']})
+        cache = DNSCache(resolver=resolver, max_entries=2)
+        cache.resolve('a.test', 80)
+        cache.resolve('b.test', 80)
+        cache.resolve('a.test', 80)
+        cache.resolve('c.test', 80)
+        self.assertEqual(cache.stats()['entries'], 2)
+        cache.resolve('a.test', 80)
+        self.assertEqual(resolver.calls, 3)
+        cache.invalidate('a.test')
+        cache.resolve('a.test', 80)
+        self.assertEqual(resolver.calls, 4)
+
+
+class TestConcurrentResolve(unittest.TestCase):
+    """并发解析的测试用例。"""
+
+    def test_concurrent_lookups_coalesced(self):
+        """测试同一主机的并发解析只调用一次解析器。"""
+        release = threading.Event()
+        calls = []
+
+        def resolver(host, port):
+            calls.append(host)
+            release.wait()
+            return [numeric_address('10.0.0.1', port)]
+
+        cache = DNSCache(resolver=resolver)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.resolve('api.test', 80)))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        time.sleep(DELAY)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 10)
+
+
+class TestHappyEyeballs(unittest.TestCase):
+    """Happy Eyeballs连接的测试用例。"""
+
+    def setUp(self):
+        """启动只监听127.0.0.1的服务器。"""
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.addCleanup(self.listener.close)
+        self.port = self.listener.getsockname()[1]
+
+    def _connect(self, addresses):
+        """通过固定地址的缓存连接到测试端口。"""
+        cache = DNSCache(resolver=StaticResolver({'dual.test': addresses}),
+                         happy_eyeballs_delay=DELAY)
+        start = time.monotonic()
+        sock = cache.create_connection(('dual.test', self.port), timeout=5)
+        self.addCleanup(sock.close)
+        return sock, time.monotonic() - start
+
+    def test_interleave_families(self):
+        """测试交替排列IPv6和IPv4地址。"""
+        infos = [numeric_address(a, 80) for a in ('::1', '::2', '::3', '10.0.0.1', '10.0.0.2')]
+        ordered = [info[4][0] for info in interleave_families(infos)]
+        self.assertEqual(ordered, ['::1', '10.0.0.1', '::2', '10.0.0.2', '::3'])
+
+    def test_failed_address_tries_next_immediately(self):
+        """测试前一个地址被拒绝时立即尝试下一个地址。"""
+        sock, elapsed = self._connect(['127.0.0.3', '127.0.0.1'])
+        self.assertEqual(sock.getpeername()[0], '127.0.0.1')
+        self.assertLess(elapsed, DELAY)
+        self.assertEqual(sock.gettimeout(), 5)
+
+    def test_hanging_address_is_raced(self):
+        """测试前一个地址迟迟连不上时，在等待时间之后并行尝试下一个地址。"""
+        blackhole = socket.socket()
+        self.addCleanup(blackhole.close)
+        try:
+            blackhole.bind(('127.0.0.2', self.port))
+        except OSError:
+            self.skipTest("无法绑定127.0.0.2")
+        blackhole.listen(0)
+        # 填满监听队列后，新的连接请求会被丢弃
+        for _ in range(BACKLOG_FILL):
+            filler = socket.socket()
+            self.addCleanup(filler.close)
+            filler.setblocking(False)
+            filler.connect_ex(('127.0.0.2', self.port))
+        time.sleep(DELAY)
+        sock, elapsed = self._connect(['127.0.0.2', '127.0.0.1'])
+        self.assertEqual(sock.getpeername()[0], '127.0.0.1')
+        self.assertLess(elapsed, 1)
+
+    def test_all_addresses_fail(self):
+        """测试所有地址都连接失败时抛出异常并删除缓存。"""
+        self.listener.close()
+        resolver = StaticResolver({'down.test': ['127.0.0.1']})
+        cache = DNSCache(resolver=resolver)
+        with self.assertRaises(ConnectionRefusedError):
+            cache.create_connection(('down.test', self.port), timeout=5)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+
+class TestHTTPClientDNS(unittest.TestCase):
+    """HTTPClient使用DNS缓存的测试用例。"""
+
+    def setUp(self):
+        """启动HTTP服务器。"""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_reconnect_uses_cache(self):
+        """测试重新建立连接时不再解析主机名。"""
+        resolver = StaticResolver({'service.test': ['127.0.0.1']})
+        client = HTTPClient(base_url=f"http://service.test:{self.server.server_address[1]}",
+                            dns_cache=DNSCache(resolver=resolver))
+        self.addCleanup(client.close)
+        for _ in range(3):
+            self.assertEqual(client.get('/').status_code, 200)
+            client._pool.close_all()
+        self.assertEqual(resolver.calls, 1)
+
+    def test_default_cache_shared(self):
+        """测试客户端默认共享同一个DNS缓存。"""
+        first, second = HTTPClient(), HTTPClient()
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        self.assertIs(first.dns_cache, second.dns_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,332 @@
+"""
+HTTP/2传输的单元测试（需要安装h2）。
+"""
+
+import sys
+import os
+import io
+import json
+import socket
+import struct
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient
+from http_client.http2 import DEFAULT_URGENCY, h2, parse_urgency
+
+if h2 is not None:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+
+
+# 慢请求的处理时间（秒）
+SLOW_DELAY = 0.2
+
+# 大响应体的大小（字节），超过客户端每个流的接收窗口
+BIG_SIZE = 3 * 1024 * 1024
+
+# 大请求体的大小（字节），超过服务器的初始接收窗口65535
+UPLOAD_SIZE = 300 * 1024
+
+
+class _H2TestServer:
+    """
+    h2c测试服务器。每条连接一个线程，每个请求在单独的线程中响应。
+
+    /echo返回请求的方法、路径、头部和请求体长度；/slow延迟SLOW_DELAY后返回；
+    /big返回BIG_SIZE字节；/cookie设置两个Cookie；/goaway收到请求后立即发送GOAWAY
+    （last_stream_id为该请求的流），延迟SLOW_DELAY后返回请求体长度。
+    """
+
+    def __init__(self, max_streams: int = 100):
+        """
+        启动服务器。
+
+        Args:
+            max_streams: 每条连接允许的并发流数。
+        """
+        self.max_streams = max_streams
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.url = f"http://127.0.0.1:{self.listener.getsockname()[1]}"
+        self.connections = 0
+        self.arrivals = []
+        self.active = self.max_active = 0
+        self.lock = threading.Lock()
+        self.sockets = []
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        """接受连接。"""
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.connections += 1
+                self.sockets.append(sock)
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock):
+        """处理一条连接。"""
+        config = h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+        conn = h2.connection.H2Connection(config=config)
+        conn.local_settings = h2.settings.Settings(client=False, initial_values={
+            h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: self.max_streams})
+        lock = threading.Lock()
+        requests = {}
+        pending = {}
+
+        def flush():
+            for stream_id, view in list(pending.items()):
+                while view:
+                    size = min(conn.local_flow_control_window(stream_id),
+                               conn.max_outbound_frame_size, len(view))
+                    if size <= 0:
+                        break
+                    conn.send_data(stream_id, view[:size].tobytes())
+                    view = view[size:]
+                if view:
+                    pending[stream_id] = view
+                else:
+                    del pending[stream_id]
+                    conn.end_stream(stream_id)
+            sock.sendall(conn.data_to_send())
+
+        def respond(stream_id, headers, body):
+            path = headers[':path']
+            extra = []
+            if path.startswith('/slow'):
+                time.sleep(SLOW_DELAY)
+                payload = b'ok'
+            elif path.startswith('/goaway'):
+                time.sleep(SLOW_DELAY)
+                payload = str(len(body)).encode()
+            elif path.startswith('/big'):
+                payload = b'x' * BIG_SIZE
+            elif path.startswith('/cookie'):
+                payload = b''
+                extra = [('set-cookie', 'a=1; Path=/'), ('set-cookie', 'b=2; Path=/')]
+            else:
+                payload = json.dumps({'method': headers[':method'], 'path': path,
+                                      'headers': headers, 'length': len(body)}).encode()
+            with self.lock:
+                self.active -= 1
+            try:
+                with lock:
+                    conn.send_headers(stream_id, [(':status', '200'),
+                                                  ('content-length', str(len(payload)))] + extra)
+                    pending[stream_id] = memoryview(payload)
+                    flush()
+            except (OSError, h2.exceptions.ProtocolError):
+                pass
+
+        with lock:
+            conn.initiate_connection()
+            sock.sendall(conn.data_to_send())
+        try:
+            while True:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                with lock:
+                    for event in conn.receive_data(data):
+                        if isinstance(event, h2.events.RequestReceived):
+                            requests[event.stream_id] = (dict(event.headers), bytearray())
+                        elif isinstance(event, h2.events.DataReceived):
+                            requests[event.stream_id][1].extend(event.data)
+                            conn.acknowledge_received_data(event.flow_controlled_length,
+                                                           event.stream_id)
+                        elif isinstance(event, h2.events.StreamEnded):
+                            headers, body = requests.pop(event.stream_id)
+                            if headers[':path'].startswith('/goaway'):
+                                # 直接写入GOAWAY帧：h2发送GOAWAY后不允许再发送响应
+                                # 长度8、类型0x7、标志0、流0；last_stream_id、错误码NO_ERROR
+                                sock.sendall(struct.pack('>IBIII', 8 << 8 | 0x7, 0, 0,
+                                                         event.stream_id, 0))
+                            with self.lock:
+                                self.arrivals.append(headers[':path'])
+                                self.active += 1
+                                self.max_active = max(self.max_active, self.active)
+                            threading.Thread(target=respond, daemon=True,
+                                             args=(event.stream_id, headers, bytes(body))).start()
+                        elif isinstance(event, h2.events.WindowUpdated):
+                            flush()
+                        elif isinstance(event, h2.events.StreamReset):
+                            pending.pop(event.stream_id, None)
+                    sock.sendall(conn.data_to_send())
+        except (OSError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            sock.close()
+
+    def drop_connections(self):
+        """关闭所有已接受的连接。"""
+        with self.lock:
+            sockets, self.sockets = self.sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        """停止服务器。"""
+        self.listener.close()
+        self.drop_connections()
+
+
+class TestParseUrgency(unittest.TestCase):
+    """parse_urgency的测试用例。"""
+
+    def test_parse_urgency(self):
+        """测试解析Priority头部。"""
+        self.assertEqual(parse_urgency({'Priority': 'u=1, i'}), 1)
+        self.assertEqual(parse_urgency({'priority': 'i, u=0'}), 0)
+        self.assertEqual(parse_urgency({'Priority': 'u=9'}), 7)
+        self.assertEqual(parse_urgency({'Priority': 'i'}), DEFAULT_URGENCY)
+        self.assertEqual(parse_urgency({}), DEFAULT_URGENCY)
+
+    def test_missing_h2(self):
+        """测试没有安装h2时启用HTTP/2会抛出ImportError。"""
+        with patch('http_client.http2.h2', None):
+            with self.assertRaises(ImportError):
+                HTTPClient(http2=True)
+
+
+@unittest.skipIf(h2 is None, "需要安装h2")
+class TestHTTP2Client(unittest.TestCase):
+    """HTTPClient使用HTTP/2的测试用例。"""
+
+    def setUp(self):
+        """启动服务器和客户端。"""
+        self.server = _H2TestServer()
+        self.client = HTTPClient(base_url=self.server.url, http2=True, timeout=5)
+
+    def tearDown(self):
+        """关闭客户端和服务器。"""
+        self.client.close()
+        self.server.close()
+
+    def test_get_and_post(self):
+        """测试GET和POST请求，头部转为小写并去掉逐跳头部。"""
+        response = self.client.get('/echo', params={'q': '1'}, headers={'X-Test': 'yes',
+                                                                        'Connection': 'close'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['method'], data['path']), ('GET', '/echo?q=1'))
+        self.assertEqual(data['headers']['x-test'], 'yes')
+        self.assertNotIn('connection', data['headers'])
+
+        data = self.client.post('/echo', json_data={'name': 'value'}).json()
+        self.assertEqual(data['method'], 'POST')
+        self.assertEqual(data['length'], len(json.dumps({'name': 'value'})))
+        self.assertEqual(data['headers']['content-type'], 'application/json')
+        self.assertEqual(self.server.connections, 1)
+
+    def test_concurrent_requests_share_one_connection(self):
+        """测试并发请求在同一条连接上多路复用。"""
+        start = time.monotonic()
+        results = self.client.gather(['/slow'] * 20, concurrency=20, per_host=20)
+        elapsed = time.monotonic() - start
+        self.assertTrue(all(r.ok and r.response.status_code == 200 for r in results))
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.server.max_active, 20)
+        self.assertLess(elapsed, SLOW_DELAY * 5)
+
+    def test_flow_control(self):
+        """测试大请求体和大响应体按流量控制窗口传输。"""
+        data = self.client.post('/echo', data=b'x' * UPLOAD_SIZE).json()
+        self.assertEqual(data['length'], UPLOAD_SIZE)
+        data = self.client.put('/echo', data=io.BytesIO(b'y' * UPLOAD_SIZE)).json()
+        self.assertEqual(data['length'], UPLOAD_SIZE)
+        self.assertEqual(len(self.client.get('/big').content), BIG_SIZE)
+
+    def test_streaming_response(self):
+        """测试流式读取大响应体。"""
+        response = self.client.get('/big', stream=True)
+        with response['content'] as body:
+            total = sum(len(chunk) for chunk in body.iter_chunks(100000))
+        self.assertEqual(total, BIG_SIZE)
+        # 提前关闭的流不影响连接上的其他请求
+        self.client.get('/big', stream=True)['content'].close()
+        self.assertEqual(self.client.get('/echo').status_code, 200)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_set_cookies(self):
+        """测试多个Set-Cookie头部。"""
+        self.client.get('/cookie')
+        self.assertEqual(self.client.get_cookies('127.0.0.1'), {'a': '1', 'b': '2'})
+
+    def test_graceful_goaway(self):
+        """测试GOAWAY之前的流继续完成，其他线程的请求使用新连接，旧连接排空后关闭。"""
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            self.client.post('/goaway', data=b'x' * UPLOAD_SIZE)))
+        thread.start()
+        time.sleep(SLOW_DELAY / 2)
+        self.assertEqual(self.client.get('/echo').status_code, 200)
+        self.assertEqual(self.client._http2.draining, 1)
+        thread.join()
+        self.assertEqual((results[0].status_code, results[0].text),
+                         (200, str(UPLOAD_SIZE)))
+        self.assertEqual(self.server.connections, 2)
+        self.client._http2.remove_idle(60)
+        self.assertEqual(self.client._http2.draining, 0)
+
+    def test_reconnect_after_connection_closed(self):
+        """测试连接被服务器关闭后建立新连接。"""
+        self.assertEqual(self.client.get('/echo').status_code, 200)
+        self.server.drop_connections()
+        with patch('http_client.time.sleep'):
+            self.assertEqual(self.client.get('/echo').status_code, 200)
+        self.assertEqual(self.server.connections, 2)
+
+
+@unittest.skipIf(h2 is None, "需要安装h2")
+class TestHTTP2StreamLimit(unittest.TestCase):
+    """服务器限制并发流数时的测试用例。"""
+
+    def setUp(self):
+        """启动只允许一个并发流的服务器。"""
+        self.server = _H2TestServer(max_streams=1)
+        self.client = HTTPClient(base_url=self.server.url, http2=True, timeout=5)
+        # 先完成一个请求，确保客户端已收到服务器的SETTINGS
+        self.client.get('/echo')
+
+    def tearDown(self):
+        """关闭客户端和服务器。"""
+        self.client.close()
+        self.server.close()
+
+    def test_waiters_served_by_priority(self):
+        """测试并发流用尽时，等待的请求按Priority头部的优先级获得流。"""
+        threads = [threading.Thread(target=self.client.get, args=('/slow',))]
+        threads[0].start()
+        time.sleep(SLOW_DELAY / 4)
+        for path, priority in (('/echo/low', 'u=7'), ('/echo/normal', None),
+                               ('/echo/high', 'u=0')):
+            headers = {'Priority': priority} if priority else None
+            thread = threading.Thread(target=self.client.get, args=(path,),
+                                      kwargs={'headers': headers})
+            thread.start()
+            threads.append(thread)
+            time.sleep(SLOW_DELAY / 8)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.server.arrivals[1:],
+                         ['/slow', '/echo/high', '/echo/normal', '/echo/low'])
+        self.assertEqual(self.server.max_active, 1)
+        self.assertEqual(self.server.connections, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,8 @@ from unittest.mock import patch, Mock
 # 将父目录添加到路径中，以便我们可以导入http_client
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+from http.client import RemoteDisconnected
+
 from http_client import HTTPClient, HTTPException
 
 
@@ -93,6 +95,7 @@ class TestHTTPClient(unittest.TestCase):
         mock_response.read.return_value = b'{"test": "response"}'
         mock_response.status = 200
         mock_response.getheaders.return_value = [("Content-Type", "application/json")]
+        mock_response.msg.get_all.return_value = None
         
         # 模拟连接
         mock_conn = Mock()
@@ -123,6 +126,7 @@ class TestHTTPClient(unittest.TestCase):
         mock_response.read.return_value = b'{"result": "created"}'
         mock_response.status = 201
         mock_response.getheaders.return_value = [("Content-Type", "application/json")]
+        mock_response.msg.get_all.return_value = None
         
         # 模拟连接
         mock_conn = Mock()
@@ -152,6 +156,7 @@ class TestHTTPClient(unittest.TestCase):
         mock_response.read.return_value = b'{"result": "updated"}'
         mock_response.status = 200
         mock_response.getheaders.return_value = [("Content-Type", "application/json")]
+        mock_response.msg.get_all.return_value = None
         
         # 模拟连接
         mock_conn = Mock()
@@ -178,6 +183,7 @@ class TestHTTPClient(unittest.TestCase):
         mock_response.read.return_value = b'{"result": "deleted"}'
         mock_response.status = 200
         mock_response.getheaders.return_value = [("Content-Type", "application/json")]
+        mock_response.msg.get_all.return_value = None
         
         # 模拟连接
         mock_conn = Mock()
@@ -219,6 +225,69 @@ class TestHTTPClient(unittest.TestCase):
             self.client._get_connection = original_get_connection
             self.client._return_connection = original_return_connection
 
+    def _mock_response(self, body=b'{}', status=200):
+        """构造一个模拟响应。"""
+        mock_response = Mock()
+        mock_response.read.return_value = body
+        mock_response.status = status
+        mock_response.getheaders.return_value = [("Content-Type", "application/json")]
+        mock_response.msg.get_all.return_value = None
+        return mock_response
+
+    def test_stale_connection_retried_for_idempotent_method(self):
+        """测试复用的连接失效时幂等请求在新连接上重试一次。"""
+        stale_conn = Mock()
+        stale_conn.sock = Mock()  # 模拟复用的连接
+        stale_conn.request.side_effect = RemoteDisconnected("closed")
+        fresh_conn = Mock()
+        fresh_conn.sock = None
+        fresh_conn.getresponse.return_value = self._mock_response(b'{"ok": true}')
+        
+        self.client._get_connection = Mock(side_effect=[stale_conn, fresh_conn])
+        self.client._return_connection = Mock()
+        self.client.max_retries = 0
+        
+        result = self.client.get("https://example.com/test")
+        
+        self.assertEqual(result['content'], {"ok": True})
+        self.assertEqual(self.client._get_connection.call_count, 2)
+        stale_conn.close.assert_called_once()
+
+    def test_stale_connection_not_retried_for_post(self):
+        """测试复用的连接失效时非幂等请求不会被重发。"""
+        stale_conn = Mock()
+        stale_conn.sock = Mock()
+        stale_conn.request.side_effect = RemoteDisconnected("closed")
+        
+        self.client._get_connection = Mock(return_value=stale_conn)
+        self.client.max_retries = 0
+        
+        with self.assertRaises(HTTPException):
+            self.client.post("https://example.com/test", data="payload")
+        self.assertEqual(self.client._get_connection.call_count, 1)
+
+    def test_all_set_cookie_headers_processed(self):
+        """测试处理全部Set-Cookie头部，Expires中的逗号不会拆分Cookie，过期的Cookie被删除。"""
+        self.client.set_cookie("example.com", "/", "old", "1")
+        mock_response = self._mock_response()
+        mock_response.msg.get_all.return_value = [
+            "sid=abc; Expires=Wed, 21 Oct 2037 07:28:00 GMT; Path=/",
+            "theme=dark; Max-Age=3600; Path=/",
+            "old=; Max-Age=0; Path=/",
+        ]
+        mock_conn = Mock()
+        mock_conn.sock = None
+        mock_conn.getresponse.return_value = mock_response
+        self.client._get_connection = Mock(return_value=mock_conn)
+        self.client._return_connection = Mock()
+
+        self.client.get("https://example.com/login")
+
+        mock_response.msg.get_all.assert_called_with('Set-Cookie')
+        self.assertEqual(self.client.get_cookies("example.com"), {"sid": "abc", "theme": "dark"})
+        # 未指定Domain属性的Cookie只发送给设置它的主机
+        self.assertEqual(self.client.get_cookies("api.example.com"), {})
+
     def test_url_error_handling(self):
         """测试URL错误处理。"""
         # 模拟URL错误，通过模拟_make_request方法
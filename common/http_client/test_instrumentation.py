@@ -0,0 +1,184 @@
+"""
+事件钩子和指标收集器的单元测试。
+"""
+
+import sys
+import os
+import socket
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import (ConnectionEvent, HTTPClient, HTTPException, Histogram, Hooks,
+                         MetricsCollector, RequestEvent, RetryEvent, RetryPolicy)
+
+# 响应体
+BODY = b'{"ok": true}'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回BODY的处理器，/flaky的前failures次请求返回503。"""
+
+    protocol_version = 'HTTP/1.1'
+    failures = 0
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def _respond(self):
+        """读取请求体并返回响应。"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        status = 200
+        if self.path == '/flaky' and _Handler.failures > 0:
+            _Handler.failures -= 1
+            status = 503
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    do_GET = do_POST = _respond
+
+
+class TestHooks(unittest.TestCase):
+    """Hooks和Histogram的测试用例。"""
+
+    def test_add_remove(self):
+        """测试注册、触发和移除钩子，未知事件抛出ValueError。"""
+        hooks = Hooks()
+        events = []
+        hooks.add('request', events.append)
+        Hooks.emit(hooks.request, 1)
+        hooks.remove('request', events.append)
+        Hooks.emit(hooks.request, 2)
+        self.assertEqual(events, [1])
+        self.assertEqual(hooks.request, [])
+        with self.assertRaises(ValueError):
+            hooks.add('response', events.append)
+
+    def test_histogram(self):
+        """测试直方图按上界分桶并估算分位数。"""
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [2, 3, 4])
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 4)
+        self.assertAlmostEqual(snapshot['sum'], 5.65)
+        self.assertEqual(snapshot['buckets'], {'0.1': 2, '1.0': 3, '+Inf': 4})
+
+
+class TestHTTPClientInstrumentation(unittest.TestCase):
+    """HTTPClient触发事件和MetricsCollector的测试用例。"""
+
+    def setUp(self):
+        """启动服务器和客户端。"""
+        _Handler.failures = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.port = self.server.server_address[1]
+        self.host = f"http://127.0.0.1:{self.port}"
+        self.client = HTTPClient(base_url=self.host,
+                                 retry_policy=RetryPolicy(backoff_base=0.01, budget=None))
+        self.addCleanup(self.client.close)
+
+    def test_no_hooks_no_tracing(self):
+        """测试没有钩子时新连接不记录耗时。"""
+        self.client.get('/')
+        conn = next(iter(self.client._pool._hosts.values())).idle[0].conn
+        self.assertFalse(hasattr(conn, 'timings'))
+
+    def test_events(self):
+        """测试connection和request事件的内容。"""
+        events = []
+        self.client.add_hook('connection', events.append)
+        self.client.add_hook('request', events.append)
+        self.client.post('/', data=b'12345')
+        self.client.get('/')
+        connection, request, reused, _ = events
+        self.assertIsInstance(connection, ConnectionEvent)
+        self.assertFalse(connection.reused)
+        self.assertTrue(reused.reused)
+        self.assertIsInstance(request, RequestEvent)
+        self.assertEqual((request.method, request.host, request.status_code, request.protocol),
+                         ('POST', self.host, 200, 'HTTP/1.1'))
+        self.assertEqual((request.bytes_sent, request.bytes_received), (5, len(BODY)))
+        self.assertFalse(request.reused)
+        self.assertIsNotNone(request.dns)
+        self.assertIsNotNone(request.connect)
+        self.assertIsNone(request.tls)
+        self.assertGreaterEqual(request.duration, request.ttfb)
+        self.assertIsNone(events[3].dns)
+
+    def test_retry_event(self):
+        """测试重试前触发retry事件，每次尝试都触发request事件。"""
+        _Handler.failures = 2
+        retries, requests = [], []
+        self.client.add_hook('retry', retries.append)
+        self.client.add_hook('request', requests.append)
+        self.assertEqual(self.client.get('/flaky').status_code, 200)
+        self.assertEqual([event.attempt for event in retries], [1, 2])
+        self.assertIsInstance(retries[0], RetryEvent)
+        self.assertEqual(retries[0].status_code, 503)
+        self.assertEqual([event.status_code for event in requests], [503, 503, 200])
+        self.assertEqual([event.attempt for event in requests], [0, 1, 2])
+
+    def test_error_event(self):
+        """测试连接失败时request事件带有异常。"""
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        client = HTTPClient(max_retries=0)
+        self.addCleanup(client.close)
+        events = []
+        client.add_hook('request', events.append)
+        with self.assertRaises(HTTPException):
+            client.get(f"http://127.0.0.1:{port}/")
+        self.assertEqual(len(events), 1)
+        self.assertIsNone(events[0].status_code)
+        self.assertIsNotNone(events[0].error)
+
+    def test_metrics_collector(self):
+        """测试收集器的快照和Prometheus导出，移除后不再收集。"""
+        _Handler.failures = 1
+        collector = MetricsCollector().attach(self.client)
+        self.client.get('/flaky')
+        self.client.get('/')
+        metrics = collector.snapshot()[self.host]
+        self.assertEqual(metrics['requests'], 3)
+        self.assertEqual(metrics['retries'], 1)
+        self.assertEqual(metrics['statuses'], {'2xx': 2, '5xx': 1})
+        self.assertEqual(metrics['connections_created'], 1)
+        self.assertEqual(metrics['connections_reused'], 2)
+        self.assertAlmostEqual(metrics['pool_hit_rate'], 0.6667)
+        self.assertEqual(metrics['bytes_received'], 3 * len(BODY))
+        self.assertEqual(metrics['histograms']['duration']['count'], 3)
+        self.assertEqual(metrics['histograms']['connect']['count'], 1)
+        self.assertEqual(metrics['histograms']['ttfb']['count'], 3)
+
+        text = collector.prometheus()
+        self.assertIn('# TYPE http_client_requests_total counter', text)
+        self.assertIn(f'http_client_requests_total{{host="{self.host}"}} 3', text)
+        self.assertIn(f'http_client_responses_total{{host="{self.host}",status="5xx"}} 1', text)
+        self.assertIn(f'http_client_duration_seconds_bucket{{host="{self.host}",le="+Inf"}} 3',
+                      text)
+
+        collector.detach(self.client)
+        self.client.get('/')
+        self.assertEqual(collector.snapshot()[self.host]['requests'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -46,8 +46,7 @@ def test_multi_domain_support():
         print(f"  请求URL: {response['content']['url']}")
         
         print("\n=== 连接池状态 ===")
-        print(f"连接计数: {client._connection_count}")
-        print(f"连接池大小: {len(client._connection_pool)}")
+        print(f"连接池状态: {client._pool.stats()}")
         
     except Exception as e:
         print(f"错误: {e}")
@@ -73,10 +72,10 @@ def test_connection_pooling_across_domains():
             response = client.get(domain_url, params={"request": i})
             print(f"  状态码: {response['status_code']}")
             
-        print(f"\n连接计数: {client._connection_count}")
-        print(f"连接池大小: {len(client._connection_pool)}")
-        for key, connections in client._connection_pool.items():
-            print(f"  {key}: {len(connections)} 个连接")
+        pool_stats = client._pool.stats()
+        print(f"\n连接池大小: {len(pool_stats)}")
+        for key, stats in pool_stats.items():
+            print(f"  {key}: {stats['idle']} 个空闲连接, 共 {stats['total']} 个连接")
             
     except Exception as e:
         print(f"错误: {e}")
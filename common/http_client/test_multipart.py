@@ -0,0 +1,168 @@
+"""
+multipart/form-data编码的单元测试。
+"""
+
+import sys
+import os
+import io
+import socket
+import tempfile
+import threading
+import unittest
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient, MultipartEncoder, RetryPolicy
+
+
+def parse(content_type: str, body: bytes) -> dict:
+    """
+    解析multipart请求体。
+
+    Returns:
+        字段名到(文件名, 内容类型, 数据)的映射。
+    """
+    message = BytesParser(policy=HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode() + body)
+    return {part.get_param('name', header='content-disposition'):
+            (part.get_filename(), part.get_content_type(), part.get_payload(decode=True))
+            for part in message.iter_parts()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """记录请求头部和请求体的处理器，前failures次请求返回503。"""
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+    failures = 0
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_POST(self):
+        """记录请求并返回空响应。"""
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.requests.append((dict(self.headers), body))
+        status = 200
+        if _Handler.failures:
+            _Handler.failures -= 1
+            status = 503
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_PUT = do_POST
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    """MultipartEncoder的测试用例。"""
+
+    def setUp(self):
+        """创建临时文件。"""
+        handle, self.path = tempfile.mkstemp(suffix='.png')
+        self.data = os.urandom(300 * 1024) + b'\r\n--tail'
+        with os.fdopen(handle, 'wb') as f:
+            f.write(self.data)
+        self.addCleanup(os.remove, self.path)
+
+    def _encoder(self, fileobj) -> MultipartEncoder:
+        """包含普通字段、内存文件和磁盘文件的编码器。"""
+        return MultipartEncoder(
+            fields={'title': '标题', 'raw': memoryview(b'abc')},
+            files=[('image', fileobj), ('note', ('a.txt', b'hello', 'text/plain'))],
+            boundary='test-boundary')
+
+    def test_encode(self):
+        """测试编码结果可以被解析，长度与实际字节数一致。"""
+        with open(self.path, 'rb') as f:
+            encoder = self._encoder(f)
+            body = b''.join(encoder)
+        self.assertEqual(len(encoder), len(body))
+        self.assertEqual(encoder.content_type, 'multipart/form-data; boundary=test-boundary')
+        parts = parse(encoder.content_type, body)
+        self.assertEqual(parts['title'][2].decode('utf-8'), '标题')
+        self.assertEqual(parts['raw'][2], b'abc')
+        self.assertEqual(parts['image'], (os.path.basename(self.path), 'image/png', self.data))
+        self.assertEqual(parts['note'], ('a.txt', 'text/plain', b'hello'))
+
+    def test_replay_from_offset(self):
+        """测试文件部分从构造时的位置开始，重复迭代得到相同的结果。"""
+        with open(self.path, 'rb') as f:
+            f.seek(100)
+            encoder = MultipartEncoder(files={'image': f})
+            first = b''.join(encoder)
+            self.assertEqual(first, b''.join(encoder))
+        self.assertEqual(parse(encoder.content_type, first)['image'][2], self.data[100:])
+
+    def test_send_uses_sendfile(self):
+        """测试send()通过套接字发送（磁盘文件使用sendfile），结果与迭代一致。"""
+        left, right = socket.socketpair()
+        self.addCleanup(left.close)
+        self.addCleanup(right.close)
+        with open(self.path, 'rb') as f:
+            encoder = MultipartEncoder(fields={'a': 'b'}, files={'image': f,
+                                                                 'mem': io.BytesIO(b'xyz')})
+            received = []
+            reader = threading.Thread(target=lambda: received.append(
+                b''.join(iter(lambda: right.recv(65536), b''))))
+            reader.start()
+            self.assertEqual(encoder.send(left), len(encoder))
+            left.shutdown(socket.SHUT_WR)
+            reader.join()
+            self.assertEqual(received[0], b''.join(encoder))
+
+    def test_unseekable_file_rejected(self):
+        """测试不能定位的文件对象无法预先计算长度。"""
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd, 'rb') as reader, os.fdopen(write_fd, 'wb'):
+            with self.assertRaises(ValueError):
+                MultipartEncoder(files={'pipe': reader})
+
+
+class TestHTTPClientMultipart(unittest.TestCase):
+    """HTTPClient上传multipart请求体的测试用例。"""
+
+    def setUp(self):
+        """启动服务器和客户端，创建临时文件。"""
+        _Handler.requests = []
+        _Handler.failures = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = HTTPClient(base_url=f"http://127.0.0.1:{self.server.server_address[1]}",
+                                 retry_policy=RetryPolicy(backoff_base=0, budget=None))
+        self.addCleanup(self.client.close)
+        self.file = tempfile.TemporaryFile()
+        self.file.write(b'0123456789' * 10000)
+        self.file.seek(0)
+        self.addCleanup(self.file.close)
+
+    def test_upload(self):
+        """测试上传带有Content-Length而不是分块编码，服务器收到完整的文件。"""
+        encoder = MultipartEncoder(fields={'k': 'v'}, files={'f': ('data.bin', self.file)})
+        self.assertEqual(self.client.post('/upload', data=encoder).status_code, 200)
+        headers, body = _Handler.requests[0]
+        self.assertEqual(int(headers['Content-Length']), len(encoder))
+        self.assertNotIn('Transfer-Encoding', headers)
+        parts = parse(headers['Content-Type'], body)
+        self.assertEqual(parts['f'][2], b'0123456789' * 10000)
+        self.assertEqual(parts['k'][2], b'v')
+
+    def test_retry_resends_body(self):
+        """测试重试时重新发送完整的请求体。"""
+        _Handler.failures = 1
+        encoder = MultipartEncoder(files={'f': self.file})
+        self.assertEqual(self.client.put('/upload', data=encoder).status_code, 200)
+        self.assertEqual(len(_Handler.requests), 2)
+        self.assertEqual(_Handler.requests[0][1], _Handler.requests[1][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,311 @@
+"""
+熔断器和自适应并发限制器的单元测试。
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import (AIMDLimiter, CircuitBreaker, CircuitOpenError, HTTPClient,
+                         HTTPException)
+from http_client.overload import CLOSED, HALF_OPEN, OPEN, is_failure_status
+
+
+# 测试中使用的主机键
+KEY = ('http', 'example.com', None)
+
+# 慢请求的处理时间（秒）
+SLOW_DELAY = 0.1
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """CircuitBreaker的测试用例。"""
+
+    def setUp(self):
+        """设置测试夹具。"""
+        patcher = patch('http_client.overload.time.monotonic', return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+
+    def _fail(self, times):
+        """报告times次失败。"""
+        for _ in range(times):
+            self.breaker.record(KEY, True, self.breaker.before_request(KEY))
+
+    def test_opens_after_consecutive_failures(self):
+        """测试连续失败达到阈值后打开，成功会重置失败计数。"""
+        self._fail(2)
+        self.breaker.record(KEY, False)
+        self._fail(2)
+        self.assertEqual(self.breaker.state(KEY), CLOSED)
+        self._fail(1)
+        self.assertEqual(self.breaker.state(KEY), OPEN)
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.before_request(KEY)
+        self.assertEqual(context.exception.retry_after, 10)
+        # 其他主机不受影响
+        self.assertFalse(self.breaker.before_request(('http', 'other', None)))
+
+    def test_half_open_probe_success_closes(self):
+        """测试恢复时间后只放行一个探测请求，探测成功后关闭。"""
+        self._fail(3)
+        self.clock.return_value = 1010.0
+        probe = self.breaker.before_request(KEY)
+        self.assertTrue(probe)
+        self.assertEqual(self.breaker.state(KEY), HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(KEY)
+        self.breaker.record(KEY, False, probe)
+        self.assertEqual(self.breaker.state(KEY), CLOSED)
+        self.assertFalse(self.breaker.before_request(KEY))
+
+    def test_half_open_probe_failure_reopens(self):
+        """测试探测失败后重新打开。"""
+        self._fail(3)
+        self.clock.return_value = 1010.0
+        self.breaker.record(KEY, True, self.breaker.before_request(KEY))
+        self.assertEqual(self.breaker.state(KEY), OPEN)
+        snapshot = self.breaker.snapshot()[KEY]
+        self.assertEqual((snapshot['opened'], snapshot['rejected']), (2, 0))
+
+    def test_unsent_probe_releases_slot(self):
+        """测试没有发出的探测请求只释放名额，不改变状态。"""
+        self._fail(3)
+        self.clock.return_value = 1010.0
+        self.breaker.record(KEY, None, self.breaker.before_request(KEY))
+        self.assertEqual(self.breaker.state(KEY), HALF_OPEN)
+        self.assertTrue(self.breaker.before_request(KEY))
+
+    def test_reset_during_probe(self):
+        """测试探测请求进行中重置熔断器，旧的探测请求不会使计数变为负数。"""
+        self._fail(3)
+        self.clock.return_value = 1010.0
+        probe = self.breaker.before_request(KEY)
+        self.breaker.reset(KEY)
+        self.breaker.record(KEY, False, probe)
+        self._fail(3)
+        self.assertEqual(self.breaker.state(KEY), OPEN)
+        self.clock.return_value = 1020.0
+        # 新的半开阶段仍然只放行一个探测请求
+        self.assertTrue(self.breaker.before_request(KEY))
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request(KEY)
+        # 旧的探测请求失败按普通请求处理，不会重新打开新的半开阶段
+        self.breaker.record(KEY, True, probe)
+        self.assertEqual(self.breaker.state(KEY), HALF_OPEN)
+
+    def test_failure_statuses(self):
+        """测试5xx和429视为失败。"""
+        self.assertTrue(is_failure_status(503))
+        self.assertTrue(is_failure_status(429))
+        self.assertFalse(is_failure_status(404))
+        self.assertFalse(is_failure_status(200))
+
+
+class TestAIMDLimiter(unittest.TestCase):
+    """AIMDLimiter的测试用例。"""
+
+    def test_multiplicative_decrease_once_per_round(self):
+        """测试失败时按比例缩小上限，同一批开始的请求只缩小一次。"""
+        limiter = AIMDLimiter(max_limit=10, backoff_ratio=0.5)
+        starts = [limiter.acquire(KEY) for _ in range(4)]
+        for started in starts:
+            limiter.release(KEY, started, True)
+        self.assertEqual(limiter.limit(KEY), 5)
+        limiter.release(KEY, limiter.acquire(KEY), True)
+        self.assertEqual(limiter.limit(KEY), 2)
+        # 不低于min_limit
+        for _ in range(5):
+            limiter.release(KEY, limiter.acquire(KEY), True)
+        self.assertEqual(limiter.limit(KEY), 1)
+
+    def test_additive_increase(self):
+        """测试并发保持在上限附近时每完成一轮请求上限增加1，且不超过max_limit。"""
+        limiter = AIMDLimiter(max_limit=4, initial_limit=2)
+        inflight = [limiter.acquire(KEY) for _ in range(2)]
+        # 每完成一个请求立即开始下一个，始终占满当前上限
+        for _ in range(5):
+            limiter.release(KEY, inflight.pop(0), False)
+            inflight.append(limiter.acquire(KEY))
+        self.assertEqual(limiter.limit(KEY), 3)
+        for _ in range(50):
+            limiter.release(KEY, inflight.pop(0), False)
+            while len(inflight) < limiter.limit(KEY):
+                inflight.append(limiter.acquire(KEY))
+        self.assertEqual(limiter.limit(KEY), 4)
+
+    def test_idle_does_not_increase(self):
+        """测试并发远低于上限时不增加上限。"""
+        limiter = AIMDLimiter(max_limit=10, initial_limit=4)
+        for _ in range(20):
+            limiter.release(KEY, limiter.acquire(KEY), False)
+        self.assertEqual(limiter.limit(KEY), 4)
+
+    def test_latency_increase_shrinks_limit(self):
+        """测试延迟明显升高时缩小上限。"""
+        limiter = AIMDLimiter(max_limit=10)
+        with patch('http_client.overload.time.monotonic') as clock:
+            now = 0.0
+            for latency in [0.01] * 50 + [0.2] * 20:
+                clock.return_value = now
+                started = limiter.acquire(KEY)
+                now += latency
+                clock.return_value = now
+                limiter.release(KEY, started, False)
+        self.assertLess(limiter.limit(KEY), 10)
+        self.assertGreater(limiter.snapshot()[KEY]['decreases'], 0)
+
+    def test_blocks_at_limit(self):
+        """测试达到上限时等待，超时抛出异常，名额释放后继续。"""
+        limiter = AIMDLimiter(max_limit=1)
+        started = limiter.acquire(KEY)
+        with self.assertRaises(HTTPException):
+            limiter.acquire(KEY, timeout=0.05)
+
+        acquired = threading.Event()
+
+        def waiter():
+            limiter.acquire(KEY)
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+        limiter.release(KEY, started, False)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+        self.assertEqual(limiter.snapshot()[KEY]['inflight'], 1)
+
+    def test_invalid_limits(self):
+        """测试无效的参数。"""
+        with self.assertRaises(ValueError):
+            AIMDLimiter(max_limit=1, min_limit=2)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """/fail返回503，/slow延迟返回，/body返回响应体，同时记录请求数和最大并发数。"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """处理GET请求。"""
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(SLOW_DELAY)
+            body = b'hello' if self.path.startswith('/body') else b''
+            self.send_response(503 if self.path.startswith('/fail') else 200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+class TestHTTPClientOverload(unittest.TestCase):
+    """HTTPClient使用熔断器和并发限制器的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动本地服务器。"""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭本地服务器。"""
+        cls.server.shutdown()
+
+    def setUp(self):
+        """重置服务器计数。"""
+        self.server.hits = self.server.active = self.server.max_active = 0
+
+    def test_breaker_stops_requests(self):
+        """测试连续失败后熔断器打开，之后的请求不会发送到服务器。"""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        client = HTTPClient(base_url=self.url, max_retries=0, circuit_breaker=breaker)
+        try:
+            for _ in range(3):
+                self.assertEqual(client.get('/fail').status_code, 503)
+            with self.assertRaises(CircuitOpenError):
+                client.get('/fail')
+            self.assertEqual(self.server.hits, 3)
+            key = ('http', '127.0.0.1', self.server.server_address[1])
+            self.assertEqual(breaker.state(key), OPEN)
+        finally:
+            client.close()
+
+    def test_open_circuit_not_retried(self):
+        """测试熔断器打开后不会重试。"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        client = HTTPClient(base_url=self.url, max_retries=3, circuit_breaker=breaker)
+        try:
+            with patch('http_client.time.sleep') as sleep:
+                with self.assertRaises(CircuitOpenError):
+                    client.get('/fail')
+            # 第一次503后重试一次，随即被熔断器拒绝
+            self.assertEqual(self.server.hits, 1)
+            self.assertEqual(sleep.call_count, 1)
+        finally:
+            client.close()
+
+    def test_limiter_bounds_inflight_requests(self):
+        """测试并发限制器限制同时发送到同一主机的请求数。"""
+        client = HTTPClient(base_url=self.url, max_retries=0,
+                            concurrency_limiter=AIMDLimiter(max_limit=3))
+        try:
+            results = client.gather(['/slow'] * 12, concurrency=12, per_host=12)
+            self.assertTrue(all(r.ok for r in results))
+            self.assertLessEqual(self.server.max_active, 3)
+        finally:
+            client.close()
+
+    def test_stream_holds_slot_until_closed(self):
+        """测试流式响应在响应体读完或关闭前一直占用并发名额，结束后才报告熔断器。"""
+        limiter = AIMDLimiter(max_limit=1)
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        client = HTTPClient(base_url=self.url, max_retries=0, timeout=0.2,
+                            concurrency_limiter=limiter, circuit_breaker=breaker)
+        key = ('http', '127.0.0.1', self.server.server_address[1])
+        try:
+            response = client.get('/body', stream=True)
+            self.assertEqual(limiter.snapshot()[key]['inflight'], 1)
+            # 名额被流式响应占用，另一个请求等待超时
+            with self.assertRaises(HTTPException):
+                client.get('/body')
+            self.assertEqual(response.content.read(), b'hello')
+            self.assertEqual(limiter.snapshot()[key]['inflight'], 0)
+            self.assertEqual(client.get('/body').text, 'hello')
+            # 关闭未读完的503流式响应时才记录失败
+            response = client.get('/fail', stream=True)
+            self.assertEqual(breaker.state(key), CLOSED)
+            response.content.close()
+            self.assertEqual(breaker.state(key), OPEN)
+            self.assertEqual(limiter.snapshot()[key]['inflight'], 0)
+        finally:
+            client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+连接池的单元测试。
+"""
+
+import sys
+import os
+import socket
+import threading
+import unittest
+from unittest.mock import Mock
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client.pool import ConnectionPool, PooledConnection
+
+
+KEY = ('http', 'example.com', None)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """ConnectionPool类的测试用例。"""
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.pool = ConnectionPool(max_connections=2, connection_ttl=300)
+
+    def tearDown(self):
+        """清理测试夹具。"""
+        self.pool.close_all()
+
+    def test_checkout_creates_wrapped_connection(self):
+        """测试没有空闲连接时创建新连接。"""
+        raw = Mock()
+        conn = self.pool.checkout(KEY, lambda: raw)
+        self.assertIsInstance(conn, PooledConnection)
+        self.assertIs(conn.conn, raw)
+        self.assertEqual(conn.key, KEY)
+        self.assertEqual(self.pool.stats()[KEY], {'idle': 0, 'total': 1})
+
+    def test_checkin_and_reuse(self):
+        """测试归还的连接会被优先复用。"""
+        first = self.pool.checkout(KEY, Mock)
+        self.pool.checkin(first)
+        self.assertEqual(self.pool.stats()[KEY], {'idle': 1, 'total': 1})
+
+        factory = Mock()
+        again = self.pool.checkout(KEY, factory)
+        self.assertIs(again, first)
+        factory.assert_not_called()
+
+    def test_checkin_evicts_oldest_when_full(self):
+        """测试空闲队列已满时淘汰最久未使用的连接。"""
+        conns = [self.pool.checkout(KEY, Mock) for _ in range(3)]
+        for conn in conns:
+            self.pool.checkin(conn)
+        self.assertTrue(conns[0].closed)
+        conns[0].conn.close.assert_called_once()
+        self.assertEqual(self.pool.stats()[KEY], {'idle': 2, 'total': 2})
+
+    def test_expired_connection_not_reused(self):
+        """测试过期的空闲连接在借出时被关闭。"""
+        conn = self.pool.checkout(KEY, Mock)
+        self.pool.checkin(conn)
+        conn.created_at -= 301
+        again = self.pool.checkout(KEY, Mock)
+        self.assertIsNot(again, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.stats()[KEY], {'idle': 0, 'total': 1})
+
+    def test_idle_connection_not_reused(self):
+        """测试空闲过久的连接在借出时被关闭。"""
+        conn = self.pool.checkout(KEY, Mock)
+        self.pool.checkin(conn)
+        conn.last_used -= self.pool.idle_timeout
+        again = self.pool.checkout(KEY, Mock)
+        self.assertIsNot(again, conn)
+        self.assertTrue(conn.closed)
+
+    def test_discard(self):
+        """测试丢弃连接会更新计数并关闭连接。"""
+        conn = self.pool.checkout(KEY, Mock)
+        self.pool.discard(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.stats()[KEY], {'idle': 0, 'total': 0})
+
+    def test_factory_error_does_not_leak_count(self):
+        """测试创建连接失败时不计入连接数。"""
+        with self.assertRaises(OSError):
+            self.pool.checkout(KEY, Mock(side_effect=OSError("refused")))
+        self.assertEqual(self.pool.stats()[KEY]['total'], 0)
+
+    def test_remove_expired(self):
+        """测试清理过期连接并移除空的主机条目。"""
+        conn = self.pool.checkout(KEY, Mock)
+        self.pool.checkin(conn)
+        conn.created_at -= 301
+        self.assertEqual(self.pool.remove_expired(), 1)
+        self.assertTrue(conn.closed)
+        self.assertNotIn(KEY, self.pool.stats())
+
+    def test_checkin_after_close_all(self):
+        """测试连接池关闭后归还的连接会被直接关闭。"""
+        conn = self.pool.checkout(KEY, Mock)
+        self.pool.close_all()
+        self.pool.checkin(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(self.pool.stats(), {})
+
+    def test_concurrent_checkout_checkin(self):
+        """测试多线程并发借出和归还后计数保持一致。"""
+        pool = ConnectionPool(max_connections=4, connection_ttl=300)
+        errors = []
+
+        def worker():
+            try:
+                for i in range(500):
+                    conn = pool.checkout(KEY, Mock)
+                    if i % 50 == 0:
+                        pool.discard(conn)
+                    else:
+                        pool.checkin(conn)
+                    if i % 100 == 0:
+                        pool.remove_expired()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        stats = pool.stats()[KEY]
+        self.assertEqual(stats['idle'], stats['total'])
+        self.assertLessEqual(stats['idle'], 4)
+        pool.close_all()
+
+
+class TestPooledConnectionLiveness(unittest.TestCase):
+    """PooledConnection.is_alive的测试用例。"""
+
+    def setUp(self):
+        """创建一对相连的套接字。"""
+        self.local, self.remote = socket.socketpair()
+        self.conn = PooledConnection(Mock(sock=self.local), KEY)
+
+    def tearDown(self):
+        """关闭套接字。"""
+        self.local.close()
+        self.remote.close()
+
+    def test_unconnected_is_alive(self):
+        """测试尚未建立套接字的连接视为可用。"""
+        self.assertTrue(PooledConnection(Mock(sock=None), KEY).is_alive())
+
+    def test_idle_socket_is_alive(self):
+        """测试没有可读数据的空闲连接可用。"""
+        self.assertTrue(self.conn.is_alive())
+
+    def test_peer_closed_is_not_alive(self):
+        """测试对端关闭后连接不可用。"""
+        self.remote.close()
+        self.assertFalse(self.conn.is_alive())
+
+    def test_unexpected_data_is_not_alive(self):
+        """测试空闲连接上出现多余数据时不可用。"""
+        self.remote.sendall(b"HTTP/1.1 408 Request Timeout\r\n\r\n")
+        self.assertFalse(self.conn.is_alive())
+
+    def test_closed_socket_is_not_alive(self):
+        """测试本地已关闭的套接字不可用。"""
+        self.local.close()
+        self.assertFalse(self.conn.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
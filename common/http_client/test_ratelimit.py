@@ -0,0 +1,243 @@
+"""
+令牌桶限流器的单元测试。
+"""
+
+import sys
+import os
+import asyncio
+import fcntl
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import (AsyncHTTPClient, HTTPClient, RateLimit, RateLimitExceeded,
+                         RateLimiter, SharedFileBackend)
+from http_client.ratelimit import take_token
+
+
+def _acquire_in_process(path: str, count: int, results):
+    """子进程：非阻塞地取count次令牌，记录成功次数。"""
+    backend = SharedFileBackend(path)
+    results.put(sum(backend.try_acquire('shared', 0.001, 5) == 0 for _ in range(count)))
+    backend.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回空响应并记录请求数的处理器。"""
+
+    protocol_version = 'HTTP/1.1'
+    count = 0
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """返回空响应。"""
+        _Handler.count += 1
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class TestTokenBucket(unittest.TestCase):
+    """令牌桶计算和规则匹配的测试用例。"""
+
+    def test_take_token(self):
+        """测试新桶是满的，按时间补充，不足时返回等待时间。"""
+        self.assertEqual(take_token(0, 0, 100, 2, 4, 1), (3, 0))
+        self.assertEqual(take_token(0.5, 100, 100.25, 2, 4, 1), (0, 0))
+        tokens, wait = take_token(0, 100, 100.25, 2, 4, 1)
+        self.assertEqual((tokens, wait), (0.5, 0.25))
+        self.assertEqual(take_token(1, 100, 200, 2, 4, 1), (3, 0))
+
+    def test_match(self):
+        """测试URL前缀优先（最长匹配），其次是主机名，最后是按主机的默认规则。"""
+        limiter = RateLimiter({
+            'api.example.com': RateLimit(10),
+            'https://api.example.com/send/': RateLimit(1),
+            'https://api.example.com/send/bulk': RateLimit(0.1),
+        }, default=RateLimit(100))
+        self.assertEqual(limiter.match('https://api.example.com/send/bulk?x=1')[0],
+                         'https://api.example.com/send/bulk')
+        self.assertEqual(limiter.match('https://api.example.com/send/one')[0],
+                         'https://api.example.com/send/')
+        self.assertEqual(limiter.match('http://API.example.com/other'),
+                         ('api.example.com', RateLimit(10)))
+        self.assertEqual(limiter.match('https://other.com/'), ('other.com', RateLimit(100)))
+        self.assertIsNone(RateLimiter({'a.com': RateLimit(1)}).match('https://b.com/'))
+
+    def test_per_minute(self):
+        """测试按每分钟次数创建规则和默认容量。"""
+        limit = RateLimit.per_minute(600)
+        self.assertAlmostEqual(limit.rate, 10)
+        self.assertEqual(limit.capacity, 10)
+        self.assertEqual(RateLimit(0.5).capacity, 1)
+
+
+class TestRateLimiter(unittest.TestCase):
+    """RateLimiter的测试用例。"""
+
+    def test_fail_fast(self):
+        """测试不等待时令牌用尽后抛出RateLimitExceeded。"""
+        limiter = RateLimiter({'a.com': RateLimit(1, burst=2)}, block=False)
+        limiter.acquire('http://a.com/')
+        limiter.acquire('http://a.com/')
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.acquire('http://a.com/')
+        self.assertGreater(ctx.exception.retry_after, 0.9)
+        self.assertEqual(limiter.stats()['a.com']['rejected'], 1)
+
+    def test_blocking(self):
+        """测试等待时按速率放行。"""
+        limiter = RateLimiter({'a.com': RateLimit(50, burst=1)})
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire('http://a.com/')
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(limiter.stats()['a.com']['allowed'], 6)
+
+    def test_max_wait(self):
+        """测试需要等待超过max_wait时抛出异常，单次调用可以覆盖block。"""
+        limiter = RateLimiter({'a.com': RateLimit(1, burst=1)}, max_wait=0.1)
+        limiter.acquire('http://a.com/')
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('http://a.com/')
+        limiter = RateLimiter({'a.com': RateLimit(20, burst=1)})
+        limiter.acquire('http://a.com/')
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('http://a.com/', block=False)
+
+    def test_async_does_not_block_loop(self):
+        """测试acquire_async等待令牌时事件循环可以运行其他协程。"""
+        limiter = RateLimiter({'a.com': RateLimit(20, burst=1)})
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def main():
+            task = asyncio.ensure_future(ticker())
+            for _ in range(3):
+                await limiter.acquire_async('http://a.com/')
+            await task
+
+        start = time.monotonic()
+        asyncio.run(main())
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(len(ticks), 5)
+
+
+class TestSharedFileBackend(unittest.TestCase):
+    """SharedFileBackend的测试用例。"""
+
+    def setUp(self):
+        """创建临时目录。"""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'quota')
+
+    def test_shared_between_instances(self):
+        """测试打开同一文件的后端共享桶，不同的键互不影响。"""
+        first, second = SharedFileBackend(self.path), SharedFileBackend(self.path)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        self.assertEqual(first.try_acquire('k', 0.001, 2), 0)
+        self.assertEqual(second.try_acquire('k', 0.001, 2), 0)
+        self.assertGreater(first.try_acquire('k', 0.001, 2), 0)
+        self.assertEqual(second.try_acquire('other', 0.001, 2), 0)
+        first.reset()
+        self.assertEqual(second.try_acquire('k', 0.001, 2), 0)
+
+    def test_shared_between_processes(self):
+        """测试多个进程共享同一份配额。"""
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [context.Process(target=_acquire_in_process, args=(self.path, 10, results))
+                     for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(sum(results.get() for _ in processes), 5)
+
+    def test_async_waits_for_file_lock_off_loop(self):
+        """测试其他进程持有文件锁时acquire_async不阻塞事件循环。"""
+        backend = SharedFileBackend(self.path)
+        self.addCleanup(backend.close)
+        limiter = RateLimiter({'a.com': RateLimit(100)}, backend=backend)
+        # 另一个打开的文件描述符上的flock与后端的互斥，相当于其他进程持有锁
+        holder = os.open(self.path, os.O_RDWR)
+        self.addCleanup(os.close, holder)
+        fcntl.flock(holder, fcntl.LOCK_EX)
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+            fcntl.flock(holder, fcntl.LOCK_UN)
+
+        async def main():
+            task = asyncio.ensure_future(ticker())
+            await limiter.acquire_async('http://a.com/')
+            await task
+
+        asyncio.run(asyncio.wait_for(main(), 5))
+        self.assertEqual(len(ticks), 5)
+
+
+class TestClientRateLimit(unittest.TestCase):
+    """HTTPClient和AsyncHTTPClient限流的测试用例。"""
+
+    def setUp(self):
+        """启动服务器。"""
+        _Handler.count = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def test_http_client(self):
+        """测试超出配额的请求不会发送到服务器。"""
+        limiter = RateLimiter({'127.0.0.1': RateLimit(0.01, burst=2)}, block=False)
+        client = HTTPClient(base_url=self.url, rate_limiter=limiter)
+        self.addCleanup(client.close)
+        client.get('/')
+        client.get('/')
+        with self.assertRaises(RateLimitExceeded):
+            client.get('/')
+        self.assertEqual(_Handler.count, 2)
+
+    def test_async_client(self):
+        """测试异步客户端按速率等待令牌。"""
+        limiter = RateLimiter({'127.0.0.1': RateLimit(20, burst=1)})
+
+        async def main():
+            client = AsyncHTTPClient(base_url=self.url, rate_limiter=limiter)
+            try:
+                await asyncio.gather(*(client.get('/') for _ in range(3)))
+            finally:
+                await client.close()
+
+        start = time.monotonic()
+        asyncio.run(main())
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+        self.assertEqual(_Handler.count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
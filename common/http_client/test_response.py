@@ -0,0 +1,93 @@
+"""
+Response类的单元测试。
+"""
+
+import sys
+import os
+import unittest
+from unittest.mock import Mock
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import Response
+from http_client.response import parse_content_type
+from http_client.streaming import StreamingBody
+
+
+class TestResponse(unittest.TestCase):
+    """Response类的测试用例。"""
+
+    def test_parse_content_type(self):
+        """测试Content-Type解析。"""
+        self.assertEqual(parse_content_type('Application/JSON; charset="GBK"'),
+                         ('application/json', 'GBK'))
+        self.assertEqual(parse_content_type('text/plain'), ('text/plain', None))
+        self.assertEqual(parse_content_type(None), ('', None))
+
+    def test_lazy_cached_json(self):
+        """测试JSON在首次访问时才解码，且只解码一次。"""
+        loads = Mock(return_value={"a": 1})
+        response = Response(200, {'Content-Type': 'application/json'}, b'{"a": 1}', loads)
+        loads.assert_not_called()
+        self.assertEqual(response.body, b'{"a": 1}')
+        self.assertEqual(response.json(), {"a": 1})
+        self.assertEqual(response['content'], {"a": 1})
+        loads.assert_called_once_with(b'{"a": 1}')
+
+    def test_charset_decoding(self):
+        """测试按Content-Type中的charset解码文本和JSON。"""
+        body = '{"名称": "测试"}'.encode('gbk')
+        response = Response(200, {'content-type': 'application/json; charset=gbk'}, body)
+        self.assertEqual(response.text, '{"名称": "测试"}')
+        self.assertEqual(response.json(), {"名称": "测试"})
+
+    def test_binary_content_not_decoded(self):
+        """测试二进制响应保持原始字节。"""
+        body = bytes(range(256))
+        response = Response(200, {'Content-Type': 'image/png'}, body)
+        self.assertIs(response['content'], body)
+
+    def test_text_content(self):
+        """测试文本类型即使内容是JSON也返回字符串。"""
+        response = Response(200, {'Content-Type': 'text/plain'}, b'{"a": 1}')
+        self.assertEqual(response['content'], '{"a": 1}')
+
+    def test_invalid_json_falls_back_to_text(self):
+        """测试声明为JSON但内容非法时回退为文本。"""
+        response = Response(500, {'Content-Type': 'application/json'}, b'Internal Error')
+        self.assertEqual(response['content'], 'Internal Error')
+        with self.assertRaises(ValueError):
+            response.json()
+
+    def test_no_content_type(self):
+        """测试未声明Content-Type时依次尝试JSON、文本和字节。"""
+        self.assertEqual(Response(200, {}, b'[1, 2]')['content'], [1, 2])
+        self.assertEqual(Response(200, {}, b'hello')['content'], 'hello')
+        self.assertEqual(Response(200, {}, b'\xff\xfe')['content'], b'\xff\xfe')
+
+    def test_mapping_access(self):
+        """测试兼容字典访问。"""
+        response = Response(201, {'X-Test': '1'}, b'')
+        self.assertEqual(response['status_code'], 201)
+        self.assertEqual(response['headers'], {'X-Test': '1'})
+        self.assertEqual(set(dict(response)), {'status_code', 'headers', 'content'})
+        self.assertIn('headers', response)
+        with self.assertRaises(KeyError):
+            response['missing']
+
+    def test_streaming_body(self):
+        """测试流式响应的content为StreamingBody，访问body时读取全部数据。"""
+        raw = Mock()
+        raw.read.return_value = b'{"a": 1}'
+        raw.isclosed.return_value = True
+        release = Mock()
+        stream = StreamingBody(raw, release)
+        response = Response(200, {'Content-Type': 'application/json'}, stream)
+        self.assertIs(response['content'], stream)
+        self.assertEqual(response.json(), {"a": 1})
+        release.assert_called_once_with(True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,319 @@
+"""
+重试策略的单元测试。
+"""
+
+import sys
+import os
+import asyncio
+import json
+import socket
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import AsyncHTTPClient, HTTPClient, HTTPException, RetryBudget, RetryPolicy
+from http_client.response import Response
+from http_client.retry import parse_retry_after, request_not_sent
+
+
+# 测试中使用的主机键
+KEY = ('http', 'example.com', None)
+
+# 无法连接的地址（端口1通常没有服务监听）
+REFUSED_URL = "http://127.0.0.1:1/"
+
+
+def _response(status, headers=None):
+    """构造一个响应。"""
+    return Response(status, headers or {}, b'')
+
+
+def _wrapped(cause):
+    """构造一个由底层异常引起的HTTPException，与客户端的包装方式一致。"""
+    try:
+        raise HTTPException("请求失败") from cause
+    except HTTPException as e:
+        return e
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """RetryPolicy的测试用例。"""
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.policy = RetryPolicy(budget=None)
+
+    def test_full_jitter_bounds(self):
+        """测试退避时间在[0, min(backoff_max, base * 2^attempt)]内随机分布。"""
+        policy = RetryPolicy(backoff_base=1, backoff_max=5, budget=None)
+        for attempt, cap in ((0, 1), (1, 2), (2, 4), (3, 5), (10, 5)):
+            delays = [policy.backoff(attempt) for _ in range(200)]
+            self.assertTrue(all(0 <= d <= cap for d in delays))
+            # 抖动后的等待时间不会全部相同
+            self.assertGreater(len(set(delays)), 1)
+
+    def test_idempotent_errors_retried(self):
+        """测试幂等方法出错时重试，非幂等方法不重试。"""
+        error = _wrapped(ConnectionResetError())
+        self.assertIsNotNone(self.policy.retry_delay('GET', 0, KEY, error=error))
+        self.assertIsNotNone(self.policy.retry_delay('PUT', 0, KEY, error=error))
+        self.assertIsNone(self.policy.retry_delay('POST', 0, KEY, error=error))
+
+    def test_post_retried_when_not_sent(self):
+        """测试请求确定没有发出时非幂等方法也会重试。"""
+        self.assertIsNotNone(self.policy.retry_delay('POST', 0, KEY,
+                                                     error=_wrapped(ConnectionRefusedError())))
+        self.assertIsNotNone(self.policy.retry_delay('POST', 0, KEY,
+                                                     error=_wrapped(socket.gaierror())))
+        self.assertTrue(request_not_sent(_wrapped(ConnectionRefusedError())))
+        self.assertFalse(request_not_sent(HTTPException("请求失败")))
+
+    def test_status_retry(self):
+        """测试只有可重试的状态码会重试，且只对幂等方法重试。"""
+        self.assertIsNotNone(self.policy.retry_delay('GET', 0, KEY, response=_response(503)))
+        self.assertIsNone(self.policy.retry_delay('GET', 0, KEY, response=_response(500)))
+        self.assertIsNone(self.policy.retry_delay('GET', 0, KEY, response=_response(404)))
+        self.assertIsNone(self.policy.retry_delay('GET', 0, KEY, response=_response(200)))
+        self.assertIsNone(self.policy.retry_delay('POST', 0, KEY, response=_response(503)))
+
+    def test_retry_after(self):
+        """测试遵守Retry-After头部，超过上限时不再重试。"""
+        policy = RetryPolicy(max_retry_after=10, budget=None)
+        self.assertEqual(policy.retry_delay('GET', 0, KEY,
+                                            response=_response(429, {'Retry-After': '3'})), 3)
+        self.assertIsNone(policy.retry_delay('GET', 0, KEY,
+                                             response=_response(429, {'retry-after': '120'})))
+        policy.respect_retry_after = False
+        self.assertLessEqual(policy.retry_delay('GET', 0, KEY,
+                                                response=_response(429, {'Retry-After': '3'})),
+                             policy.backoff_base)
+
+    def test_parse_retry_after(self):
+        """测试解析秒数和HTTP日期形式的Retry-After。"""
+        now = 1_700_000_000
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertAlmostEqual(parse_retry_after(formatdate(now + 30, usegmt=True), now), 30)
+        self.assertEqual(parse_retry_after(formatdate(now - 30, usegmt=True), now), 0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestRetryBudget(unittest.TestCase):
+    """RetryBudget的测试用例。"""
+
+    @patch('http_client.retry.time.monotonic', return_value=1000.0)
+    def test_budget_limits_retries(self, monotonic):
+        """测试令牌用尽后不再重试，请求和时间会补充令牌。"""
+        budget = RetryBudget(ratio=0.5, min_per_second=1, capacity=2)
+        policy = RetryPolicy(budget=budget)
+        error = _wrapped(ConnectionResetError())
+        self.assertIsNotNone(policy.retry_delay('GET', 0, KEY, error=error))
+        self.assertIsNotNone(policy.retry_delay('GET', 0, KEY, error=error))
+        self.assertIsNone(policy.retry_delay('GET', 0, KEY, error=error))
+
+        # 两个请求存入一个令牌
+        policy.record_request(KEY)
+        policy.record_request(KEY)
+        self.assertIsNotNone(policy.retry_delay('GET', 0, KEY, error=error))
+        self.assertIsNone(policy.retry_delay('GET', 0, KEY, error=error))
+
+        # 每秒补充一个令牌，不超过容量
+        monotonic.return_value = 1100.0
+        self.assertEqual(budget.available(KEY), 2)
+
+    def test_budget_per_host(self):
+        """测试每个主机的预算相互独立。"""
+        budget = RetryBudget(ratio=0, min_per_second=0, capacity=1)
+        self.assertTrue(budget.withdraw('a'))
+        self.assertFalse(budget.withdraw('a'))
+        self.assertTrue(budget.withdraw('b'))
+
+    def test_invalid_budget(self):
+        """测试无效的预算参数。"""
+        with self.assertRaises(ValueError):
+            RetryBudget(ratio=-1)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """前几次请求返回503的处理器，失败次数由路径中的数字指定。"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def _reply(self):
+        """/fail/<n>/...的前n次请求返回503和Retry-After: 0，之后返回200。"""
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+        parts = self.path.split('/')
+        failures = int(parts[2]) if len(parts) > 2 and parts[1] == 'fail' else 0
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        status = 503 if hits <= failures else 200
+        payload = json.dumps({'hits': hits}).encode()
+        self.send_response(status)
+        if status == 503:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _reply
+    do_POST = _reply
+
+
+def _start_server():
+    """启动本地服务器。"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.hits = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestHTTPClientRetry(unittest.TestCase):
+    """HTTPClient重试的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动本地服务器。"""
+        cls.server, cls.url = _start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭本地服务器。"""
+        cls.server.shutdown()
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.client = HTTPClient(base_url=self.url, max_retries=3)
+
+    def tearDown(self):
+        """清理测试夹具。"""
+        self.client.close()
+
+    def test_status_retried_until_success(self):
+        """测试503响应按Retry-After重试直到成功。"""
+        response = self.client.get('/fail/2/a')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'hits': 3})
+
+    def test_last_response_returned_when_exhausted(self):
+        """测试重试次数用尽后返回最后一次的响应。"""
+        self.client.max_retries = 1
+        response = self.client.get('/fail/5/b')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.hits['/fail/5/b'], 2)
+
+    def test_post_not_retried_on_status(self):
+        """测试POST收到503时不重试。"""
+        response = self.client.post('/fail/1/c', data='x')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.hits['/fail/1/c'], 1)
+
+    def test_stream_response_retried(self):
+        """测试流式请求收到503时关闭响应体后重试。"""
+        response = self.client.get('/fail/1/d', stream=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.stream.read()), {'hits': 2})
+
+    def test_jittered_sleep_on_errors(self):
+        """测试出错时以抖动的退避时间等待，而不是固定的2^attempt秒。"""
+        client = HTTPClient(max_retries=3, retry_policy=RetryPolicy(backoff_base=0.01, budget=None))
+        try:
+            with patch('http_client.time.sleep') as sleep:
+                with self.assertRaises(HTTPException):
+                    client.get(REFUSED_URL)
+            self.assertEqual(sleep.call_count, 3)
+            for attempt, call in enumerate(sleep.call_args_list):
+                self.assertLessEqual(call.args[0], 0.01 * 2 ** attempt)
+        finally:
+            client.close()
+
+    def test_budget_shared_between_clients(self):
+        """测试共享同一个策略的客户端共享重试预算。"""
+        policy = RetryPolicy(backoff_base=0, budget=RetryBudget(ratio=0, min_per_second=0,
+                                                                capacity=2))
+        clients = [HTTPClient(max_retries=5, retry_policy=policy) for _ in range(2)]
+        try:
+            mock = Mock(side_effect=HTTPException("请求失败"))
+            for client in clients:
+                client._make_request = mock
+                with self.assertRaises(HTTPException):
+                    client.get("http://example.com/")
+            # 两个客户端一共只重试了预算允许的2次
+            self.assertEqual(mock.call_count, 4)
+        finally:
+            for client in clients:
+                client.close()
+
+
+class TestAsyncHTTPClientRetry(unittest.IsolatedAsyncioTestCase):
+    """AsyncHTTPClient重试的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动本地服务器。"""
+        cls.server, cls.url = _start_server()
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭本地服务器。"""
+        cls.server.shutdown()
+
+    async def asyncSetUp(self):
+        """设置测试夹具。"""
+        self.client = AsyncHTTPClient(base_url=self.url, max_retries=3, timeout=5)
+
+    async def asyncTearDown(self):
+        """清理测试夹具。"""
+        await self.client.close()
+
+    async def test_status_retried_until_success(self):
+        """测试503响应重试直到成功，POST不重试。"""
+        response = await self.client.get('/fail/2/a')
+        self.assertEqual(response.json(), {'hits': 3})
+        response = await self.client.post('/fail/1/b', data='x')
+        self.assertEqual(response.status_code, 503)
+
+    async def test_retry_does_not_block_loop(self):
+        """测试退避等待期间事件循环可以处理其他协程。"""
+        client = AsyncHTTPClient(max_retries=1, retry_policy=RetryPolicy(
+            backoff_base=0.2, budget=None))
+        client.retry_policy.backoff = lambda attempt: 0.2
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            start = time.monotonic()
+            with self.assertRaises(HTTPException):
+                await client.get(REFUSED_URL)
+            self.assertGreaterEqual(time.monotonic() - start, 0.2)
+            self.assertGreater(ticks, 5)
+        finally:
+            task.cancel()
+            await client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+共享维护调度器的单元测试。
+"""
+
+import sys
+import os
+import gc
+import threading
+import time
+import unittest
+import weakref
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient, MaintenanceScheduler, default_scheduler
+
+# 测试任务的执行间隔（秒）
+INTERVAL = 0.02
+
+
+class _Target:
+    """记录被调用次数的对象。"""
+
+    def __init__(self):
+        self.calls = 0
+        self.called = threading.Event()
+
+    def tick(self):
+        self.calls += 1
+        self.called.set()
+
+
+class TestMaintenanceScheduler(unittest.TestCase):
+    """MaintenanceScheduler的测试用例。"""
+
+    def setUp(self):
+        """创建独立的调度器。"""
+        self.scheduler = MaintenanceScheduler(name='test-maintenance')
+
+    def test_periodic_and_cancel(self):
+        """测试任务按间隔重复执行，取消后不再执行。"""
+        target = _Target()
+        task = self.scheduler.schedule(target.tick, INTERVAL)
+        time.sleep(INTERVAL * 10)
+        task.cancel()
+        calls = target.calls
+        self.assertGreaterEqual(calls, 3)
+        time.sleep(INTERVAL * 5)
+        self.assertLessEqual(target.calls, calls + 1)
+        self.assertEqual(self.scheduler.stats()['tasks'], 0)
+
+    def test_deadline_order(self):
+        """测试任务按到期时间执行，与注册顺序无关。"""
+        order = []
+        late = self.scheduler.schedule(lambda: order.append('late'), 10, delay=INTERVAL * 4)
+        early = self.scheduler.schedule(lambda: order.append('early'), 10, delay=INTERVAL)
+        time.sleep(INTERVAL * 8)
+        late.cancel()
+        early.cancel()
+        self.assertEqual(order, ['early', 'late'])
+
+    def test_collected_target_removed(self):
+        """测试绑定对象被回收后任务自动移除，调度器不阻止回收。"""
+        target = _Target()
+        ref = weakref.ref(target)
+        self.scheduler.schedule(target.tick, INTERVAL)
+        self.assertTrue(target.called.wait(1))
+        del target
+        gc.collect()
+        self.assertIsNone(ref())
+        time.sleep(INTERVAL * 5)
+        self.assertEqual(self.scheduler.stats()['tasks'], 0)
+
+    def test_error_does_not_stop_scheduler(self):
+        """测试任务抛出异常后调度器继续执行其他任务。"""
+        target = _Target()
+        failing = self.scheduler.schedule(lambda: 1 / 0, INTERVAL, delay=0)
+        self.scheduler.schedule(target.tick, INTERVAL, delay=INTERVAL * 2)
+        self.assertTrue(target.called.wait(1))
+        failing.cancel()
+
+    def test_cancelled_tasks_compacted(self):
+        """测试大量取消的任务不会留在堆中。"""
+        tasks = [self.scheduler.schedule(_Target().tick, 3600) for _ in range(200)]
+        for task in tasks:
+            task.cancel()
+        self.assertLess(self.scheduler.stats()['queued'], 200)
+
+    def test_invalid_interval(self):
+        """测试执行间隔必须是正数。"""
+        with self.assertRaises(ValueError):
+            self.scheduler.schedule(lambda: None, 0)
+
+    @unittest.skipUnless(hasattr(os, 'register_at_fork'), '需要os.register_at_fork')
+    def test_fork_drops_inherited_tasks(self):
+        """测试fork后的子进程不执行父进程的任务，新注册的任务正常执行。"""
+        scheduler = default_scheduler()
+        inherited = _Target()
+        task = scheduler.schedule(inherited.tick, INTERVAL)
+        self.addCleanup(task.cancel)
+        self.assertTrue(inherited.called.wait(1))
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                inherited.calls = 0
+                stats = scheduler.stats()
+                task.cancel()
+                ok = task.cancelled and stats['tasks'] == stats['queued'] == 0
+                target = _Target()
+                scheduler.schedule(target.tick, INTERVAL)
+                ok = (ok and target.called.wait(1) and inherited.calls == 0
+                      and scheduler.stats()['tasks'] == 1)
+                os.write(write_fd, b'1' if ok else b'0')
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        result = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        self.assertEqual(result, b'1')
+        self.assertFalse(task.cancelled)
+
+
+class TestHTTPClientMaintenance(unittest.TestCase):
+    """HTTPClient使用共享调度器的测试用例。"""
+
+    def test_clients_share_one_thread(self):
+        """测试多个客户端不额外创建线程，关闭后任务取消。"""
+        threads = threading.active_count()
+        tasks = default_scheduler().stats()['tasks']
+        clients = [HTTPClient() for _ in range(50)]
+        self.assertLessEqual(threading.active_count(), threads + 1)
+        self.assertEqual(default_scheduler().stats()['tasks'], tasks + 50)
+        for client in clients:
+            client.close()
+        self.assertEqual(default_scheduler().stats()['tasks'], tasks)
+
+    def test_abandoned_client_collected(self):
+        """测试未关闭的客户端可以被回收，回收时任务取消。"""
+        tasks = default_scheduler().stats()['tasks']
+        client = HTTPClient()
+        ref = weakref.ref(client)
+        del client
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(default_scheduler().stats()['tasks'], tasks)
+
+    def test_run_maintenance(self):
+        """测试维护任务清理过期的Cookie。"""
+        client = HTTPClient()
+        self.addCleanup(client.close)
+        client.set_cookie('example.com', '/', 'old', 'v', expires=time.time() - 1)
+        self.assertEqual(len(client.cookie_jar), 1)
+        client._run_maintenance()
+        self.assertEqual(len(client.cookie_jar), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
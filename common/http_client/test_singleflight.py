@@ -0,0 +1,162 @@
+"""
+请求合并（single-flight）的单元测试。
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient, SingleFlight
+
+# 服务器处理每个请求的延迟（秒），保证并发请求在执行期间到达
+DELAY = 0.2
+
+# 并发请求的线程数
+THREADS = 20
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """延迟DELAY后返回请求路径的处理器，记录收到的请求。"""
+
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def _respond(self):
+        """记录请求并返回路径。"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self.requests.append((self.command, self.path))
+        time.sleep(DELAY)
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body) + 2))
+        self.end_headers()
+        self.wfile.write(b'"' + body + b'"')
+
+    do_GET = do_POST = do_PUT = _respond
+
+
+class TestSingleFlight(unittest.TestCase):
+    """SingleFlight的测试用例。"""
+
+    def test_concurrent_calls_share_result(self):
+        """测试同时进行的调用只执行一次并共享结果。"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            release.wait()
+            return object()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('k', fn)))
+                   for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        time.sleep(DELAY / 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(value) for value, _ in results}), 1)
+        self.assertEqual(sum(leader for _, leader in results), 1)
+        self.assertEqual(flight.stats(), {'executed': 1, 'shared': THREADS - 1, 'in_flight': 0})
+        # 调用结束后不再合并
+        flight.do('k', fn)
+        self.assertEqual(len(calls), 2)
+
+    def test_error_shared(self):
+        """测试执行者的异常传给所有等待者。"""
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait()
+            raise ValueError("上游失败")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do('k', fn)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(DELAY / 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(flight.stats()['executed'], 1)
+
+
+class TestHTTPClientSingleFlight(unittest.TestCase):
+    """HTTPClient合并请求的测试用例。"""
+
+    def setUp(self):
+        """启动服务器和客户端。"""
+        _Handler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = HTTPClient(base_url=f"http://127.0.0.1:{self.server.server_address[1]}",
+                                 max_connections=THREADS, single_flight=True)
+        self.addCleanup(self.client.close)
+
+    def _concurrently(self, calls):
+        """同时执行calls中的函数，返回结果列表。"""
+        results = [None] * len(calls)
+
+        def run(i):
+            results[i] = calls[i]()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(len(calls))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_gets_coalesced(self):
+        """测试同时进行的相同GET请求只访问一次上游，每个调用者得到独立的响应对象。"""
+        responses = self._concurrently([lambda: self.client.get('/hot')] * THREADS)
+        self.assertEqual(_Handler.requests, [('GET', '/hot')])
+        self.assertTrue(all(r.json() == '/hot' for r in responses))
+        self.assertEqual(len({id(r) for r in responses}), THREADS)
+        self.assertEqual(self.client.single_flight.stats()['shared'], THREADS - 1)
+
+    def test_different_requests_not_coalesced(self):
+        """测试URL或头部不同的请求、非幂等请求和不可重放的请求体不合并。"""
+        self._concurrently([
+            lambda: self.client.get('/a'),
+            lambda: self.client.get('/a', headers={'X-Tenant': '1'}),
+            lambda: self.client.get('/b'),
+            lambda: self.client.post('/a', data=b'x'),
+            lambda: self.client.post('/a', data=b'x'),
+            lambda: self.client.put('/a', data={'k': 'v'}),
+            lambda: self.client.put('/a', data={'k': 'v'}),
+        ])
+        self.assertEqual(len(_Handler.requests), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
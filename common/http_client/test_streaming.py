@@ -0,0 +1,153 @@
+"""
+流式响应和分块上传的单元测试。
+"""
+
+import sys
+import os
+import io
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient
+from http_client.streaming import StreamingBody
+
+
+BODY_SIZE = 1024 * 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回大响应体并回显上传信息的请求处理器。"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def setup(self):
+        """记录连接数。"""
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        """返回BODY_SIZE字节的响应体。"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(BODY_SIZE))
+        self.end_headers()
+        block = b'x' * 65536
+        for _ in range(BODY_SIZE // len(block)):
+            self.wfile.write(block)
+
+    def do_POST(self):
+        """读取请求体（支持分块编码）并回显其长度。"""
+        chunked = self.headers.get('Transfer-Encoding') == 'chunked'
+        if chunked:
+            size = 0
+            while True:
+                chunk_size = int(self.rfile.readline().strip(), 16)
+                if chunk_size == 0:
+                    self.rfile.readline()
+                    break
+                size += len(self.rfile.read(chunk_size))
+                self.rfile.readline()
+        else:
+            size = len(self.rfile.read(int(self.headers.get('Content-Length') or 0)))
+        payload = json.dumps({'chunked': chunked, 'size': size}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestStreaming(unittest.TestCase):
+    """流式响应和分块上传的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """启动本地服务器。"""
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.server.connections = 0
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        """停止本地服务器。"""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        """设置测试夹具。"""
+        self.client = HTTPClient(base_url=self.base_url, max_retries=0)
+        self.server.connections = 0
+
+    def tearDown(self):
+        """清理测试夹具。"""
+        self.client.close()
+
+    def _pool_stats(self):
+        """返回当前主机的连接池状态。"""
+        return next(iter(self.client._pool.stats().values()))
+
+    def test_stream_iter_chunks(self):
+        """测试按块迭代响应体，读完后连接归还到连接池。"""
+        response = self.client.get("/big", stream=True)
+        body = response['content']
+        self.assertIsInstance(body, StreamingBody)
+        # 读完之前连接仍被占用
+        self.assertEqual(self._pool_stats(), {'idle': 0, 'total': 1})
+
+        sizes = [len(chunk) for chunk in body.iter_chunks(100000)]
+        self.assertEqual(sum(sizes), BODY_SIZE)
+        self.assertLessEqual(max(sizes), 100000)
+        self.assertTrue(body.consumed)
+        self.assertEqual(self._pool_stats(), {'idle': 1, 'total': 1})
+
+        # 再次请求复用同一个连接
+        self.client.get("/big")
+        self.assertEqual(self.server.connections, 1)
+
+    def test_stream_write_to(self):
+        """测试将响应体写入文件类对象。"""
+        sink = io.BytesIO()
+        with self.client.get("/big", stream=True)['content'] as body:
+            written = body.write_to(sink)
+        self.assertEqual(written, BODY_SIZE)
+        self.assertEqual(len(sink.getvalue()), BODY_SIZE)
+
+    def test_stream_closed_early_discards_connection(self):
+        """测试未读完就关闭的响应会丢弃连接。"""
+        body = self.client.get("/big", stream=True)['content']
+        body.read(1024)
+        body.close()
+        self.assertEqual(self._pool_stats(), {'idle': 0, 'total': 0})
+        self.assertEqual(body.read(), b'')
+
+    def test_chunked_upload_from_iterable(self):
+        """测试可迭代对象形式的请求体以分块编码发送。"""
+        chunks = (b'a' * 1000 for _ in range(100))
+        response = self.client.post("/upload", data=chunks)
+        self.assertEqual(response['content'], {'chunked': True, 'size': 100000})
+
+    def test_chunked_upload_from_file(self):
+        """测试文件类对象形式的请求体以分块编码发送。"""
+        response = self.client.post("/upload", data=io.BytesIO(b'b' * 50000))
+        self.assertEqual(response['content'], {'chunked': True, 'size': 50000})
+
+    def test_bytes_upload(self):
+        """测试字节串请求体带Content-Length发送。"""
+        response = self.client.post("/upload", data=b'c' * 10)
+        self.assertEqual(response['content'], {'chunked': False, 'size': 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+共享SSL上下文和TLS会话复用的单元测试（需要openssl命令生成自签名证书）。
+"""
+
+import sys
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 将父目录添加到路径中，以便我们可以导入http_client
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from http_client import HTTPClient
+from http_client.tls import TLSSessionCache
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """返回固定内容的处理器。"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        """关闭访问日志。"""
+        pass
+
+    def do_GET(self):
+        """处理GET请求。"""
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+
+class TestTLSSessionCacheStats(unittest.TestCase):
+    """TLSSessionCache统计的测试用例。"""
+
+    def test_saved_time(self):
+        """测试节省的握手时间按平均耗时之差估算。"""
+        cache = TLSSessionCache()
+        self.assertEqual(cache.stats()['saved_ms'], 0)
+        cache.record(False, 0.010)
+        cache.record(False, 0.010)
+        for _ in range(3):
+            cache.record(True, 0.002)
+        stats = cache.stats()
+        self.assertEqual((stats['full_handshakes'], stats['resumed_handshakes']), (2, 3))
+        self.assertAlmostEqual(stats['full_avg_ms'], 10)
+        self.assertAlmostEqual(stats['resumed_avg_ms'], 2)
+        self.assertAlmostEqual(stats['saved_ms'], 24)
+        cache.clear()
+        self.assertEqual(cache.stats()['resumed_handshakes'], 0)
+
+
+@unittest.skipIf(shutil.which('openssl') is None, "需要openssl命令生成证书")
+class TestTLSClient(unittest.TestCase):
+    """HTTPClient通过TLS连接的测试用例。"""
+
+    @classmethod
+    def setUpClass(cls):
+        """生成自签名证书并启动TLS服务器。"""
+        cls.directory = tempfile.mkdtemp()
+        cls.certfile = os.path.join(cls.directory, 'cert.pem')
+        keyfile = os.path.join(cls.directory, 'key.pem')
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'ec',
+                        '-pkeyopt', 'ec_paramgen_curve:prime256v1', '-nodes', '-days', '1',
+                        '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+                        '-keyout', keyfile, '-out', cls.certfile],
+                       check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cls.certfile, keyfile)
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.server.daemon_threads = True
+        cls.server.socket = context.wrap_socket(cls.server.socket, server_side=True)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"https://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        """关闭服务器并删除证书。"""
+        cls.server.shutdown()
+        cls.server.server_close()
+        shutil.rmtree(cls.directory)
+
+    def _client(self, **kwargs) -> HTTPClient:
+        """创建信任自签名证书的客户端。"""
+        context = ssl.create_default_context(cafile=self.certfile)
+        client = HTTPClient(base_url=self.url, ssl_context=context, **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_shared_context(self):
+        """测试所有连接共享客户端的SSL上下文。"""
+        client = self._client()
+        context = client.ssl_context
+        client.gather(['/a'] * 4, concurrency=4, per_host=4)
+        connections = [conn for host in client._pool._hosts.values() for conn in host.idle]
+        self.assertGreater(len(connections), 0)
+        for conn in connections:
+            self.assertIs(conn.conn._context, context)
+
+    def test_handshake_timing_event(self):
+        """测试新连接的request事件带有TLS握手耗时。"""
+        client = self._client()
+        events = []
+        client.add_hook('request', events.append)
+        client.get('/a')
+        client.get('/a')
+        self.assertGreater(events[0].tls, 0)
+        self.assertIsNone(events[1].tls)
+
+    def test_default_context_created_lazily(self):
+        """测试没有https请求时不创建默认的SSL上下文。"""
+        client = HTTPClient()
+        self.addCleanup(client.close)
+        self.assertIsNone(client._ssl_context)
+        self.assertIs(client.ssl_context, client.ssl_context)
+
+    def test_session_resumed_after_reconnect(self):
+        """测试连接被回收后重新连接时恢复TLS会话。"""
+        client = self._client()
+        self.assertEqual(client.get('/').status_code, 200)
+        for _ in range(3):
+            # 模拟连接超过存活时间被回收
+            client._pool.close_all()
+            self.assertEqual(client.get('/').status_code, 200)
+        stats = client.tls_stats()
+        self.assertEqual((stats['full_handshakes'], stats['resumed_handshakes']), (1, 3))
+        self.assertGreaterEqual(stats['saved_ms'], 0)
+
+    def test_http2_falls_back_to_http1(self):
+        """测试服务器不支持h2时回退到HTTP/1.1，并复用探测时的TLS会话。"""
+        try:
+            client = self._client(http2=True)
+        except ImportError:
+            self.skipTest("需要安装h2")
+        self.assertEqual(client.get('/').status_code, 200)
+        self.assertEqual(client.get('/').status_code, 200)
+        stats = client.tls_stats()
+        self.assertEqual(stats['full_handshakes'] + stats['resumed_handshakes'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,301 @@
+"""
+TLS会话复用模块。
+
+创建默认的SSL上下文需要加载系统CA证书，每次耗时数十毫秒，客户端的所有https连接
+因此共享同一个SSLContext。TLSSessionCache按主机保存最近一次握手得到的会话
+（TLS 1.3为会话票据），重新建立连接（例如连接超过connection_ttl被回收）时用它恢复会话，
+省去证书链的传输和校验；TLS 1.2时还能省去一次往返。缓存同时统计完整握手和恢复握手的耗时，
+估算节省的握手时间。
+"""
+
+import ssl
+import threading
+import time
+from http.client import HTTPConnection, HTTPSConnection
+from typing import Any, Dict, Hashable, List, Optional
+
+
+# HTTP/1.1连接的ALPN协议
+HTTP1_ALPN = ['http/1.1']
+
+# TLSChannel每次从套接字或TLS层读取的字节数
+READ_SIZE = 64 * 1024
+
+
+def create_ssl_context(alpn: Optional[List[str]] = None) -> ssl.SSLContext:
+    """
+    创建与http.client默认行为一致的客户端SSL上下文。
+
+    Args:
+        alpn: ALPN协议列表。默认为['http/1.1']。
+
+    Returns:
+        SSL上下文。
+    """
+    context = ssl.create_default_context()
+    context.set_alpn_protocols(alpn or HTTP1_ALPN)
+    if context.post_handshake_auth is not None:
+        context.post_handshake_auth = True
+    return context
+
+
+class TLSSessionCache:
+    """
+    线程安全的TLS会话缓存，按主机键保存可恢复的会话并统计握手耗时。
+
+    会话只能在创建它的SSLContext上恢复，因此一个缓存只应配合一个上下文使用。
+    服务器拒绝恢复会话时自动进行完整握手，之后保存新的会话。
+    """
+
+    def __init__(self):
+        """初始化缓存。"""
+        self._sessions: Dict[Hashable, ssl.SSLSession] = {}
+        self._lock = threading.Lock()
+        self._full = 0
+        self._full_seconds = 0.0
+        self._resumed = 0
+        self._resumed_seconds = 0.0
+
+    def get(self, key: Hashable) -> Optional[ssl.SSLSession]:
+        """
+        获取主机的会话。
+
+        Args:
+            key: 主机键。
+
+        Returns:
+            会话，没有时为None。
+        """
+        return self._sessions.get(key)
+
+    def save(self, key: Hashable, sock: Any):
+        """
+        保存连接当前的会话。TLS 1.3的会话票据在握手之后才到达，
+        应在连接上读取过响应之后调用。
+
+        Args:
+            key: 主机键。
+            sock: 已完成握手的SSLSocket或TLSChannel。
+        """
+        try:
+            session = sock.session
+        except (OSError, ValueError):
+            return
+        if session is not None and (session.has_ticket or session.id):
+            with self._lock:
+                self._sessions[key] = session
+
+    def wrap_socket(self, context: ssl.SSLContext, sock, server_hostname: str,
+                    key: Hashable) -> ssl.SSLSocket:
+        """
+        在套接字上完成TLS握手，有缓存的会话时尝试恢复，并记录握手耗时。
+
+        Args:
+            context: SSL上下文。
+            sock: 已连接的套接字。
+            server_hostname: 服务器主机名，用于SNI和证书校验。
+            key: 主机键。
+
+        Returns:
+            已完成握手的TLS套接字。
+        """
+        start = time.perf_counter()
+        tls_sock = context.wrap_socket(sock, server_hostname=server_hostname,
+                                       session=self._sessions.get(key))
+        self.record(tls_sock.session_reused, time.perf_counter() - start)
+        return tls_sock
+
+    def record(self, resumed: bool, seconds: float):
+        """
+        记录一次握手的耗时。
+
+        Args:
+            resumed: 是否恢复了会话。
+            seconds: 握手耗时（秒）。
+        """
+        with self._lock:
+            if resumed:
+                self._resumed += 1
+                self._resumed_seconds += seconds
+            else:
+                self._full += 1
+                self._full_seconds += seconds
+
+    def stats(self) -> dict:
+        """
+        握手统计。
+
+        Returns:
+            字典，包含full_handshakes、resumed_handshakes、full_avg_ms、resumed_avg_ms，
+            以及saved_ms：恢复握手的次数乘以完整握手与恢复握手的平均耗时之差，
+            即复用会话估计节省的握手时间（毫秒）。
+        """
+        with self._lock:
+            full_avg = self._full_seconds / self._full if self._full else 0.0
+            resumed_avg = self._resumed_seconds / self._resumed if self._resumed else 0.0
+            saved = self._resumed * (full_avg - resumed_avg) if self._full else 0.0
+            return {
+                'full_handshakes': self._full,
+                'resumed_handshakes': self._resumed,
+                'full_avg_ms': round(full_avg * 1000, 3),
+                'resumed_avg_ms': round(resumed_avg * 1000, 3),
+                'saved_ms': round(max(saved, 0.0) * 1000, 3),
+            }
+
+    def clear(self):
+        """清空会话和统计。"""
+        with self._lock:
+            self._sessions.clear()
+            self._full = self._resumed = 0
+            self._full_seconds = self._resumed_seconds = 0.0
+
+
+class TLSChannel:
+    """
+    在原始套接字上通过内存BIO运行的TLS连接。
+
+    SSLSocket不能同时在一个线程中读、在另一个线程中写。TLSChannel只负责加密和解密，
+    套接字读写由调用者完成，调用者用自己的锁串行化所有TLS操作，
+    读取线程就可以在不持有锁的情况下阻塞在原始套接字上。
+    """
+
+    def __init__(self, sock, context: ssl.SSLContext, server_hostname: str,
+                 session: Optional[ssl.SSLSession] = None):
+        """
+        初始化TLS连接，不会立即握手。
+
+        Args:
+            sock: 已连接的原始套接字。
+            context: SSL上下文。
+            server_hostname: 服务器主机名，用于SNI和证书校验。
+            session: 要恢复的会话。可选。
+        """
+        self._sock = sock
+        self._incoming = ssl.MemoryBIO()
+        self._outgoing = ssl.MemoryBIO()
+        self._tls = context.wrap_bio(self._incoming, self._outgoing,
+                                     server_hostname=server_hostname, session=session)
+
+    def handshake(self):
+        """
+        在套接字上完成握手（阻塞，受套接字超时限制）。
+
+        Raises:
+            ssl.SSLError: 如果握手失败。
+            ConnectionResetError: 如果握手期间连接被关闭。
+        """
+        while True:
+            try:
+                self._tls.do_handshake()
+                break
+            except ssl.SSLWantReadError:
+                self._sock.sendall(self._outgoing.read())
+                data = self._sock.recv(READ_SIZE)
+                if not data:
+                    raise ConnectionResetError("TLS握手期间连接被关闭")
+                self._incoming.write(data)
+        self._sock.sendall(self._outgoing.read())
+
+    def encrypt(self, data: bytes) -> bytes:
+        """
+        加密要发送的数据。
+
+        Args:
+            data: 明文。
+
+        Returns:
+            要写入套接字的密文。
+        """
+        if data:
+            self._tls.write(data)
+        return self._outgoing.read()
+
+    def decrypt(self, data: bytes) -> bytes:
+        """
+        解密从套接字读取的数据。
+
+        Args:
+            data: 密文，可以是不完整的TLS记录。
+
+        Returns:
+            已解密的明文，可能为空（记录不完整或只包含会话票据等握手消息）。
+
+        Raises:
+            ConnectionResetError: 如果对端发送了close_notify。
+        """
+        self._incoming.write(data)
+        parts = []
+        while True:
+            try:
+                chunk = self._tls.read(READ_SIZE)
+            except ssl.SSLWantReadError:
+                break
+            except ssl.SSLZeroReturnError:
+                raise ConnectionResetError("对端关闭了TLS连接")
+            if not chunk:
+                break
+            parts.append(chunk)
+        return b''.join(parts)
+
+    def pending_output(self) -> bytes:
+        """
+        获取解密过程中TLS层自己产生的待发送数据（例如密钥更新的应答）。
+
+        Returns:
+            要写入套接字的密文。
+        """
+        return self._outgoing.read()
+
+    @property
+    def session(self) -> Optional[ssl.SSLSession]:
+        """当前的TLS会话。"""
+        return self._tls.session
+
+    @property
+    def session_reused(self) -> bool:
+        """握手是否恢复了会话。"""
+        return self._tls.session_reused
+
+    def selected_alpn_protocol(self) -> Optional[str]:
+        """
+        ALPN协商选择的协议。
+
+        Returns:
+            协议名，没有协商时为None。
+        """
+        return self._tls.selected_alpn_protocol()
+
+
+class ResumableHTTPSConnection(HTTPSConnection):
+    """
+    使用共享SSL上下文并通过TLSSessionCache恢复会话的HTTPSConnection。
+    """
+
+    def __init__(self, host: str, port: int, timeout: float, context: ssl.SSLContext,
+                 sessions: TLSSessionCache, key: Hashable):
+        """
+        初始化连接，不会立即建立连接。
+
+        Args:
+            host: 主机名。
+            port: 端口。
+            timeout: 超时时间（秒）。
+            context: 共享的SSL上下文。
+            sessions: 会话缓存。
+            key: 主机键，用于查找和保存会话。
+        """
+        super().__init__(host, port, timeout=timeout, context=context)
+        self._sessions = sessions
+        self._session_key = key
+        # 插桩时由客户端设置为字典，握手后写入'tls'耗时（秒）
+        self.timings: Optional[Dict[str, float]] = None
+
+    def connect(self):
+        """建立TCP连接并完成TLS握手，有缓存的会话时尝试恢复。"""
+        HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        start = time.perf_counter()
+        self.sock = self._sessions.wrap_socket(self._context, self.sock, server_hostname,
+                                               self._session_key)
+        if self.timings is not None:
+            self.timings['tls'] = time.perf_counter() - start
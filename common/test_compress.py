@@ -0,0 +1,167 @@
+"""
+compress模块的单元测试。
+"""
+
+import sys
+import os
+import io
+import shutil
+import socket
+import tarfile
+import tempfile
+import threading
+import unittest
+import zipfile
+import zlib
+from pathlib import Path
+
+# 将当前目录添加到路径中，以便我们可以导入compress
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import compress
+from compress import compress_path_advanced, iter_archive, write_archive
+
+
+class _WriteOnly:
+    """只有write()的输出，不能tell()和seek()。"""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+
+    def getvalue(self) -> bytes:
+        return b''.join(self.parts)
+
+
+class _SourceTreeTestCase(unittest.TestCase):
+    """在临时目录中准备源目录的测试基类。"""
+
+    def setUp(self):
+        """创建包含多块大文件、空文件和非ASCII文件名的目录。"""
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.source = self.directory / 'src'
+        (self.source / 'sub').mkdir(parents=True)
+        self.output = self.directory / 'out'
+        self.output.mkdir()
+        line = b'the quick brown fox jumps over the lazy dog\n'
+        self.files = {
+            'src/large.txt': line * (compress.BLOCK_SIZE * 3 // len(line) + 7),
+            'src/exact.bin': os.urandom(compress.BLOCK_SIZE),
+            'src/empty': b'',
+            'src/sub/文件.txt': '内容'.encode('utf-8'),
+        }
+        for name, data in self.files.items():
+            (self.directory / name).write_bytes(data)
+
+
+class TestParallelCompress(_SourceTreeTestCase):
+    """并行压缩的测试用例。"""
+
+    def test_zip(self):
+        """测试并行压缩的zip可以被校验和解压，压缩率与串行相近。"""
+        serial = compress_path_advanced(self.source, self.output, 'serial', 'zip')
+        parallel = compress_path_advanced(self.source, self.output, 'parallel', 'zip', workers=4)
+        with zipfile.ZipFile(parallel) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual({name: zipf.read(name) for name in zipf.namelist()}, self.files)
+        self.assertLess(os.path.getsize(parallel), os.path.getsize(serial) * 1.01)
+
+    def test_single_file_zip(self):
+        """测试压缩单个文件。"""
+        path = compress_path_advanced(self.source / 'large.txt', self.output, format_type='zip',
+                                      workers=2)
+        with zipfile.ZipFile(path) as zipf:
+            self.assertEqual(zipf.read('large.txt'), self.files['src/large.txt'])
+
+    def test_tar_gz_is_single_gzip_member(self):
+        """测试并行压缩的tar.gz是一个gzip流，内容与源文件一致。"""
+        path = compress_path_advanced(self.source, self.output, format_type='tar.gz', workers=4)
+        with open(path, 'rb') as f:
+            data = f.read()
+        # 只有一个gzip成员：一次解压就到达流的末尾，没有剩余数据
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        tar_data = decompressor.decompress(data)
+        self.assertTrue(decompressor.eof)
+        self.assertEqual(decompressor.unused_data, b'')
+        self.assertEqual(len(tar_data) % tarfile.RECORDSIZE, 0)
+        with tarfile.open(path) as tar:
+            for name, content in self.files.items():
+                self.assertEqual(tar.extractfile(name).read(), content)
+
+    def test_tar_bz2(self):
+        """测试并行压缩的tar.bz2（多个bzip2流）可以被tarfile解压。"""
+        path = compress_path_advanced(self.source, self.output, format_type='tar.bz2', workers=3)
+        with tarfile.open(path) as tar:
+            for name, content in self.files.items():
+                self.assertEqual(tar.extractfile(name).read(), content)
+
+
+class TestStreamingArchive(_SourceTreeTestCase):
+    """流式写入压缩包的测试用例。"""
+
+    def _check_zip(self, data: bytes):
+        """检查zip可以被校验和解压，内容与源文件一致。"""
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual({name: zipf.read(name) for name in zipf.namelist()}, self.files)
+
+    def _check_tar(self, data: bytes):
+        """检查tar包含目录和文件，内容与源文件一致。"""
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            self.assertTrue(tar.getmember('src/sub').isdir())
+            for name, content in self.files.items():
+                self.assertEqual(tar.extractfile(name).read(), content)
+
+    def test_write_only_sink(self):
+        """测试各种格式都可以写入不能定位的输出，返回写入的字节数。"""
+        for format_type in ('zip', 'tar', 'tar.gz', 'tar.bz2'):
+            for workers in (1, 3):
+                with self.subTest(format_type=format_type, workers=workers):
+                    sink = _WriteOnly()
+                    written = write_archive(self.source, sink, format_type, workers)
+                    data = sink.getvalue()
+                    self.assertEqual(written, len(data))
+                    if format_type == 'zip':
+                        self._check_zip(data)
+                    else:
+                        self._check_tar(data)
+
+    def test_socket(self):
+        """测试直接写入套接字。"""
+        left, right = socket.socketpair()
+        self.addCleanup(left.close)
+        self.addCleanup(right.close)
+        received = []
+        reader = threading.Thread(target=lambda: received.append(
+            b''.join(iter(lambda: right.recv(65536), b''))))
+        reader.start()
+        write_archive(self.source, left, 'zip')
+        left.shutdown(socket.SHUT_WR)
+        reader.join()
+        self._check_zip(received[0])
+
+    def test_iter_archive(self):
+        """测试生成器按固定大小产生数据块，拼接后是完整的压缩包。"""
+        chunks = list(iter_archive(self.source, 'tar.gz', workers=2, chunk_size=64 * 1024))
+        self.assertTrue(all(len(chunk) == 64 * 1024 for chunk in chunks[:-1]))
+        self._check_tar(b''.join(chunks))
+
+    def test_iter_archive_close_stops_thread(self):
+        """测试提前关闭生成器时后台线程结束。"""
+        before = threading.active_count()
+        chunks = iter_archive(self.source, 'zip', chunk_size=1024)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(threading.active_count(), before)
+
+    def test_iter_archive_error(self):
+        """测试压缩过程中的异常在迭代时抛出。"""
+        with self.assertRaises(FileNotFoundError):
+            list(iter_archive(self.directory / 'missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()